@@ -8,7 +8,7 @@ from pydantic import BaseModel, Field
 
 from app.models.ab_test import ABTest, ExperimentStatus
 from app.models.ml_model import MLModel
-from app.services.ab_testing import ABTestingService
+from app.services.ab_testing import ABTestingService, experiment_cache
 from app.auth.nextauth_auth import get_current_user_id
 
 
@@ -188,9 +188,12 @@ async def start_experiment(
     if not experiment.is_valid_configuration():
         raise HTTPException(status_code=400, detail="Invalid experiment configuration")
     
-    experiment.status = ExperimentStatus.RUNNING
-    experiment.started_at = datetime.utcnow()
-    await experiment.save()
+    # Set only the status fields; variant counters are updated by $inc flushes
+    await experiment.set({
+        "status": ExperimentStatus.RUNNING,
+        "started_at": datetime.utcnow()
+    })
+    experiment_cache.invalidate(experiment_id)
     
     return {"message": "Experiment started successfully"}
 
@@ -213,8 +216,8 @@ async def pause_experiment(
     if experiment.status != ExperimentStatus.RUNNING:
         raise HTTPException(status_code=400, detail="Only running experiments can be paused")
     
-    experiment.status = ExperimentStatus.PAUSED
-    await experiment.save()
+    await experiment.set({"status": ExperimentStatus.PAUSED})
+    experiment_cache.invalidate(experiment_id)
     
     return {"message": "Experiment paused successfully"}
 
@@ -254,10 +257,7 @@ async def assign_variant(
 ):
     """Get variant assignment for a user"""
     
-    experiment = await ABTest.find_one({
-        "experiment_id": experiment_id,
-        "status": ExperimentStatus.RUNNING
-    })
+    experiment = await ABTestingService.get_running_experiment(experiment_id)
     
     if not experiment:
         raise HTTPException(status_code=404, detail="Active experiment not found")
@@ -3,7 +3,7 @@ API routes for data processing functionality
 """
 
 from typing import Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Path
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field, ConfigDict
 import numpy as np
@@ -13,6 +13,7 @@ from app.auth.nextauth_auth import get_current_user_id
 from app.models.user_data import UserData
 from app.services.data_processing.data_processor import DataProcessor
 from app.services.s3_service import s3_service
+from app.services.visualization_cache import precompute_visualizations
 from app.utils.json_encoder import convert_numpy_types, NumpyJSONEncoder
 
 
@@ -20,6 +21,15 @@ router = APIRouter()
 data_processor = DataProcessor()
 
 
+async def _precompute_visualizations(dataset_id: str, dataframe) -> None:
+    """Precompute visualizations after the response; a failure here only
+    means they are computed lazily on first request"""
+    try:
+        await precompute_visualizations(dataset_id, dataframe)
+    except Exception as e:
+        print(f"Error precomputing visualizations: {e}")
+
+
 class ProcessingRequest(BaseModel):
     """Request model for data processing"""
     file_id: str = Field(..., description="ID of the uploaded file to process")
@@ -50,6 +60,7 @@ class ProcessingResponse(BaseModel):
 @router.post("/process", response_model=ProcessingResponse)
 async def process_uploaded_file(
     request: ProcessingRequest,
+    background_tasks: BackgroundTasks,
     current_user_id: str = Depends(get_current_user_id)
 ):
     """
@@ -130,6 +141,11 @@ async def process_uploaded_file(
             print(f"Error saving user_data: {e}")
             raise
         
+        # Precompute visualizations from the parsed frame once the response is sent
+        background_tasks.add_task(
+            _precompute_visualizations, str(user_data.id), processed_data.dataframe
+        )
+        
         # Return processing results
         # Convert all numpy types to Python types before returning
         response_data = {
@@ -7,6 +7,7 @@ Implements Story 12.1: API Integration for New Models (Dataset portion).
 
 from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File
 from typing import Optional
+import asyncio
 import logging
 import uuid
 import hashlib
@@ -113,7 +114,8 @@ async def upload_dataset(
 
         # Upload to S3
         file_path = f"datasets/{current_user_id}/{dataset_id}_{file.filename}"
-        success, s3_url = upload_file_to_s3(
+        success, s3_url = await asyncio.to_thread(
+            upload_file_to_s3,
             file_content=file_content,
             s3_filename=file_path,
             content_type=file.content_type or 'application/octet-stream'
@@ -18,8 +18,11 @@ from app.services.model_storage import ModelStorageService
 from app.services.model_training import (
     AutoMLEngine,
     FeatureEngineeringConfig,
-    ProblemType
+    ProblemType,
+    matrix_input,
+    prepare_model_input
 )
+from app.services.drift_detection import build_feature_profile
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -157,6 +160,7 @@ async def train_model_task(
             "feature_names": result.feature_names,
             "n_samples_train": len(df),
             "feature_importance": result.feature_importance,
+            "feature_profile": build_feature_profile(df.drop(columns=[request.target_column])),
             "metrics": {
                 "cv_score": result.best_model.cv_score,
                 "test_score": result.best_model.test_score,
@@ -258,21 +262,24 @@ async def predict(
         MLModel.user_id == current_user_id
     )
     
-    # Convert input data to DataFrame
-    input_df = pd.DataFrame(request.data)
-    
-    # Apply feature engineering if available
-    if feature_engineer:
-        input_df = await feature_engineer.transform(input_df)
-    
-    # Make predictions
-    predictions = model.predict(input_df)
+    # Build model input (compiled feature pipeline when available); without a
+    # feature engineer, columns are put in training order
+    try:
+        input_df = await prepare_model_input(
+            model, request.data, feature_engineer, ml_model.feature_names if ml_model else None
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing features: {e}")
     
-    # Get probabilities if requested and available
-    probabilities = None
-    if request.include_probabilities and hasattr(model, 'predict_proba'):
-        prob_array = model.predict_proba(input_df)
-        probabilities = prob_array.tolist()
+    with matrix_input():
+        # Make predictions
+        predictions = model.predict(input_df)
+        
+        # Get probabilities if requested and available
+        probabilities = None
+        if request.include_probabilities and hasattr(model, 'predict_proba'):
+            prob_array = model.predict_proba(input_df)
+            probabilities = prob_array.tolist()
     
     # Convert predictions to list
     if isinstance(predictions, np.ndarray):
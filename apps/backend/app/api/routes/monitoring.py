@@ -10,6 +10,7 @@ from app.models.ml_model import MLModel
 from app.models.api_key import APIKey
 from app.auth.nextauth_auth import get_current_user_id
 from app.services.prediction_monitoring import PredictionMonitoringService
+from app.services.api_key_service import api_key_usage
 from beanie import PydanticObjectId
 
 
@@ -22,6 +23,7 @@ class ModelMetricsResponse(BaseModel):
     model_name: str
     total_predictions: int
     avg_latency_ms: float
+    p95_latency_ms: float = 0
     predictions_per_hour: float
     avg_confidence: float
     error_rate: float
@@ -43,6 +45,9 @@ class DriftDetectionResponse(BaseModel):
     drift_detected: bool
     drift_score: float
     features_with_drift: List[str]
+    feature_scores: Dict[str, Dict[str, float]] = Field(default_factory=dict)
+    live_samples: int = 0
+    window_end: Optional[datetime] = None
     recommendation: str
     checked_at: datetime
 
@@ -169,8 +174,11 @@ async def get_usage_overview(
     total_models = len(models)
     active_models = sum(1 for m in models if m.is_active)
     
-    # Get API keys
-    api_keys = await APIKey.find({"user_id": current_user_id}).to_list()
+    # Get API keys, including usage that has not been flushed yet
+    api_keys = [
+        api_key_usage.with_pending(key)
+        for key in await APIKey.find({"user_id": current_user_id}).to_list()
+    ]
     total_api_keys = len(api_keys)
     active_api_keys = sum(1 for k in api_keys if k.is_active)
     
@@ -210,8 +218,11 @@ async def get_api_key_usage(
 ):
     """Get usage statistics for all API keys"""
     
-    # Get all user's API keys
-    api_keys = await APIKey.find({"user_id": current_user_id}).to_list()
+    # Get all user's API keys, including usage that has not been flushed yet
+    api_keys = [
+        api_key_usage.with_pending(key)
+        for key in await APIKey.find({"user_id": current_user_id}).to_list()
+    ]
     
     usage_stats = []
     
@@ -3,28 +3,28 @@ Production model serving API routes
 """
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, Response
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 import hashlib
-import redis
+import time
 from beanie import PydanticObjectId
 
 from app.models.api_key import APIKey
 from app.models.ml_model import MLModel
 from app.models.user_data import UserData
 from app.services.model_storage import ModelStorageService
+from app.services.api_key_service import api_key_cache, api_key_usage, lookup_api_key
+from app.services.rate_limiter import RateLimitResult, rate_limiter
+from app.services.inference_batcher import inference_batchers
+from app.services.model_training import matrix_input, prepare_model_input
+from app.services.prediction_monitoring import prediction_log
+from app.services.drift_detection import drift_monitor
 from app.auth.nextauth_auth import get_current_user_id
-from app.config import settings
 router = APIRouter(prefix="/production", tags=["production"])
 
-# Initialize Redis for rate limiting
-redis_client = None  # Redis is optional for development
-try:
-    if hasattr(settings, 'REDIS_URL') and settings.REDIS_URL:
-        redis_client = redis.from_url(settings.REDIS_URL)
-except:
-    pass
+# API key rate limits are per hour
+RATE_LIMIT_WINDOW_SECONDS = 3600
 
 
 # Request/Response Models
@@ -84,9 +84,9 @@ async def verify_api_key(api_key: str = Header(..., alias="X-API-Key")) -> APIKe
     if not api_key or not api_key.startswith("sk_live_"):
         raise HTTPException(status_code=401, detail="Invalid API key format")
     
-    # Hash the key and look it up
+    # Hash the key and look it up (served from cache after the first request)
     key_hash = hash_api_key(api_key)
-    api_key_doc = await APIKey.find_one({"key_hash": key_hash})
+    api_key_doc = await lookup_api_key(key_hash)
     
     if not api_key_doc:
         raise HTTPException(status_code=401, detail="Invalid API key")
@@ -94,39 +94,35 @@ async def verify_api_key(api_key: str = Header(..., alias="X-API-Key")) -> APIKe
     if not api_key_doc.is_valid():
         raise HTTPException(status_code=401, detail="API key expired or inactive")
     
-    # Update last used timestamp
-    api_key_doc.last_used_at = datetime.utcnow()
-    api_key_doc.total_requests += 1
-    await api_key_doc.save()
+    # Usage is buffered and flushed in bulk, keeping writes off the request path
+    api_key_usage.record(api_key_doc.key_id)
     
     return api_key_doc
 
 
-async def check_rate_limit(api_key: APIKey, request: Request) -> None:
-    """Check if the API key has exceeded its rate limit"""
-    if not redis_client:
-        return  # Skip rate limiting if Redis not configured
-    
-    # Create rate limit key
-    rate_key = f"rate_limit:{api_key.key_id}:{datetime.utcnow().hour}"
-    
-    # Increment counter
-    try:
-        current_count = redis_client.incr(rate_key)
-        
-        # Set expiration on first request of the hour
-        if current_count == 1:
-            redis_client.expire(rate_key, 3600)  # 1 hour
-        
-        # Check limit
-        if current_count > api_key.rate_limit:
-            raise HTTPException(
-                status_code=429,
-                detail=f"Rate limit exceeded. Limit: {api_key.rate_limit}/hour"
-            )
-    except redis.RedisError:
-        # Don't block requests if Redis is down
-        pass
+async def check_rate_limit(
+    api_key: APIKey,
+    request: Request,
+    response: Optional[Response] = None
+) -> RateLimitResult:
+    """Check if the API key has exceeded its rate limit and set X-RateLimit-* headers"""
+    result = await rate_limiter.acquire(
+        f"rate_limit:{api_key.key_id}",
+        api_key.rate_limit,
+        RATE_LIMIT_WINDOW_SECONDS
+    )
+
+    if not result.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded. Limit: {api_key.rate_limit}/hour",
+            headers=result.headers()
+        )
+
+    if response is not None:
+        response.headers.update(result.headers())
+
+    return result
 
 
 # API Routes
@@ -179,8 +175,11 @@ async def list_api_keys(
     """List all API keys for the current user"""
     api_keys = await APIKey.find({"user_id": current_user_id}).to_list()
     
-    return [
-        APIKeyListResponse(
+    responses = []
+    for key in api_keys:
+        # Include usage that has not been flushed yet
+        key = api_key_usage.with_pending(key)
+        responses.append(APIKeyListResponse(
             key_id=key.key_id,
             name=key.name,
             description=key.description,
@@ -190,9 +189,9 @@ async def list_api_keys(
             total_requests=key.total_requests,
             rate_limit=key.rate_limit,
             is_active=key.is_active
-        )
-        for key in api_keys
-    ]
+        ))
+
+    return responses
 
 
 @router.delete("/api-keys/{key_id}")
@@ -211,6 +210,7 @@ async def revoke_api_key(
     
     api_key.is_active = False
     await api_key.save()
+    api_key_cache.invalidate(key_id)
     
     return {"message": "API key revoked successfully"}
 
@@ -220,12 +220,13 @@ async def production_predict(
     model_id: str,
     request: ProductionPredictRequest,
     req: Request,
+    response: Response,
     api_key: APIKey = Depends(verify_api_key)
 ):
     """Make predictions using a deployed model (Production API)"""
     
     # Check rate limit
-    await check_rate_limit(api_key, req)
+    await check_rate_limit(api_key, req, response)
     
     # Verify model access
     if not api_key.has_model_access(model_id):
@@ -243,32 +244,50 @@ async def production_predict(
     
     # Load the model
     storage_service = ModelStorageService()
+    batcher_key = f"{model.model_id}:{model.version}"
+    # Create prediction ID for tracking
+    prediction_id = f"pred_{PydanticObjectId()}"
+    started = time.perf_counter()
     
     try:
-        model_artifacts = await storage_service.load_model(model.model_path)
-        trained_model = model_artifacts["model"]
-        feature_engineer = model_artifacts.get("feature_engineer")
+        want_probabilities = (
+            request.include_probabilities and model.problem_type.endswith("classification")
+        )
         
-        # Transform input data if feature engineer exists
-        import pandas as pd
-        df = pd.DataFrame(request.data)
+        batcher = inference_batchers.get(batcher_key) if inference_batchers.enabled else None
+        if batcher is None:
+            trained_model, feature_engineer = await storage_service.load_model(
+                model.model_id, api_key.user_id
+            )
+            
+            if inference_batchers.enabled:
+                batcher = inference_batchers.register(
+                    batcher_key,
+                    model.model_id,
+                    trained_model,
+                    feature_engineer,
+                    model.feature_names
+                )
         
-        if feature_engineer:
-            X_transformed = feature_engineer.transform(df)
+        if batcher is not None:
+            # Share one vectorized transform/predict with concurrent requests
+            predictions, probabilities = await batcher.predict(request.data, want_probabilities)
+            if probabilities is not None:
+                probabilities = probabilities.tolist()
         else:
-            X_transformed = df[model.feature_names]
-        
-        # Make predictions
-        predictions = trained_model.predict(X_transformed)
-        
-        # Get probabilities for classification
-        probabilities = None
-        if request.include_probabilities and model.problem_type.endswith("classification"):
-            if hasattr(trained_model, "predict_proba"):
-                probabilities = trained_model.predict_proba(X_transformed).tolist()
-        
-        # Create prediction ID for tracking
-        prediction_id = f"pred_{PydanticObjectId()}"
+            # Compiled feature pipeline when available, DataFrame path otherwise
+            X_transformed = await prepare_model_input(
+                trained_model, request.data, feature_engineer, model.feature_names
+            )
+            
+            with matrix_input():
+                # Make predictions
+                predictions = trained_model.predict(X_transformed)
+                
+                # Get probabilities for classification
+                probabilities = None
+                if want_probabilities and hasattr(trained_model, "predict_proba"):
+                    probabilities = trained_model.predict_proba(X_transformed).tolist()
         
         # Prepare metadata if requested
         metadata = None
@@ -281,11 +300,22 @@ async def production_predict(
                 "training_date": model.created_at.isoformat()
             }
         
-        # Log prediction (async, don't wait)
-        # In production, this would go to a logging service
+        # Buffered telemetry: rollups and batched time-series writes, no I/O here
+        latency_ms = (time.perf_counter() - started) * 1000
+        prediction_values = predictions.tolist()
+        prediction_log.record_request(
+            model.model_id,
+            prediction_id,
+            request.data,
+            prediction_values,
+            probabilities=[max(p) for p in probabilities] if probabilities else None,
+            latency_ms=latency_ms,
+            api_key_id=api_key.key_id
+        )
+        drift_monitor.observe(model, request.data)
         
         return ProductionPredictResponse(
-            predictions=predictions.tolist(),
+            predictions=prediction_values,
             probabilities=probabilities,
             model_version=model.version,
             prediction_id=prediction_id,
@@ -294,6 +324,15 @@ async def production_predict(
         )
         
     except Exception as e:
+        prediction_log.record_request(
+            model.model_id,
+            prediction_id,
+            [],
+            [],
+            latency_ms=(time.perf_counter() - started) * 1000,
+            api_key_id=api_key.key_id,
+            error=True
+        )
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
@@ -3,9 +3,10 @@ Secure Upload API with PII detection and resumable uploads
 """
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, BinaryIO, Union
+from pathlib import Path
+import asyncio
 import pandas as pd
-import io
 from datetime import datetime
 
 from app.auth.nextauth_auth import get_current_user_id
@@ -14,6 +15,7 @@ from app.services.security.upload_handler import ChunkedUploadHandler, RateLimit
 from app.models.user_data import UserData, SchemaField
 from app.utils.schema_inference import infer_schema, generate_s3_filename
 from app.utils.s3 import upload_file_to_s3
+from app.services.data_processing.ingestion import get_ingestion_engine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,6 +26,21 @@ router = APIRouter()
 pii_detector = PIIDetector()
 upload_handler = ChunkedUploadHandler()
 rate_limiter = RateLimiter()
+ingestion_engine = get_ingestion_engine()
+
+
+async def load_dataframe(source: Union[BinaryIO, Path], filename: str) -> pd.DataFrame:
+    """Parse an uploaded file with the ingestion engine, off the event loop"""
+    if filename.endswith('.csv'):
+        file_type = 'csv'
+    elif filename.endswith(('.xlsx', '.xls')):
+        file_type = 'excel'
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported file format")
+    
+    if not isinstance(source, Path):
+        source.seek(0)
+    return await asyncio.to_thread(ingestion_engine.read, source, file_type)
 
 
 @router.post("/secure")
@@ -62,17 +79,12 @@ async def secure_upload(
                 detail=f"Unsupported file type: {file.content_type}"
             )
         
-        # Read file content
-        content = await file.read()
-        
-        # Load into DataFrame
+        # Parse straight from the spooled upload; the raw bytes are never
+        # held in memory alongside the DataFrame
         try:
-            if file.filename.endswith('.csv'):
-                df = pd.read_csv(io.BytesIO(content))
-            elif file.filename.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(io.BytesIO(content))
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported file format")
+            df = await load_dataframe(file.file, file.filename)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=400,
@@ -107,7 +119,10 @@ async def secure_upload(
         
         # Upload to S3
         logger.info(f"Uploading file {file.filename} to S3 as {s3_filename}")
-        success, s3_url = upload_file_to_s3(content, s3_filename, content_type=file.content_type)
+        file.file.seek(0)
+        success, s3_url = await asyncio.to_thread(
+            upload_file_to_s3, file.file, s3_filename, content_type=file.content_type
+        )
         
         if not success or not s3_url:
             logger.error(f"S3 upload failed for file {file.filename}")
@@ -170,12 +185,7 @@ async def confirm_pii_upload(
     """
     
     # Similar to secure_upload but skips PII blocking
-    content = await file.read()
-    
-    if file.filename.endswith('.csv'):
-        df = pd.read_csv(io.BytesIO(content))
-    elif file.filename.endswith(('.xlsx', '.xls')):
-        df = pd.read_excel(io.BytesIO(content))
+    df = await load_dataframe(file.file, file.filename)
     
     # Detect PII
     pii_detections = pii_detector.detect_pii_in_dataframe(df)
@@ -190,10 +200,15 @@ async def confirm_pii_upload(
         # Upload masked version
         processed_content = df_processed.to_csv(index=False).encode()
         masked_filename = f"masked_{s3_filename}"
-        success, s3_url = upload_file_to_s3(processed_content, masked_filename, content_type="text/csv")
+        success, s3_url = await asyncio.to_thread(
+            upload_file_to_s3, processed_content, masked_filename, content_type="text/csv"
+        )
     else:
         # Upload original
-        success, s3_url = upload_file_to_s3(content, s3_filename, content_type=file.content_type)
+        file.file.seek(0)
+        success, s3_url = await asyncio.to_thread(
+            upload_file_to_s3, file.file, s3_filename, content_type=file.content_type
+        )
         df_processed = df
     
     # Infer schema
@@ -271,7 +286,10 @@ async def upload_chunk(
     Upload a single chunk
     """
     
-    chunk_data = await file.read()
+    # Chunks are bounded by the session's chunk size
+    chunk_data = await file.read(upload_handler.chunk_size + 1)
+    if len(chunk_data) > upload_handler.chunk_size:
+        raise HTTPException(status_code=413, detail="Chunk larger than the session chunk size")
     result = await upload_handler.upload_chunk(session_id, chunk_number, chunk_data, chunk_hash)
     
     if result.get("complete"):
@@ -301,28 +319,39 @@ async def complete_chunked_upload(
     Complete chunked upload and process file
     """
     
-    temp_path = await upload_handler.complete_upload(session_id)
-    
-    # Process the complete file
-    with open(temp_path, 'rb') as f:
-        content = f.read()
-    
-    # Get session info to get original filename
-    session = upload_handler._get_session(session_id)
-    filename = session["filename"]
+    upload = await upload_handler.complete_upload(session_id)
+    filename = upload.filename
+    scan = upload.scan
     
-    # Load and process file (similar to secure_upload)
-    if filename.endswith('.csv'):
-        df = pd.read_csv(io.BytesIO(content))
-    elif filename.endswith(('.xlsx', '.xls')):
-        df = pd.read_excel(io.BytesIO(content))
-    
-    # Detect PII
-    pii_detections = pii_detector.detect_pii_in_dataframe(df)
-    pii_report = pii_detector.generate_pii_report(pii_detections)
-    
-    # Upload to S3
-    s3_url = upload_file_to_s3(content, filename, current_user_id)
+    try:
+        if scan is not None and scan.sample is not None and not scan.error:
+            # PII and the schema sample were gathered while chunks arrived
+            df = scan.sample
+            num_rows = scan.row_count
+            pii_detections = scan.pii_detections
+        else:
+            if upload.temp_path is not None:
+                df = await load_dataframe(upload.temp_path, filename)
+            else:
+                from app.utils.s3 import get_file_from_s3
+                content = await asyncio.to_thread(get_file_from_s3, upload.s3_url)
+                if content is None:
+                    raise HTTPException(status_code=500, detail="Failed to read uploaded file")
+                df = await load_dataframe(content, filename)
+            num_rows = len(df)
+            pii_detections = pii_detector.detect_pii_in_dataframe(df)
+        pii_report = pii_detector.generate_pii_report(pii_detections)
+        
+        s3_url = upload.s3_url
+        if s3_url is None:
+            # S3 was not configured for multipart; upload the assembled file
+            with open(upload.temp_path, 'rb') as f:
+                success, s3_url = await asyncio.to_thread(upload_file_to_s3, f, generate_s3_filename(filename))
+            if not success or not s3_url:
+                raise HTTPException(status_code=500, detail="Failed to upload file to S3")
+    finally:
+        if upload.temp_path is not None:
+            upload.temp_path.unlink(missing_ok=True)
     
     # Create UserData record
     schema = infer_schema(df)
@@ -330,7 +359,7 @@ async def complete_chunked_upload(
         user_id=current_user_id,
         filename=filename,
         s3_url=s3_url,
-        num_rows=len(df),
+        num_rows=num_rows,
         num_columns=len(df.columns),
         data_schema=schema
     )
@@ -342,9 +371,6 @@ async def complete_chunked_upload(
     
     await user_data.insert()
     
-    # Clean up temp file
-    temp_path.unlink()
-    
     # Background AI summary
     if pii_report["has_pii"]:
         masked_df = pii_detector.mask_pii(df, pii_detections)
@@ -383,5 +409,5 @@ async def generate_ai_summary_safe(user_data_id: str, df: pd.DataFrame):
 @router.get("/cleanup")
 async def cleanup_expired_sessions():
     """Admin endpoint to cleanup expired upload sessions"""
-    cleaned = upload_handler.cleanup_expired_sessions()
+    cleaned = await upload_handler.cleanup_expired_sessions()
     return {"cleaned_sessions": cleaned}
\ No newline at end of file
@@ -35,7 +35,11 @@ from app.services.transformation_service.transformation_engine import (
 )
 from app.services.transformation_service.validators import TransformationValidator
 from app.services.transformation_service.recipe_manager import RecipeManager
-from app.services.transformation_service.data_utils import get_dataframe_from_s3, upload_dataframe_to_s3
+from app.services.transformation_service.data_utils import (
+    get_dataframe_from_s3,
+    get_dataset_sample,
+    upload_dataframe_to_s3,
+)
 from app.services.redis_cache import cache_service
 
 router = APIRouter()
@@ -58,16 +62,16 @@ async def preview_transformation(
         if not user_data:
             raise HTTPException(status_code=404, detail="Dataset not found")
         
-        # Load data from S3
+        # Preview runs on a cached stratified sample, not the full dataset
         file_path = user_data.file_path or user_data.s3_url
-        df = await get_dataframe_from_s3(file_path)
+        sample = await get_dataset_sample(file_path)
         
         # Create transformation engine
         engine = TransformationEngine()
         
         # Preview transformation
         result = engine.preview_transformation(
-            df=df,
+            df=sample.dataframe,
             transformation_type=EngineTransformationType(request.transformation_type),
             parameters=request.parameters,
             n_rows=request.preview_rows
@@ -81,7 +85,10 @@ async def preview_transformation(
             stats_before=result.stats_before,
             stats_after=result.stats_after,
             error=result.error,
-            warnings=result.warnings
+            warnings=result.warnings,
+            is_estimate=sample.is_estimate,
+            sample_rows=sample.sample_rows,
+            total_rows=sample.total_rows
         )
         
     except Exception as e:
@@ -118,7 +125,7 @@ async def apply_transformation(
         engine = TransformationEngine()
         
         # Apply transformation
-        result = engine.apply_transformation(
+        transformed_df, result = engine.apply_transformation_frame(
             df=df,
             transformation_type=EngineTransformationType(request.transformation_type),
             parameters=request.parameters
@@ -134,7 +141,6 @@ async def apply_transformation(
             )
         
         # Save transformed data back to S3
-        transformed_df = pd.DataFrame(result.transformed_data)
         new_file_path = await upload_dataframe_to_s3(
             transformed_df,
             f"transformed/{current_user_id}/{request.dataset_id}_{datetime.utcnow().timestamp()}.parquet"
@@ -201,29 +207,26 @@ async def apply_transformation_pipeline(
         # Create transformation engine
         engine = TransformationEngine()
         
-        total_affected_rows = 0
-        all_affected_columns = set()
+        # Apply each transformation in sequence, handing DataFrames between steps
+        result = engine.apply_pipeline(
+            df,
+            [(EngineTransformationType(step.transformation_type), step.parameters) for step in request.transformations]
+        )
         
-        # Apply each transformation in sequence
-        for step in request.transformations:
-            result = engine.apply_transformation(
-                df=df,
-                transformation_type=EngineTransformationType(step.type),
-                parameters=step.parameters
+        if not result.success:
+            error = result.error
+            if result.failed_step is not None:
+                failed_step = request.transformations[result.failed_step]
+                error = f"Transformation '{failed_step.transformation_type}' failed: {result.error}"
+            return TransformationApplyResponse(
+                success=False,
+                dataset_id=request.dataset_id,
+                transformation_id="",
+                execution_time_ms=int((time.time() - start_time) * 1000),
+                error=error
             )
-            
-            if not result.success:
-                return TransformationApplyResponse(
-                    success=False,
-                    dataset_id=request.dataset_id,
-                    transformation_id="",
-                    execution_time_ms=int((time.time() - start_time) * 1000),
-                    error=f"Transformation '{step.type}' failed: {result.error}"
-                )
-            
-            df = pd.DataFrame(result.transformed_data)
-            total_affected_rows += result.affected_rows
-            all_affected_columns.update(result.affected_columns)
+        
+        df = result.dataframe
         
         # Save transformed data
         new_file_path = await upload_dataframe_to_s3(
@@ -241,9 +244,8 @@ async def apply_transformation_pipeline(
             recipe = await RecipeManager.create_recipe(
                 name=request.recipe_name,
                 steps=[{
-                    "type": step.type,
-                    "parameters": step.parameters,
-                    "description": step.description
+                    "type": step.transformation_type,
+                    "parameters": step.parameters
                 } for step in request.transformations],
                 user_id=current_user_id,
                 description=request.recipe_description,
@@ -257,8 +259,8 @@ async def apply_transformation_pipeline(
             success=True,
             dataset_id=request.dataset_id,
             transformation_id=f"pipeline_{datetime.utcnow().timestamp()}",
-            affected_rows=total_affected_rows,
-            affected_columns=list(all_affected_columns),
+            affected_rows=result.affected_rows,
+            affected_columns=result.affected_columns,
             execution_time_ms=execution_time_ms
         )
         
@@ -289,38 +291,33 @@ async def validate_transformations(
         if not user_data:
             raise HTTPException(status_code=404, detail="Dataset not found")
         
-        # Load data sample
+        # Validate against a cached stratified sample of the dataset
         file_path = user_data.file_path or user_data.s3_url
-        df = await get_dataframe_from_s3(file_path, nrows=1000)
+        sample = await get_dataset_sample(file_path)
+        df = sample.dataframe
         
-        # Validate each transformation
-        all_errors = []
-        all_warnings = []
-        all_info = []
-        
-        for step in request.transformations:
-            if step.type == "remove_duplicates":
-                result = TransformationValidator.validate_remove_duplicates(df, step.parameters)
-            elif step.type == "fill_missing":
-                result = TransformationValidator.validate_fill_missing(df, step.parameters)
-            elif step.type == "trim_whitespace":
-                result = TransformationValidator.validate_trim_whitespace(df, step.parameters)
-            else:
-                continue
-            
-            all_errors.extend(result.errors)
-            all_warnings.extend(result.warnings)
-            all_info.extend(result.info)
+        # Validate the whole chain, and suggest fixes, from one pass over the sample
+        result = TransformationValidator.validate_transformation_chain(
+            df,
+            [{"type": step.transformation_type, "parameters": step.parameters or {}}
+             for step in request.transformations],
+            suggest=True
+        )
         
-        # Get suggestions
-        suggestions = TransformationValidator.suggest_transformations(df)
+        if sample.is_estimate:
+            result.info.append(
+                f"Estimated from a sample of {sample.sample_rows} of {sample.total_rows} rows"
+            )
         
         return ValidationResponse(
-            is_valid=len(all_errors) == 0,
-            errors=all_errors,
-            warnings=all_warnings,
-            info=all_info,
-            suggestions=suggestions
+            is_valid=result.is_valid,
+            errors=result.errors,
+            warnings=result.warnings,
+            info=result.info,
+            suggestions=result.suggestions,
+            is_estimate=sample.is_estimate,
+            sample_rows=sample.sample_rows,
+            total_rows=sample.total_rows
         )
         
     except Exception as e:
@@ -9,6 +9,7 @@ from fastapi import (
 )
 from typing import List, Dict, Any
 import pandas as pd
+import asyncio
 import io
 import traceback
 import os
@@ -106,7 +107,7 @@ async def upload_file(
 
             # Upload to S3
             logger.info(f"Attempting to upload file to S3: {s3_filename}")
-            success, s3_url = upload_file_to_s3(content, s3_filename, file.content_type)
+            success, s3_url = await asyncio.to_thread(upload_file_to_s3, content, s3_filename, file.content_type)
 
             if not success:
                 logger.error("Failed to upload file to S3")
@@ -13,6 +13,7 @@ from app.schemas.version import (
     DatasetVersionResponse,
     DatasetVersionCreate,
     LineageResponse,
+    LineageBatchRequest,
     VersionComparisonRequest,
     VersionComparisonResponse,
     VersionListResponse,
@@ -22,6 +23,7 @@ from app.schemas.version import (
 from app.models.version import DatasetVersion, TransformationLineage
 from app.models.dataset import DatasetMetadata
 from app.services.versioning_service import versioning_service
+from app.services.version_retention import RetentionPolicy, retention_engine
 from app.auth.nextauth_auth import get_current_user_id
 
 logger = logging.getLogger(__name__)
@@ -240,6 +242,40 @@ async def get_version_lineage(
         )
 
 
+@router.post("/versions/lineage/batch", response_model=dict)
+async def get_versions_lineage(
+    batch_request: LineageBatchRequest,
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """
+    Get transformation lineage chains for many versions at once.
+
+    Used by list views; unknown version IDs are omitted from the result.
+    """
+    try:
+        chains = await versioning_service.get_lineage_chains(batch_request.version_ids)
+
+        return {
+            "lineages": {
+                version_id: {
+                    "lineage_chain": [
+                        LineageResponse.model_validate(lineage).model_dump()
+                        for lineage in chain
+                    ],
+                    "total_transformations": len(chain)
+                }
+                for version_id, chain in chains.items()
+            }
+        }
+
+    except Exception as e:
+        logger.error(f"Error retrieving lineage for {len(batch_request.version_ids)} versions: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving lineage: {str(e)}"
+        )
+
+
 @router.post("/versions/compare", response_model=VersionComparisonResponse)
 async def compare_versions(
     comparison_request: VersionComparisonRequest,
@@ -249,7 +285,9 @@ async def compare_versions(
     Compare two dataset versions.
 
     Returns detailed comparison including row/column differences,
-    schema changes, and transformation lineage path between versions.
+    schema changes, and transformation lineage path between versions,
+    plus added/removed/changed rows and changed cells per column matched
+    on the requested key columns (or row position).
     """
     try:
         logger.info(
@@ -260,7 +298,9 @@ async def compare_versions(
         # Perform comparison using service
         comparison = await versioning_service.compare_versions(
             version1_id=comparison_request.version1_id,
-            version2_id=comparison_request.version2_id
+            version2_id=comparison_request.version2_id,
+            key_columns=comparison_request.key_columns,
+            include_row_diff=comparison_request.include_row_diff
         )
 
         return VersionComparisonResponse.model_validate(comparison)
@@ -331,6 +371,7 @@ async def delete_version(
 
         # Delete version
         await version.delete()
+        versioning_service.lineage_cache.invalidate(version.dataset_id)
 
         logger.info(f"Deleted version {version_id}")
 
@@ -346,6 +387,37 @@ async def delete_version(
         )
 
 
+@router.post("/datasets/{dataset_id}/versions/cleanup", response_model=dict)
+async def cleanup_dataset_versions(
+    dataset_id: str,
+    retention_days: int = 30,
+    keep_count: int = 10,
+    dry_run: bool = True,
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """
+    Apply the retention policy to a dataset's versions.
+
+    Pinned, base, recent and training versions are kept. Defaults to a dry
+    run that only reports what would be deleted.
+    """
+    try:
+        logger.info(f"Cleaning up versions for dataset {dataset_id} (dry_run={dry_run})")
+
+        return await retention_engine.cleanup_dataset(
+            dataset_id,
+            RetentionPolicy(retention_days=retention_days, keep_count=keep_count),
+            dry_run=dry_run
+        )
+
+    except Exception as e:
+        logger.error(f"Error cleaning up versions for dataset {dataset_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error cleaning up versions: {str(e)}"
+        )
+
+
 @router.patch("/versions/{version_id}/pin", response_model=DatasetVersionResponse)
 async def pin_version(
     version_id: str,
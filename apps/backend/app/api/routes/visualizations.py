@@ -8,6 +8,7 @@ from app.services.visualization_cache import (
 from app.auth.nextauth_auth import get_current_user_id
 from app.models.user_data import UserData
 from app.utils.s3 import get_file_from_s3
+import asyncio
 import pandas as pd
 import json
 import numpy as np
@@ -82,7 +83,7 @@ async def get_scatter_plot(
             raise HTTPException(status_code=404, detail="Dataset not found")
         
         # Load data
-        df = pd.read_csv(get_file_from_s3(dataset.file_path))
+        df = pd.read_csv(await asyncio.to_thread(get_file_from_s3, dataset.file_path))
         
         # Apply filters if provided
         if filters:
@@ -145,7 +146,7 @@ async def get_line_chart(
             raise HTTPException(status_code=404, detail="Dataset not found")
         
         # Load data
-        df = pd.read_csv(get_file_from_s3(dataset.file_path))
+        df = pd.read_csv(await asyncio.to_thread(get_file_from_s3, dataset.file_path))
         
         # Apply filters if provided
         if filters:
@@ -212,7 +213,7 @@ async def get_time_series(
             raise HTTPException(status_code=404, detail="Dataset not found")
         
         # Load data
-        df = pd.read_csv(get_file_from_s3(dataset.file_path))
+        df = pd.read_csv(await asyncio.to_thread(get_file_from_s3, dataset.file_path))
         
         # Apply filters if provided
         if filters:
@@ -34,8 +34,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 
-from app.middleware.api_version import APIVersionMiddleware
-from app.middleware.metrics import MetricsMiddleware, get_metrics
+from app.middleware.instrumentation import InstrumentationMiddleware
+from app.middleware.metrics import get_metrics
 from prometheus_client import CONTENT_TYPE_LATEST
 from app.api.routes import (
     health,
@@ -73,6 +73,7 @@ from app.models.trained_model import TrainedModel
 from app.models.column_stats import ColumnStats
 from app.models.ml_model import MLModel
 from app.models.api_key import APIKey
+from app.models.prediction_event import PredictionEvent
 from app.models.ab_test import ABTest
 from app.models.batch_job import BatchJob
 from app.models.dataset import DatasetMetadata
@@ -80,6 +81,11 @@ from app.models.version import DatasetVersion, TransformationLineage
 from app.services.transformation_service.recipe_manager import TransformationRecipe, RecipeExecutionHistory
 from app.utils.ai_summary import initialize_openai_client
 from app.services.redis_cache import init_cache, cleanup_cache
+from app.services.api_key_service import init_api_key_usage, cleanup_api_key_usage
+from app.services.prediction_monitoring import init_prediction_log, cleanup_prediction_log
+from app.services.drift_detection import init_drift_monitor, cleanup_drift_monitor
+from app.services.ab_testing import init_ab_test_metrics, cleanup_ab_test_metrics
+from app.services.version_retention import init_version_retention, cleanup_version_retention
 
 
 @asynccontextmanager
@@ -97,6 +103,7 @@ async def lifespan(app: FastAPI):
                          ColumnStats,
                          MLModel,
                          APIKey,
+                         PredictionEvent,
                          ABTest,
                          BatchJob,
                          DatasetMetadata,
@@ -112,9 +119,29 @@ async def lifespan(app: FastAPI):
     # Initialize Redis cache
     await init_cache()
 
+    # Start buffered API key usage flushing
+    await init_api_key_usage()
+
+    # Start batched prediction event writes
+    await init_prediction_log()
+
+    # Start scheduled drift checks
+    await init_drift_monitor()
+
+    # Start buffered A/B test metric flushing
+    await init_ab_test_metrics()
+
+    # Start scheduled version retention sweeps
+    await init_version_retention()
+
     yield
 
-    # Cleanup
+    # Cleanup (flush usage while the DB connection is still open)
+    await cleanup_api_key_usage()
+    await cleanup_prediction_log()
+    await cleanup_drift_monitor()
+    await cleanup_ab_test_metrics()
+    await cleanup_version_retention()
     client.close()
     await cleanup_cache()
 
@@ -140,11 +167,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ Apply API versioning middleware
-app.add_middleware(APIVersionMiddleware)
-
-# ✅ Apply Prometheus metrics middleware
-app.add_middleware(MetricsMiddleware)
+# ✅ Apply API versioning, Prometheus metrics and monitoring in one ASGI layer
+app.add_middleware(InstrumentationMiddleware)
 
 # ✅ Include routers
 # Health check routes at root level (no version prefix)
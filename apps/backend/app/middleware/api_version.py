@@ -10,7 +10,7 @@ Provides middleware to:
 
 import logging
 import re
-from typing import Optional
+from typing import Dict, Optional
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -26,6 +26,54 @@ DEFAULT_VERSION = "v1"
 # Version header pattern: application/vnd.narrativeml.v1+json
 VERSION_PATTERN = re.compile(r"application/vnd\.narrativeml\.v(\d+)\+json")
 
+# Version path pattern: /api/v1/...
+PATH_VERSION_PATTERN = re.compile(r"/api/(v\d+)/")
+
+
+def resolve_api_version(path: str, accept_header: str) -> str:
+    """
+    Determine the API version for a request.
+
+    The URL path takes precedence over the Accept header, which takes
+    precedence over the default version.
+    """
+    match = PATH_VERSION_PATTERN.search(path)
+    if match:
+        return match.group(1)
+
+    match = VERSION_PATTERN.search(accept_header)
+    if match:
+        return f"v{match.group(1)}"
+
+    return DEFAULT_VERSION
+
+
+def version_headers(version: str) -> Dict[str, str]:
+    """Response headers announcing the served version and any deprecation."""
+    headers = {
+        "X-API-Version": version,
+        "X-API-Current-Version": CURRENT_VERSION,
+    }
+    if version != CURRENT_VERSION:
+        headers["Warning"] = (
+            f'299 - "API version {version} is deprecated. Please upgrade to {CURRENT_VERSION}"'
+        )
+        headers["Deprecation"] = "true"
+    return headers
+
+
+def unsupported_version_response(version: str) -> JSONResponse:
+    """406 response for a version that is not supported."""
+    return JSONResponse(
+        status_code=406,
+        content={
+            "error": "Not Acceptable",
+            "message": f"API version '{version}' is not supported",
+            "supported_versions": SUPPORTED_VERSIONS,
+            "current_version": CURRENT_VERSION,
+        },
+    )
+
 
 class APIVersionMiddleware(BaseHTTPMiddleware):
     """
@@ -41,28 +89,13 @@ class APIVersionMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         """Process request and add version handling."""
 
-        # Extract version from Accept header
-        requested_version = self._parse_version_from_header(request)
-
-        # Extract version from URL path
-        # Handle both request.path (direct) and request.url.path (starlette)
+        # Path version takes precedence over the Accept header
         path = request.url.path if hasattr(request, 'url') else request.path
-        path_version = self._parse_version_from_path(path)
-
-        # Determine which version to use
-        version = path_version or requested_version or DEFAULT_VERSION
+        version = resolve_api_version(path, request.headers.get("Accept", ""))
 
         # Validate version is supported
         if version not in SUPPORTED_VERSIONS:
-            return JSONResponse(
-                status_code=406,
-                content={
-                    "error": "Not Acceptable",
-                    "message": f"API version '{version}' is not supported",
-                    "supported_versions": SUPPORTED_VERSIONS,
-                    "current_version": CURRENT_VERSION,
-                },
-            )
+            return unsupported_version_response(version)
 
         # Add version info to request state for route handlers
         request.state.api_version = version
@@ -70,16 +103,8 @@ class APIVersionMiddleware(BaseHTTPMiddleware):
         # Process request
         response = await call_next(request)
 
-        # Add version headers to response
-        response.headers["X-API-Version"] = version
-        response.headers["X-API-Current-Version"] = CURRENT_VERSION
-
-        # Add deprecation warning if using old version
-        if version != CURRENT_VERSION:
-            response.headers[
-                "Warning"
-            ] = f'299 - "API version {version} is deprecated. Please upgrade to {CURRENT_VERSION}"'
-            response.headers["Deprecation"] = "true"
+        # Add version (and deprecation) headers to response
+        response.headers.update(version_headers(version))
 
         return response
 
@@ -111,7 +136,7 @@ class APIVersionMiddleware(BaseHTTPMiddleware):
             Version string (e.g., "v1") or None if not found
         """
         # Match /api/v{number}/ pattern
-        match = re.search(r"/api/(v\d+)/", path)
+        match = PATH_VERSION_PATTERN.search(path)
         if match:
             return match.group(1)
 
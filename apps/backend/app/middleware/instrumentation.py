@@ -0,0 +1,69 @@
+"""
+Combined request instrumentation middleware.
+
+One pure ASGI layer that handles API version negotiation, Prometheus
+metrics and application monitoring, replacing a stack of
+APIVersionMiddleware, MetricsMiddleware and MonitoringMiddleware. All
+labels use the matched route template, so series stay bounded.
+
+Usage:
+    from app.middleware.instrumentation import InstrumentationMiddleware
+
+    app.add_middleware(InstrumentationMiddleware)
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import Message, Receive, Scope, Send
+
+from app.middleware.api_version import (
+    SUPPORTED_VERSIONS,
+    resolve_api_version,
+    unsupported_version_response,
+    version_headers,
+)
+from app.middleware.metrics import MetricsMiddleware, record_request, route_template
+from app.services.monitoring import monitor
+
+
+class InstrumentationMiddleware(MetricsMiddleware):
+    """
+    Pure ASGI middleware for versioning, metrics and monitoring.
+
+    - Resolves the API version (URL path, then Accept header, then default),
+      rejects unsupported versions with 406 and stores the version in
+      request.state.api_version
+    - Adds version and deprecation headers to every response
+    - Records Prometheus request metrics and ApplicationMonitor API calls
+    """
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        version = resolve_api_version(
+            scope["path"], Headers(scope=scope).get("accept", "")
+        )
+        if version not in SUPPORTED_VERSIONS:
+            await unsupported_version_response(version)(scope, receive, send)
+            return
+
+        # Read by get_api_version() through request.state
+        scope.setdefault("state", {})["api_version"] = version
+        await self.app(scope, receive, send)
+
+    def on_response_start(self, scope: Scope, message: Message) -> None:
+        version = scope.get("state", {}).get("api_version")
+        if version:
+            headers = MutableHeaders(scope=message)
+            for name, value in version_headers(version).items():
+                headers[name] = value
+
+    def on_exception(self, scope: Scope, exc: Exception) -> None:
+        monitor.increment('api.exceptions', 1, {
+            'endpoint': route_template(scope),
+            'method': scope["method"],
+            'exception': type(exc).__name__
+        })
+
+    def on_request_complete(
+        self, scope: Scope, method: str, endpoint: str, status_code: int, duration: float
+    ) -> None:
+        record_request(method, endpoint, status_code, duration)
+        monitor.record_api_call(endpoint, method, status_code, duration)
@@ -5,7 +5,11 @@ Prometheus metrics middleware for FastAPI.
 Tracks:
 - Request latency histogram (buckets: 0.1, 0.5, 1, 2, 5, 10s)
 - Request count by endpoint, method, and status code
-- Active request gauge
+- Active request gauge by method
+
+The endpoint label is the matched route template (e.g. /datasets/{dataset_id}),
+never the raw URL path, so the number of series is bounded by the number of
+routes. Requests that match no route share the "<unmatched>" label.
 
 Usage:
     from app.middleware.metrics import MetricsMiddleware, metrics_registry
@@ -21,7 +25,7 @@ Usage:
 """
 
 import time
-from typing import Callable
+from typing import Dict, Tuple
 from prometheus_client import (
     CollectorRegistry,
     Counter,
@@ -30,10 +34,7 @@ from prometheus_client import (
     generate_latest,
     CONTENT_TYPE_LATEST,
 )
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 # Create a custom registry for application metrics
 metrics_registry = CollectorRegistry()
@@ -55,66 +56,104 @@ request_count = Counter(
     registry=metrics_registry,
 )
 
-# Active requests gauge
+# Active requests gauge (the route is not known until the request is routed)
 active_requests = Gauge(
     name="http_requests_active",
     documentation="Number of active HTTP requests",
-    labelnames=["method", "endpoint"],
+    labelnames=["method"],
     registry=metrics_registry,
 )
 
+# Label for requests that did not match any route (404s, rejected requests)
+UNMATCHED_ROUTE = "<unmatched>"
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    """
-    Middleware to collect Prometheus metrics for HTTP requests.
+# Labelled children, bounded by methods x route templates x status codes
+_request_series: Dict[Tuple[str, str, int], Tuple[object, object]] = {}
 
-    Tracks request latency, count, and active requests for all endpoints
-    except the /metrics endpoint itself to avoid metric pollution.
-    """
 
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
+def route_template(scope: Scope) -> str:
+    """Route template the router matched for this request, e.g. /models/{model_id}."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip metrics collection for the metrics endpoint itself
-        if request.url.path == "/metrics":
-            return await call_next(request)
 
-        # Extract endpoint path (use route path if available, otherwise URL path)
-        endpoint = request.url.path
-        method = request.method
+def record_request(method: str, endpoint: str, status_code: int, duration: float) -> None:
+    """Observe one finished request in the latency histogram and request counter."""
+    key = (method, endpoint, status_code)
+    series = _request_series.get(key)
+    if series is None:
+        series = _request_series[key] = (
+            request_latency.labels(method=method, endpoint=endpoint, status_code=status_code),
+            request_count.labels(method=method, endpoint=endpoint, status_code=status_code),
+        )
+    series[0].observe(duration)
+    series[1].inc()
 
-        # Track active requests
-        active_requests.labels(method=method, endpoint=endpoint).inc()
 
-        # Start timing
-        start_time = time.time()
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware to collect Prometheus metrics for HTTP requests.
+
+    Tracks request latency, count, and active requests for all endpoints
+    except the /metrics endpoint itself to avoid metric pollution. Unlike a
+    BaseHTTPMiddleware it does not wrap the request in an extra task or
+    response stream; it only observes the response start message.
+    """
+
+    excluded_paths = frozenset({"/metrics"})
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip non-HTTP traffic and the metrics endpoint itself
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started = True
+                self.on_response_start(scope, message)
+            await send(message)
+
+        active = active_requests.labels(method=method)
+        active.inc()
+        start_time = time.perf_counter()
 
         try:
-            # Process the request
-            response = await call_next(request)
-            status_code = response.status_code
+            await self.handle(scope, receive, send_wrapper)
         except Exception as e:
-            # Track errors as 500
-            status_code = 500
+            # Track errors as 500 unless a response was already sent
+            if not response_started:
+                status_code = 500
+            self.on_exception(scope, e)
             raise
         finally:
-            # Calculate latency
-            latency = time.time() - start_time
+            duration = time.perf_counter() - start_time
+            self.on_request_complete(scope, method, route_template(scope), status_code, duration)
+            active.dec()
 
-            # Record metrics
-            request_latency.labels(
-                method=method, endpoint=endpoint, status_code=status_code
-            ).observe(latency)
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the wrapped application."""
+        await self.app(scope, receive, send)
 
-            request_count.labels(
-                method=method, endpoint=endpoint, status_code=status_code
-            ).inc()
+    def on_response_start(self, scope: Scope, message: Message) -> None:
+        """Hook for adjusting the response start message."""
 
-            # Decrement active requests
-            active_requests.labels(method=method, endpoint=endpoint).dec()
+    def on_exception(self, scope: Scope, exc: Exception) -> None:
+        """Hook called when the application raises."""
 
-        return response
+    def on_request_complete(
+        self, scope: Scope, method: str, endpoint: str, status_code: int, duration: float
+    ) -> None:
+        record_request(method, endpoint, status_code, duration)
 
 
 def get_metrics() -> bytes:
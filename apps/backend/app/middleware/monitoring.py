@@ -7,17 +7,20 @@ import time
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from app.services.monitoring import monitor
+from app.middleware.metrics import route_template
 
 
 class MonitoringMiddleware(BaseHTTPMiddleware):
-    """Middleware to automatically track API metrics"""
+    """Middleware to automatically track API metrics
+
+    Prefer InstrumentationMiddleware, which records the same calls without
+    a BaseHTTPMiddleware layer.
+    """
     
     async def dispatch(self, request: Request, call_next):
         start_time = time.time()
-        
-        # Extract endpoint info
-        endpoint = request.url.path
         method = request.method
+        status_code = 500
         
         try:
             # Process request
@@ -27,7 +30,7 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             # Track errors
             monitor.increment('api.exceptions', 1, {
-                'endpoint': endpoint,
+                'endpoint': route_template(request.scope),
                 'method': method,
                 'exception': type(e).__name__
             })
@@ -37,7 +40,7 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
             # Calculate duration
             duration = time.time() - start_time
             
-            # Record metrics
-            monitor.record_api_call(endpoint, method, status_code, duration)
+            # Record metrics by route template (known once the request is routed)
+            monitor.record_api_call(route_template(request.scope), method, status_code, duration)
         
         return response
\ No newline at end of file
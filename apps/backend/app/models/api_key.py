@@ -13,7 +13,7 @@ class APIKey(Document):
     """API Key for accessing production model endpoints"""
     
     key_id: Indexed(str) = Field(description="Unique API key identifier")
-    key_hash: str = Field(description="Hashed API key for security")
+    key_hash: Indexed(str) = Field(description="Hashed API key for security")
     name: str = Field(description="Friendly name for the API key")
     description: Optional[str] = Field(None, description="Description of key usage")
     
@@ -36,6 +36,7 @@ class APIKey(Document):
         name = "api_keys"
         indexes = [
             "key_id",
+            "key_hash",
             "user_id",
             "is_active"
         ]
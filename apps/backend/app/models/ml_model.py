@@ -38,6 +38,7 @@ class MLModel(Document):
     # Storage information
     model_path: str  # S3 path to serialized model
     feature_transformer_path: Optional[str] = None  # S3 path to feature transformer
+    onnx_path: Optional[str] = None  # S3 path to ONNX graph, when converted
     
     # Versioning
     version: str = Field(default="1.0.0", description="Semantic version (major.minor.patch)")
@@ -51,6 +52,9 @@ class MLModel(Document):
     # Feature importance
     feature_importance: Optional[Dict[str, float]] = None
     
+    # Reference distributions of raw input features, for drift detection
+    feature_profile: Optional[Dict[str, Dict[str, Any]]] = None
+    
     # Training configuration
     training_config: Dict[str, Any] = Field(default_factory=dict)
     
@@ -0,0 +1,34 @@
+"""
+Prediction event document stored in a MongoDB time-series collection
+"""
+from typing import Any, Dict, Optional
+from datetime import datetime
+import os
+
+from beanie import Document, Granularity, TimeSeriesConfig
+from pydantic import Field
+
+
+class PredictionEvent(Document):
+    """One served prediction (or failed prediction) for a model"""
+
+    timestamp: datetime
+    model_id: str = Field(description="Time-series meta field")
+    prediction_id: str
+    prediction: Any = None
+    probability: Optional[float] = None
+    latency_ms: float = 0
+    api_key_id: Optional[str] = None
+    error: bool = False
+    # Whether this row carries its request's latency and outcome (a request's first row)
+    request: bool = True
+    input_data: Optional[Dict[str, Any]] = None
+
+    class Settings:
+        name = "prediction_events"
+        timeseries = TimeSeriesConfig(
+            time_field="timestamp",
+            meta_field="model_id",
+            granularity=Granularity.seconds,
+            expire_after_seconds=int(os.getenv("PREDICTION_EVENT_TTL_DAYS", "30")) * 86400
+        )
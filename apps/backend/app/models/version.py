@@ -40,6 +40,13 @@ class TransformationStep(BaseModel):
         return v
 
 
+class ChunkRef(BaseModel):
+    """Reference to a content-addressed chunk of a version's file content."""
+
+    sha256: str = Field(..., description="SHA-256 hash of the chunk bytes")
+    size: int = Field(..., ge=0, description="Chunk size in bytes")
+
+
 class DatasetVersion(Document):
     """
     Dataset version tracking document.
@@ -68,6 +75,10 @@ class DatasetVersion(Document):
     # Storage location
     file_path: str = Field(..., description="Storage path (e.g., S3 key)")
     s3_url: str = Field(..., description="S3 URL for version access")
+    chunks: Optional[List[ChunkRef]] = Field(
+        None,
+        description="Chunks the content is assembled from (None = stored as a single file)"
+    )
 
     # Version metadata
     description: Optional[str] = Field(None, description="User-provided version description")
@@ -276,6 +287,30 @@ class TransformationLineage(Document):
         }
 
 
+class RowDiff(BaseModel):
+    """Row- and cell-level differences between two dataset versions."""
+
+    basis: str = Field(..., description="How rows are matched: key or position")
+    key_columns: List[str] = Field(default_factory=list, description="Columns identifying a row")
+
+    rows_added: int = Field(default=0, ge=0)
+    rows_removed: int = Field(default=0, ge=0)
+    rows_changed: int = Field(default=0, ge=0)
+    rows_unchanged: int = Field(default=0, ge=0)
+    cells_changed: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Changed cell count per column shared by both versions"
+    )
+
+    # Samples of the differences
+    changed_rows: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Changed rows as key plus {column: [old, new]}"
+    )
+    added_rows: List[Dict[str, Any]] = Field(default_factory=list)
+    removed_rows: List[Dict[str, Any]] = Field(default_factory=list)
+
+
 class VersionComparison(BaseModel):
     """
     Result of comparing two dataset versions.
@@ -308,5 +343,8 @@ class VersionComparison(BaseModel):
     )
     transformation_count: int = Field(default=0, ge=0)
 
+    # Row- and cell-level differences
+    row_diff: Optional[RowDiff] = None
+
     # Timestamps
     compared_at: datetime = Field(default_factory=get_current_time)
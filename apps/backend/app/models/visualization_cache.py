@@ -13,6 +13,18 @@ class HistogramData(BaseModel):
     bin_edges: List[float]
 
 
+class FineHistogramData(BaseModel):
+    """Model for storing a fine-grained, equal-width histogram
+
+    Fine histograms over the same range can be merged by summing counts and
+    re-binned to any coarser bin count without rereading the raw data.
+    """
+
+    min: float
+    max: float
+    counts: List[int]
+
+
 class BoxplotData(BaseModel):
     """Model for storing boxplot data"""
 
@@ -35,7 +47,7 @@ class VisualizationCache(Document):
     """Model for caching visualization data"""
 
     dataset_id: Link[UserData] = Indexed(Link[UserData])
-    visualization_type: str  # 'histogram', 'boxplot', 'correlation'
+    visualization_type: str  # 'histogram_fine', 'boxplot', 'correlation'
     column_name: Optional[str] = None  # For histograms and boxplots
     data: Dict[
         str, Any
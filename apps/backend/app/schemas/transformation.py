@@ -107,6 +107,9 @@ class TransformationPreviewResponse(BaseModel):
     estimated_rows_affected: int = Field(..., ge=0)
     estimated_data_loss: float = Field(default=0.0, ge=0.0, le=100.0)
     warnings: List[str] = Field(default_factory=list)
+    is_estimate: bool = Field(default=False, description="Whether results were computed on a sample")
+    sample_rows: Optional[int] = Field(default=None, description="Rows in the sample used")
+    total_rows: Optional[int] = Field(default=None, description="Rows in the full dataset")
     generated_at: datetime
 
 
@@ -266,3 +269,6 @@ class ValidationResponse(BaseModel):
     warnings: List[str] = Field(default_factory=list)
     info: List[str] = Field(default_factory=list)
     suggestions: List[str] = Field(default_factory=list)
+    is_estimate: bool = Field(default=False, description="Whether results were computed on a sample")
+    sample_rows: Optional[int] = Field(default=None, description="Rows in the sample used")
+    total_rows: Optional[int] = Field(default=None, description="Rows in the full dataset")
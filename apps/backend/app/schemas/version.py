@@ -8,7 +8,7 @@ and lineage management endpoints.
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from app.models.version import TransformationStep
+from app.models.version import RowDiff, TransformationStep
 
 
 class TransformationStepResponse(BaseModel):
@@ -104,11 +104,22 @@ class LineageResponse(BaseModel):
     )
 
 
+class LineageBatchRequest(BaseModel):
+    """Request model for lineage of many versions."""
+
+    version_ids: List[str] = Field(..., min_length=1, max_length=500, description="Version IDs to look up")
+
+
 class VersionComparisonRequest(BaseModel):
     """Request model for comparing two versions."""
 
     version1_id: str = Field(..., description="First version ID to compare")
     version2_id: str = Field(..., description="Second version ID to compare")
+    key_columns: Optional[List[str]] = Field(
+        None,
+        description="Columns identifying a row; rows are matched by position when omitted"
+    )
+    include_row_diff: bool = Field(True, description="Whether to compute row- and cell-level differences")
 
 
 class VersionComparisonResponse(BaseModel):
@@ -126,6 +137,7 @@ class VersionComparisonResponse(BaseModel):
     schema_identical: bool = False
     lineage_path: List[str] = Field(default_factory=list)
     transformation_count: int = 0
+    row_diff: Optional[RowDiff] = None
     compared_at: datetime
 
     model_config = ConfigDict(
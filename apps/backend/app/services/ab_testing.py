@@ -3,15 +3,214 @@ A/B Testing service for experiment management and variant assignment
 """
 import random
 import hashlib
+import asyncio
+import logging
+import os
+import time
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from scipy import stats
 import numpy as np
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from app.models.ab_test import ABTest, Variant, ExperimentStatus, VariantStatus
 from app.models.ml_model import MLModel
 from beanie import PydanticObjectId
 
+logger = logging.getLogger(__name__)
+
+
+class ExperimentConfigCache:
+    """Short-TTL in-process cache of experiment documents
+
+    Used for variant assignment and tracking validation. Status changes in
+    this process invalidate immediately; other workers pick them up when
+    the entry expires.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("AB_TEST_CACHE_TTL", "30")
+        )
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[Optional[ABTest], float]] = {}
+
+    async def get(self, experiment_id: str) -> Optional[ABTest]:
+        """Get an experiment, loading it on a miss (missing experiments are cached too)"""
+        entry = self._entries.get(experiment_id)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+
+        experiment = await ABTest.find_one({"experiment_id": experiment_id})
+        if len(self._entries) >= self.max_entries and experiment_id not in self._entries:
+            # Evict the oldest entry (dicts keep insertion order)
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[experiment_id] = (experiment, time.monotonic() + self.ttl_seconds)
+        return experiment
+
+    def invalidate(self, experiment_id: str) -> None:
+        self._entries.pop(experiment_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class VariantDelta:
+    """Metric increments for one variant not yet written"""
+
+    __slots__ = ("predictions", "latency_ms", "errors", "custom_metrics")
+
+    def __init__(self):
+        self.predictions = 0
+        self.latency_ms = 0.0
+        self.errors = 0
+        self.custom_metrics: Dict[str, float] = {}
+
+
+class ABTestMetricsBuffer:
+    """Aggregates variant metrics in process and flushes them as atomic $inc updates"""
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.getenv("AB_TEST_FLUSH_INTERVAL", "5")
+        )
+        self._deltas: Dict[Tuple[str, str], VariantDelta] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        experiment_id: str,
+        variant_id: str,
+        latency_ms: float,
+        success: bool = True,
+        custom_metrics: Optional[Dict[str, float]] = None,
+        count: int = 1
+    ) -> None:
+        """Record predictions for a variant; no I/O on the request path"""
+        delta = self._deltas.get((experiment_id, variant_id))
+        if delta is None:
+            delta = self._deltas[(experiment_id, variant_id)] = VariantDelta()
+
+        delta.predictions += count
+        delta.latency_ms += latency_ms
+        if not success:
+            delta.errors += count
+        if custom_metrics:
+            for metric, value in custom_metrics.items():
+                delta.custom_metrics[metric] = delta.custom_metrics.get(metric, 0) + value
+
+    def pending(self, experiment_id: str) -> Dict[str, VariantDelta]:
+        """Unflushed increments for an experiment, by variant ID"""
+        return {
+            variant_id: delta
+            for (exp_id, variant_id), delta in self._deltas.items()
+            if exp_id == experiment_id
+        }
+
+    def with_pending(self, experiment: ABTest) -> ABTest:
+        """Copy of a loaded experiment with unflushed increments added to its variants"""
+        pending = self.pending(experiment.experiment_id)
+        if not pending:
+            return experiment
+        experiment = experiment.model_copy(deep=True)
+        for variant in experiment.variants:
+            delta = pending.get(variant.variant_id)
+            if delta is None:
+                continue
+            variant.total_predictions += delta.predictions
+            variant.total_latency_ms += delta.latency_ms
+            variant.error_count += delta.errors
+            for metric, value in delta.custom_metrics.items():
+                variant.custom_metrics[metric] = variant.custom_metrics.get(metric, 0) + value
+        return experiment
+
+    async def flush(self) -> int:
+        """Write buffered increments in one unordered bulk write; returns variants updated"""
+        if not self._deltas:
+            return 0
+
+        # Swap buffers before awaiting so concurrent records land in the next batch
+        deltas, self._deltas = self._deltas, {}
+        now = datetime.utcnow()
+
+        operations = []
+        for (experiment_id, variant_id), delta in deltas.items():
+            increments = {
+                "variants.$.total_predictions": delta.predictions,
+                "variants.$.total_latency_ms": delta.latency_ms,
+                "variants.$.error_count": delta.errors,
+            }
+            for metric, value in delta.custom_metrics.items():
+                increments[f"variants.$.custom_metrics.{metric}"] = value
+            operations.append(UpdateOne(
+                {"experiment_id": experiment_id, "variants.variant_id": variant_id},
+                {"$inc": increments, "$max": {"updated_at": now}}
+            ))
+
+        keys = list(deltas)
+        try:
+            await ABTest.get_motor_collection().bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: every operation not reported in writeErrors was applied
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            logger.error(f"Failed to flush {len(failed)} of {len(operations)} A/B test metric updates: {e}")
+            # Merge back so only the failed increments are retried on the next flush
+            for i in failed:
+                self._restore(keys[i], deltas[keys[i]])
+            return len(operations) - len(failed)
+        except Exception as e:
+            # The increments may or may not have been applied, and $inc is not
+            # idempotent, so retrying could double count
+            logger.error(f"Failed to flush A/B test metrics, dropping {len(operations)} updates: {e}")
+            return 0
+
+        return len(operations)
+
+    def _restore(self, key: Tuple[str, str], delta: VariantDelta) -> None:
+        experiment_id, variant_id = key
+        self.record(
+            experiment_id, variant_id, delta.latency_ms,
+            custom_metrics=delta.custom_metrics, count=delta.predictions
+        )
+        self._deltas[key].errors += delta.errors
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start periodic flushing on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and write any remaining increments"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Global instances
+experiment_cache = ExperimentConfigCache()
+ab_test_metrics = ABTestMetricsBuffer()
+
+
+async def init_ab_test_metrics():
+    """Start buffered A/B test metric flushing"""
+    ab_test_metrics.start()
+
+
+async def cleanup_ab_test_metrics():
+    """Flush outstanding A/B test metrics and stop flushing"""
+    await ab_test_metrics.stop()
+
 
 class ABTestingService:
     """Service for managing A/B tests and experiments"""
@@ -98,6 +297,14 @@ class ABTestingService:
         # Fallback to last variant (shouldn't happen with valid config)
         return active_variants[-1]
     
+    @staticmethod
+    async def get_running_experiment(experiment_id: str) -> Optional[ABTest]:
+        """Get a running experiment from the config cache"""
+        experiment = await experiment_cache.get(experiment_id)
+        if experiment is None or experiment.status != ExperimentStatus.RUNNING:
+            return None
+        return experiment
+    
     @staticmethod
     async def track_prediction(
         experiment_id: str,
@@ -108,29 +315,22 @@ class ABTestingService:
     ) -> None:
         """Track a prediction for a variant"""
         
-        experiment = await ABTest.find_one({"experiment_id": experiment_id})
+        experiment = await experiment_cache.get(experiment_id)
         if not experiment:
             return  # Silently fail for non-blocking tracking
         
-        variant = experiment.get_variant_by_id(variant_id)
-        if not variant:
+        if not experiment.get_variant_by_id(variant_id):
             return
         
-        # Update metrics
-        variant.total_predictions += 1
-        variant.total_latency_ms += latency_ms
-        if not success:
-            variant.error_count += 1
-        
-        # Update custom metrics
         if custom_metrics:
-            for metric, value in custom_metrics.items():
-                if metric not in variant.custom_metrics:
-                    variant.custom_metrics[metric] = 0
-                variant.custom_metrics[metric] += value
+            # Metric names become document field paths
+            custom_metrics = {
+                metric: value for metric, value in custom_metrics.items()
+                if metric and "." not in metric and not metric.startswith("$")
+            }
         
-        experiment.updated_at = datetime.utcnow()
-        await experiment.save()
+        # Buffered and flushed as atomic $inc updates
+        ab_test_metrics.record(experiment_id, variant_id, latency_ms, success, custom_metrics)
     
     @staticmethod
     def calculate_statistics(
@@ -195,6 +395,8 @@ class ABTestingService:
         if experiment.status != ExperimentStatus.RUNNING:
             return False, None
         
+        experiment = ab_test_metrics.with_pending(experiment)
+        
         # Check duration limit
         if experiment.test_duration_hours and experiment.started_at:
             elapsed = datetime.utcnow() - experiment.started_at
@@ -227,32 +429,43 @@ class ABTestingService:
     async def complete_experiment(experiment: ABTest) -> ABTest:
         """Complete an experiment and determine the winner"""
         
-        if len(experiment.variants) == 2:
+        # Decide on exact counts, including increments not yet flushed
+        counted = ab_test_metrics.with_pending(experiment)
+        
+        if len(counted.variants) == 2:
             # Simple two-variant test
             stats_result = ABTestingService.calculate_statistics(
-                experiment.variants[0],
-                experiment.variants[1],
-                experiment.primary_metric
+                counted.variants[0],
+                counted.variants[1],
+                counted.primary_metric
             )
             
             if stats_result["variant_b_rate"] > stats_result["variant_a_rate"]:
-                experiment.winner_variant_id = experiment.variants[1].variant_id
+                experiment.winner_variant_id = counted.variants[1].variant_id
             else:
-                experiment.winner_variant_id = experiment.variants[0].variant_id
+                experiment.winner_variant_id = counted.variants[0].variant_id
             
             experiment.statistical_significance = 1 - stats_result["p_value"]
             experiment.lift_percentage = stats_result["lift_percentage"]
         else:
             # Multi-variant test - find best performer
             best_variant = max(
-                experiment.variants,
-                key=lambda v: v.custom_metrics.get(experiment.primary_metric, 0) / max(v.total_predictions, 1)
+                counted.variants,
+                key=lambda v: v.custom_metrics.get(counted.primary_metric, 0) / max(v.total_predictions, 1)
             )
             experiment.winner_variant_id = best_variant.variant_id
         
         experiment.status = ExperimentStatus.COMPLETED
         experiment.ended_at = datetime.utcnow()
-        await experiment.save()
+        # Write only the result fields; variant counters are owned by $inc flushes
+        await experiment.set({
+            "winner_variant_id": experiment.winner_variant_id,
+            "statistical_significance": experiment.statistical_significance,
+            "lift_percentage": experiment.lift_percentage,
+            "status": experiment.status,
+            "ended_at": experiment.ended_at
+        })
+        experiment_cache.invalidate(experiment.experiment_id)
         
         return experiment
     
@@ -260,6 +473,8 @@ class ABTestingService:
     async def get_experiment_metrics(experiment: ABTest) -> Dict[str, Any]:
         """Get comprehensive metrics for an experiment"""
         
+        experiment = ab_test_metrics.with_pending(experiment)
+        
         metrics = {
             "experiment_id": experiment.experiment_id,
             "name": experiment.name,
@@ -0,0 +1,198 @@
+"""
+Cached API key verification and write-behind usage accounting
+"""
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+import asyncio
+import logging
+import os
+import time
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.models.api_key import APIKey
+
+logger = logging.getLogger(__name__)
+
+
+class APIKeyVerificationCache:
+    """Short-TTL in-process cache of verified API key documents
+
+    Keyed by key hash. Revocation in this process invalidates immediately;
+    other workers pick it up when the entry expires, so the TTL bounds how
+    long a revoked key can still be served elsewhere.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("API_KEY_CACHE_TTL", "30")
+        )
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[APIKey, float]] = {}
+        self._hash_by_key_id: Dict[str, str] = {}
+
+    def get(self, key_hash: str) -> Optional[APIKey]:
+        """Get a cached key document, or None if missing or expired"""
+        entry = self._entries.get(key_hash)
+        if entry is None:
+            return None
+
+        api_key_doc, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key_hash)
+            return None
+        return api_key_doc
+
+    def put(self, key_hash: str, api_key_doc: APIKey) -> None:
+        """Cache a verified key document"""
+        if len(self._entries) >= self.max_entries and key_hash not in self._entries:
+            # Evict the oldest entry (dicts keep insertion order)
+            self._remove(next(iter(self._entries)))
+
+        self._entries[key_hash] = (api_key_doc, time.monotonic() + self.ttl_seconds)
+        self._hash_by_key_id[api_key_doc.key_id] = key_hash
+
+    def invalidate(self, key_id: str) -> None:
+        """Drop a key from the cache, e.g. after it is revoked"""
+        key_hash = self._hash_by_key_id.get(key_id)
+        if key_hash:
+            self._remove(key_hash)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._hash_by_key_id.clear()
+
+    def _remove(self, key_hash: str) -> None:
+        entry = self._entries.pop(key_hash, None)
+        if entry:
+            self._hash_by_key_id.pop(entry[0].key_id, None)
+
+
+class APIKeyUsageBuffer:
+    """Buffers per-key request counts and flushes them with bulk $inc/$max updates"""
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.getenv("API_KEY_USAGE_FLUSH_INTERVAL", "10")
+        )
+        self._counts: Dict[str, int] = {}
+        self._last_used: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, key_id: str, timestamp: Optional[datetime] = None) -> None:
+        """Record one request; no I/O on the request path"""
+        timestamp = timestamp or datetime.utcnow()
+        self._counts[key_id] = self._counts.get(key_id, 0) + 1
+        last_used = self._last_used.get(key_id)
+        if last_used is None or timestamp > last_used:
+            self._last_used[key_id] = timestamp
+
+    def pending(self, key_id: str) -> Tuple[int, Optional[datetime]]:
+        """Requests and last use not yet flushed for a key"""
+        return self._counts.get(key_id, 0), self._last_used.get(key_id)
+
+    def with_pending(self, api_key_doc: APIKey) -> APIKey:
+        """Copy of a loaded key document with unflushed usage added"""
+        count, last_used = self.pending(api_key_doc.key_id)
+        if not count:
+            return api_key_doc
+        api_key_doc = api_key_doc.model_copy()
+        api_key_doc.total_requests += count
+        if api_key_doc.last_used_at is None or last_used > api_key_doc.last_used_at:
+            api_key_doc.last_used_at = last_used
+        return api_key_doc
+
+    async def flush(self) -> int:
+        """Write buffered usage in one unordered bulk write; returns keys updated"""
+        if not self._counts:
+            return 0
+
+        # Swap buffers before awaiting so concurrent records land in the next batch
+        counts, self._counts = self._counts, {}
+        last_used, self._last_used = self._last_used, {}
+
+        operations = [
+            UpdateOne(
+                {"key_id": key_id},
+                {
+                    "$inc": {"total_requests": count},
+                    "$max": {"last_used_at": last_used[key_id]},
+                },
+            )
+            for key_id, count in counts.items()
+        ]
+
+        keys = list(counts)
+        try:
+            await APIKey.get_motor_collection().bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: every operation not reported in writeErrors was applied
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            logger.error(f"Failed to flush usage for {len(failed)} of {len(operations)} API keys: {e}")
+            # Merge back so only the failed counts are retried on the next flush
+            for i in failed:
+                self.record_many(keys[i], counts[keys[i]], last_used[keys[i]])
+            return len(operations) - len(failed)
+        except Exception as e:
+            # The increments may or may not have been applied, and $inc is not
+            # idempotent, so retrying could double count
+            logger.error(f"Failed to flush API key usage, dropping {len(operations)} updates: {e}")
+            return 0
+
+        return len(operations)
+
+    def record_many(self, key_id: str, count: int, timestamp: datetime) -> None:
+        """Record several requests at once"""
+        self._counts[key_id] = self._counts.get(key_id, 0) + count
+        last_used = self._last_used.get(key_id)
+        if last_used is None or timestamp > last_used:
+            self._last_used[key_id] = timestamp
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start periodic flushing on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and write any remaining usage"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Global instances
+api_key_cache = APIKeyVerificationCache()
+api_key_usage = APIKeyUsageBuffer()
+
+
+async def lookup_api_key(key_hash: str) -> Optional[APIKey]:
+    """Find an API key by hash, serving repeat lookups from the cache"""
+    api_key_doc = api_key_cache.get(key_hash)
+    if api_key_doc is not None:
+        return api_key_doc
+
+    api_key_doc = await APIKey.find_one({"key_hash": key_hash})
+    if api_key_doc is not None:
+        api_key_cache.put(key_hash, api_key_doc)
+    return api_key_doc
+
+
+async def init_api_key_usage():
+    """Start write-behind usage accounting"""
+    api_key_usage.start()
+
+
+async def cleanup_api_key_usage():
+    """Flush outstanding usage and stop accounting"""
+    await api_key_usage.stop()
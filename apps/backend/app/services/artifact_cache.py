@@ -0,0 +1,207 @@
+"""
+Node-local read-through disk cache for S3 datasets and model artifacts.
+
+Files are stored under a hash of bucket, key and ETag, so a changed object
+gets a new entry and stale ones simply age out. Downloads go to a
+temporary file in the cache directory and are renamed into place, which
+is atomic, so worker processes sharing the directory never see a partial
+file and racing downloads of the same object are harmless. When the cache
+grows past its size budget the least recently used files are deleted
+under an exclusive lock; open handles and memory maps of a deleted file
+stay valid on POSIX.
+"""
+
+from typing import Dict, Optional, Tuple
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from app.services.object_storage import ObjectStorage, get_object_storage
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_CACHE_ENABLED = os.getenv("ARTIFACT_CACHE_ENABLED", "true").lower() == "true"
+ARTIFACT_CACHE_DIR = os.getenv(
+    "ARTIFACT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "narrative-artifact-cache")
+)
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))
+
+# Seconds an object's ETag is trusted before it is checked with S3 again
+ARTIFACT_CACHE_ETAG_TTL = float(os.getenv("ARTIFACT_CACHE_ETAG_TTL", "30"))
+
+# Temporary files older than this are left over from crashed downloads
+STALE_PARTIAL_SECONDS = 3600
+
+PARTIAL_PREFIX = ".partial-"
+LOCK_FILE = ".lock"
+
+
+class ArtifactCache:
+    """Read-through disk cache of S3 objects, keyed by key and ETag"""
+
+    def __init__(
+        self,
+        storage: Optional[ObjectStorage] = None,
+        cache_dir: str = ARTIFACT_CACHE_DIR,
+        max_bytes: int = ARTIFACT_CACHE_MAX_BYTES,
+        etag_ttl: float = ARTIFACT_CACHE_ETAG_TTL
+    ):
+        self._storage = storage
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.etag_ttl = etag_ttl
+        self._etags: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def storage(self) -> ObjectStorage:
+        return self._storage or get_object_storage()
+
+    def path_for(self, bucket: str, key: str, etag: str) -> str:
+        """Cache path of one version of an object; keeps the key's extension"""
+        digest = hashlib.sha256(f"{bucket}/{key}@{etag}".encode()).hexdigest()
+        extension = os.path.splitext(key)[1][:16]
+        return os.path.join(self.cache_dir, digest[:2], digest + extension)
+
+    def _etag(self, bucket: str, key: str, refresh: bool = False) -> str:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._etags.get((bucket, key))
+        if cached and not refresh and cached[1] > now:
+            return cached[0]
+
+        etag = self.storage.client.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+        with self._lock:
+            self._etags[(bucket, key)] = (etag, now + self.etag_ttl)
+        return etag
+
+    def get_path_sync(self, key: str, bucket: Optional[str] = None) -> str:
+        """
+        Local path of an object's current content, downloading it on a miss.
+
+        The file must be treated as read-only and not deleted by callers.
+
+        Raises:
+            ClientError: If the object cannot be read from S3
+            ValueError: If the object keeps changing while being downloaded
+        """
+        bucket = bucket or self.storage.bucket_name
+        etag = self._etag(bucket, key)
+        for _ in range(2):
+            path = self.path_for(bucket, key, etag)
+            try:
+                # Touch for LRU eviction
+                os.utime(path)
+                self.hits += 1
+                return path
+            except FileNotFoundError:
+                pass
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), prefix=PARTIAL_PREFIX)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    self.storage.download_fileobj_sync(key, f, bucket=bucket)
+                current = self._etag(bucket, key, refresh=True)
+                if current == etag:
+                    os.replace(partial, path)
+                    break
+            finally:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(partial)
+            # Overwritten mid-download; the file may hold either version
+            etag = current
+        else:
+            raise ValueError(f"S3 object {bucket}/{key} changed while downloading")
+
+        self.misses += 1
+        logger.info(f"Cached s3://{bucket}/{key} at {path}")
+        self._evict(keep=path)
+        return path
+
+    async def get_path(self, key: str, bucket: Optional[str] = None) -> str:
+        """Async get_path_sync"""
+        return await asyncio.to_thread(self.get_path_sync, key, bucket)
+
+    async def get_bytes(self, key: str, bucket: Optional[str] = None) -> bytes:
+        """An object's content, read from the local copy"""
+        def read() -> bytes:
+            with open(self.get_path_sync(key, bucket), "rb") as f:
+                return f.read()
+        return await asyncio.to_thread(read)
+
+    @contextlib.contextmanager
+    def _exclusive(self):
+        """Serialise eviction across processes sharing the directory"""
+        if not FCNTL_AVAILABLE:
+            with self._lock:
+                yield
+            return
+        with open(os.path.join(self.cache_dir, LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _evict(self, keep: Optional[str] = None) -> int:
+        """Delete least recently used files until under budget, returning bytes freed"""
+        with self._exclusive():
+            entries = []
+            total = 0
+            now = time.time()
+            for root, _, names in os.walk(self.cache_dir):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if name.startswith(PARTIAL_PREFIX):
+                        if now - stat.st_mtime > STALE_PARTIAL_SECONDS:
+                            with contextlib.suppress(FileNotFoundError):
+                                os.unlink(path)
+                        continue
+                    if name == LOCK_FILE:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            freed = 0
+            for _, size, path in sorted(entries):
+                if total - freed <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(path)
+                    freed += size
+
+        if freed:
+            logger.info(f"Evicted {freed} bytes from the artifact cache")
+        return freed
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Global artifact cache
+artifact_cache = ArtifactCache()
+
+
+def get_artifact_cache() -> Optional[ArtifactCache]:
+    """Get the artifact cache, or None if it is disabled"""
+    return artifact_cache if ARTIFACT_CACHE_ENABLED else None
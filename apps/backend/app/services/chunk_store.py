@@ -0,0 +1,227 @@
+"""
+Content-addressed chunk storage for dataset versions.
+
+Version content is split with content-defined chunking: a gear rolling hash
+over the last 32 bytes picks cut points, so an edit only moves the chunk
+boundaries around it and the rest of the file produces the same chunks as
+before. Chunks are stored once per dataset under their SHA-256, and a
+version is a manifest of chunk references that is reassembled on read.
+"""
+
+from collections import deque
+from typing import AsyncIterator, Iterable, List, Optional, Set
+import asyncio
+import hashlib
+import logging
+import os
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+from app.models.version import ChunkRef
+from app.services.object_storage import S3_MAX_CONCURRENCY, ObjectStorage
+
+logger = logging.getLogger(__name__)
+
+# Chunk size bounds in bytes; the expected size is about the average
+CHUNK_MIN_SIZE = int(os.getenv("VERSION_CHUNK_MIN_SIZE", str(256 * 1024)))
+CHUNK_AVG_SIZE = int(os.getenv("VERSION_CHUNK_AVG_SIZE", str(1024 * 1024)))
+CHUNK_MAX_SIZE = int(os.getenv("VERSION_CHUNK_MAX_SIZE", str(4 * 1024 * 1024)))
+
+# Bytes that influence each rolling hash value
+WINDOW = 32
+
+# Bytes hashed per vectorized pass; small enough to stay in CPU cache
+SCAN_BLOCK = 256 * 1024
+
+# Fixed per-byte gear values; changing them changes every chunk boundary
+_GEAR = np.array(
+    [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "little") for i in range(256)],
+    dtype=np.uint32
+)
+
+
+def _cut_mask(min_size: int, avg_size: int) -> np.uint32:
+    """High-bit mask matching on average once per (avg - min) bytes"""
+    bits = max(1, min(31, int(round(np.log2(max(2, avg_size - min_size))))))
+    return np.uint32(((1 << bits) - 1) << (32 - bits))
+
+
+def _cut_candidates(data: bytes, mask: np.uint32) -> np.ndarray:
+    """Offsets just past every byte whose rolling hash matches the mask"""
+    view = np.frombuffer(data, dtype=np.uint8)
+    shifted = np.empty(SCAN_BLOCK + WINDOW, dtype=np.uint32)
+    found = []
+    for start in range(0, len(view), SCAN_BLOCK):
+        lo = max(0, start - (WINDOW - 1))
+        rolling = _GEAR[view[lo:start + SCAN_BLOCK]]
+        # Shifting by one per byte pushes bytes older than WINDOW out of a
+        # 32-bit hash, so the hash at i is sum(gear[i - k] << k for k < 32).
+        # Summing windows of doubling width needs log2(WINDOW) passes.
+        width = 1
+        while width < min(WINDOW, len(rolling)):
+            n = len(rolling) - width
+            np.left_shift(rolling[:n], np.uint32(width), out=shifted[:n])
+            rolling[width:] += shifted[:n]
+            width *= 2
+        matches = np.flatnonzero((rolling[start - lo:] & mask) == 0)
+        found.append(matches + start + 1)
+    return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+def chunk_boundaries(
+    data: bytes,
+    min_size: int = CHUNK_MIN_SIZE,
+    avg_size: int = CHUNK_AVG_SIZE,
+    max_size: int = CHUNK_MAX_SIZE
+) -> List[int]:
+    """End offsets of the content-defined chunks of data"""
+    if not data:
+        return []
+    if not 0 < min_size < avg_size < max_size:
+        raise ValueError("Chunk sizes must satisfy 0 < min < avg < max")
+
+    candidates = _cut_candidates(data, _cut_mask(min_size, avg_size))
+    total = len(data)
+    cuts = []
+    start = 0
+    while start < total:
+        limit = min(start + max_size, total)
+        i = np.searchsorted(candidates, start + min_size)
+        if total - start > min_size and i < len(candidates) and candidates[i] <= limit:
+            end = int(candidates[i])
+        else:
+            end = limit
+        cuts.append(end)
+        start = end
+    return cuts
+
+
+def split_chunks(data: bytes, **sizes) -> List[ChunkRef]:
+    """Chunk references for data, in order"""
+    chunks = []
+    start = 0
+    for end in chunk_boundaries(data, **sizes):
+        piece = memoryview(data)[start:end]
+        chunks.append(ChunkRef(sha256=hashlib.sha256(piece).hexdigest(), size=end - start))
+        start = end
+    return chunks
+
+
+class ChunkStore:
+    """Stores version content as deduplicated chunks in S3"""
+
+    def __init__(self, s3_client, bucket_name: str, prefix: str = "chunks"):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.storage = ObjectStorage(s3_client, bucket_name)
+
+    def chunk_key(self, dataset_id: str, chunk_hash: str) -> str:
+        """S3 key of a chunk; chunks are shared within a dataset only"""
+        return f"{self.prefix}/{dataset_id}/{chunk_hash[:2]}/{chunk_hash}"
+
+    async def put(
+        self,
+        dataset_id: str,
+        content: bytes,
+        known_hashes: Optional[Iterable[str]] = None
+    ) -> List[ChunkRef]:
+        """
+        Chunk content and upload the chunks not already stored.
+
+        New chunks are uploaded S3_MAX_CONCURRENCY at a time.
+
+        Args:
+            dataset_id: Dataset the chunks belong to
+            content: Full file content
+            known_hashes: Hashes of chunks already in the store, e.g. from
+                the parent version's manifest
+
+        Returns:
+            Manifest of the content's chunks in order
+
+        Raises:
+            ValueError: If a chunk upload fails
+        """
+        chunks = await asyncio.to_thread(split_chunks, content)
+        stored: Set[str] = set(known_hashes or ())
+
+        uploads = []
+        offset = 0
+        for chunk in chunks:
+            if chunk.sha256 not in stored:
+                stored.add(chunk.sha256)
+                uploads.append((chunk, offset))
+            offset += chunk.size
+
+        semaphore = asyncio.Semaphore(S3_MAX_CONCURRENCY)
+
+        async def upload(chunk: ChunkRef, start: int) -> None:
+            async with semaphore:
+                await self.storage.put_bytes(
+                    self.chunk_key(dataset_id, chunk.sha256), content[start:start + chunk.size]
+                )
+
+        try:
+            await asyncio.gather(*(upload(chunk, start) for chunk, start in uploads))
+        except ClientError as e:
+            logger.error(f"Failed to upload version chunk: {e}")
+            raise ValueError(f"Failed to upload version chunk: {str(e)}")
+
+        logger.info(
+            f"Stored {len(content)} bytes as {len(chunks)} chunks, "
+            f"uploaded {sum(chunk.size for chunk, _ in uploads)} new bytes"
+        )
+        return chunks
+
+    async def iter_content(self, dataset_id: str, chunks: List[ChunkRef]) -> AsyncIterator[bytes]:
+        """
+        Yield a version's content chunk by chunk.
+
+        Up to S3_MAX_CONCURRENCY chunks are fetched ahead of the one being
+        yielded.
+
+        Raises:
+            ValueError: If a chunk is missing or does not match its hash
+        """
+        remaining = iter(chunks)
+        pending = deque()
+
+        def fetch_ahead() -> None:
+            while len(pending) < S3_MAX_CONCURRENCY:
+                chunk = next(remaining, None)
+                if chunk is None:
+                    return
+                key = self.chunk_key(dataset_id, chunk.sha256)
+                pending.append((chunk, asyncio.ensure_future(self.storage.get_bytes(key))))
+
+        try:
+            fetch_ahead()
+            while pending:
+                chunk, fetch = pending.popleft()
+                try:
+                    body = await fetch
+                except ClientError as e:
+                    logger.error(f"Failed to retrieve chunk {chunk.sha256}: {e}")
+                    raise ValueError(f"Failed to retrieve version chunk: {str(e)}")
+                fetch_ahead()
+
+                if hashlib.sha256(body).hexdigest() != chunk.sha256:
+                    raise ValueError(f"Chunk {chunk.sha256} is corrupt")
+                yield body
+        finally:
+            for _, fetch in pending:
+                if not fetch.cancel() and not fetch.cancelled():
+                    # Finished already; retrieve any error so it isn't reported as unhandled
+                    fetch.exception()
+
+    async def read(self, dataset_id: str, chunks: List[ChunkRef]) -> bytes:
+        """Reassemble a version's full content"""
+        return b"".join([body async for body in self.iter_content(dataset_id, chunks)])
+
+    async def delete(self, dataset_id: str, chunk_hashes: Iterable[str]) -> int:
+        """Delete chunks no version references any more, returning how many were deleted"""
+        return await self.storage.delete_many(
+            self.chunk_key(dataset_id, chunk_hash) for chunk_hash in chunk_hashes
+        )
@@ -0,0 +1,127 @@
+"""
+Memory compaction of parsed DataFrames driven by the inferred schema
+
+After schema inference the frame still holds what the parser produced:
+object columns for every string and 64-bit numbers everywhere. Compaction
+rewrites each column into the smallest representation that keeps its
+values:
+
+- integers are downcast to the smallest integer type, and integer columns
+  that were parsed as float because of missing values become nullable
+  integers
+- floats become float32 only when every value survives the round trip
+- low-cardinality strings become pandas categoricals
+- other strings use the Arrow-backed string dtype when pyarrow is installed
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .schema_inference import DataType, SchemaDefinition
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    STRING_DTYPE = None
+
+# Strings become categoricals at or below this unique-to-row ratio
+CATEGORY_MAX_RATIO = 0.5
+
+INTEGER_TYPES = {DataType.INTEGER}
+FLOAT_TYPES = {DataType.FLOAT}
+CATEGORY_TYPES = {DataType.CATEGORICAL, DataType.BOOLEAN}
+FREE_TEXT_TYPES = {DataType.TEXT}
+
+
+def _nullable_integer(series: pd.Series) -> pd.Series:
+    """Smallest nullable integer type that holds an integral float column"""
+    non_null = series.dropna()
+    if non_null.empty or not (non_null == np.floor(non_null)).all():
+        return series
+    low, high = non_null.min(), non_null.max()
+    for dtype in ("Int8", "Int16", "Int32", "Int64"):
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            return series.astype(dtype)
+    return series
+
+
+def _compact_strings(series: pd.Series, data_type: DataType) -> pd.Series:
+    non_null = series.dropna()
+    # Only columns of actual strings; JSON can produce mixed objects
+    if non_null.empty or pd.api.types.infer_dtype(non_null, skipna=False) != "string":
+        return series
+
+    if data_type not in FREE_TEXT_TYPES and (
+        data_type in CATEGORY_TYPES
+        or non_null.nunique() <= CATEGORY_MAX_RATIO * len(non_null)
+    ):
+        return series.astype("category")
+    if STRING_DTYPE is not None:
+        return series.astype(STRING_DTYPE)
+    return series
+
+
+def compact_column(series: pd.Series, data_type: DataType) -> pd.Series:
+    """Smallest lossless representation of one column"""
+    dtype = series.dtype
+
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+        return series
+
+    if pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+        return pd.to_numeric(series, downcast="integer")
+
+    if pd.api.types.is_float_dtype(dtype):
+        if data_type in INTEGER_TYPES and series.hasnans:
+            return _nullable_integer(series)
+        if dtype == np.float64:
+            as_float32 = series.astype(np.float32)
+            if np.array_equal(as_float32.to_numpy(np.float64), series.to_numpy(), equal_nan=True):
+                return as_float32
+        return series
+
+    if dtype == object:
+        return _compact_strings(series, data_type)
+
+    return series
+
+
+def compact_dataframe(
+    df: pd.DataFrame,
+    schema: SchemaDefinition
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Compact every column according to its inferred type
+
+    Returns the compacted frame and a report of memory use before and
+    after with the dtype changes per column.
+    """
+    types = {column.name: column.data_type for column in schema.columns}
+    before = df.memory_usage(deep=True)
+
+    compacted = {}
+    changes = {}
+    for name in df.columns:
+        series = df[name]
+        new_series = compact_column(series, types.get(name, DataType.UNKNOWN))
+        if new_series.dtype != series.dtype:
+            changes[str(name)] = {"from": str(series.dtype), "to": str(new_series.dtype)}
+        compacted[name] = new_series
+
+    result = pd.DataFrame(compacted, index=df.index)
+    after = result.memory_usage(deep=True)
+
+    before_bytes = int(before.sum())
+    after_bytes = int(after.sum())
+    return result, {
+        "memory_before_bytes": before_bytes,
+        "memory_after_bytes": after_bytes,
+        "memory_saved_percentage": (
+            round((1 - after_bytes / before_bytes) * 100, 2) if before_bytes else 0.0
+        ),
+        "column_dtypes": changes,
+    }
@@ -2,6 +2,7 @@
 Main data processor that orchestrates schema inference, statistics, and quality assessment
 """
 
+import asyncio
 import io
 from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
@@ -12,6 +13,8 @@ from datetime import datetime, timezone
 from .schema_inference import SchemaInferenceService, SchemaDefinition
 from .statistics_engine import StatisticsEngine, DatasetStatistics
 from .quality_assessment import QualityAssessmentService, QualityReport
+from .ingestion import get_ingestion_engine
+from .compaction import compact_dataframe
 
 
 class ProcessedData:
@@ -23,13 +26,15 @@ class ProcessedData:
         schema: SchemaDefinition,
         statistics: DatasetStatistics,
         quality_report: QualityReport,
-        file_metadata: Dict[str, Any]
+        file_metadata: Dict[str, Any],
+        memory_report: Optional[Dict[str, Any]] = None
     ):
         self.dataframe = dataframe
         self.schema = schema
         self.statistics = statistics
         self.quality_report = quality_report
         self.file_metadata = file_metadata
+        self.memory_report = memory_report or {}
         self.processed_at = datetime.now(timezone.utc)
     
     def to_dict(self) -> Dict[str, Any]:
@@ -40,6 +45,7 @@ class ProcessedData:
             "quality_report": self.quality_report.model_dump(),
             "file_metadata": self.file_metadata,
             "processed_at": self.processed_at.isoformat(),
+            "memory_report": self.memory_report,
             "preview": self.get_preview()
         }
     
@@ -98,7 +104,9 @@ class DataProcessor:
         self,
         schema_sample_size: int = 1000,
         outlier_method: str = "iqr",
-        correlation_threshold: float = 0.7
+        correlation_threshold: float = 0.7,
+        ingestion_engine: Optional[str] = None,
+        compact: bool = True
     ):
         """
         Initialize data processor with component services
@@ -107,7 +115,12 @@ class DataProcessor:
             schema_sample_size: Number of rows to sample for schema inference
             outlier_method: Method for outlier detection ('iqr' or 'zscore')
             correlation_threshold: Threshold for flagging high correlations
+            ingestion_engine: File reader ('arrow' or 'pandas', default from
+                INGESTION_ENGINE)
+            compact: Shrink column dtypes to match the inferred schema
         """
+        self.ingestion = get_ingestion_engine(ingestion_engine)
+        self.compact = compact
         self.schema_service = SchemaInferenceService(sample_size=schema_sample_size)
         self.stats_engine = StatisticsEngine(
             outlier_method=outlier_method,
@@ -216,6 +229,11 @@ class DataProcessor:
             file_type=file_metadata.get("file_type", "unknown")
         )
         
+        # Shrink dtypes now that column types are known
+        memory_report = None
+        if self.compact:
+            df, memory_report = compact_dataframe(df, schema)
+        
         # Create column type mapping
         column_types = {col.name: col.data_type.value for col in schema.columns}
         
@@ -237,7 +255,8 @@ class DataProcessor:
             schema=schema,
             statistics=statistics,
             quality_report=quality_report,
-            file_metadata=file_metadata
+            file_metadata=file_metadata,
+            memory_report=memory_report
         )
     
     def _detect_file_type(self, file_path: str) -> str:
@@ -264,30 +283,14 @@ class DataProcessor:
         delimiter: Optional[str]
     ) -> pd.DataFrame:
         """Read file from disk"""
-        if file_type == 'csv':
+        if file_type == 'csv' and not delimiter:
             # Auto-detect delimiter if not provided
-            if not delimiter:
-                delimiter = self._detect_delimiter(file_path)
-            
-            return pd.read_csv(
-                file_path,
-                encoding=encoding,
-                delimiter=delimiter,
-                low_memory=False
-            )
-        
-        elif file_type == 'excel':
-            # Read first sheet by default
-            return pd.read_excel(file_path, engine='openpyxl')
-        
-        elif file_type == 'json':
-            return pd.read_json(file_path)
+            delimiter = self._detect_delimiter(file_path)
         
-        elif file_type == 'parquet':
-            return pd.read_parquet(file_path)
-        
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
+        # Parsing runs off the event loop; the arrow engine releases the GIL
+        return await asyncio.to_thread(
+            self.ingestion.read, file_path, file_type, encoding, delimiter
+        )
     
     async def _read_file_object(
         self,
@@ -297,33 +300,16 @@ class DataProcessor:
         delimiter: Optional[str]
     ) -> pd.DataFrame:
         """Read file from file-like object"""
-        if file_type == 'csv':
-            # Auto-detect delimiter if not provided
-            if not delimiter:
-                # Read first few lines to detect delimiter
-                file_obj.seek(0)
-                sample = file_obj.read(1024).decode(encoding)
-                file_obj.seek(0)
-                delimiter = self._detect_delimiter_from_sample(sample)
-            
-            return pd.read_csv(
-                file_obj,
-                encoding=encoding,
-                delimiter=delimiter,
-                low_memory=False
-            )
-        
-        elif file_type == 'excel':
-            return pd.read_excel(file_obj, engine='openpyxl')
-        
-        elif file_type == 'json':
-            return pd.read_json(file_obj)
-        
-        elif file_type == 'parquet':
-            return pd.read_parquet(file_obj)
-        
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
+        if file_type == 'csv' and not delimiter:
+            # Read first few lines to detect delimiter
+            file_obj.seek(0)
+            sample = file_obj.read(1024).decode(encoding)
+            file_obj.seek(0)
+            delimiter = self._detect_delimiter_from_sample(sample)
+        
+        return await asyncio.to_thread(
+            self.ingestion.read, file_obj, file_type, encoding, delimiter
+        )
     
     def _detect_delimiter(self, file_path: str) -> str:
         """Detect CSV delimiter from file"""
@@ -0,0 +1,256 @@
+"""
+Pluggable file ingestion engines
+
+The pandas engine is the original C-parser path. The Arrow engine parses
+CSV, JSON Lines and Parquet with pyarrow's multithreaded readers in
+fixed-size blocks parsed in parallel, keeps the result as an Arrow table
+and converts it to pandas only when a DataFrame is requested, releasing
+Arrow buffers as columns are converted. A pre-scan of the first block
+supplies column type hints so the parsed frame matches what the pandas
+engine produces; inputs Arrow cannot read that way fall back to pandas.
+
+Select the engine with the INGESTION_ENGINE environment variable
+("arrow" or "pandas"); Arrow is the default when pyarrow is installed.
+"""
+
+from typing import BinaryIO, Optional, Union
+import io
+import json
+import logging
+import os
+
+import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.json as pa_json
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+# Bytes per parse block; blocks are parsed in parallel
+ARROW_BLOCK_SIZE = int(os.getenv("INGESTION_BLOCK_SIZE", str(4 * 1024 * 1024)))
+
+# Bytes sampled for column type hints before the full parse
+PRESCAN_BYTES = 1024 * 1024
+
+# Strings pandas reads as missing; Arrow's defaults differ (e.g. "None", "<NA>")
+PANDAS_NA_VALUES = sorted(STR_NA_VALUES)
+
+
+def _read_head(source: Source, size: int) -> bytes:
+    """Read the first bytes of a path or file object, leaving it rewound"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read(size)
+    position = source.tell()
+    head = source.read(size)
+    source.seek(position)
+    return head
+
+
+def _rewind(source: Source) -> None:
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+
+
+class PandasIngestionEngine:
+    """Reads files with the pandas parsers"""
+
+    name = "pandas"
+
+    def read(
+        self,
+        source: Source,
+        file_type: str,
+        encoding: str = "utf-8",
+        delimiter: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Read a path or binary file object into a DataFrame"""
+        if file_type == 'csv':
+            return pd.read_csv(
+                source,
+                encoding=encoding,
+                delimiter=delimiter or ',',
+                low_memory=False
+            )
+
+        elif file_type == 'excel':
+            # Read first sheet by default
+            return pd.read_excel(source, engine='openpyxl')
+
+        elif file_type == 'json':
+            return pd.read_json(source, lines=self._is_json_lines(source))
+
+        elif file_type == 'parquet':
+            return pd.read_parquet(source)
+
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+
+    @staticmethod
+    def _is_json_lines(source: Source) -> bool:
+        """Whether a JSON input is one object per line rather than one document"""
+        lines = [line for line in _read_head(source, 64 * 1024).splitlines() if line.strip()]
+        if len(lines) < 2 or not lines[0].lstrip().startswith(b"{"):
+            return False
+        try:
+            return isinstance(json.loads(lines[0]), dict)
+        except ValueError:
+            return False
+
+
+class ArrowIngestionEngine(PandasIngestionEngine):
+    """Reads files with pyarrow's multithreaded block readers"""
+
+    name = "arrow"
+
+    def __init__(self, block_size: int = ARROW_BLOCK_SIZE, use_threads: bool = True):
+        if not PYARROW_AVAILABLE:
+            raise ValueError("pyarrow is required for the arrow ingestion engine")
+        self.block_size = block_size
+        self.use_threads = use_threads
+
+    def read(
+        self,
+        source: Source,
+        file_type: str,
+        encoding: str = "utf-8",
+        delimiter: Optional[str] = None
+    ) -> pd.DataFrame:
+        table = self.read_table(source, file_type, encoding, delimiter)
+        if table is None:
+            _rewind(source)
+            return super().read(source, file_type, encoding, delimiter)
+        return table_to_dataframe(table)
+
+    def read_table(
+        self,
+        source: Source,
+        file_type: str,
+        encoding: str = "utf-8",
+        delimiter: Optional[str] = None
+    ) -> Optional["pa.Table"]:
+        """
+        Parse into an Arrow table without converting to pandas
+
+        Returns None when the input needs the pandas engine (Excel, JSON
+        documents, CSV headers pandas would rename, malformed input).
+        """
+        try:
+            if file_type == 'csv':
+                return self._read_csv(source, encoding, delimiter)
+
+            elif file_type == 'json':
+                if not self._is_json_lines(source):
+                    return None
+                return pa_json.read_json(
+                    source, read_options=pa_json.ReadOptions(
+                        use_threads=self.use_threads, block_size=self.block_size
+                    )
+                )
+
+            elif file_type == 'parquet':
+                return pq.read_table(source, use_threads=self.use_threads)
+
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            logger.info(f"Arrow could not parse {file_type} input, using pandas: {e}")
+            return None
+
+        if file_type == 'excel':
+            return None
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+    def _read_csv(self, source: Source, encoding: str, delimiter: Optional[str]) -> Optional["pa.Table"]:
+        """
+        Parse a CSV with column types hinted by a pre-scan of its first block
+
+        Arrow infers types over whole columns, but unlike pandas it turns
+        dates and times into temporal types. The pre-scan pins those
+        columns to strings; temporal columns that only appear later in
+        the file trigger a second parse with them pinned too. Returns None
+        for headers pandas would rename (blank or duplicate names).
+        """
+        read_options = pa_csv.ReadOptions(
+            use_threads=self.use_threads,
+            block_size=self.block_size,
+            encoding=encoding
+        )
+        parse_options = pa_csv.ParseOptions(delimiter=delimiter or ',')
+
+        head = _read_head(source, PRESCAN_BYTES)
+        if len(head) == PRESCAN_BYTES:
+            # Only parse complete lines of the sample
+            head = head[:head.rfind(b"\n") + 1]
+        sample = pa_csv.read_csv(
+            io.BytesIO(head),
+            read_options=pa_csv.ReadOptions(use_threads=False, encoding=encoding),
+            parse_options=parse_options,
+            convert_options=pa_csv.ConvertOptions(
+                null_values=PANDAS_NA_VALUES, strings_can_be_null=True
+            )
+        )
+
+        names = sample.column_names
+        if any(not name.strip() for name in names) or len(set(names)) != len(names):
+            return None
+
+        string_columns = {
+            field.name for field in sample.schema if pa.types.is_temporal(field.type)
+        }
+        while True:
+            convert_options = pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in string_columns},
+                null_values=PANDAS_NA_VALUES,
+                strings_can_be_null=True
+            )
+            table = pa_csv.read_csv(source, read_options, parse_options, convert_options)
+            late_temporal = {
+                field.name for field in table.schema if pa.types.is_temporal(field.type)
+            }
+            if not late_temporal:
+                break
+            string_columns |= late_temporal
+            table = None
+            _rewind(source)
+
+        # Columns with no values at all are float NaN in pandas
+        for i, field in enumerate(table.schema):
+            if pa.types.is_null(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+        return table
+
+
+def table_to_dataframe(table: "pa.Table") -> pd.DataFrame:
+    """
+    Convert an Arrow table to pandas, freeing Arrow buffers as it goes
+
+    The table must not be used afterwards.
+    """
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+INGESTION_ENGINES = {
+    "pandas": PandasIngestionEngine,
+    "arrow": ArrowIngestionEngine,
+}
+
+
+def get_ingestion_engine(name: Optional[str] = None) -> PandasIngestionEngine:
+    """Create the named ingestion engine, or the configured default"""
+    if name is None:
+        name = os.getenv("INGESTION_ENGINE", "arrow" if PYARROW_AVAILABLE else "pandas")
+
+    if name not in INGESTION_ENGINES:
+        raise ValueError(f"Unknown ingestion engine: {name}")
+    if name == "arrow" and not PYARROW_AVAILABLE:
+        logger.warning("pyarrow not installed, using pandas ingestion engine")
+        name = "pandas"
+    return INGESTION_ENGINES[name]()
@@ -0,0 +1,306 @@
+"""
+Streaming feature drift detection against training reference profiles
+
+At training time each raw input feature is summarized into a small
+reference profile: quantile bin edges and counts for numeric features,
+top category counts for categorical ones. Served records update fixed-size
+live histograms over the same bins, so memory is O(features x bins) per
+model regardless of traffic. Drift scores (PSI, binned KS, Jensen-Shannon)
+are computed by a background task over tumbling windows of live data.
+"""
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import bisect
+import logging
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DRIFT_BINS = 10
+MAX_REFERENCE_CATEGORIES = 20
+# Smoothing for empty bins so PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+def build_feature_profile(
+    df: pd.DataFrame,
+    bins: int = DRIFT_BINS,
+    max_categories: int = MAX_REFERENCE_CATEGORIES
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Summarize raw training features into a compact reference profile
+
+    Numeric features get quantile bin edges with per-bin counts; other
+    features get their most frequent categories plus an "other" count.
+    """
+    profile = {}
+    for column in df.columns:
+        series = df[column]
+        values = series.dropna()
+        if values.empty:
+            continue
+
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            data = values.to_numpy(dtype=np.float64)
+            quantiles = np.quantile(data, np.linspace(0, 1, bins + 1))
+            edges = np.unique(quantiles[1:-1])
+            counts = np.bincount(np.searchsorted(edges, data, side="right"), minlength=len(edges) + 1)
+            profile[str(column)] = {
+                "type": "numeric",
+                "edges": edges.tolist(),
+                "counts": counts.tolist(),
+                "missing": int(len(series) - len(values))
+            }
+        else:
+            value_counts = values.astype(str).value_counts()
+            top = value_counts.iloc[:max_categories]
+            profile[str(column)] = {
+                "type": "categorical",
+                "categories": top.index.tolist(),
+                "counts": top.tolist() + [int(value_counts.iloc[max_categories:].sum())],
+                "missing": int(len(series) - len(values))
+            }
+    return profile
+
+
+class FeatureHistogram:
+    """Live counts for one feature over its reference bins"""
+
+    __slots__ = ("kind", "edges", "index", "counts", "missing")
+
+    def __init__(self, reference: Dict[str, Any]):
+        self.kind = reference["type"]
+        self.edges = reference.get("edges", [])
+        self.index = {category: i for i, category in enumerate(reference.get("categories", []))}
+        self.counts = np.zeros(len(reference["counts"]), dtype=np.int64)
+        self.missing = 0
+
+    def update(self, value: Any) -> None:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            self.missing += 1
+        elif self.kind == "numeric":
+            try:
+                self.counts[bisect.bisect_right(self.edges, float(value))] += 1
+            except (TypeError, ValueError):
+                self.missing += 1
+        else:
+            # Unknown categories share the trailing "other" bin
+            self.counts[self.index.get(str(value), len(self.counts) - 1)] += 1
+
+    def merge(self, other: "FeatureHistogram") -> None:
+        self.counts += other.counts
+        self.missing += other.missing
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+
+class LiveProfile:
+    """Live histograms for every profiled feature of one model version"""
+
+    def __init__(self, version: str, reference: Dict[str, Dict[str, Any]]):
+        self.version = version
+        self.reference = reference
+        self.histograms = {name: FeatureHistogram(ref) for name, ref in reference.items()}
+        self.observations = 0
+
+    def observe(self, record: Dict[str, Any]) -> None:
+        for name, histogram in self.histograms.items():
+            histogram.update(record.get(name))
+        self.observations += 1
+
+    def merge(self, other: "LiveProfile") -> None:
+        for name, histogram in self.histograms.items():
+            histogram.merge(other.histograms[name])
+        self.observations += other.observations
+
+
+def _distributions(reference_counts: List[int], live_counts: np.ndarray):
+    p = np.asarray(reference_counts, dtype=np.float64)
+    q = live_counts.astype(np.float64)
+    return p / p.sum(), q / q.sum()
+
+
+def population_stability_index(p: np.ndarray, q: np.ndarray) -> float:
+    p = np.clip(p, PSI_EPSILON, None)
+    q = np.clip(q, PSI_EPSILON, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def jensen_shannon_divergence(p: np.ndarray, q: np.ndarray) -> float:
+    """Jensen-Shannon divergence in bits (0 = identical, 1 = disjoint)"""
+    m = (p + q) / 2
+
+    def kl(a, b):
+        mask = a > 0
+        return float(np.sum(a[mask] * np.log2(a[mask] / b[mask])))
+
+    return 0.5 * kl(p, m) + 0.5 * kl(q, m)
+
+
+def binned_ks_statistic(p: np.ndarray, q: np.ndarray) -> float:
+    """KS statistic over bin boundaries (a lower bound on the exact statistic)"""
+    return float(np.max(np.abs(np.cumsum(p) - np.cumsum(q))))
+
+
+def compare_profiles(
+    live: LiveProfile,
+    psi_threshold: float,
+    min_samples: int
+) -> Dict[str, Any]:
+    """Drift scores per feature for a live window against its reference"""
+    feature_scores = {}
+    for name, histogram in live.histograms.items():
+        reference = live.reference[name]
+        if histogram.total < min_samples or sum(reference["counts"]) == 0:
+            continue
+
+        p, q = _distributions(reference["counts"], histogram.counts)
+        scores = {
+            "psi": round(population_stability_index(p, q), 4),
+            "js_divergence": round(jensen_shannon_divergence(p, q), 4),
+        }
+        if histogram.kind == "numeric":
+            scores["ks_statistic"] = round(binned_ks_statistic(p, q), 4)
+        feature_scores[name] = scores
+
+    features_with_drift = sorted(
+        name for name, scores in feature_scores.items() if scores["psi"] >= psi_threshold
+    )
+    drift_score = max((scores["psi"] for scores in feature_scores.values()), default=0.0)
+
+    if not feature_scores:
+        recommendation = "Not enough live predictions to assess drift"
+    elif features_with_drift:
+        recommendation = (
+            f"Significant drift in {len(features_with_drift)} feature(s); "
+            "consider retraining on recent data"
+        )
+    else:
+        recommendation = "No significant drift detected"
+
+    return {
+        "drift_detected": bool(features_with_drift),
+        "drift_score": drift_score,
+        "features_with_drift": features_with_drift,
+        "feature_scores": feature_scores,
+        "live_samples": live.observations,
+        "recommendation": recommendation,
+    }
+
+
+class DriftMonitor:
+    """Collects live feature histograms and scores drift on a schedule
+
+    Each model accumulates a window of live data; once the window holds
+    at least min_samples records the scheduled check scores it, keeps the
+    result and starts a fresh window.
+    """
+
+    def __init__(
+        self,
+        check_interval: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        psi_threshold: Optional[float] = None
+    ):
+        self.check_interval = check_interval if check_interval is not None else float(
+            os.getenv("DRIFT_CHECK_INTERVAL", "300")
+        )
+        self.min_samples = min_samples or int(os.getenv("DRIFT_MIN_SAMPLES", "200"))
+        self.psi_threshold = psi_threshold if psi_threshold is not None else float(
+            os.getenv("DRIFT_PSI_THRESHOLD", "0.2")
+        )
+        self.windows: Dict[str, LiveProfile] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def observe(self, model: Any, records: List[Dict[str, Any]]) -> None:
+        """Update live histograms from served records; no I/O"""
+        reference = getattr(model, "feature_profile", None)
+        if not reference:
+            return
+
+        window = self.windows.get(model.model_id)
+        if window is None or window.version != model.version:
+            # First traffic for this model or a new version: new reference
+            window = self.windows[model.model_id] = LiveProfile(model.version, reference)
+            self.results.pop(model.model_id, None)
+
+        for record in records:
+            window.observe(record)
+
+    def evaluate(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Score the current live window without resetting it"""
+        window = self.windows.get(model_id)
+        if window is None or window.observations < self.min_samples:
+            return None
+        result = compare_profiles(window, self.psi_threshold, self.min_samples)
+        result["window_end"] = datetime.utcnow()
+        return result
+
+    def check_all(self) -> int:
+        """Score every full window, keep the results and start new windows"""
+        checked = 0
+        for model_id, window in list(self.windows.items()):
+            result = self.evaluate(model_id)
+            if result is None:
+                continue
+            self.results[model_id] = result
+            self.windows[model_id] = LiveProfile(window.version, window.reference)
+            checked += 1
+            if result["drift_detected"]:
+                logger.warning(
+                    f"Drift detected for model {model_id}: {result['features_with_drift']}"
+                )
+        return checked
+
+    def get_result(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Latest scheduled result, or a score of the current window if none yet"""
+        return self.results.get(model_id) or self.evaluate(model_id)
+
+    def clear(self) -> None:
+        self.windows.clear()
+        self.results.clear()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                self.check_all()
+            except Exception as e:
+                logger.error(f"Scheduled drift check failed: {e}")
+
+    def start(self) -> None:
+        """Start scheduled drift checks on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop scheduled drift checks"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global drift monitor
+drift_monitor = DriftMonitor()
+
+
+async def init_drift_monitor():
+    """Start scheduled drift checks"""
+    drift_monitor.start()
+
+
+async def cleanup_drift_monitor():
+    """Stop scheduled drift checks"""
+    await drift_monitor.stop()
@@ -1,6 +1,7 @@
 from typing import Dict, Any
 from app.models.user_data import UserData
 from app.services.s3_service import download_file_from_s3
+import asyncio
 import logging
 import pandas as pd
 import numpy as np
@@ -108,7 +109,7 @@ def generate_grouped_insights(df: pd.DataFrame) -> Dict[str, Any]:
 
 
 async def generate_eda_summary(user_data: UserData) -> Dict[str, Any]:
-    local_file_path = download_file_from_s3(user_data.s3_url)
+    local_file_path = await asyncio.to_thread(download_file_from_s3, user_data.s3_url)
     df = pd.read_csv(local_file_path)
 
     eda_summary = {
@@ -0,0 +1,203 @@
+"""
+Micro-batching for production inference
+
+Concurrent prediction requests for the same model are collected for a few
+milliseconds (or until enough rows arrive), run through one vectorized
+transform/predict call, and the results are scattered back to each request.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+
+from app.services.metrics_collector import ml_metrics
+from app.services.model_training import matrix_input, prepare_model_input
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    """A request waiting for its batch"""
+
+    __slots__ = ("records", "include_probabilities", "future", "enqueued_at")
+
+    def __init__(self, records: List[Dict[str, Any]], include_probabilities: bool, future: asyncio.Future):
+        self.records = records
+        self.include_probabilities = include_probabilities
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class ModelBatcher:
+    """Collects requests for one loaded model and predicts them together"""
+
+    def __init__(
+        self,
+        model_id: str,
+        model: Any,
+        feature_engineer: Optional[Any] = None,
+        feature_names: Optional[List[str]] = None,
+        max_batch_rows: int = 64,
+        max_wait_ms: float = 5.0
+    ):
+        self.model_id = model_id
+        self.model = model
+        self.feature_engineer = feature_engineer
+        self.feature_names = feature_names
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[_PendingRequest] = []
+        self._pending_rows = 0
+        self._full = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def predict(
+        self,
+        records: List[Dict[str, Any]],
+        include_probabilities: bool = False
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Queue records for the next batch and wait for their predictions"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(_PendingRequest(records, include_probabilities, future))
+        self._pending_rows += len(records)
+
+        if self._flush_task is None or self._flush_task.done():
+            self._full.clear()
+            self._flush_task = asyncio.create_task(self._flush_after_wait())
+        if self._pending_rows >= self.max_batch_rows:
+            self._full.set()
+
+        return await future
+
+    async def _flush_after_wait(self) -> None:
+        try:
+            await asyncio.wait_for(self._full.wait(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        self._flush_task = None
+
+        # Only requests with the same fields are combined, so a request with
+        # missing fields fails on its own instead of being NaN-filled
+        groups: Dict[Tuple[Any, ...], List[_PendingRequest]] = {}
+        for request in batch:
+            fields = tuple(sorted({key for record in request.records for key in record}))
+            groups.setdefault(fields, []).append(request)
+        for group in groups.values():
+            await self._run_batch(group)
+
+    async def _run_batch(self, batch: List[_PendingRequest]) -> None:
+        started = time.perf_counter()
+        try:
+            records = batch[0].records if len(batch) == 1 else [
+                record for request in batch for record in request.records
+            ]
+            want_proba = any(request.include_probabilities for request in batch)
+            predictions, probabilities = await self._predict_records(records, want_proba)
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0].future.done():
+                    batch[0].future.set_exception(e)
+                return
+            # Isolate the failing request by predicting each one on its own
+            logger.warning(f"Batched prediction failed for {self.model_id}, retrying individually: {e}")
+            for request in batch:
+                await self._run_batch([request])
+            return
+
+        finished = time.perf_counter()
+        ml_metrics.record_inference_batch(
+            self.model_id,
+            len(records),
+            finished - started,
+            [started - request.enqueued_at for request in batch]
+        )
+
+        offset = 0
+        for request in batch:
+            end = offset + len(request.records)
+            if not request.future.done():
+                request_probabilities = None
+                if request.include_probabilities and probabilities is not None:
+                    request_probabilities = probabilities[offset:end]
+                request.future.set_result((predictions[offset:end], request_probabilities))
+            offset = end
+
+    async def _predict_records(
+        self,
+        records: List[Dict[str, Any]],
+        want_proba: bool
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        X_transformed = await prepare_model_input(
+            self.model, records, self.feature_engineer, self.feature_names
+        )
+
+        with matrix_input():
+            predictions = np.asarray(self.model.predict(X_transformed))
+            probabilities = None
+            if want_proba and hasattr(self.model, "predict_proba"):
+                probabilities = np.asarray(self.model.predict_proba(X_transformed))
+        return predictions, probabilities
+
+
+class InferenceBatcherRegistry:
+    """Opt-in registry of per-model batchers
+
+    Enabled with INFERENCE_BATCHING_ENABLED; batch limits come from
+    INFERENCE_BATCH_MAX_ROWS and INFERENCE_BATCH_MAX_WAIT_MS.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        max_batch_rows: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        self.enabled = enabled if enabled is not None else (
+            os.getenv("INFERENCE_BATCHING_ENABLED", "false").lower() == "true"
+        )
+        self.max_batch_rows = max_batch_rows or int(os.getenv("INFERENCE_BATCH_MAX_ROWS", "64"))
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else float(
+            os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "5")
+        )
+        self._batchers: Dict[str, ModelBatcher] = {}
+
+    def get(self, key: str) -> Optional[ModelBatcher]:
+        """Batcher for an already loaded model, if any"""
+        return self._batchers.get(key)
+
+    def register(
+        self,
+        key: str,
+        model_id: str,
+        model: Any,
+        feature_engineer: Optional[Any] = None,
+        feature_names: Optional[List[str]] = None
+    ) -> ModelBatcher:
+        """Create (or return) the batcher for a loaded model"""
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            batcher = ModelBatcher(
+                model_id,
+                model,
+                feature_engineer,
+                feature_names,
+                max_batch_rows=self.max_batch_rows,
+                max_wait_ms=self.max_wait_ms
+            )
+            self._batchers[key] = batcher
+        return batcher
+
+    def remove(self, key: str) -> None:
+        self._batchers.pop(key, None)
+
+    def clear(self) -> None:
+        self._batchers.clear()
+
+
+# Global registry instance
+inference_batchers = InferenceBatcherRegistry()
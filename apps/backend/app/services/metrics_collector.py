@@ -8,6 +8,7 @@ ML Metrics:
 - Prediction latency histogram
 - Model accuracy gauge (updated after training)
 - Dataset size histogram
+- Inference batch size, queue wait and batch latency histograms
 
 Business Metrics:
 - Active users gauge (from auth)
@@ -80,6 +81,31 @@ class MLMetricsCollector:
             registry=registry,
         )
 
+        # Micro-batched inference histograms
+        self.inference_batch_size = Histogram(
+            name="ml_inference_batch_size_rows",
+            documentation="Rows per micro-batched inference call",
+            labelnames=["model_id"],
+            buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+            registry=registry,
+        )
+
+        self.inference_queue_wait = Histogram(
+            name="ml_inference_queue_wait_seconds",
+            documentation="Time a request waited for its inference batch to start",
+            labelnames=["model_id"],
+            buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1),
+            registry=registry,
+        )
+
+        self.inference_batch_latency = Histogram(
+            name="ml_inference_batch_latency_seconds",
+            documentation="Transform and predict time per inference batch",
+            labelnames=["model_id"],
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+            registry=registry,
+        )
+
     @contextmanager
     def track_training_duration(
         self, model_type: str, problem_type: str = "unknown"
@@ -158,6 +184,24 @@ class MLMetricsCollector:
         """
         self.dataset_size.labels(dataset_id=dataset_id).observe(num_rows)
 
+    def record_inference_batch(
+        self, model_id: str, num_rows: int, batch_seconds: float, queue_waits: list
+    ):
+        """
+        Record one micro-batched inference call.
+
+        Args:
+            model_id: Unique model identifier
+            num_rows: Rows in the batch
+            batch_seconds: Transform and predict time for the batch
+            queue_waits: Per-request seconds spent waiting for the batch
+        """
+        self.inference_batch_size.labels(model_id=model_id).observe(num_rows)
+        self.inference_batch_latency.labels(model_id=model_id).observe(batch_seconds)
+        queue_wait = self.inference_queue_wait.labels(model_id=model_id)
+        for wait in queue_waits:
+            queue_wait.observe(wait)
+
 
 class BusinessMetricsCollector:
     """Collector for business metrics."""
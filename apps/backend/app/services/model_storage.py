@@ -2,6 +2,7 @@
 Model storage service for saving and loading ML models
 """
 
+import asyncio
 import pickle
 import joblib
 from typing import Any, Optional, Tuple
@@ -14,6 +15,12 @@ from app.services.s3_service import S3Service
 from app.models.ml_model import MLModel
 from app.services.model_training.automl_engine import ModelCandidate
 from app.services.model_training.feature_engineer import FeatureEngineer
+from app.services.onnx_backend import (
+    OnnxModel,
+    convert_to_onnx,
+    onnx_serving_enabled,
+    onnx_sessions,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +66,15 @@ class ModelStorageService:
         model_key = f"{self.models_prefix}{user_id}/{model_id}/model.pkl"
         await self.s3_service.upload_file_obj(model_buffer, model_key)
         
+        # Convert to ONNX alongside the joblib artifact when enabled
+        onnx_path = None
+        if onnx_serving_enabled():
+            onnx_bytes = convert_to_onnx(model_candidate.estimator)
+            if onnx_bytes:
+                onnx_key = f"{self.models_prefix}{user_id}/{model_id}/model.onnx"
+                await self.s3_service.upload_file_obj(io.BytesIO(onnx_bytes), onnx_key)
+                onnx_path = f"s3://{self.s3_service.bucket_name}/{onnx_key}"
+        
         # Serialize feature engineer if it has transformers
         feature_transformer_path = None
         if feature_engineer.transformers:
@@ -90,7 +106,9 @@ class ModelStorageService:
             n_features=len(model_metadata["feature_names"]),
             model_path=f"s3://{self.s3_service.bucket_name}/{model_key}",
             feature_transformer_path=feature_transformer_path,
+            onnx_path=onnx_path,
             feature_importance=model_metadata.get("feature_importance"),
+            feature_profile=model_metadata.get("feature_profile"),
             training_config=model_metadata.get("training_config", {})
         )
         
@@ -120,12 +138,15 @@ class ModelStorageService:
         if not ml_model:
             raise ValueError(f"Model {model_id} not found for user {user_id}")
         
-        # Extract S3 key from path
-        model_key = ml_model.model_path.replace(f"s3://{self.s3_service.bucket_name}/", "")
+        model = None
+        if ml_model.onnx_path and onnx_serving_enabled():
+            model = await self._load_onnx_model(ml_model.onnx_path)
         
-        # Download model
-        model_data = await self.s3_service.download_file_obj(model_key)
-        model = joblib.load(io.BytesIO(model_data))
+        if model is None:
+            # Extract S3 key from path
+            model_key = ml_model.model_path.replace(f"s3://{self.s3_service.bucket_name}/", "")
+            
+            model = await self._load_joblib(model_key)
         
         # Load feature transformer if exists
         feature_engineer = None
@@ -133,8 +154,7 @@ class ModelStorageService:
             transformer_key = ml_model.feature_transformer_path.replace(
                 f"s3://{self.s3_service.bucket_name}/", ""
             )
-            transformer_data = await self.s3_service.download_file_obj(transformer_key)
-            feature_engineer = joblib.load(io.BytesIO(transformer_data))
+            feature_engineer = await self._load_joblib(transformer_key)
         
         # Update last used timestamp
         ml_model.last_used_at = datetime.now(timezone.utc)
@@ -142,6 +162,32 @@ class ModelStorageService:
         
         return model, feature_engineer
     
+    async def _load_joblib(self, key: str) -> Any:
+        """Load a joblib artifact, memory-mapping its arrays from the local cache when enabled"""
+        path = await self.s3_service.download_file_path(key)
+        if path is not None:
+            # Copy-on-write maps: pages are shared between workers until written
+            return await asyncio.to_thread(joblib.load, path, mmap_mode="c")
+        data = await self.s3_service.download_file_obj(key)
+        return joblib.load(io.BytesIO(data))
+    
+    async def _load_onnx_model(self, onnx_path: str) -> Optional[OnnxModel]:
+        """Get a cached ONNX session, or None to fall back to the native model"""
+        model = onnx_sessions.get(onnx_path)
+        if model is not None:
+            return model
+        
+        try:
+            onnx_key = onnx_path.replace(f"s3://{self.s3_service.bucket_name}/", "")
+            onnx_bytes = await self.s3_service.download_file_obj(onnx_key)
+            model = OnnxModel.from_bytes(onnx_bytes)
+        except Exception as e:
+            logger.warning(f"Failed to load ONNX model {onnx_path}, using native model: {e}")
+            return None
+        
+        onnx_sessions.put(onnx_path, model)
+        return model
+    
     async def delete_model(self, model_id: str, user_id: str) -> bool:
         """
         Delete a model and its files
@@ -174,6 +220,12 @@ class ModelStorageService:
                     f"s3://{self.s3_service.bucket_name}/", ""
                 )
                 await self.s3_service.delete_file(transformer_key)
+            
+            # Delete ONNX graph if exists
+            if ml_model.onnx_path:
+                onnx_sessions.remove(ml_model.onnx_path)
+                onnx_key = ml_model.onnx_path.replace(f"s3://{self.s3_service.bucket_name}/", "")
+                await self.s3_service.delete_file(onnx_key)
         except Exception as e:
             logger.error(f"Error deleting model files: {str(e)}")
         
@@ -4,6 +4,12 @@ Model training services for AutoML functionality
 
 from .problem_detector import ProblemDetector, ProblemType
 from .feature_engineer import FeatureEngineer, FeatureEngineeringConfig
+from .compiled_features import (
+    CompiledFeaturePipeline,
+    compile_feature_pipeline,
+    matrix_input,
+    prepare_model_input,
+)
 from .automl_engine import AutoMLEngine
 
 __all__ = [
@@ -11,5 +17,9 @@ __all__ = [
     "ProblemType", 
     "FeatureEngineer",
     "FeatureEngineeringConfig",
+    "CompiledFeaturePipeline",
+    "compile_feature_pipeline",
+    "matrix_input",
+    "prepare_model_input",
     "AutoMLEngine",
 ]
\ No newline at end of file
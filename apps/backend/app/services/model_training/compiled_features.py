@@ -0,0 +1,310 @@
+"""
+Compiled inference path for a fitted FeatureEngineer
+
+Maps request records (dicts) straight into a float64 feature matrix using
+constants extracted from the fitted transformers, skipping DataFrame
+construction. Output matches ``FeatureEngineer.transform`` bit for bit; any
+record the compiled path cannot handle raises, and callers fall back to the
+pandas path.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+import math
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler, MinMaxScaler, RobustScaler
+
+logger = logging.getLogger(__name__)
+
+
+
+@contextmanager
+def matrix_input() -> Iterator[None]:
+    """
+    Scope for predicting on compiled matrices
+
+    Compiled matrices are positional, so sklearn would warn on every call for
+    estimators fitted on DataFrames. The warning is silenced inside the block
+    only.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        yield
+
+
+def _is_nan(value: Any) -> bool:
+    return isinstance(value, float) and math.isnan(value)
+
+
+class CompiledFeaturePipeline:
+    """Preallocated, lookup-table version of a fitted FeatureEngineer"""
+
+    def __init__(
+        self,
+        feature_names: List[str],
+        numeric_features: List[str],
+        numeric_fill: Optional[np.ndarray],
+        numeric_nulls_supported: bool,
+        scale_ops: List[Tuple[str, np.ndarray]],
+        numeric_positions: List[Tuple[int, int]],
+        categorical_features: List[str],
+        categorical_fill: Optional[List[Any]],
+        onehot_tables: List[Dict[Any, int]],
+        interactions: List[Tuple[int, int, int, str]],
+        passthrough: List[Tuple[str, int]]
+    ):
+        self.feature_names = feature_names
+        self.numeric_features = numeric_features
+        self.numeric_fill = numeric_fill
+        self.numeric_nulls_supported = numeric_nulls_supported
+        self.scale_ops = scale_ops
+        self.numeric_positions = numeric_positions
+        self.categorical_features = categorical_features
+        self.categorical_fill = categorical_fill
+        self.onehot_tables = onehot_tables
+        self.interactions = interactions
+        self.passthrough = passthrough
+
+    def transform_records(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        """Transform records into a (rows, features) float64 matrix"""
+        n_rows = len(records)
+        out = np.zeros((n_rows, len(self.feature_names)), dtype=np.float64)
+
+        if self.numeric_features:
+            numeric = np.empty((n_rows, len(self.numeric_features)), dtype=np.float64)
+            for row, record in enumerate(records):
+                for j, key in enumerate(self.numeric_features):
+                    value = record[key]
+                    if isinstance(value, str):
+                        raise TypeError(f"Non-numeric value for numeric feature {key}")
+                    if value is None:
+                        if not self.numeric_nulls_supported:
+                            raise ValueError(f"Null value for numeric feature {key}")
+                        value = np.nan
+                    numeric[row, j] = value
+
+            if self.numeric_fill is not None:
+                missing = np.isnan(numeric)
+                if missing.any():
+                    numeric = np.where(missing, self.numeric_fill, numeric)
+
+            # Same in-place operation order as the sklearn scalers
+            for op, params in self.scale_ops:
+                if op == "sub":
+                    numeric -= params
+                elif op == "div":
+                    numeric /= params
+                elif op == "mul":
+                    numeric *= params
+                elif op == "add":
+                    numeric += params
+                else:  # clip
+                    np.clip(numeric, params[0], params[1], out=numeric)
+
+            for j, position in self.numeric_positions:
+                out[:, position] = numeric[:, j]
+
+            for left, right, position, op in self.interactions:
+                if op == "mul":
+                    out[:, position] = numeric[:, left] * numeric[:, right]
+                else:
+                    out[:, position] = numeric[:, left] / (numeric[:, right] + 1e-8)
+
+        for row, record in enumerate(records):
+            for k, table in enumerate(self.onehot_tables):
+                value = record[self.categorical_features[k]]
+                if value is None:
+                    # pandas turns None into NaN or keeps it depending on the
+                    # other rows, so leave these records to the pandas path
+                    raise ValueError(f"Null value for categorical feature {self.categorical_features[k]}")
+                if self.categorical_fill is not None and _is_nan(value):
+                    value = self.categorical_fill[k]
+
+                # Unknown categories encode as all zeros (handle_unknown="ignore")
+                position = table.get(value)
+                if position is not None:
+                    out[row, position] = 1.0
+
+            for key, position in self.passthrough:
+                value = record[key]
+                if isinstance(value, str):
+                    raise TypeError(f"Non-numeric value for feature {key}")
+                out[row, position] = np.nan if value is None else value
+
+        return out
+
+    def model_input(self, model: Any, X: np.ndarray) -> Any:
+        """sklearn and ONNX models take the matrix as is; other libraries get named columns"""
+        if type(model).__module__.startswith("sklearn") or getattr(model, "accepts_matrix", False):
+            return X
+        return pd.DataFrame(X, columns=self.feature_names)
+
+
+def _scale_ops(scaler: Any) -> Optional[List[Tuple[str, np.ndarray]]]:
+    """Operations equivalent to ``scaler.transform`` on a dense float64 matrix"""
+    if type(scaler) is StandardScaler:
+        ops = []
+        if scaler.with_mean:
+            ops.append(("sub", np.asarray(scaler.mean_, dtype=np.float64)))
+        if scaler.with_std:
+            ops.append(("div", np.asarray(scaler.scale_, dtype=np.float64)))
+        return ops
+    if type(scaler) is MinMaxScaler:
+        ops = [
+            ("mul", np.asarray(scaler.scale_, dtype=np.float64)),
+            ("add", np.asarray(scaler.min_, dtype=np.float64)),
+        ]
+        if scaler.clip:
+            ops.append(("clip", np.asarray(scaler.feature_range, dtype=np.float64)))
+        return ops
+    if type(scaler) is RobustScaler:
+        ops = []
+        if scaler.with_centering:
+            ops.append(("sub", np.asarray(scaler.center_, dtype=np.float64)))
+        if scaler.with_scaling:
+            ops.append(("div", np.asarray(scaler.scale_, dtype=np.float64)))
+        return ops
+    return None
+
+
+def compile_feature_pipeline(feature_engineer: Any) -> Optional[CompiledFeaturePipeline]:
+    """
+    Compile a fitted FeatureEngineer for record-at-a-time inference
+
+    Returns None when the fitted configuration uses something the compiled
+    path does not reproduce exactly; callers then keep using ``transform``.
+    """
+    transformers = feature_engineer.transformers
+    numeric_features = list(feature_engineer.numeric_features)
+    categorical_features = list(feature_engineer.categorical_features)
+
+    if "selector" in transformers:
+        feature_names = list(transformers["selected_features"])
+    else:
+        feature_names = list(feature_engineer.feature_names)
+    if not feature_names or len(set(feature_names)) != len(feature_names):
+        return None
+    positions = {name: i for i, name in enumerate(feature_names)}
+
+    # Imputation constants
+    numeric_fill = None
+    numeric_nulls_supported = True
+    if "imputer_numeric" in transformers:
+        imputer = transformers["imputer_numeric"]
+        # mean/median coerce object columns to float, so None is imputed; the
+        # other strategies keep None as a value when a column is all-null
+        numeric_nulls_supported = imputer.strategy in ("mean", "median")
+        statistics = getattr(imputer, "statistics_", None)
+        if statistics is None or len(statistics) != len(numeric_features):
+            return None
+        numeric_fill = np.asarray(statistics, dtype=np.float64)
+        if np.isnan(numeric_fill).any():
+            return None
+
+    categorical_fill = None
+    if "imputer_categorical" in transformers:
+        statistics = getattr(transformers["imputer_categorical"], "statistics_", None)
+        if statistics is None or len(statistics) != len(categorical_features):
+            return None
+        categorical_fill = list(statistics)
+
+    # Scaler parameters
+    scale_ops: List[Tuple[str, np.ndarray]] = []
+    if "scaler" in transformers:
+        ops = _scale_ops(transformers["scaler"])
+        if ops is None:
+            return None
+        scale_ops = ops
+
+    # One-hot lookup tables: category -> output position
+    onehot_tables: List[Dict[Any, int]] = []
+    encoded_names = set()
+    if "encoder" in transformers and feature_engineer.config.encoding_method == "onehot":
+        encoder = transformers["encoder"]
+        if getattr(encoder, "drop_idx_", None) is not None or getattr(encoder, "_infrequent_enabled", False):
+            return None
+        for col, categories in zip(categorical_features, encoder.categories_):
+            table = {}
+            for category in categories:
+                if category is None or _is_nan(category):
+                    return None
+                name = f"{col}_{category}"
+                encoded_names.add(name)
+                if name in positions:
+                    table[category] = positions[name]
+            onehot_tables.append(table)
+    elif any(col in positions for col in categorical_features):
+        # Label-encoded or unencoded categoricals reach transform's output
+        # as raw values, which the compiled matrix cannot represent
+        return None
+
+    # Interaction features computed from scaled numeric columns
+    interactions: List[Tuple[int, int, int, str]] = []
+    interaction_names = set(transformers.get("interaction_features", []))
+    numeric_index = {name: j for j, name in enumerate(numeric_features)}
+    for name in interaction_names:
+        if name not in positions:
+            continue
+        op, separator = ("mul", "_x_") if "_x_" in name else ("div", "_div_")
+        parts = name.split(separator)
+        if len(parts) != 2 or parts[0] not in numeric_index or parts[1] not in numeric_index:
+            return None
+        interactions.append((numeric_index[parts[0]], numeric_index[parts[1]], positions[name], op))
+
+    numeric_positions = [
+        (j, positions[name]) for j, name in enumerate(numeric_features)
+        if name in positions and name not in interaction_names
+    ]
+
+    # Anything else in the output is an input column passed through unchanged
+    categorical_set = set(categorical_features)
+    passthrough = [
+        (name, position) for name, position in positions.items()
+        if name not in numeric_index
+        and name not in interaction_names
+        and name not in encoded_names
+        and name not in categorical_set
+    ]
+
+    return CompiledFeaturePipeline(
+        feature_names=feature_names,
+        numeric_features=numeric_features,
+        numeric_fill=numeric_fill,
+        numeric_nulls_supported=numeric_nulls_supported,
+        scale_ops=scale_ops,
+        numeric_positions=numeric_positions,
+        categorical_features=categorical_features,
+        categorical_fill=categorical_fill,
+        onehot_tables=onehot_tables,
+        interactions=interactions,
+        passthrough=passthrough
+    )
+
+
+async def prepare_model_input(
+    model: Any,
+    records: List[Dict[str, Any]],
+    feature_engineer: Optional[Any] = None,
+    feature_names: Optional[List[str]] = None
+) -> Any:
+    """
+    Build the model input for request records
+
+    Uses the feature engineer's compiled pipeline when it has one and the
+    records are supported, otherwise the DataFrame path.
+    """
+    if feature_engineer is not None:
+        compiled = feature_engineer.compile() if hasattr(feature_engineer, "compile") else None
+        if compiled is not None:
+            try:
+                return compiled.model_input(model, compiled.transform_records(records))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.debug(f"Compiled feature pipeline fell back to pandas: {e}")
+        return await feature_engineer.transform(pd.DataFrame(records))
+
+    df = pd.DataFrame(records)
+    return df[feature_names] if feature_names else df
@@ -17,6 +17,8 @@ from sklearn.feature_selection import (
 from dataclasses import dataclass
 import logging
 
+from .compiled_features import CompiledFeaturePipeline, compile_feature_pipeline
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,6 +56,12 @@ class FeatureEngineer:
         self.numeric_features = []
         self.categorical_features = []
     
+    def __getstate__(self):
+        # The compiled pipeline is derived state; rebuild it after unpickling
+        state = self.__dict__.copy()
+        state.pop("_compiled_pipeline", None)
+        return state
+    
     async def fit_transform(
         self,
         X: pd.DataFrame,
@@ -71,6 +79,7 @@ class FeatureEngineer:
         Returns:
             FeatureEngineeringResult with transformed features
         """
+        self.__dict__.pop("_compiled_pipeline", None)
         X_transformed = X.copy()
         
         # Identify feature types
@@ -179,6 +188,12 @@ class FeatureEngineer:
         
         return X_transformed
     
+    def compile(self) -> Optional[CompiledFeaturePipeline]:
+        """Compiled record-to-matrix pipeline for inference, or None if unsupported"""
+        if "_compiled_pipeline" not in self.__dict__:
+            self._compiled_pipeline = compile_feature_pipeline(self)
+        return self._compiled_pipeline
+    
     def _identify_feature_types(self, df: pd.DataFrame):
         """Identify numeric and categorical features"""
         self.numeric_features = list(df.select_dtypes(include=[np.number]).columns)
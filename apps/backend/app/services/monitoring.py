@@ -4,38 +4,212 @@ Tracks metrics, performance, and security events
 """
 
 import time
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
-from dataclasses import dataclass
 import logging
 from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+# Seconds of per-second buckets kept for rate and percentile queries
+WINDOW_SECONDS = 300
 
-@dataclass
-class MetricEvent:
-    """Single metric event"""
-    name: str
-    value: float
-    timestamp: datetime
-    tags: Dict[str, str]
+# Recent raw samples kept per timer
+MAX_TIMER_SAMPLES = 1000
+
+# Log-linear histogram layout: 2**SUB_BUCKET_BITS sub-buckets per power of two
+# of microseconds, i.e. at most ~3% relative error on percentiles
+SUB_BUCKET_BITS = 6
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+
+
+def _now_second() -> int:
+    return int(time.monotonic())
+
+
+def latency_bucket(micros: int) -> int:
+    """Histogram bucket index for a duration in microseconds"""
+    if micros < 2 * SUB_BUCKET_HALF:
+        return max(micros, 0)
+    shift = micros.bit_length() - SUB_BUCKET_BITS
+    return shift * SUB_BUCKET_HALF + (micros >> shift)
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Largest duration in microseconds that falls into a bucket"""
+    if index < 2 * SUB_BUCKET_HALF:
+        return index
+    shift = index // SUB_BUCKET_HALF - 1
+    mantissa = index % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+class RotatingCounter:
+    """Fixed ring of per-second counts; O(1) add, O(window) queries"""
+
+    __slots__ = ("size", "counts", "stamps")
+
+    def __init__(self, window_seconds: int = WINDOW_SECONDS):
+        self.size = window_seconds
+        self.counts = [0] * window_seconds
+        self.stamps = [-1] * window_seconds
+
+    def add(self, now: int, value: int = 1) -> None:
+        i = now % self.size
+        if self.stamps[i] != now:
+            # Slot holds an expired second: reuse it
+            self.stamps[i] = now
+            self.counts[i] = 0
+        self.counts[i] += value
+
+    def merge(self, other: "RotatingCounter") -> None:
+        """Fold in another counter's seconds, keeping the newer of clashing slots"""
+        for i, stamp in enumerate(other.stamps):
+            if stamp == self.stamps[i]:
+                self.counts[i] += other.counts[i]
+            elif stamp > self.stamps[i]:
+                self.stamps[i] = stamp
+                self.counts[i] = other.counts[i]
+
+    def total(self, now: int, seconds: int) -> int:
+        """Sum over the last `seconds` seconds, including the current one"""
+        oldest = now - min(seconds, self.size)
+        return sum(count for count, stamp in zip(self.counts, self.stamps) if stamp > oldest)
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations at microsecond resolution"""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        index = latency_bucket(int(seconds * 1_000_000))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in list(other.counts.items()):
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Duration in seconds at quantile q (0-1), rounded up to its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return bucket_upper_bound(index) / 1_000_000
+        return bucket_upper_bound(max(self.counts)) / 1_000_000
+
+
+class WindowedHistogram:
+    """Ring of per-second latency histograms"""
+
+    __slots__ = ("size", "slots", "stamps")
+
+    def __init__(self, window_seconds: int = WINDOW_SECONDS):
+        self.size = window_seconds
+        self.slots: List[Optional[LatencyHistogram]] = [None] * window_seconds
+        self.stamps = [-1] * window_seconds
+
+    def record(self, now: int, seconds: float) -> None:
+        i = now % self.size
+        if self.stamps[i] != now:
+            self.stamps[i] = now
+            self.slots[i] = LatencyHistogram()
+        self.slots[i].record(seconds)
+
+    def merge(self, other: "WindowedHistogram") -> None:
+        """Fold in another ring's seconds, keeping the newer of clashing slots"""
+        for i, stamp in enumerate(other.stamps):
+            if other.slots[i] is None:
+                continue
+            if stamp == self.stamps[i]:
+                self.slots[i].merge(other.slots[i])
+            elif stamp > self.stamps[i]:
+                self.stamps[i] = stamp
+                self.slots[i] = LatencyHistogram()
+                self.slots[i].merge(other.slots[i])
+
+    def snapshot(self, now: int, seconds: int, into: Optional[LatencyHistogram] = None) -> LatencyHistogram:
+        """Merge the last `seconds` seconds into one histogram"""
+        merged = into if into is not None else LatencyHistogram()
+        oldest = now - min(seconds, self.size)
+        for slot, stamp in zip(self.slots, self.stamps):
+            if slot is not None and stamp > oldest:
+                merged.merge(slot)
+        return merged
+
+
+class _MonitorShard:
+    """Metrics written by one thread; readers merge all shards"""
+
+    def __init__(self, window_seconds: int, owner: Optional[threading.Thread] = None):
+        self.window_seconds = window_seconds
+        self.owner = owner
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(lambda: deque(maxlen=MAX_TIMER_SAMPLES))
+        self.event_total = 0
+        self.events = RotatingCounter(window_seconds)
+        self.requests = RotatingCounter(window_seconds)
+        self.errors = RotatingCounter(window_seconds)
+        self.api_latency = WindowedHistogram(window_seconds)
+        self.endpoint_latency: Dict[str, WindowedHistogram] = {}
+
+    def absorb(self, other: "_MonitorShard") -> None:
+        """Fold in a shard whose thread has exited and no longer writes to it"""
+        for name, value in other.counters.items():
+            self.counters[name] += value
+        for name, samples in other.timers.items():
+            self.timers[name].extend(samples)
+        self.event_total += other.event_total
+        self.events.merge(other.events)
+        self.requests.merge(other.requests)
+        self.errors.merge(other.errors)
+        self.api_latency.merge(other.api_latency)
+        for endpoint, histogram in other.endpoint_latency.items():
+            if endpoint not in self.endpoint_latency:
+                self.endpoint_latency[endpoint] = WindowedHistogram(self.window_seconds)
+            self.endpoint_latency[endpoint].merge(histogram)
 
 
 class ApplicationMonitor:
-    """Application monitoring and metrics collection"""
+    """Application monitoring and metrics collection
+
+    Recording is O(1): counts go into rotating per-second buckets and
+    durations into per-second HDR-style histograms. Each thread writes to
+    its own shard, so the event loop and worker threads never contend or
+    lock on the recording path; queries merge the shards in O(buckets).
+    Shards of exited threads are folded into one retired shard whenever a
+    new thread registers, so thread churn does not grow the shard list.
+    """
     
-    def __init__(self, max_events: int = 10000):
-        self.max_events = max_events
-        self.events = deque(maxlen=max_events)
-        self.counters = defaultdict(int)
-        self.timers = defaultdict(list)
+    def __init__(self, window_seconds: int = WINDOW_SECONDS):
+        self.window_seconds = window_seconds
         self.gauges = defaultdict(float)
+        self._gauges_lock = threading.Lock()
+        self.started_at = time.monotonic()
         
-        # Performance tracking
-        self.response_times = defaultdict(list)
-        self.error_counts = defaultdict(int)
+        self._local = threading.local()
+        self._retired = _MonitorShard(window_seconds)
+        self._shards: List[_MonitorShard] = [self._retired]
+        self._shards_lock = threading.Lock()
         
         # Security tracking
         self.security_events = deque(maxlen=1000)
@@ -49,23 +223,66 @@ class ApplicationMonitor:
             'total_bytes': 0
         }
     
+    def _shard(self) -> _MonitorShard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _MonitorShard(self.window_seconds, threading.current_thread())
+            # Only shard registration takes the lock, once per thread
+            with self._shards_lock:
+                self._retire_dead_shards()
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+    
+    def _retire_dead_shards(self) -> None:
+        """Fold shards of exited threads into the retired shard; caller holds the lock"""
+        live = [self._retired]
+        for shard in self._shards:
+            if shard is self._retired:
+                continue
+            if shard.owner.is_alive():
+                live.append(shard)
+            else:
+                self._retired.absorb(shard)
+        # Swap in a new list so readers iterating the old one are unaffected
+        self._shards = live
+    
+    @property
+    def counters(self) -> Dict[str, int]:
+        """Counter totals across all threads"""
+        merged = defaultdict(int)
+        for shard in list(self._shards):
+            for name, value in list(shard.counters.items()):
+                merged[name] += value
+        return merged
+    
+    @property
+    def timers(self) -> Dict[str, List[float]]:
+        """Recent timing samples per metric across all threads"""
+        merged = defaultdict(list)
+        for shard in list(self._shards):
+            for name, samples in list(shard.timers.items()):
+                merged[name].extend(list(samples))
+        return merged
+    
     def increment(self, metric_name: str, value: int = 1, tags: Optional[Dict[str, str]] = None):
         """Increment a counter metric"""
-        self.counters[metric_name] += value
-        self._record_event(metric_name, value, tags or {})
+        shard = self._shard()
+        shard.counters[metric_name] += value
+        self._record_event(shard)
     
     def gauge(self, metric_name: str, value: float, tags: Optional[Dict[str, str]] = None):
         """Set a gauge metric"""
-        self.gauges[metric_name] = value
-        self._record_event(metric_name, value, tags or {})
+        # Gauges are shared last-value metrics, so writers take a lock
+        with self._gauges_lock:
+            self.gauges[metric_name] = value
+        self._record_event(self._shard())
     
     def timing(self, metric_name: str, duration: float, tags: Optional[Dict[str, str]] = None):
         """Record timing metric"""
-        self.timers[metric_name].append(duration)
-        # Keep only recent timings
-        if len(self.timers[metric_name]) > 1000:
-            self.timers[metric_name] = self.timers[metric_name][-1000:]
-        self._record_event(f"{metric_name}.timing", duration, tags or {})
+        shard = self._shard()
+        shard.timers[metric_name].append(duration)
+        self._record_event(shard)
     
     def timer(self, metric_name: str, tags: Optional[Dict[str, str]] = None):
         """Context manager for timing operations"""
@@ -83,22 +300,28 @@ class ApplicationMonitor:
     
     def record_api_call(self, endpoint: str, method: str, status_code: int, duration: float):
         """Record API call metrics"""
-        tags = {
-            'endpoint': endpoint,
-            'method': method,
-            'status_code': str(status_code)
-        }
+        shard = self._shard()
+        now = _now_second()
         
-        self.timing('api.response_time', duration, tags)
-        self.increment('api.requests_total', 1, tags)
+        shard.timers['api.response_time'].append(duration)
+        shard.counters['api.requests_total'] += 1
+        shard.requests.add(now)
+        events = 2
         
         if status_code >= 400:
-            self.increment('api.errors_total', 1, tags)
-            
-        # Store for analytics
-        self.response_times[endpoint].append(duration)
-        if len(self.response_times[endpoint]) > 1000:
-            self.response_times[endpoint] = self.response_times[endpoint][-1000:]
+            shard.counters['api.errors_total'] += 1
+            shard.errors.add(now)
+            events += 1
+        
+        # Streaming latency histograms, overall and per route
+        shard.api_latency.record(now, duration)
+        histogram = shard.endpoint_latency.get(endpoint)
+        if histogram is None:
+            histogram = shard.endpoint_latency[endpoint] = WindowedHistogram(self.window_seconds)
+        histogram.record(now, duration)
+        
+        shard.event_total += events
+        shard.events.add(now, events)
     
     def record_upload_event(self, user_id: str, filename: str, file_size: int, 
                            has_pii: bool, success: bool, duration: float):
@@ -154,31 +377,50 @@ class ApplicationMonitor:
     def get_health_metrics(self) -> Dict[str, Any]:
         """Get current health metrics"""
         now = datetime.utcnow()
-        one_minute_ago = now - timedelta(minutes=1)
+        shards = list(self._shards)
+        second = _now_second()
         
-        # Recent events
-        recent_events = [e for e in self.events if e.timestamp > one_minute_ago]
-        
-        # Calculate averages
-        recent_response_times = []
-        for endpoint, times in self.response_times.items():
-            if times:
-                recent_response_times.extend(times[-10:])  # Last 10 calls
-        
-        avg_response_time = sum(recent_response_times) / len(recent_response_times) if recent_response_times else 0
+        latency = self.get_latency_histogram(seconds=60)
         
         return {
             'timestamp': now.isoformat(),
-            'uptime_seconds': (now - datetime.utcnow()).total_seconds(),
-            'total_events': len(self.events),
-            'recent_events_1min': len(recent_events),
-            'avg_response_time_ms': round(avg_response_time * 1000, 2),
+            'uptime_seconds': round(time.monotonic() - self.started_at, 2),
+            'total_events': sum(shard.event_total for shard in shards),
+            'recent_events_1min': sum(shard.events.total(second, 60) for shard in shards),
+            'requests_1min': latency.count,
+            'avg_response_time_ms': round(latency.mean * 1000, 2),
+            'p50_response_time_ms': round(latency.percentile(0.50) * 1000, 2),
+            'p95_response_time_ms': round(latency.percentile(0.95) * 1000, 2),
+            'p99_response_time_ms': round(latency.percentile(0.99) * 1000, 2),
             'error_rate_1min': self._calculate_error_rate(),
             'upload_stats': self.upload_stats.copy(),
             'memory_usage': self._get_memory_usage(),
             'active_counters': len(self.counters),
         }
     
+    def get_latency_histogram(self, endpoint: Optional[str] = None, seconds: int = 60) -> LatencyHistogram:
+        """API latency histogram over the last N seconds, for one route or all"""
+        now = _now_second()
+        merged = LatencyHistogram()
+        for shard in list(self._shards):
+            if endpoint is None:
+                shard.api_latency.snapshot(now, seconds, into=merged)
+            else:
+                histogram = shard.endpoint_latency.get(endpoint)
+                if histogram is not None:
+                    histogram.snapshot(now, seconds, into=merged)
+        return merged
+    
+    def get_latency_percentiles(self, endpoint: Optional[str] = None, seconds: int = 60) -> Dict[str, float]:
+        """p50/p95/p99 API latency in milliseconds over the last N seconds"""
+        histogram = self.get_latency_histogram(endpoint, seconds)
+        return {
+            'count': histogram.count,
+            'p50_ms': round(histogram.percentile(0.50) * 1000, 2),
+            'p95_ms': round(histogram.percentile(0.95) * 1000, 2),
+            'p99_ms': round(histogram.percentile(0.99) * 1000, 2),
+        }
+    
     def get_security_summary(self) -> Dict[str, Any]:
         """Get security event summary"""
         now = datetime.utcnow()
@@ -203,35 +445,20 @@ class ApplicationMonitor:
             ])
         }
     
-    def _record_event(self, name: str, value: float, tags: Dict[str, str]):
-        """Record a metric event"""
-        event = MetricEvent(
-            name=name,
-            value=value,
-            timestamp=datetime.utcnow(),
-            tags=tags
-        )
-        self.events.append(event)
+    def _record_event(self, shard: _MonitorShard, count: int = 1):
+        """Count metric events for the recent-activity rate"""
+        shard.event_total += count
+        shard.events.add(_now_second(), count)
     
-    def _calculate_error_rate(self) -> float:
-        """Calculate error rate for last minute"""
-        now = datetime.utcnow()
-        one_minute_ago = now - timedelta(minutes=1)
-        
-        recent_api_events = [
-            e for e in self.events 
-            if e.name == 'api.requests_total' and e.timestamp > one_minute_ago
-        ]
-        
-        if not recent_api_events:
+    def _calculate_error_rate(self, seconds: int = 60) -> float:
+        """Calculate error rate (4xx/5xx, percent) for the last minute"""
+        now = _now_second()
+        shards = list(self._shards)
+        requests = sum(shard.requests.total(now, seconds) for shard in shards)
+        if not requests:
             return 0.0
-        
-        error_events = [
-            e for e in recent_api_events
-            if e.tags.get('status_code', '200')[0] in ['4', '5']
-        ]
-        
-        return len(error_events) / len(recent_api_events) * 100
+        errors = sum(shard.errors.total(now, seconds) for shard in shards)
+        return errors / requests * 100
     
     def _get_memory_usage(self) -> Dict[str, Any]:
         """Get memory usage statistics"""
@@ -0,0 +1,267 @@
+"""
+Async object storage over S3.
+
+All S3 access goes through one boto3 client per process, created lazily
+with a connection pool sized for parallel transfers. boto3 is blocking, so
+every call runs in a worker thread and never on the event loop. Large
+uploads and downloads use s3transfer's multipart transfers with a
+configurable part size and concurrency; reads can be ranged or streamed
+in pieces. Point S3_ENDPOINT_URL at MinIO or a moto server to run against
+a local stand-in.
+"""
+
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, Optional, Tuple
+from urllib.parse import unquote, urlparse
+import asyncio
+import logging
+import os
+import re
+import threading
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# Connections kept open to S3, shared by all threads
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+
+# Multipart transfers: files above the threshold move in parts of
+# S3_MULTIPART_CHUNK_SIZE bytes, S3_MAX_CONCURRENCY parts at a time
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+S3_MULTIPART_CHUNK_SIZE = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "10"))
+
+# Bytes per piece when streaming an object body
+S3_STREAM_CHUNK_SIZE = int(os.getenv("S3_STREAM_CHUNK_SIZE", str(1024 * 1024)))
+
+# S3 accepts at most 1000 keys per delete_objects request
+S3_DELETE_BATCH = 1000
+
+_VIRTUAL_HOST_URL = re.compile(r"^([^.]+)\.s3(?:[.-][a-z0-9-]+)?\.amazonaws\.com$")
+
+
+def parse_s3_url(url: str) -> Tuple[str, str]:
+    """
+    Split an S3 URL into bucket and key.
+
+    Accepts s3://bucket/key and https://bucket.s3[.region].amazonaws.com/key.
+
+    Raises:
+        ValueError: If the URL is not an S3 URL
+    """
+    parsed = urlparse(url)
+    key = unquote(parsed.path.lstrip("/"))
+    if parsed.scheme == "s3" and parsed.netloc and key:
+        return parsed.netloc, key
+    if parsed.scheme in ("http", "https") and key:
+        match = _VIRTUAL_HOST_URL.match(parsed.netloc)
+        if match:
+            return match.group(1), key
+    raise ValueError(f"Invalid S3 URL format: {url}")
+
+
+def create_s3_client():
+    """Create a pooled S3 client from the environment"""
+    return boto3.client(
+        "s3",
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("AWS_REGION", "us-east-1"),
+        endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+        config=Config(
+            max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+            retries={"max_attempts": 3, "mode": "standard"},
+        ),
+    )
+
+
+class ObjectStorage:
+    """Async S3 operations over a shared, pooled client"""
+
+    def __init__(self, client=None, bucket_name: Optional[str] = None):
+        self._client = client
+        self._lock = threading.Lock()
+        self.bucket_name = bucket_name or os.getenv("AWS_BUCKET_NAME") or os.getenv(
+            "S3_BUCKET_NAME", "narrative-modeling-dev"
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNK_SIZE,
+            max_concurrency=S3_MAX_CONCURRENCY,
+            use_threads=True,
+        )
+
+    @property
+    def client(self):
+        """The underlying boto3 client, created on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = create_s3_client()
+        return self._client
+
+    def url(self, key: str, bucket: Optional[str] = None) -> str:
+        return f"s3://{bucket or self.bucket_name}/{key}"
+
+    async def get_bytes(
+        self,
+        key: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        bucket: Optional[str] = None
+    ) -> bytes:
+        """
+        Read an object, or the inclusive byte range (start, end) of it.
+        """
+        params = {"Bucket": bucket or self.bucket_name, "Key": key}
+        if byte_range is not None:
+            params["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+
+        def read() -> bytes:
+            body = self.client.get_object(**params)["Body"]
+            try:
+                return body.read()
+            finally:
+                body.close()
+
+        return await asyncio.to_thread(read)
+
+    async def iter_bytes(
+        self,
+        key: str,
+        chunk_size: int = S3_STREAM_CHUNK_SIZE,
+        byte_range: Optional[Tuple[int, int]] = None,
+        bucket: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream an object's body in pieces of up to chunk_size bytes"""
+        params = {"Bucket": bucket or self.bucket_name, "Key": key}
+        if byte_range is not None:
+            params["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+
+        response = await asyncio.to_thread(self.client.get_object, **params)
+        body = response["Body"]
+        try:
+            while True:
+                piece = await asyncio.to_thread(body.read, chunk_size)
+                if not piece:
+                    break
+                yield piece
+        finally:
+            body.close()
+
+    async def put_bytes(
+        self,
+        key: str,
+        data: bytes,
+        content_type: Optional[str] = None,
+        bucket: Optional[str] = None
+    ) -> str:
+        """Write a small object in one request"""
+        params = {"Bucket": bucket or self.bucket_name, "Key": key, "Body": data}
+        if content_type:
+            params["ContentType"] = content_type
+        await asyncio.to_thread(self.client.put_object, **params)
+        return self.url(key, bucket)
+
+    async def upload_fileobj(
+        self,
+        fileobj: BinaryIO,
+        key: str,
+        content_type: Optional[str] = None,
+        bucket: Optional[str] = None
+    ) -> str:
+        """Upload a file object from its current position, in parallel parts if large"""
+        await asyncio.to_thread(self.upload_fileobj_sync, fileobj, key, content_type, bucket)
+        return self.url(key, bucket)
+
+    def upload_fileobj_sync(
+        self,
+        fileobj: BinaryIO,
+        key: str,
+        content_type: Optional[str] = None,
+        bucket: Optional[str] = None
+    ) -> None:
+        """Blocking upload_fileobj for callers already off the event loop"""
+        extra_args = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(
+            fileobj, bucket or self.bucket_name, key,
+            ExtraArgs=extra_args, Config=self.transfer_config
+        )
+
+    async def upload_file(self, path: str, key: str, bucket: Optional[str] = None) -> str:
+        """Upload a local file, in parallel parts if large"""
+        await asyncio.to_thread(
+            self.client.upload_file, path, bucket or self.bucket_name, key, Config=self.transfer_config
+        )
+        return self.url(key, bucket)
+
+    async def download_fileobj(self, key: str, fileobj: BinaryIO, bucket: Optional[str] = None) -> None:
+        """Download into a file object, in parallel ranged parts if large"""
+        await asyncio.to_thread(self.download_fileobj_sync, key, fileobj, bucket)
+
+    def download_fileobj_sync(self, key: str, fileobj: BinaryIO, bucket: Optional[str] = None) -> None:
+        """Blocking download_fileobj for callers already off the event loop"""
+        self.client.download_fileobj(bucket or self.bucket_name, key, fileobj, Config=self.transfer_config)
+
+    async def download_file(self, key: str, path: str, bucket: Optional[str] = None) -> str:
+        """Download to a local path, in parallel ranged parts if large"""
+        await asyncio.to_thread(self.download_file_sync, key, path, bucket)
+        return path
+
+    def download_file_sync(self, key: str, path: str, bucket: Optional[str] = None) -> None:
+        """Blocking download_file for callers already off the event loop"""
+        self.client.download_file(bucket or self.bucket_name, key, path, Config=self.transfer_config)
+
+    async def head(self, key: str, bucket: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Object metadata, or None if the object does not exist"""
+        try:
+            return await asyncio.to_thread(
+                self.client.head_object, Bucket=bucket or self.bucket_name, Key=key
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def delete(self, key: str, bucket: Optional[str] = None) -> None:
+        await asyncio.to_thread(self.client.delete_object, Bucket=bucket or self.bucket_name, Key=key)
+
+    async def delete_many(self, keys: Iterable[str], bucket: Optional[str] = None) -> int:
+        """
+        Delete keys in batches of 1000, up to S3_MAX_CONCURRENCY batches at
+        a time, returning how many were deleted.
+        """
+        keys = list(keys)
+        semaphore = asyncio.Semaphore(S3_MAX_CONCURRENCY)
+
+        def delete_batch(batch) -> int:
+            try:
+                response = self.client.delete_objects(
+                    Bucket=bucket or self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                )
+            except ClientError as e:
+                logger.warning(f"Failed to delete {len(batch)} objects: {e}")
+                return 0
+            errors = response.get("Errors", [])
+            for error in errors:
+                logger.warning(f"Failed to delete object {error.get('Key')}: {error.get('Message')}")
+            return len(batch) - len(errors)
+
+        async def delete(batch) -> int:
+            async with semaphore:
+                return await asyncio.to_thread(delete_batch, batch)
+
+        batches = [keys[i:i + S3_DELETE_BATCH] for i in range(0, len(keys), S3_DELETE_BATCH)]
+        return sum(await asyncio.gather(*(delete(batch) for batch in batches)))
+
+
+# Shared storage instance
+object_storage = ObjectStorage()
+
+
+def get_object_storage() -> ObjectStorage:
+    """Get the shared object storage"""
+    return object_storage
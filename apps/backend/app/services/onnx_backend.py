@@ -0,0 +1,153 @@
+"""
+ONNX Runtime serving backend for trained models
+
+Eligible estimators are converted to ONNX when they are saved and served
+through onnxruntime CPU sessions. Conversion and serving are optional: when
+skl2onnx/onnxruntime are missing or a model cannot be converted, callers keep
+using the native estimator. ONNX graphs compute in float32, so outputs can
+differ from the native float64 estimator in the last digits.
+"""
+from typing import Any, Optional
+from collections import OrderedDict
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    ONNX_CONVERT_AVAILABLE = True
+except ImportError:
+    ONNX_CONVERT_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+    ONNX_RUNTIME_AVAILABLE = True
+except ImportError:
+    ONNX_RUNTIME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ONNX_TARGET_OPSET = int(os.getenv("ONNX_TARGET_OPSET", "15"))
+
+
+def onnx_serving_enabled() -> bool:
+    """Whether models should be converted at save time and served via ONNX"""
+    return (
+        os.getenv("ONNX_SERVING_ENABLED", "false").lower() == "true"
+        and ONNX_CONVERT_AVAILABLE
+        and ONNX_RUNTIME_AVAILABLE
+    )
+
+
+def convert_to_onnx(estimator: Any, n_features: Optional[int] = None) -> Optional[bytes]:
+    """
+    Convert a fitted estimator to a serialized ONNX graph
+
+    Returns None when conversion is unavailable or the estimator is not
+    supported, so callers can keep the native model.
+    """
+    if not ONNX_CONVERT_AVAILABLE:
+        return None
+
+    n_features = n_features or getattr(estimator, "n_features_in_", None)
+    if not n_features:
+        return None
+
+    # Plain probability tensors instead of a list of per-class dicts
+    options = {id(estimator): {"zipmap": False}} if hasattr(estimator, "predict_proba") else None
+
+    try:
+        onnx_model = convert_sklearn(
+            estimator,
+            initial_types=[("input", FloatTensorType([None, int(n_features)]))],
+            target_opset=ONNX_TARGET_OPSET,
+            options=options
+        )
+        return onnx_model.SerializeToString()
+    except Exception as e:
+        logger.warning(f"ONNX conversion failed for {type(estimator).__name__}, serving native model: {e}")
+        return None
+
+
+def _create_session(onnx_bytes: bytes, intra_op_threads: Optional[int] = None) -> "ort.InferenceSession":
+    if not ONNX_RUNTIME_AVAILABLE:
+        raise ValueError("ONNX serving requires the onnxruntime package")
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads or int(os.getenv("ONNX_INTRA_OP_THREADS", "1"))
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return ort.InferenceSession(onnx_bytes, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+class OnnxModel:
+    """sklearn-style predict over an onnxruntime session"""
+
+    # Takes positional feature matrices, no column names needed
+    accepts_matrix = True
+
+    def __init__(self, session: "ort.InferenceSession"):
+        self.session = session
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_names = [output.name for output in self.session.get_outputs()]
+        self.n_features_in_ = self.session.get_inputs()[0].shape[1]
+
+    def _run(self, X: Any, output_names=None):
+        if isinstance(X, pd.DataFrame):
+            X = X.to_numpy()
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.session.run(output_names, {self.input_name: X})
+
+    def predict(self, X: Any) -> np.ndarray:
+        outputs = self._run(X, self.output_names[:1])
+        predictions = outputs[0]
+        # Regressors return (n, 1); match the native 1-D shape
+        return predictions.ravel() if predictions.ndim == 2 and predictions.shape[1] == 1 else predictions
+
+    @classmethod
+    def from_bytes(cls, onnx_bytes: bytes, intra_op_threads: Optional[int] = None) -> "OnnxModel":
+        """Load a graph, as OnnxClassifier when it has a probability output"""
+        session = _create_session(onnx_bytes, intra_op_threads)
+        model_class = OnnxClassifier if len(session.get_outputs()) > 1 else OnnxModel
+        return model_class(session)
+
+
+class OnnxClassifier(OnnxModel):
+    """ONNX classifier; exposes predict_proba like native classifiers"""
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        return self._run(X, self.output_names[1:2])[0]
+
+
+class OnnxSessionCache:
+    """Bounded cache of ONNX sessions keyed by artifact path"""
+
+    def __init__(self, max_sessions: Optional[int] = None):
+        self.max_sessions = max_sessions or int(os.getenv("ONNX_SESSION_CACHE_SIZE", "32"))
+        self._sessions: "OrderedDict[str, OnnxModel]" = OrderedDict()
+
+    def get(self, path: str) -> Optional[OnnxModel]:
+        model = self._sessions.get(path)
+        if model is not None:
+            self._sessions.move_to_end(path)
+        return model
+
+    def put(self, path: str, model: OnnxModel) -> None:
+        self._sessions[path] = model
+        self._sessions.move_to_end(path)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def remove(self, path: str) -> None:
+        self._sessions.pop(path, None)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+
+# Global session cache
+onnx_sessions = OnnxSessionCache()
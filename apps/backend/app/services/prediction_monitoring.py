@@ -1,64 +1,488 @@
 """
 Prediction monitoring and analytics service
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
-from collections import defaultdict
-import numpy as np
+from collections import defaultdict, deque
+from itertools import islice
+import bisect
 from beanie import PydanticObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from app.models.ml_model import MLModel
+from app.models.prediction_event import PredictionEvent
+from app.services.drift_detection import drift_monitor
 import asyncio
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Upper bounds (ms) of the per-minute latency histogram; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Distinct prediction values tracked per minute; the rest are counted as "other"
+MAX_DISTRIBUTION_VALUES = 100
+OTHER_PREDICTIONS = "other"
+
+
+class MinuteRollup:
+    """Pre-aggregated prediction counts for one model and one minute
+
+    Requests, errors, latencies and API key usage count requests; count,
+    confidence and the prediction distribution count served rows.
+    """
+
+    __slots__ = (
+        "count", "requests", "errors", "latency_sum", "latency_histogram",
+        "confidence_sum", "confidence_count", "predictions", "api_keys"
+    )
 
-class PredictionLog:
-    """In-memory prediction log (would be in a time-series DB in production)"""
     def __init__(self):
-        self.logs = defaultdict(list)
-        self.lock = asyncio.Lock()
-    
-    async def log_prediction(
+        self.count = 0
+        self.requests = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.predictions: Dict[str, int] = {}
+        self.api_keys: Dict[str, int] = {}
+
+    def add(
+        self,
+        predictions: List[Any],
+        probabilities: Optional[List[Optional[float]]],
+        latency_ms: float,
+        api_key_id: Optional[str],
+        error: bool = False
+    ) -> None:
+        """Add one request and the rows it served"""
+        key = api_key_id or "unknown"
+        self.api_keys[key] = self.api_keys.get(key, 0) + 1
+
+        if error:
+            self.errors += 1
+            return
+
+        self.requests += 1
+        self.latency_sum += latency_ms
+        self.latency_histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+        self.count += len(predictions)
+        for probability in probabilities or ():
+            if probability is not None:
+                self.confidence_sum += probability
+                self.confidence_count += 1
+
+        for prediction in predictions:
+            self._count_prediction(str(prediction), 1)
+
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        """Add one buffered prediction event; only a request's first row
+        carries its latency and outcome"""
+        if event["error"] or event["request"]:
+            key = event["api_key_id"] or "unknown"
+            self.api_keys[key] = self.api_keys.get(key, 0) + 1
+        if event["error"]:
+            self.errors += 1
+            return
+
+        if event["request"]:
+            self.requests += 1
+            self.latency_sum += event["latency_ms"]
+            self.latency_histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, event["latency_ms"])] += 1
+
+        self.count += 1
+        if event["probability"] is not None:
+            self.confidence_sum += event["probability"]
+            self.confidence_count += 1
+        self._count_prediction(str(event["prediction"]), 1)
+
+    def merge(self, other: "MinuteRollup") -> None:
+        """Add another rollup's counts to this one"""
+        self.count += other.count
+        self.requests += other.requests
+        self.errors += other.errors
+        self.latency_sum += other.latency_sum
+        self.latency_histogram = [a + b for a, b in zip(self.latency_histogram, other.latency_histogram)]
+        self.confidence_sum += other.confidence_sum
+        self.confidence_count += other.confidence_count
+        for value, count in other.predictions.items():
+            self._count_prediction(value, count)
+        for key, count in other.api_keys.items():
+            self.api_keys[key] = self.api_keys.get(key, 0) + count
+
+    def _count_prediction(self, value: str, count: int) -> None:
+        if value not in self.predictions and len(self.predictions) >= MAX_DISTRIBUTION_VALUES:
+            value = OTHER_PREDICTIONS
+        self.predictions[value] = self.predictions.get(value, 0) + count
+
+
+def latency_percentile(histogram: List[int], q: float) -> float:
+    """Estimate a latency percentile (ms) from histogram counts
+
+    Returns the upper bound of the bucket containing the percentile; the
+    open-ended last bucket reports the largest finite bound.
+    """
+    total = sum(histogram)
+    if total == 0:
+        return 0.0
+    rank = q * total
+    seen = 0
+    for i, bucket_count in enumerate(histogram):
+        seen += bucket_count
+        if seen >= rank:
+            return float(LATENCY_BUCKETS_MS[min(i, len(LATENCY_BUCKETS_MS) - 1)])
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+class PredictionLog:
+    """Prediction telemetry: recent-event ring buffers, per-minute rollups and
+    batched writes to the prediction_events time-series collection
+
+    Recording never awaits: events go into a bounded ring buffer per model
+    (without their input payload) and into the current minute's rollup, and
+    are queued for the background flusher. Metrics queries aggregate the
+    time-series collection, which every worker writes to, plus this process's
+    unflushed events; the in-memory rollups serve them when the collection
+    cannot be read.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        retention_hours: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        max_pending: int = 50000
+    ):
+        self.max_entries = max_entries
+        self.retention_hours = retention_hours or int(
+            os.getenv("PREDICTION_ROLLUP_RETENTION_HOURS", "168")
+        )
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.getenv("PREDICTION_LOG_FLUSH_INTERVAL", "5")
+        )
+        self.batch_size = batch_size or int(os.getenv("PREDICTION_LOG_BATCH_SIZE", "1000"))
+        self.max_pending = max_pending
+
+        self.logs: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.max_entries))
+        # model_id -> {minute start -> rollup}, oldest minute first
+        self.rollups: Dict[str, Dict[datetime, MinuteRollup]] = defaultdict(dict)
+        self._pending: List[Dict[str, Any]] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(
         self,
         model_id: str,
         prediction_id: str,
-        input_data: Dict[str, Any],
+        input_data: Optional[Dict[str, Any]],
         prediction: Any,
         probability: Optional[float] = None,
         latency_ms: float = 0,
-        api_key_id: Optional[str] = None
-    ):
-        """Log a prediction event"""
-        async with self.lock:
-            self.logs[model_id].append({
+        api_key_id: Optional[str] = None,
+        error: bool = False
+    ) -> None:
+        """Record a single-row prediction request; no I/O on the request path"""
+        self.record_request(
+            model_id,
+            prediction_id,
+            [input_data],
+            [prediction],
+            probabilities=[probability],
+            latency_ms=latency_ms,
+            api_key_id=api_key_id,
+            error=error
+        )
+
+    def record_request(
+        self,
+        model_id: str,
+        prediction_id: str,
+        rows: List[Optional[Dict[str, Any]]],
+        predictions: List[Any],
+        probabilities: Optional[List[Optional[float]]] = None,
+        latency_ms: float = 0,
+        api_key_id: Optional[str] = None,
+        error: bool = False
+    ) -> None:
+        """Record a prediction request and its served rows; no I/O on the request path
+
+        The request's latency and outcome are counted once, however many
+        rows it served. A failed request is recorded as one error event.
+        """
+        timestamp = datetime.utcnow()
+        self._rollup(model_id, timestamp).add(
+            [] if error else predictions, probabilities, latency_ms, api_key_id, error
+        )
+
+        if error:
+            rows, predictions, probabilities = [None], [None], None
+        for i, (input_data, prediction) in enumerate(zip(rows, predictions)):
+            # The first row of a request carries its latency and outcome
+            request = i == 0
+            entry = {
                 "prediction_id": prediction_id,
-                "timestamp": datetime.utcnow(),
-                "input_data": input_data,
+                "timestamp": timestamp,
                 "prediction": prediction,
-                "probability": probability,
+                "probability": probabilities[i] if probabilities else None,
                 "latency_ms": latency_ms,
                 "api_key_id": api_key_id
+            }
+            if error:
+                entry["error"] = True
+            else:
+                self.logs[model_id].append(entry)
+            self._enqueue({
+                **entry, "model_id": model_id, "error": error, "request": request,
+                "input_data": input_data
             })
-            
-            # Keep only last 10000 predictions per model
-            if len(self.logs[model_id]) > 10000:
-                self.logs[model_id] = self.logs[model_id][-10000:]
-    
+
+    def _enqueue(self, event: Dict[str, Any]) -> None:
+        if len(self._pending) >= self.max_pending:
+            # Storage is unavailable or too slow; keep the newest events
+            del self._pending[:self.batch_size]
+            logger.warning("Prediction event buffer full, dropping oldest events")
+        self._pending.append(event)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def _rollup(self, model_id: str, timestamp: datetime) -> MinuteRollup:
+        minute = timestamp.replace(second=0, microsecond=0)
+        buckets = self.rollups[model_id]
+        rollup = buckets.get(minute)
+        if rollup is None:
+            rollup = buckets[minute] = MinuteRollup()
+            # A new minute started: expire buckets past the retention window
+            cutoff = minute - timedelta(hours=self.retention_hours)
+            while True:
+                oldest = next(iter(buckets))
+                if oldest >= cutoff:
+                    break
+                del buckets[oldest]
+        return rollup
+
+    def get_rollups(self, model_id: str, hours: int) -> List[Tuple[datetime, MinuteRollup]]:
+        """Per-minute rollups for a model within the last N hours, oldest first"""
+        buckets = self.rollups.get(model_id)
+        if not buckets:
+            return []
+        cutoff = (datetime.utcnow() - timedelta(hours=hours)).replace(second=0, microsecond=0)
+        return [(minute, rollup) for minute, rollup in buckets.items() if minute >= cutoff]
+
+    async def get_window(self, model_id: str, hours: int) -> Tuple[Optional[datetime], MinuteRollup]:
+        """Counts for a model within the last N hours across all workers
+
+        Returns the start of the earliest minute with data and the merged
+        counts. Events still buffered in this process are added to the stored
+        ones; other workers' buffers show up after their next flush.
+        """
+        cutoff = (datetime.utcnow() - timedelta(hours=hours)).replace(second=0, microsecond=0)
+        pending = [
+            event for event in self._pending
+            if event["model_id"] == model_id and event["timestamp"] >= cutoff
+        ]
+
+        try:
+            first, window = await self._aggregate_events(model_id, cutoff)
+        except Exception as e:
+            logger.error(f"Failed to aggregate prediction events, using this worker's rollups: {e}")
+            window = MinuteRollup()
+            buckets = self.get_rollups(model_id, hours)
+            for _, rollup in buckets:
+                window.merge(rollup)
+            return (buckets[0][0] if buckets else None), window
+
+        for event in pending:
+            window.add_event(event)
+        if pending:
+            minute = pending[0]["timestamp"].replace(second=0, microsecond=0)
+            first = minute if first is None else min(first, minute)
+        return first, window
+
+    async def _aggregate_events(
+        self, model_id: str, cutoff: datetime
+    ) -> Tuple[Optional[datetime], MinuteRollup]:
+        """Rebuild a window's counts from the prediction_events collection"""
+        # Events written before requests were flagged are one request each
+        is_request = {"$ifNull": ["$request", True]}
+        served_request = {"$and": [is_request, {"$not": ["$error"]}]}
+        latency_bucket = {"$switch": {
+            "branches": [
+                {"case": {"$lte": ["$latency_ms", bound]}, "then": i}
+                for i, bound in enumerate(LATENCY_BUCKETS_MS)
+            ],
+            "default": len(LATENCY_BUCKETS_MS)
+        }}
+        pipeline = [
+            {"$match": {"model_id": model_id, "timestamp": {"$gte": cutoff}}},
+            {"$facet": {
+                "totals": [{"$group": {
+                    "_id": None,
+                    "count": {"$sum": {"$cond": ["$error", 0, 1]}},
+                    "requests": {"$sum": {"$cond": [served_request, 1, 0]}},
+                    "errors": {"$sum": {"$cond": ["$error", 1, 0]}},
+                    "latency_sum": {"$sum": {"$cond": [served_request, "$latency_ms", 0]}},
+                    "confidence_sum": {"$sum": {"$cond": ["$error", 0, {"$ifNull": ["$probability", 0]}]}},
+                    "confidence_count": {"$sum": {"$cond": [
+                        {"$or": ["$error", {"$eq": [{"$ifNull": ["$probability", None]}, None]}]}, 0, 1
+                    ]}},
+                    "first": {"$min": "$timestamp"}
+                }}],
+                "latency": [
+                    {"$match": {"$expr": served_request}},
+                    {"$group": {"_id": latency_bucket, "count": {"$sum": 1}}}
+                ],
+                "predictions": [
+                    {"$match": {"error": False}},
+                    {"$group": {"_id": "$prediction", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": MAX_DISTRIBUTION_VALUES}
+                ],
+                "api_keys": [
+                    {"$match": {"$expr": {"$or": [is_request, "$error"]}}},
+                    {"$group": {"_id": "$api_key_id", "count": {"$sum": 1}}}
+                ]
+            }}
+        ]
+        result, = await PredictionEvent.aggregate(pipeline).to_list()
+
+        window = MinuteRollup()
+        if not result["totals"]:
+            return None, window
+
+        totals = result["totals"][0]
+        for field in (
+            "count", "requests", "errors", "latency_sum", "confidence_sum", "confidence_count"
+        ):
+            setattr(window, field, totals[field])
+        for bucket in result["latency"]:
+            window.latency_histogram[bucket["_id"]] += bucket["count"]
+
+        # The most frequent values; the rest of the served rows are "other"
+        for bucket in result["predictions"]:
+            window._count_prediction(str(bucket["_id"]), bucket["count"])
+        other = window.count - sum(window.predictions.values())
+        if other:
+            window.predictions[OTHER_PREDICTIONS] = window.predictions.get(OTHER_PREDICTIONS, 0) + other
+
+        for bucket in result["api_keys"]:
+            key = bucket["_id"] or "unknown"
+            window.api_keys[key] = window.api_keys.get(key, 0) + bucket["count"]
+
+        return totals["first"].replace(second=0, microsecond=0), window
+
     async def get_recent_predictions(
         self,
         model_id: str,
         limit: int = 100
     ) -> List[Dict[str, Any]]:
         """Get recent predictions for a model"""
-        async with self.lock:
-            return self.logs[model_id][-limit:]
+        entries = self.logs.get(model_id)
+        if not entries:
+            return []
+        recent = list(islice(reversed(entries), limit))
+        recent.reverse()
+        return recent
+
+    def pending(self) -> int:
+        """Events not yet written to the time-series collection"""
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Write buffered events in one unordered insert; returns events written"""
+        if not self._pending:
+            return 0
+
+        # Swap buffers before awaiting so concurrent records land in the next batch
+        events, self._pending = self._pending, []
+        self._wake.clear()
+
+        try:
+            await PredictionEvent.get_motor_collection().insert_many(events, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: everything but the reported documents was written
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            logger.error(f"Failed to write {len(failed)} of {len(events)} prediction events: {e}")
+            retry = [
+                {k: v for k, v in event.items() if k != "_id"}
+                for i, event in enumerate(events) if i in failed
+            ]
+            self._pending = (retry + self._pending)[-self.max_pending:]
+            events = [event for i, event in enumerate(events) if i not in failed]
+        except Exception as e:
+            logger.error(f"Failed to flush prediction events: {e}")
+            # Requeue for the next flush, within the buffer bound
+            self._pending = (events + self._pending)[-self.max_pending:]
+            return 0
+
+        # One last_used_at update per model instead of a save per prediction
+        last_used: Dict[str, datetime] = {}
+        for event in events:
+            if not event["error"]:
+                last_used[event["model_id"]] = event["timestamp"]
+        if last_used:
+            try:
+                await MLModel.get_motor_collection().bulk_write(
+                    [
+                        UpdateOne({"model_id": model_id}, {"$max": {"last_used_at": timestamp}})
+                        for model_id, timestamp in last_used.items()
+                    ],
+                    ordered=False
+                )
+            except Exception as e:
+                logger.error(f"Failed to update model last_used_at: {e}")
+
+        return len(events)
+
+    def clear(self) -> None:
+        """Drop buffered events, recent logs and rollups"""
+        self.logs.clear()
+        self.rollups.clear()
+        self._pending = []
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def start(self) -> None:
+        """Start background flushing on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop background flushing and write any remaining events"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
 
 
 # Global prediction log instance
 prediction_log = PredictionLog()
 
 
+async def init_prediction_log():
+    """Start batched prediction event writes"""
+    prediction_log.start()
+
+
+async def cleanup_prediction_log():
+    """Flush outstanding prediction events and stop the writer"""
+    await prediction_log.stop()
+
+
 class PredictionMonitoringService:
     """Service for monitoring model predictions and performance"""
     
@@ -71,29 +495,21 @@ class PredictionMonitoringService:
         latency_ms: float = 0,
         api_key_id: Optional[str] = None
     ) -> str:
-        """Log a prediction for monitoring"""
+        """Log a prediction for monitoring
+
+        Buffered for the batched writer, which also updates the model's
+        last_used_at once per flush.
+        """
         prediction_id = f"pred_{PydanticObjectId()}"
-        
-        # Log to in-memory store
-        await prediction_log.log_prediction(
-            model_id=model_id,
-            prediction_id=prediction_id,
-            input_data=input_data,
-            prediction=prediction,
+        prediction_log.record(
+            model_id,
+            prediction_id,
+            input_data,
+            prediction,
             probability=probability,
             latency_ms=latency_ms,
             api_key_id=api_key_id
         )
-        
-        # Update model last used timestamp
-        try:
-            model = await MLModel.find_one({"model_id": model_id})
-            if model:
-                model.last_used_at = datetime.utcnow()
-                await model.save()
-        except Exception as e:
-            logger.error(f"Failed to update model last_used_at: {e}")
-        
         return prediction_id
     
     @staticmethod
@@ -102,54 +518,36 @@ class PredictionMonitoringService:
         hours: int = 24
     ) -> Dict[str, Any]:
         """Get model performance metrics for the last N hours"""
-        recent_preds = await prediction_log.get_recent_predictions(model_id, limit=10000)
-        
-        if not recent_preds:
-            return {
-                "total_predictions": 0,
-                "avg_latency_ms": 0,
-                "predictions_per_hour": 0,
-                "avg_confidence": 0,
-                "error_rate": 0
-            }
-        
-        # Filter by time window
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        filtered_preds = [
-            p for p in recent_preds 
-            if p["timestamp"] > cutoff_time
-        ]
+        first_minute, window = await prediction_log.get_window(model_id, hours)
         
-        if not filtered_preds:
+        if window.requests + window.errors == 0:
             return {
                 "total_predictions": 0,
                 "avg_latency_ms": 0,
+                "p95_latency_ms": 0,
                 "predictions_per_hour": 0,
                 "avg_confidence": 0,
-                "error_rate": 0
+                "error_rate": 0,
+                "time_window_hours": hours
             }
         
-        # Calculate metrics
-        total_predictions = len(filtered_preds)
-        avg_latency = np.mean([p["latency_ms"] for p in filtered_preds])
-        
         # Predictions per hour
-        time_span_hours = (datetime.utcnow() - filtered_preds[0]["timestamp"]).total_seconds() / 3600
-        predictions_per_hour = total_predictions / max(time_span_hours, 1)
+        time_span_hours = (datetime.utcnow() - first_minute).total_seconds() / 3600
+        predictions_per_hour = window.count / max(time_span_hours, 1)
         
         # Average confidence (for classification models)
-        confidences = [p["probability"] for p in filtered_preds if p["probability"] is not None]
-        avg_confidence = np.mean(confidences) if confidences else 0
-        
-        # Error rate (would need ground truth in production)
-        error_rate = 0  # Placeholder
+        avg_confidence = (
+            window.confidence_sum / window.confidence_count if window.confidence_count else 0
+        )
         
+        # Latency and errors are per request
         return {
-            "total_predictions": total_predictions,
-            "avg_latency_ms": round(avg_latency, 2),
+            "total_predictions": window.count,
+            "avg_latency_ms": round(window.latency_sum / window.requests, 2) if window.requests else 0,
+            "p95_latency_ms": latency_percentile(window.latency_histogram, 0.95),
             "predictions_per_hour": round(predictions_per_hour, 2),
             "avg_confidence": round(avg_confidence, 4),
-            "error_rate": error_rate,
+            "error_rate": round(window.errors / (window.requests + window.errors), 4),
             "time_window_hours": hours
         }
     
@@ -159,49 +557,37 @@ class PredictionMonitoringService:
         hours: int = 24
     ) -> Dict[str, Any]:
         """Get distribution of predictions"""
-        recent_preds = await prediction_log.get_recent_predictions(model_id, limit=10000)
-        
-        if not recent_preds:
-            return {"distribution": {}, "total": 0}
-        
-        # Filter by time window
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        filtered_preds = [
-            p for p in recent_preds 
-            if p["timestamp"] > cutoff_time
-        ]
-        
-        # Count predictions by value
-        distribution = defaultdict(int)
-        for pred in filtered_preds:
-            pred_value = str(pred["prediction"])
-            distribution[pred_value] += 1
+        _, window = await prediction_log.get_window(model_id, hours)
         
         return {
-            "distribution": dict(distribution),
-            "total": len(filtered_preds),
-            "unique_values": len(distribution)
+            "distribution": dict(window.predictions),
+            "total": window.count,
+            "unique_values": len(window.predictions)
         }
     
     @staticmethod
     async def detect_drift(
         model_id: str,
-        feature_stats: Dict[str, Dict[str, float]]
+        feature_stats: Optional[Dict[str, Dict[str, float]]] = None
     ) -> Dict[str, Any]:
-        """Detect data drift by comparing current feature stats with training stats"""
-        # This is a simplified version - production would use statistical tests
+        """Detect data drift by comparing live input distributions with training profiles
+        
+        Scores come from the scheduled drift checks over served records;
+        feature_stats is accepted for compatibility and not used.
+        """
         model = await MLModel.find_one({"model_id": model_id})
         if not model:
             return {"drift_detected": False, "message": "Model not found"}
         
-        # In production, we'd compare with stored training statistics
-        # For now, return a placeholder
-        return {
-            "drift_detected": False,
-            "drift_score": 0.0,
-            "features_with_drift": [],
-            "recommendation": "No significant drift detected"
-        }
+        result = drift_monitor.get_result(model_id)
+        if result is None:
+            return {
+                "drift_detected": False,
+                "drift_score": 0.0,
+                "features_with_drift": [],
+                "recommendation": "Not enough live predictions to assess drift"
+            }
+        return result
     
     @staticmethod
     async def get_usage_by_api_key(
@@ -209,22 +595,5 @@ class PredictionMonitoringService:
         hours: int = 24
     ) -> Dict[str, int]:
         """Get prediction usage grouped by API key"""
-        recent_preds = await prediction_log.get_recent_predictions(model_id, limit=10000)
-        
-        if not recent_preds:
-            return {}
-        
-        # Filter by time window
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        filtered_preds = [
-            p for p in recent_preds 
-            if p["timestamp"] > cutoff_time
-        ]
-        
-        # Count by API key
-        usage = defaultdict(int)
-        for pred in filtered_preds:
-            api_key = pred.get("api_key_id", "unknown")
-            usage[api_key] += 1
-        
-        return dict(usage)
\ No newline at end of file
+        _, window = await prediction_log.get_window(model_id, hours)
+        return dict(window.api_keys)
@@ -0,0 +1,204 @@
+"""
+Async token-bucket rate limiting backed by Redis with an in-process fallback
+"""
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+import logging
+import math
+import os
+import time
+
+from app.services.redis_cache import cache_service
+
+logger = logging.getLogger(__name__)
+
+
+# Refills the bucket for the elapsed time, debits requests a worker already
+# admitted locally, then tries to take ``requested`` tokens. State is a hash of
+# {tokens, ts} that expires once the bucket would be full again anyway.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local debit = tonumber(ARGV[4])
+local requested = tonumber(ARGV[5])
+local ttl = tonumber(ARGV[6])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+tokens = math.max(0, tokens - debit)
+
+local allowed = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+
+    def __init__(
+        self,
+        allowed: bool,
+        limit: int,
+        tokens: float,
+        refill_rate: float
+    ):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = max(0, int(tokens))
+        if refill_rate > 0:
+            self.reset_after = math.ceil(max(0.0, limit - tokens) / refill_rate)
+            self.retry_after = 0 if allowed else math.ceil(max(0.0, 1 - tokens) / refill_rate)
+        else:
+            self.reset_after = 0
+            self.retry_after = 0
+
+    def headers(self) -> Dict[str, str]:
+        """X-RateLimit-* headers (reset is seconds until the bucket is full)"""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset_after),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class _LocalBucket:
+    """Per-key token estimate kept in this process"""
+
+    __slots__ = ("tokens", "updated", "pending", "synced")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+        self.pending = 0  # admitted locally, not yet debited in Redis
+        self.synced = False
+
+    def refill(self, capacity: float, rate: float, now: float) -> None:
+        self.tokens = min(capacity, self.tokens + max(0.0, now - self.updated) * rate)
+        self.updated = now
+
+
+class TokenBucketRateLimiter:
+    """Token bucket shared through Redis, with a local pre-check
+
+    Each key gets a bucket of ``limit`` tokens refilled continuously over
+    ``window_seconds``. While the local estimate shows a key is well below
+    its quota, requests are admitted without a Redis round-trip and the
+    debit is sent with the next sync, so workers can over-admit by at most
+    ``sync_fraction`` of the limit each. When Redis is not connected or
+    errors, buckets are enforced in-process only.
+    """
+
+    def __init__(
+        self,
+        local_threshold: Optional[float] = None,
+        sync_fraction: Optional[float] = None,
+        failure_backoff: float = 5.0,
+        max_local_keys: int = 10000
+    ):
+        self.local_threshold = local_threshold if local_threshold is not None else float(
+            os.getenv("RATE_LIMIT_LOCAL_THRESHOLD", "0.5")
+        )
+        self.sync_fraction = sync_fraction if sync_fraction is not None else float(
+            os.getenv("RATE_LIMIT_SYNC_FRACTION", "0.05")
+        )
+        self.failure_backoff = failure_backoff
+        self.max_local_keys = max_local_keys
+        self._buckets: "OrderedDict[str, _LocalBucket]" = OrderedDict()
+        self._script: Optional[Any] = None
+        self._script_client: Optional[Any] = None
+        self._redis_retry_at = 0.0
+
+    def _get_bucket(self, key: str, capacity: float, now: float) -> _LocalBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_local_keys:
+                self._buckets.popitem(last=False)
+            bucket = _LocalBucket(capacity, now)
+            self._buckets[key] = bucket
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _get_script(self, client: Any) -> Any:
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            self._script_client = client
+        return self._script
+
+    async def acquire(self, key: str, limit: int, window_seconds: int = 3600) -> RateLimitResult:
+        """Take one token for ``key``"""
+        if limit <= 0:
+            return RateLimitResult(False, limit, 0, 0)
+
+        capacity = float(limit)
+        rate = capacity / window_seconds
+        now = time.time()
+        bucket = self._get_bucket(key, capacity, now)
+        bucket.refill(capacity, rate, now)
+
+        client = cache_service.redis_client
+        if client is None or now < self._redis_retry_at:
+            return self._acquire_local(bucket, limit, rate)
+
+        # Local pre-check: far below quota, admit without a round-trip
+        max_pending = max(1, int(capacity * self.sync_fraction))
+        if (
+            bucket.synced
+            and bucket.pending < max_pending
+            and bucket.tokens - 1 >= capacity * self.local_threshold
+        ):
+            bucket.tokens -= 1
+            bucket.pending += 1
+            return RateLimitResult(True, limit, bucket.tokens, rate)
+
+        debit, bucket.pending = bucket.pending, 0
+        try:
+            allowed, tokens = await self._get_script(client)(
+                keys=[key],
+                args=[capacity, rate, now, debit, 1, window_seconds]
+            )
+        except Exception as e:
+            logger.error(f"Rate limit check failed for {key}, using local limiter: {e}")
+            bucket.pending += debit
+            self._redis_retry_at = now + self.failure_backoff
+            return self._acquire_local(bucket, limit, rate)
+
+        # Requests admitted locally while awaiting are still pending
+        bucket.tokens = float(tokens) - bucket.pending
+        bucket.updated = now
+        bucket.synced = True
+        return RateLimitResult(bool(int(allowed)), limit, bucket.tokens, rate)
+
+    def _acquire_local(self, bucket: _LocalBucket, limit: int, rate: float) -> RateLimitResult:
+        """Enforce the bucket in-process only"""
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return RateLimitResult(True, limit, bucket.tokens, rate)
+        return RateLimitResult(False, limit, bucket.tokens, rate)
+
+    def reset(self) -> None:
+        """Forget local state"""
+        self._buckets.clear()
+        self._redis_retry_at = 0.0
+
+
+# Global rate limiter instance
+rate_limiter = TokenBucketRateLimiter()
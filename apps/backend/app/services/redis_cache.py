@@ -4,8 +4,9 @@ Redis caching service for improved performance
 import json
 import pickle
 import logging
-from typing import Any, Optional, Union, Dict, List
+from typing import Any, Optional, Union, Dict, List, Callable, Iterable, AsyncIterator
 from datetime import timedelta
+from contextlib import asynccontextmanager
 import asyncio
 import redis.asyncio as redis
 from redis.asyncio import Redis
@@ -15,6 +16,88 @@ from functools import wraps
 logger = logging.getLogger(__name__)
 
 
+class CachePipeline:
+    """Queues cache commands and sends them to Redis in a single round-trip
+
+    Values are serialized the same way as ``RedisCacheService.set`` and reads
+    are deserialized on ``execute``. When Redis is not connected, commands are
+    accepted and ``execute`` returns the same defaults as the single-key methods.
+    Each ``execute`` sends only the commands queued since the previous one.
+    """
+
+    def __init__(self, service: "RedisCacheService", pipe: Optional[Any] = None):
+        self._service = service
+        self._pipe = pipe
+        self._decoders: List[Callable[[Any], Any]] = []
+        self._defaults: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._decoders)
+
+    def _queue(self, decoder: Callable[[Any], Any], default: Any) -> "CachePipeline":
+        self._decoders.append(decoder)
+        self._defaults.append(default)
+        return self
+
+    def _decode_optional(self, data: Optional[bytes]) -> Optional[Any]:
+        if data is None:
+            return None
+        return self._service._deserialize_value(data)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> "CachePipeline":
+        """Queue a SETEX"""
+        if self._pipe is not None:
+            self._pipe.setex(key, ttl or self._service.default_ttl, self._service._serialize_value(value))
+        return self._queue(bool, False)
+
+    def get(self, key: str) -> "CachePipeline":
+        """Queue a GET; the value is deserialized on execute"""
+        if self._pipe is not None:
+            self._pipe.get(key)
+        return self._queue(self._decode_optional, None)
+
+    def delete(self, *keys: str) -> "CachePipeline":
+        """Queue a DEL"""
+        if self._pipe is not None:
+            self._pipe.delete(*keys)
+        return self._queue(int, 0)
+
+    def expire(self, key: str, ttl: int) -> "CachePipeline":
+        """Queue an EXPIRE"""
+        if self._pipe is not None:
+            self._pipe.expire(key, ttl)
+        return self._queue(bool, False)
+
+    def increment(self, key: str, amount: int = 1) -> "CachePipeline":
+        """Queue an INCRBY"""
+        if self._pipe is not None:
+            self._pipe.incrby(key, amount)
+        return self._queue(int, None)
+
+    def set_hash(self, key: str, mapping: Dict[str, Any]) -> "CachePipeline":
+        """Queue an HSET of serialized fields"""
+        if self._pipe is not None:
+            self._pipe.hset(key, mapping={
+                field: self._service._serialize_value(value)
+                for field, value in mapping.items()
+            })
+        return self._queue(int, 0)
+
+    async def execute(self) -> List[Any]:
+        """Send all queued commands and return their decoded results in order"""
+        # Take the queue first so a failed round-trip never resends or misaligns it
+        decoders, self._decoders = self._decoders, []
+        defaults, self._defaults = self._defaults, []
+        if self._pipe is None or not decoders:
+            return defaults
+
+        try:
+            raw_results = await self._pipe.execute()
+        finally:
+            await self._pipe.reset()
+        return [decode(raw) for decode, raw in zip(decoders, raw_results)]
+
+
 class RedisCacheService:
     """Service for Redis caching operations"""
     
@@ -94,6 +177,67 @@ class RedisCacheService:
             logger.error(f"Failed to get cache key {key}: {e}")
             return None
             
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = True) -> AsyncIterator[CachePipeline]:
+        """Batch cache commands into a single round-trip
+
+        Commands queued on the yielded ``CachePipeline`` are sent when the block
+        exits, apart from those already sent by awaiting ``execute()`` inside the
+        block to read results. With ``transaction=True`` each batch is wrapped in
+        MULTI/EXEC.
+        """
+        if not self.redis_client:
+            yield CachePipeline(self)
+            return
+
+        async with self.redis_client.pipeline(transaction=transaction) as pipe:
+            batch = CachePipeline(self, pipe)
+            yield batch
+            if len(batch):
+                await batch.execute()
+
+    async def mget(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values in one round-trip; missing keys are omitted"""
+        keys = list(keys)
+        if not self.redis_client or not keys:
+            return {}
+
+        try:
+            values = await self.redis_client.mget(keys)
+            return {
+                key: self._deserialize_value(data)
+                for key, data in zip(keys, values)
+                if data is not None
+            }
+        except Exception as e:
+            logger.error(f"Failed to get cache keys {keys}: {e}")
+            return {}
+
+    async def mset(
+        self,
+        mapping: Dict[str, Any],
+        ttl: Optional[Union[int, Dict[str, int]]] = None
+    ) -> bool:
+        """Set several values in one round-trip
+
+        ``ttl`` may be a single TTL for every key or a per-key mapping; keys
+        missing from the mapping use the default TTL.
+        """
+        if not self.redis_client:
+            return False
+        if not mapping:
+            return True
+
+        try:
+            async with self.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    key_ttl = ttl.get(key) if isinstance(ttl, dict) else ttl
+                    pipe.set(key, value, key_ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to set cache keys {list(mapping)}: {e}")
+            return False
+
     async def delete(self, key: str) -> bool:
         """Delete a key from cache"""
         if not self.redis_client:
@@ -160,14 +304,10 @@ class RedisCacheService:
             
         try:
             # Serialize hash values
-            serialized_mapping = {
-                field: self._serialize_value(value)
-                for field, value in mapping.items()
-            }
-            await self.redis_client.hset(key, mapping=serialized_mapping)
-            
-            if ttl:
-                await self.redis_client.expire(key, ttl)
+            async with self.pipeline() as pipe:
+                pipe.set_hash(key, mapping)
+                if ttl:
+                    pipe.expire(key, ttl)
             return True
         except Exception as e:
             logger.error(f"Failed to set hash {key}: {e}")
@@ -212,14 +352,15 @@ class RedisCacheService:
             return False
             
         try:
-            # Clear existing list and set new values
-            await self.redis_client.delete(key)
-            if values:
-                serialized_values = [self._serialize_value(v) for v in values]
-                await self.redis_client.lpush(key, *serialized_values)
-                
-            if ttl:
-                await self.redis_client.expire(key, ttl)
+            # Clear existing list and set new values atomically in one round-trip
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                if values:
+                    serialized_values = [self._serialize_value(v) for v in values]
+                    pipe.lpush(key, *serialized_values)
+                if ttl:
+                    pipe.expire(key, ttl)
+                await pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Failed to set list {key}: {e}")
@@ -259,6 +400,19 @@ class RedisCacheService:
         key = f"data_stats:{data_id}"
         return await self.get(key)
         
+    async def cache_data_stats_batch(self, stats_by_id: Dict[str, Dict[str, Any]]) -> bool:
+        """Cache statistics for several datasets in one round-trip"""
+        return await self.mset(
+            {f"data_stats:{data_id}": stats for data_id, stats in stats_by_id.items()},
+            ttl=7200  # 2 hours
+        )
+
+    async def get_data_stats_batch(self, data_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Get cached statistics for several datasets, keyed by data_id; misses are omitted"""
+        keys = {f"data_stats:{data_id}": data_id for data_id in data_ids}
+        cached = await self.mget(keys)
+        return {keys[key]: stats for key, stats in cached.items()}
+
     async def cache_model_predictions(self, model_id: str, input_hash: str, predictions: Any) -> bool:
         """Cache model predictions"""
         key = f"predictions:{model_id}:{input_hash}"
@@ -268,6 +422,22 @@ class RedisCacheService:
         """Get cached predictions"""
         key = f"predictions:{model_id}:{input_hash}"
         return await self.get(key)
+
+    async def cache_model_predictions_batch(self, model_id: str, predictions_by_hash: Dict[str, Any]) -> bool:
+        """Cache predictions for several inputs of one model in one round-trip"""
+        return await self.mset(
+            {
+                f"predictions:{model_id}:{input_hash}": predictions
+                for input_hash, predictions in predictions_by_hash.items()
+            },
+            ttl=3600  # 1 hour
+        )
+
+    async def get_model_predictions_batch(self, model_id: str, input_hashes: Iterable[str]) -> Dict[str, Any]:
+        """Get cached predictions for several inputs, keyed by input hash; misses are omitted"""
+        keys = {f"predictions:{model_id}:{input_hash}": input_hash for input_hash in input_hashes}
+        cached = await self.mget(keys)
+        return {keys[key]: predictions for key, predictions in cached.items()}
         
     async def cache_eda_results(self, data_id: str, eda_results: Dict[str, Any]) -> bool:
         """Cache EDA analysis results"""
@@ -1,12 +1,17 @@
-import boto3
 import os
+import shutil
 import tempfile
 import logging
-import re
-from urllib.parse import urlparse, unquote
-from typing import Optional
+from typing import AsyncIterator, Optional, Tuple
 from botocore.exceptions import ClientError
 
+from app.services.artifact_cache import ArtifactCache, get_artifact_cache
+from app.services.object_storage import (
+    S3_STREAM_CHUNK_SIZE,
+    ObjectStorage,
+    get_object_storage,
+    parse_s3_url,
+)
 from app.utils.circuit_breaker import with_circuit_breaker, with_sync_circuit_breaker
 
 logger = logging.getLogger(__name__)
@@ -30,37 +35,27 @@ def download_file_from_s3(s3_url: str) -> str:
         str: The path to the downloaded file
     """
     try:
-        # Extract bucket and key using regex pattern for S3 URLs
-        # This pattern matches: https://bucket-name.s3.amazonaws.com/key
-        s3_pattern = r"https://([^\.]+)\.s3\.amazonaws\.com/([^?]+)"
-        match = re.match(s3_pattern, s3_url)
-
-        if not match:
-            raise ValueError(f"Invalid S3 URL format: {s3_url}")
-
-        bucket_name = match.group(1)
-        object_key = match.group(2)
-
-        # URL decode the object key
-        object_key = unquote(object_key)
+        bucket_name, object_key = parse_s3_url(s3_url)
 
         logger.info(f"Downloading file from S3: {bucket_name}/{object_key}")
 
-        # Initialize S3 client
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION", "us-east-1"),
-        )
-
         # Create a temporary file and close it immediately
-        temp_file = tempfile.NamedTemporaryFile(delete=False)
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(object_key)[1])
         temp_file_path = temp_file.name
         temp_file.close()  # Close the file handle immediately
 
-        # Download the file
-        s3_client.download_file(bucket_name, object_key, temp_file_path)
+        cache = get_artifact_cache()
+        if cache is not None:
+            # Link the node-local copy; the caller deletes only its own name
+            cached_path = cache.get_path_sync(object_key, bucket=bucket_name)
+            os.unlink(temp_file_path)
+            try:
+                os.link(cached_path, temp_file_path)
+            except OSError:
+                shutil.copyfile(cached_path, temp_file_path)
+        else:
+            # Download the file over the shared client, in parallel parts if large
+            get_object_storage().download_file_sync(object_key, temp_file_path, bucket=bucket_name)
 
         logger.info(f"File downloaded successfully to {temp_file_path}")
         return temp_file_path
@@ -73,14 +68,18 @@ def download_file_from_s3(s3_url: str) -> str:
 class S3Service:
     """Service for S3 operations"""
     
-    def __init__(self):
-        self.bucket_name = os.getenv("AWS_BUCKET_NAME") or os.getenv("S3_BUCKET_NAME", "narrative-modeling-dev")
-        self.s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION", "us-east-1"),
-        )
+    def __init__(self, storage: Optional[ObjectStorage] = None, cache: Optional[ArtifactCache] = None):
+        self.storage = storage or get_object_storage()
+        self.bucket_name = self.storage.bucket_name
+        # Whole-file reads go through the node-local disk cache
+        if cache is None and storage is None:
+            cache = get_artifact_cache()
+        self.cache = cache
+
+    @property
+    def s3_client(self):
+        """The shared boto3 client"""
+        return self.storage.client
     
     @with_circuit_breaker(
         "s3",
@@ -89,14 +88,29 @@ class S3Service:
         recovery_timeout=60.0,
         exceptions=(ClientError,)
     )
-    async def download_file_bytes(self, file_key: str) -> bytes:
-        """Download file from S3 and return as bytes"""
+    async def download_file_bytes(self, file_key: str, byte_range: Optional[Tuple[int, int]] = None) -> bytes:
+        """Download file from S3 and return as bytes, optionally an inclusive byte range of it"""
         try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key)
-            return response['Body'].read()
+            if self.cache is not None and byte_range is None:
+                return await self.cache.get_bytes(file_key, bucket=self.bucket_name)
+            return await self.storage.get_bytes(file_key, byte_range, bucket=self.bucket_name)
         except ClientError as e:
             logger.error(f"Error downloading file from S3: {str(e)}")
             raise
+
+    async def download_file_path(self, file_key: str) -> Optional[str]:
+        """
+        Path of a node-local, memory-mappable copy of a file, or None if the
+        disk cache is disabled. The file is shared and must not be modified
+        or deleted.
+        """
+        if self.cache is None:
+            return None
+        return await self.cache.get_path(file_key, bucket=self.bucket_name)
+
+    def iter_file(self, file_key: str, chunk_size: int = S3_STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Stream a file from S3 in pieces"""
+        return self.storage.iter_bytes(file_key, chunk_size, bucket=self.bucket_name)
     
     def get_file_url(self, file_key: str) -> str:
         """Get S3 URL for a file"""
@@ -112,7 +126,7 @@ class S3Service:
     async def upload_file_obj(self, file_obj, file_key: str) -> str:
         """Upload a file-like object to S3"""
         try:
-            self.s3_client.upload_fileobj(file_obj, self.bucket_name, file_key)
+            await self.storage.upload_fileobj(file_obj, file_key, bucket=self.bucket_name)
             logger.info(f"File uploaded successfully to {file_key}")
             return self.get_file_url(file_key)
         except ClientError as e:
@@ -133,7 +147,7 @@ class S3Service:
     async def delete_file(self, file_key: str) -> bool:
         """Delete a file from S3"""
         try:
-            self.s3_client.delete_object(Bucket=self.bucket_name, Key=file_key)
+            await self.storage.delete(file_key, bucket=self.bucket_name)
             logger.info(f"File deleted successfully: {file_key}")
             return True
         except ClientError as e:
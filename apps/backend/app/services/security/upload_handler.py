@@ -1,35 +1,187 @@
 """
 Resilient Upload Handler
 Handles network interruptions, large files, and security checks
+
+Chunks are streamed straight to an S3 multipart upload, one part per
+chunk, when S3 is configured; otherwise they are assembled in a local
+temp file. Either way the file is hashed incrementally as chunks arrive
+in order, and CSV uploads are parsed block by block for PII detection,
+row counting and a schema sample, so completing an upload never re-reads
+the file.
 """
 
+import asyncio
+import base64
 import os
 import hashlib
+import io
 import json
-from typing import Optional, Dict, Any, BinaryIO
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 import aiofiles
-from fastapi import UploadFile, HTTPException
+from fastapi import HTTPException
 import logging
 from pathlib import Path
 
+import pandas as pd
+
+from app.services.data_processing.ingestion import get_ingestion_engine
+from app.services.security.pii_detector import PIIDetector, PIIDetection
+from app.utils.s3 import get_s3_client
+
 logger = logging.getLogger(__name__)
 
+# Leading rows kept from streamed CSVs for schema inference and previews
+UPLOAD_SAMPLE_ROWS = int(os.getenv("UPLOAD_SAMPLE_ROWS", "10000"))
+
+
+class StreamingCSVScanner:
+    """
+    Parses a CSV incrementally as its bytes arrive in order
+
+    Complete records are parsed in blocks; each block is scanned for PII
+    and counted, and the leading rows are kept as a sample. A failed
+    parse stops scanning and is reported in `error`.
+    """
+    
+    def __init__(self, pii_detector: PIIDetector, sample_rows: int = UPLOAD_SAMPLE_ROWS):
+        self.pii_detector = pii_detector
+        self.sample_rows = sample_rows
+        self.engine = get_ingestion_engine()
+        self.header: Optional[bytes] = None
+        self.row_count = 0
+        self.sample: Optional[pd.DataFrame] = None
+        self.error: Optional[str] = None
+        self._buffer = bytearray()
+        self._detections: Dict[str, PIIDetection] = {}
+    
+    @property
+    def pii_detections(self) -> List[PIIDetection]:
+        return list(self._detections.values())
+    
+    @property
+    def columns(self) -> List[str]:
+        return [] if self.sample is None else [str(c) for c in self.sample.columns]
+    
+    def feed(self, data: bytes) -> None:
+        """Consume the next bytes of the file"""
+        if self.error:
+            return
+        self._buffer += data
+        
+        if self.header is None:
+            newline = self._buffer.find(b"\n")
+            if newline < 0:
+                return
+            self.header = bytes(self._buffer[:newline + 1])
+            del self._buffer[:newline + 1]
+        
+        boundary = self._record_boundary()
+        if boundary:
+            block = bytes(self._buffer[:boundary])
+            del self._buffer[:boundary]
+            self._parse(block)
+    
+    def finish(self) -> None:
+        """Parse whatever is left once the last byte has arrived"""
+        if self.error:
+            return
+        if self.header is None and self._buffer:
+            self.header, self._buffer = bytes(self._buffer) + b"\n", bytearray()
+        if self._buffer.strip():
+            self._parse(bytes(self._buffer))
+        self._buffer = bytearray()
+        if self.sample is None and self.header is not None:
+            self._parse(b"")
+    
+    def _record_boundary(self) -> int:
+        """Offset just past the last newline that is outside quotes"""
+        end = self._buffer.rfind(b"\n")
+        while end >= 0:
+            # Doubled quotes keep the count even, so an odd count means
+            # the newline sits inside a quoted field
+            if self._buffer.count(b'"', 0, end) % 2 == 0:
+                return end + 1
+            end = self._buffer.rfind(b"\n", 0, end)
+        return 0
+    
+    def _parse(self, block: bytes) -> None:
+        try:
+            df = self.engine.read(io.BytesIO(self.header + block), 'csv')
+        except Exception as e:
+            logger.warning(f"Streaming CSV scan stopped: {e}")
+            self.error = str(e)
+            return
+        
+        self.row_count += len(df)
+        for detection in self.pii_detector.detect_pii_in_dataframe(df):
+            current = self._detections.get(detection.column_name)
+            if current is None or detection.confidence > current.confidence:
+                self._detections[detection.column_name] = detection
+        
+        if self.sample is None:
+            self.sample = df.head(self.sample_rows)
+        elif len(self.sample) < self.sample_rows:
+            needed = self.sample_rows - len(self.sample)
+            self.sample = pd.concat([self.sample, df.head(needed)], ignore_index=True)
+
+
+class UploadStream:
+    """In-process state of one upload: running hash, CSV scan, parked chunks"""
+    
+    def __init__(self, scanner: Optional[StreamingCSVScanner]):
+        self.sha256 = hashlib.sha256()
+        self.scanner = scanner
+        self.next_chunk = 0
+        # Chunks that arrived ahead of next_chunk, parked on disk
+        self.parked: Dict[int, Path] = {}
+        # Serialises parking and in-order hashing across concurrent chunks
+        self.lock = asyncio.Lock()
+
+
+@dataclass
+class CompletedUpload:
+    """A finished upload and what was learned while streaming it"""
+    filename: str
+    sha256: str
+    s3_key: Optional[str] = None
+    s3_url: Optional[str] = None
+    # Assembled local copy, present when the file was not streamed to S3
+    # or could not be scanned while streaming (e.g. Excel workbooks)
+    temp_path: Optional[Path] = None
+    scan: Optional[StreamingCSVScanner] = None
+
 
 class ChunkedUploadHandler:
     """Handles resumable chunked uploads with integrity checks"""
     
     def __init__(self, 
                  temp_dir: str = "/tmp/uploads",
-                 chunk_size: int = 5 * 1024 * 1024,  # 5MB chunks
+                 chunk_size: int = 5 * 1024 * 1024,  # 5MB chunks, the S3 part minimum
                  max_file_size: int = 100 * 1024 * 1024 * 1024,  # 100GB
-                 session_timeout: int = 24):  # hours
+                 session_timeout: int = 24,  # hours
+                 s3_client: Any = None,
+                 bucket_name: Optional[str] = None,
+                 pii_detector: Optional[PIIDetector] = None):
         self.temp_dir = Path(temp_dir)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
         self.chunk_size = chunk_size
         self.max_file_size = max_file_size
         self.session_timeout = session_timeout
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.pii_detector = pii_detector or PIIDetector()
         self.sessions = {}  # In production, use Redis
+        self.streams: Dict[str, UploadStream] = {}
+    
+    def _s3(self):
+        """S3 client when configured, else None (uploads assemble locally)"""
+        if self.s3_client is None:
+            self.s3_client = get_s3_client()
+        if self.s3_client is not None and not self.bucket_name:
+            self.bucket_name = os.getenv("AWS_BUCKET_NAME")
+        return self.s3_client if self.bucket_name else None
     
     async def init_upload(self, 
                           filename: str, 
@@ -62,13 +214,32 @@ class ChunkedUploadHandler:
             "total_chunks": total_chunks,
             "uploaded_chunks": [],
             "temp_path": str(temp_path),
+            "s3_key": None,
+            "upload_id": None,
+            "parts": {},
             "created_at": datetime.utcnow().isoformat(),
             "expires_at": (datetime.utcnow() + timedelta(hours=self.session_timeout)).isoformat(),
             "status": "initialized"
         }
         
+        s3 = self._s3()
+        if s3 is not None:
+            from app.utils.schema_inference import generate_s3_filename
+            session["s3_key"] = generate_s3_filename(filename)
+            try:
+                response = await asyncio.to_thread(
+                    s3.create_multipart_upload, Bucket=self.bucket_name, Key=session["s3_key"]
+                )
+            except Exception as e:
+                logger.error(f"Failed to start multipart upload for {filename}: {e}")
+                raise HTTPException(status_code=502, detail="Failed to start upload to storage")
+            session["upload_id"] = response["UploadId"]
+        
         # Save session (in production, use Redis)
         self.sessions[session_id] = session
+        self.streams[session_id] = UploadStream(
+            StreamingCSVScanner(self.pii_detector) if filename.lower().endswith('.csv') else None
+        )
         self._save_session_metadata(session_id, session)
         
         return {
@@ -102,48 +273,60 @@ class ChunkedUploadHandler:
                 "progress": self._calculate_progress(session)
             }
         
-        # Verify chunk hash if provided
-        if chunk_hash:
-            actual_hash = hashlib.md5(chunk_data).hexdigest()
-            if actual_hash != chunk_hash:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Chunk hash mismatch. Expected: {chunk_hash}, Got: {actual_hash}"
-                )
+        stream = self.streams.get(session_id)
+        if stream is None or session["status"] not in ("initialized", "uploading"):
+            # Hash and scan state live in this process only
+            raise HTTPException(
+                status_code=409,
+                detail="Upload session can no longer accept chunks; start a new upload"
+            )
         
-        # Write chunk to temp file
-        temp_path = Path(session["temp_path"])
-        offset = chunk_number * self.chunk_size
+        # Verify chunk hash if provided
+        digest = hashlib.md5(chunk_data).digest()
+        if chunk_hash and digest.hex() != chunk_hash:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Chunk hash mismatch. Expected: {chunk_hash}, Got: {digest.hex()}"
+            )
         
-        async with aiofiles.open(temp_path, 'r+b' if temp_path.exists() else 'wb') as f:
-            await f.seek(offset)
-            await f.write(chunk_data)
+        if session["upload_id"]:
+            await self._upload_part(session, chunk_number, chunk_data, digest)
+        if not session["upload_id"] or stream.scanner is None:
+            # Assemble locally: no S3, or a format parsed only once complete
+            temp_path = Path(session["temp_path"])
+            async with aiofiles.open(temp_path, 'r+b' if temp_path.exists() else 'wb') as f:
+                await f.seek(chunk_number * self.chunk_size)
+                await f.write(chunk_data)
+        
+        if not await self._advance(session_id, stream, chunk_number, chunk_data):
+            # A concurrent request delivered the same chunk first
+            return {
+                "chunk_number": chunk_number,
+                "status": "already_uploaded",
+                "progress": self._calculate_progress(session)
+            }
         
         # Update session
         session["uploaded_chunks"].append(chunk_number)
         session["uploaded_chunks"].sort()
+        if session["status"] != "complete":
+            session["status"] = "uploading"
         session["last_activity"] = datetime.utcnow().isoformat()
         
-        # Check if upload is complete
-        if len(session["uploaded_chunks"]) == session["total_chunks"]:
+        # Complete once every chunk has been hashed and scanned in order
+        if stream.next_chunk == session["total_chunks"] and session["status"] != "complete":
             session["status"] = "complete"
+            if stream.scanner is not None:
+                await asyncio.to_thread(stream.scanner.finish)
             
-            # Verify complete file if hash provided
-            if session.get("file_hash"):
-                file_valid = await self._verify_file_integrity(
-                    temp_path, 
-                    session["file_hash"]
+            # The running hash already covers the whole file
+            if session.get("file_hash") and stream.sha256.hexdigest() != session["file_hash"]:
+                await self._fail(session_id, "File integrity check failed")
+                raise HTTPException(
+                    status_code=400,
+                    detail="File integrity check failed"
                 )
-                if not file_valid:
-                    session["status"] = "failed"
-                    raise HTTPException(
-                        status_code=400,
-                        detail="File integrity check failed"
-                    )
-        
-        # Save session state
-        self.sessions[session_id] = session
-        self._save_session_metadata(session_id, session)
+            self._save_session_metadata(session_id, session)
         
         return {
             "chunk_number": chunk_number,
@@ -152,6 +335,85 @@ class ChunkedUploadHandler:
             "complete": session["status"] == "complete"
         }
     
+    async def _upload_part(self, session: Dict[str, Any], chunk_number: int,
+                           chunk_data: bytes, digest: bytes) -> None:
+        """Send one chunk as a multipart part; S3 re-checks its MD5"""
+        try:
+            response = await asyncio.to_thread(
+                self._s3().upload_part,
+                Bucket=self.bucket_name,
+                Key=session["s3_key"],
+                UploadId=session["upload_id"],
+                PartNumber=chunk_number + 1,
+                Body=chunk_data,
+                ContentMD5=base64.b64encode(digest).decode()
+            )
+        except Exception as e:
+            logger.error(f"Part {chunk_number + 1} of {session['s3_key']} failed: {e}")
+            await self._fail(session["id"], f"Upload to storage failed: {e}")
+            raise HTTPException(status_code=502, detail="Failed to upload chunk to storage")
+        session["parts"][str(chunk_number + 1)] = response["ETag"]
+    
+    async def _advance(self, session_id: str, stream: UploadStream,
+                       chunk_number: int, chunk_data: bytes) -> bool:
+        """
+        Hash and scan chunks in file order, parking early arrivals on disk
+
+        Returns False if the chunk was already hashed or parked.
+        """
+        async with stream.lock:
+            if chunk_number < stream.next_chunk or chunk_number in stream.parked:
+                return False
+            
+            if chunk_number != stream.next_chunk:
+                park_path = self.temp_dir / f"{session_id}.{chunk_number}.part"
+                async with aiofiles.open(park_path, 'wb') as f:
+                    await f.write(chunk_data)
+                stream.parked[chunk_number] = park_path
+                return True
+            
+            while True:
+                stream.sha256.update(chunk_data)
+                if stream.scanner is not None:
+                    await asyncio.to_thread(stream.scanner.feed, chunk_data)
+                stream.next_chunk += 1
+                
+                park_path = stream.parked.pop(stream.next_chunk, None)
+                if park_path is None:
+                    return True
+                async with aiofiles.open(park_path, 'rb') as f:
+                    chunk_data = await f.read()
+                park_path.unlink()
+    
+    async def _fail(self, session_id: str, reason: str) -> None:
+        """Mark a session failed and abort its multipart upload"""
+        session = self.sessions[session_id]
+        session["status"] = "failed"
+        session["error"] = reason
+        await self._abort_multipart(session)
+        self._discard_stream(session_id)
+        self._save_session_metadata(session_id, session)
+    
+    async def _abort_multipart(self, session: Dict[str, Any]) -> None:
+        if not session.get("upload_id"):
+            return
+        try:
+            await asyncio.to_thread(
+                self._s3().abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=session["s3_key"],
+                UploadId=session["upload_id"]
+            )
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload {session['upload_id']}: {e}")
+        session["upload_id"] = None
+    
+    def _discard_stream(self, session_id: str) -> None:
+        stream = self.streams.pop(session_id, None)
+        if stream is not None:
+            for path in stream.parked.values():
+                path.unlink(missing_ok=True)
+    
     async def resume_upload(self, session_id: str) -> Dict[str, Any]:
         """Get resume information for interrupted upload"""
         
@@ -179,38 +441,69 @@ class ChunkedUploadHandler:
             "expires_at": session["expires_at"]
         }
     
-    async def complete_upload(self, session_id: str) -> Path:
-        """Finalize upload and return file path"""
+    async def complete_upload(self, session_id: str) -> CompletedUpload:
+        """Finalize the upload: complete the multipart upload, return scan results"""
         
         session = self._get_session(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Upload session not found")
         
-        if session["status"] != "complete":
+        stream = self.streams.get(session_id)
+        if session["status"] != "complete" or stream is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Upload not complete. Progress: {self._calculate_progress(session)}%"
             )
         
-        return Path(session["temp_path"])
+        upload = CompletedUpload(
+            filename=session["filename"],
+            sha256=stream.sha256.hexdigest(),
+            scan=stream.scanner
+        )
+        
+        if session["upload_id"]:
+            parts = sorted(session["parts"].items(), key=lambda item: int(item[0]))
+            try:
+                await asyncio.to_thread(
+                    self._s3().complete_multipart_upload,
+                    Bucket=self.bucket_name,
+                    Key=session["s3_key"],
+                    UploadId=session["upload_id"],
+                    MultipartUpload={
+                        "Parts": [{"PartNumber": int(n), "ETag": etag} for n, etag in parts]
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Completing multipart upload {session['s3_key']} failed: {e}")
+                await self._fail(session_id, f"Completing upload failed: {e}")
+                raise HTTPException(status_code=502, detail="Failed to finalize upload in storage")
+            upload.s3_key = session["s3_key"]
+            upload.s3_url = f"https://{self.bucket_name}.s3.amazonaws.com/{session['s3_key']}"
+        
+        temp_path = Path(session["temp_path"])
+        if temp_path.exists():
+            upload.temp_path = temp_path
+        
+        session["status"] = "finalized"
+        self._discard_stream(session_id)
+        self._save_session_metadata(session_id, session)
+        return upload
     
-    def cleanup_expired_sessions(self):
-        """Clean up expired upload sessions"""
+    async def cleanup_expired_sessions(self) -> int:
+        """Clean up expired upload sessions, aborting their multipart uploads"""
         now = datetime.utcnow()
-        expired_sessions = []
-        
-        for session_id, session in self.sessions.items():
-            if datetime.fromisoformat(session["expires_at"]) < now:
-                expired_sessions.append(session_id)
-                
-                # Delete temp file
-                temp_path = Path(session["temp_path"])
-                if temp_path.exists():
-                    temp_path.unlink()
+        expired_sessions = [
+            session_id for session_id, session in self.sessions.items()
+            if datetime.fromisoformat(session["expires_at"]) < now
+        ]
         
-        # Remove expired sessions
         for session_id in expired_sessions:
-            del self.sessions[session_id]
+            session = self.sessions.pop(session_id)
+            await self._abort_multipart(session)
+            self._discard_stream(session_id)
+            
+            # Delete temp file
+            Path(session["temp_path"]).unlink(missing_ok=True)
             metadata_path = self.temp_dir / f"{session_id}.json"
             if metadata_path.exists():
                 metadata_path.unlink()
@@ -239,7 +532,7 @@ class ChunkedUploadHandler:
         return None
     
     def _save_session_metadata(self, session_id: str, session: Dict[str, Any]):
-        """Save session metadata to disk for recovery"""
+        """Save session metadata to disk on state changes (not per chunk)"""
         metadata_path = self.temp_dir / f"{session_id}.json"
         with open(metadata_path, 'w') as f:
             json.dump(session, f)
@@ -247,17 +540,6 @@ class ChunkedUploadHandler:
     def _calculate_progress(self, session: Dict[str, Any]) -> float:
         """Calculate upload progress percentage"""
         return round(len(session["uploaded_chunks"]) / session["total_chunks"] * 100, 2)
-    
-    async def _verify_file_integrity(self, file_path: Path, expected_hash: str) -> bool:
-        """Verify file integrity using hash"""
-        hash_algo = hashlib.sha256()
-        
-        async with aiofiles.open(file_path, 'rb') as f:
-            while chunk := await f.read(8192):
-                hash_algo.update(chunk)
-        
-        actual_hash = hash_algo.hexdigest()
-        return actual_hash == expected_hash
 
 
 class RateLimiter:
@@ -1,17 +1,227 @@
 """
 Data utilities for transformation service
 """
+import asyncio
+import hashlib
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import tempfile
 import os
-from typing import Optional
+from typing import Optional, List
 import logging
 
 from app.services.s3_service import download_file_from_s3
+from app.services.redis_cache import cache_service
 from app.utils.s3 import upload_file_to_s3
 
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Rows kept in the cached preview sample
+PREVIEW_SAMPLE_ROWS = 10000
+# Candidate rows gathered before stratifying down to the sample size
+SAMPLE_CANDIDATE_FACTOR = 4
+# Categorical columns with at most this many values are used as strata
+MAX_STRATUM_CARDINALITY = 20
+CSV_SAMPLE_CHUNK_ROWS = 100000
+
+
+class DatasetSample:
+    """Sample of a dataset used for interactive previews and validation"""
+
+    def __init__(self, dataframe: pd.DataFrame, total_rows: int):
+        self.dataframe = dataframe
+        self.total_rows = total_rows
+
+    @property
+    def sample_rows(self) -> int:
+        return len(self.dataframe)
+
+    @property
+    def is_estimate(self) -> bool:
+        """Results computed on the sample are estimates unless it is the whole dataset"""
+        return self.sample_rows < self.total_rows
+
+
+def read_parquet_head(file_path: str, nrows: int) -> pd.DataFrame:
+    """Read the first rows of a Parquet file, scanning only the row groups needed"""
+    parquet_file = pq.ParquetFile(file_path)
+    batches = []
+    rows = 0
+    for batch in parquet_file.iter_batches(batch_size=min(nrows, 65536)):
+        batches.append(batch)
+        rows += batch.num_rows
+        if rows >= nrows:
+            break
+
+    if not batches:
+        return parquet_file.schema_arrow.empty_table().to_pandas()
+
+    return pa.Table.from_batches(batches).to_pandas().head(nrows)
+
+
+def stratified_sample(df: pd.DataFrame, n: int, random_state: int = 42) -> pd.DataFrame:
+    """
+    Sample rows proportionally across strata, keeping the original row order.
+
+    Rows are stratified by whether they have missing values and, when present,
+    by the first low-cardinality categorical column, so rare groups that drive
+    fill/drop previews are still represented. Every stratum keeps at least one row.
+    """
+    if len(df) <= n:
+        return df
+
+    strata = df.isnull().any(axis=1).astype(str)
+    for col in df.select_dtypes(include=['object', 'category']).columns:
+        if df[col].nunique(dropna=True) <= MAX_STRATUM_CARDINALITY:
+            strata = strata + '|' + df[col].astype(str)
+            break
+
+    rng = np.random.default_rng(random_state)
+    fraction = n / len(df)
+    positions: List[int] = []
+    for group_positions in strata.groupby(strata, sort=False).indices.values():
+        take = min(len(group_positions), max(1, round(len(group_positions) * fraction)))
+        positions.extend(rng.choice(group_positions, take, replace=False))
+
+    return df.iloc[np.sort(positions)]
+
+
+def _read_parquet_sample(file_path: str, target_rows: int) -> DatasetSample:
+    """Read the leading rows of evenly spaced row groups until enough candidates are gathered"""
+    parquet_file = pq.ParquetFile(file_path)
+    metadata = parquet_file.metadata
+    total_rows = metadata.num_rows
+
+    if total_rows <= target_rows:
+        return DatasetSample(parquet_file.read().to_pandas(), total_rows)
+
+    candidate_rows = target_rows * SAMPLE_CANDIDATE_FACTOR
+    num_groups = metadata.num_row_groups
+    avg_group_rows = max(1, total_rows // num_groups)
+    groups_needed = min(num_groups, -(-candidate_rows // avg_group_rows))
+    row_groups = sorted(set(np.linspace(0, num_groups - 1, groups_needed).astype(int).tolist()))
+
+    # Take an equal share from each group so one oversized group cannot blow the budget
+    rows_per_group = -(-candidate_rows // len(row_groups))
+    batches = []
+    for row_group in row_groups:
+        batch = next(parquet_file.iter_batches(batch_size=rows_per_group, row_groups=[row_group]), None)
+        if batch is not None:
+            batches.append(batch)
+
+    candidates = pa.Table.from_batches(batches, schema=parquet_file.schema_arrow).to_pandas()
+    return DatasetSample(stratified_sample(candidates, target_rows), total_rows)
+
+
+def _read_csv_sample(file_path: str, target_rows: int, random_state: int = 42) -> DatasetSample:
+    """Stream a CSV in chunks, keeping a bounded uniform pool of candidate rows"""
+    rng = np.random.default_rng(random_state)
+    candidate_rows = target_rows * SAMPLE_CANDIDATE_FACTOR
+    pool: Optional[pd.DataFrame] = None
+    pool_keys = np.empty(0)
+    total_rows = 0
+
+    for chunk in pd.read_csv(file_path, chunksize=CSV_SAMPLE_CHUNK_ROWS):
+        chunk.index = pd.RangeIndex(total_rows, total_rows + len(chunk))
+        total_rows += len(chunk)
+        keys = rng.random(len(chunk))
+        pool = chunk if pool is None else pd.concat([pool, chunk])
+        pool_keys = np.concatenate([pool_keys, keys])
+
+        if len(pool) > candidate_rows:
+            # Keep the rows with the smallest random keys: a uniform sample so far
+            keep = np.sort(np.argpartition(pool_keys, candidate_rows)[:candidate_rows])
+            pool = pool.iloc[keep]
+            pool_keys = pool_keys[keep]
+
+    if pool is None:
+        return DatasetSample(pd.read_csv(file_path), 0)
+
+    return DatasetSample(stratified_sample(pool, target_rows).reset_index(drop=True), total_rows)
+
+
+def _excel_row_count(file_path: str) -> Optional[int]:
+    """Data rows of a workbook's first sheet from its declared dimensions, if known"""
+    if not OPENPYXL_AVAILABLE or not file_path.endswith('.xlsx'):
+        return None
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        max_row = workbook.worksheets[0].max_row
+    finally:
+        workbook.close()
+    return max_row - 1 if max_row else None
+
+
+def _read_excel_sample(file_path: str, target_rows: int) -> DatasetSample:
+    """Read a bounded number of leading Excel rows as sample candidates
+
+    Without declared sheet dimensions, the total of a truncated read is a
+    lower bound, which still marks the sample as an estimate.
+    """
+    candidate_rows = target_rows * SAMPLE_CANDIDATE_FACTOR
+    df = pd.read_excel(file_path, nrows=candidate_rows + 1)
+    if len(df) <= candidate_rows:
+        return DatasetSample(stratified_sample(df, target_rows), len(df))
+
+    total_rows = max(_excel_row_count(file_path) or 0, len(df))
+    return DatasetSample(stratified_sample(df.head(candidate_rows), target_rows), total_rows)
+
+
+def load_dataset_sample(file_path: str, target_rows: int = PREVIEW_SAMPLE_ROWS) -> DatasetSample:
+    """Load a stratified sample from a local dataset file"""
+    if file_path.endswith('.parquet'):
+        return _read_parquet_sample(file_path, target_rows)
+    if file_path.endswith('.xlsx') or file_path.endswith('.xls'):
+        return _read_excel_sample(file_path, target_rows)
+    try:
+        return _read_csv_sample(file_path, target_rows)
+    except (pd.errors.ParserError, UnicodeDecodeError):
+        # Binary content without an extension; try it as Parquet
+        return _read_parquet_sample(file_path, target_rows)
+
+
+async def get_dataset_sample(s3_url: str, target_rows: int = PREVIEW_SAMPLE_ROWS) -> DatasetSample:
+    """
+    Get a cached stratified sample of a dataset for previews and validation
+
+    Samples are cached per file, so repeated previews cost a cache read
+    regardless of dataset size. Transformed datasets get a new file path and
+    therefore a fresh sample.
+    """
+    cache_key = f"preview_sample:{hashlib.md5(s3_url.encode()).hexdigest()}:{target_rows}"
+    cached = await cache_service.get(cache_key)
+    if cached is not None:
+        return DatasetSample(cached["dataframe"], cached["total_rows"])
+
+    def build_sample() -> DatasetSample:
+        temp_file_path = download_file_from_s3(s3_url)
+        try:
+            return load_dataset_sample(temp_file_path, target_rows)
+        finally:
+            os.unlink(temp_file_path)
+
+    try:
+        # Downloading and parsing both block, so the whole miss runs in a worker thread
+        sample = await asyncio.to_thread(build_sample)
+    except Exception as e:
+        logger.error(f"Error loading dataset sample from S3: {str(e)}")
+        raise
+
+    await cache_service.set(
+        cache_key,
+        {"dataframe": sample.dataframe, "total_rows": sample.total_rows},
+        ttl=3600  # 1 hour
+    )
+    return sample
+
 
 async def get_dataframe_from_s3(s3_url: str, nrows: Optional[int] = None) -> pd.DataFrame:
     """
@@ -26,14 +236,13 @@ async def get_dataframe_from_s3(s3_url: str, nrows: Optional[int] = None) -> pd.
     """
     try:
         # Download file from S3
-        temp_file_path = download_file_from_s3(s3_url)
+        temp_file_path = await asyncio.to_thread(download_file_from_s3, s3_url)
         
         # Determine file type and read accordingly
         if temp_file_path.endswith('.parquet'):
             if nrows:
-                # For parquet preview, read all then take head
-                df = pd.read_parquet(temp_file_path)
-                df = df.head(nrows)
+                # For parquet preview, only scan the row groups covering nrows
+                df = read_parquet_head(temp_file_path, nrows)
             else:
                 df = pd.read_parquet(temp_file_path)
         elif temp_file_path.endswith('.csv'):
@@ -45,9 +254,10 @@ async def get_dataframe_from_s3(s3_url: str, nrows: Optional[int] = None) -> pd.
             try:
                 df = pd.read_csv(temp_file_path, nrows=nrows)
             except:
-                df = pd.read_parquet(temp_file_path)
                 if nrows:
-                    df = df.head(nrows)
+                    df = read_parquet_head(temp_file_path, nrows)
+                else:
+                    df = pd.read_parquet(temp_file_path)
         
         # Clean up temp file
         os.unlink(temp_file_path)
@@ -78,15 +288,13 @@ async def upload_dataframe_to_s3(df: pd.DataFrame, s3_key: str) -> str:
         
         # Upload to S3
         with open(temp_path, 'rb') as file:
-            s3_url = upload_file_to_s3(
-                file=file,
-                filename=os.path.basename(s3_key),
-                file_path=s3_key,
-                user_id=s3_key.split('/')[1] if '/' in s3_key else 'default'
-            )
+            success, s3_url = await asyncio.to_thread(upload_file_to_s3, file, s3_key)
         
         # Clean up temp file
         os.unlink(temp_path)
+
+        if not success:
+            raise ValueError(f"Failed to upload dataframe to S3: {s3_key}")
         
         return s3_url
         
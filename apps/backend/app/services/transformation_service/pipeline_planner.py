@@ -0,0 +1,255 @@
+"""
+Lazy planner that fuses transformation steps into as few passes as possible
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+import pandas as pd
+
+from .transformation_engine import (
+    BaseTransformation,
+    DropMissingTransformation,
+    FillMissingTransformation,
+    PipelineResult,
+    TransformationType,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PlannedStep:
+    """A recipe step with its validated transformation and original position"""
+
+    def __init__(
+        self,
+        index: int,
+        transformation_type: TransformationType,
+        transformation: BaseTransformation
+    ):
+        self.index = index
+        self.transformation_type = transformation_type
+        self.transformation = transformation
+
+
+class ColumnStage:
+    """Consecutive column-wise steps executed in a single pass per column"""
+
+    kind = "column"
+
+    def __init__(self, steps: Optional[List[PlannedStep]] = None):
+        self.steps: List[PlannedStep] = steps or []
+
+    def commutes_with(self, row_filter: PlannedStep, columns: List[str]) -> bool:
+        """Whether a row filter can run before every step of this stage"""
+        filter_columns = set(row_filter.transformation.input_columns(columns))
+        return all(
+            step.transformation.row_independent
+            and not filter_columns & set(step.transformation.input_columns(columns))
+            for step in self.steps
+        )
+
+
+class RowFilterStage:
+    """A single row filter"""
+
+    kind = "row_filter"
+
+    def __init__(self, step: PlannedStep):
+        self.steps = [step]
+
+
+class PipelinePlan:
+    """Logical plan of fused stages built from recipe steps"""
+
+    def __init__(self, stages: List[Any], columns: List[str]):
+        self.stages = stages
+        self.columns = columns
+
+    def explain(self) -> List[Dict[str, Any]]:
+        """Describe the stages in execution order"""
+        return [
+            {
+                "stage": stage.kind,
+                "steps": [step.index for step in stage.steps],
+                "types": [step.transformation_type.value for step in stage.steps],
+            }
+            for stage in self.stages
+        ]
+
+    def execute(self, df: pd.DataFrame) -> PipelineResult:
+        """Run the plan, copying the frame at most once per column stage"""
+        if df.empty:
+            return PipelineResult(
+                success=False,
+                error="Cannot apply transformation to empty dataset",
+                failed_step=0
+            )
+
+        step_summaries: Dict[int, Dict[str, Any]] = {}
+        warnings: List[str] = []
+
+        for stage in self.stages:
+            if stage.kind == "column":
+                df, failed_step, error = self._run_column_stage(df, stage, step_summaries)
+            else:
+                failed_step = stage.steps[0].index
+                try:
+                    df, error = self._run_row_filter(df, stage.steps[0], step_summaries, warnings)
+                except Exception as e:
+                    error = str(e)
+            if error:
+                return PipelineResult(
+                    success=False,
+                    error=error,
+                    warnings=warnings,
+                    failed_step=failed_step
+                )
+
+        steps = [step_summaries[index] for index in sorted(step_summaries)]
+        affected_columns: List[str] = []
+        for summary in steps:
+            affected_columns.extend(
+                col for col in summary['affected_columns'] if col not in affected_columns
+            )
+
+        return PipelineResult(
+            success=True,
+            dataframe=df,
+            affected_rows=sum(summary['affected_rows'] for summary in steps),
+            affected_columns=affected_columns,
+            warnings=warnings,
+            steps=steps
+        )
+
+    def _run_column_stage(
+        self,
+        df: pd.DataFrame,
+        stage: ColumnStage,
+        step_summaries: Dict[int, Dict[str, Any]]
+    ) -> Tuple[pd.DataFrame, Optional[int], Optional[str]]:
+        """Apply every fused step to each column in turn; returns the failing step index and error, if any"""
+        affected: Dict[int, List[str]] = {step.index: [] for step in stage.steps}
+        result = None
+
+        for col in df.columns:
+            series = df[col]
+            changed = False
+            for step in stage.steps:
+                transformation = step.transformation
+                if not transformation.applies_to(col, series):
+                    continue
+                # Fills only affect columns that actually have gaps
+                if not isinstance(transformation, FillMissingTransformation) or series.isnull().any():
+                    affected[step.index].append(col)
+                try:
+                    series = transformation.transform_column(series)
+                except Exception as e:
+                    return df, step.index, f"Column '{col}': {str(e)}"
+                changed = True
+
+            if changed:
+                if result is None:
+                    result = df.copy()
+                result[col] = series
+
+        for step in stage.steps:
+            step_summaries[step.index] = {
+                'type': step.transformation_type,
+                'parameters': step.transformation.parameters,
+                'affected_rows': 0,
+                'affected_columns': affected[step.index]
+            }
+
+        return (df if result is None else result), None, None
+
+    def _run_row_filter(
+        self,
+        df: pd.DataFrame,
+        step: PlannedStep,
+        step_summaries: Dict[int, Dict[str, Any]],
+        warnings: List[str]
+    ) -> Tuple[pd.DataFrame, Optional[str]]:
+        """Evaluate a filter's mask once for validation, stats and the filter itself"""
+        transformation = step.transformation
+        keep = transformation.row_mask(df)
+        rows_to_drop = int((~keep).sum())
+
+        if isinstance(transformation, DropMissingTransformation):
+            is_valid, error = transformation.check_data_loss(rows_to_drop, len(df))
+            if not is_valid:
+                return df, error
+            data_loss_pct = (rows_to_drop / len(df)) * 100
+            if data_loss_pct > 25:
+                warnings.append(f"Warning: This operation will drop {data_loss_pct:.1f}% of rows ({rows_to_drop}/{len(df)})")
+            cols_checked = transformation.input_columns(df.columns.tolist())
+            affected_columns = [col for col in cols_checked if df[col].isnull().any()]
+        else:
+            affected_columns = transformation.input_columns(df.columns.tolist())
+
+        if rows_to_drop == len(df):
+            return df, "Transformation removed all rows from dataset. Operation aborted."
+
+        step_summaries[step.index] = {
+            'type': step.transformation_type,
+            'parameters': transformation.parameters,
+            'affected_rows': rows_to_drop,
+            'affected_columns': affected_columns
+        }
+
+        return (df[keep] if rows_to_drop else df), None
+
+
+class PipelinePlanner:
+    """Builds a fused, filter-first plan from validated recipe steps"""
+
+    def plan(self, steps: List[PlannedStep], columns: List[str]) -> PipelinePlan:
+        """
+        Build a logical plan.
+
+        Consecutive column-wise steps are fused into one stage, and each row
+        filter is moved ahead of preceding column stages it commutes with, so
+        later passes touch fewer rows. Relative order of filters is preserved.
+        """
+        stages: List[Any] = []
+
+        for step in steps:
+            transformation = step.transformation
+
+            if transformation.row_filter:
+                position = len(stages)
+                while (
+                    position > 0
+                    and stages[position - 1].kind == "column"
+                    and stages[position - 1].commutes_with(step, columns)
+                ):
+                    position -= 1
+                stages.insert(position, RowFilterStage(step))
+            elif transformation.column_wise:
+                if stages and stages[-1].kind == "column":
+                    stages[-1].steps.append(step)
+                else:
+                    stages.append(ColumnStage([step]))
+            else:
+                raise ValueError(f"Transformation {step.transformation_type.value} cannot be planned")
+
+        return PipelinePlan(stages, columns)
+
+    @staticmethod
+    def validate_columns(steps: List[PlannedStep], columns: List[str]) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Check every step's referenced columns exist, before anything runs.
+
+        Each step is checked against the schema the steps before it produce,
+        and the first failure is reported with that step's index.
+        """
+        schema = list(columns)
+        for step in steps:
+            transformation = step.transformation
+            if not (transformation.row_filter or transformation.column_wise):
+                return step.index, f"Transformation {step.transformation_type.value} cannot be planned"
+            available = set(schema)
+            missing_columns = [col for col in transformation.input_columns(schema) if col not in available]
+            if missing_columns:
+                return step.index, f"Columns not found in dataset: {', '.join(missing_columns)}"
+            schema = transformation.output_columns(schema)
+        return None, None
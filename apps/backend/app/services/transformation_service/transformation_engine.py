@@ -63,8 +63,51 @@ class TransformationResult(BaseModel):
     stats_after: Optional[Dict[str, Any]] = None
 
 
+class PipelineResult:
+    """Result of a multi-step transformation pipeline
+
+    Holds the transformed DataFrame itself so steps and callers hand frames
+    off directly; records are only materialized for API responses.
+    """
+
+    def __init__(
+        self,
+        success: bool,
+        dataframe: Optional[pd.DataFrame] = None,
+        affected_rows: int = 0,
+        affected_columns: Optional[List[str]] = None,
+        warnings: Optional[List[str]] = None,
+        error: Optional[str] = None,
+        failed_step: Optional[int] = None,
+        steps: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.success = success
+        self.dataframe = dataframe
+        self.affected_rows = affected_rows
+        self.affected_columns = affected_columns or []
+        self.warnings = warnings or []
+        self.error = error
+        self.failed_step = failed_step
+        # Per-step summaries (type, parameters, affected rows/columns) in recipe order
+        self.steps = steps or []
+
+    def to_records(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Materialize a page of the transformed data as records"""
+        if self.dataframe is None:
+            return []
+        end = None if limit is None else offset + limit
+        return self.dataframe.iloc[offset:end].to_dict('records')
+
+
 class BaseTransformation(ABC):
     """Base class for all transformations"""
+
+    # Planner hints: column-wise steps transform each column independently via
+    # transform_column; row filters only drop rows, selected by row_mask.
+    # Row-independent steps compute each value from that cell alone.
+    column_wise = False
+    row_filter = False
+    row_independent = False
     
     def __init__(self, parameters: Dict[str, Any]):
         self.parameters = parameters
@@ -93,9 +136,31 @@ class BaseTransformation(ABC):
         """Validate if transformation can be applied to data"""
         return True, None
 
+    def input_columns(self, columns: List[str]) -> List[str]:
+        """Columns this transformation may read or write, given the dataset columns"""
+        return list(columns)
+
+    def output_columns(self, columns: List[str]) -> List[str]:
+        """Dataset columns after this transformation, given the columns before it"""
+        return list(columns)
+
+    def applies_to(self, column: str, series: pd.Series) -> bool:
+        """Whether a column-wise transformation touches this column"""
+        return False
+
+    def transform_column(self, series: pd.Series) -> pd.Series:
+        """Transform a single column (column-wise transformations only)"""
+        raise NotImplementedError(f"{type(self).__name__} is not column-wise")
+
+    def row_mask(self, df: pd.DataFrame) -> pd.Series:
+        """Boolean mask of rows to keep (row filters only)"""
+        raise NotImplementedError(f"{type(self).__name__} is not a row filter")
+
 
 class RemoveDuplicatesTransformation(BaseTransformation):
     """Remove duplicate rows from dataset"""
+
+    row_filter = True
     
     def validate_parameters(self) -> None:
         self.subset = self.parameters.get('subset', None)
@@ -114,10 +179,19 @@ class RemoveDuplicatesTransformation(BaseTransformation):
     def get_affected_columns(self, df: pd.DataFrame) -> List[str]:
         return self.subset if self.subset else df.columns.tolist()
 
+    def input_columns(self, columns: List[str]) -> List[str]:
+        return list(self.subset) if self.subset else list(columns)
+
+    def row_mask(self, df: pd.DataFrame) -> pd.Series:
+        return ~df.duplicated(subset=self.subset, keep=self.keep)
+
 
 class TrimWhitespaceTransformation(BaseTransformation):
     """Trim whitespace from string columns"""
 
+    column_wise = True
+    row_independent = True
+
     def validate_parameters(self) -> None:
         self.columns = self.parameters.get('columns', [])
 
@@ -125,19 +199,25 @@ class TrimWhitespaceTransformation(BaseTransformation):
         # Optimization: Use copy-on-write and vectorized operations
         df_copy = df.copy()
 
-        if not self.columns:
-            # Apply to all string columns
-            string_cols = df.select_dtypes(include=['object']).columns.tolist()
-        else:
-            string_cols = self.columns
-
-        # Optimization: Vectorize string operations across all columns at once
-        for col in string_cols:
-            if col in df.columns:
+        for col in df.columns:
+            if self.applies_to(col, df[col]):
                 # Vectorized string strip - faster than iterating
-                df_copy[col] = df_copy[col].astype(str).str.strip()
+                df_copy[col] = self.transform_column(df_copy[col])
 
         return df_copy
+
+    def input_columns(self, columns: List[str]) -> List[str]:
+        # Without explicit columns any column may be (or become) a string column
+        return list(self.columns) if self.columns else list(columns)
+
+    def applies_to(self, column: str, series: pd.Series) -> bool:
+        if not self.columns:
+            # Apply to all string columns
+            return pd.api.types.is_object_dtype(series)
+        return column in self.columns
+
+    def transform_column(self, series: pd.Series) -> pd.Series:
+        return series.astype(str).str.strip()
     
     def preview(self, df: pd.DataFrame, n_rows: int = 100) -> pd.DataFrame:
         return self.apply(df.head(n_rows).copy())
@@ -151,6 +231,8 @@ class TrimWhitespaceTransformation(BaseTransformation):
 class DropMissingTransformation(BaseTransformation):
     """Drop rows with missing values"""
 
+    row_filter = True
+
     def validate_parameters(self) -> None:
         self.columns = self.parameters.get('columns', None)
         self.threshold = self.parameters.get('threshold', None)
@@ -171,17 +253,40 @@ class DropMissingTransformation(BaseTransformation):
 
         # Optimization: Use vectorized operations for threshold-based dropping
         if self.threshold is not None:
-            cols_to_check = self.columns if self.columns else df.columns.tolist()
-
-            # Vectorized calculation of missing percentage per row
-            missing_pct = (df[cols_to_check].isnull().sum(axis=1) / len(cols_to_check)) * 100
-
             # Vectorized boolean indexing - faster than iteration
-            return df[missing_pct < self.threshold].copy()
+            return df[self.row_mask(df)].copy()
 
         # Optimization: Use pandas built-in dropna for standard strategies (already optimized)
         return df.dropna(subset=self.columns, how=self.how)
 
+    def input_columns(self, columns: List[str]) -> List[str]:
+        return list(self.columns) if self.columns else list(columns)
+
+    def row_mask(self, df: pd.DataFrame) -> pd.Series:
+        cols_to_check = self.columns if self.columns else df.columns.tolist()
+        missing = df[cols_to_check].isnull()
+
+        if self.threshold is not None:
+            # Vectorized calculation of missing percentage per row
+            missing_pct = (missing.sum(axis=1) / len(cols_to_check)) * 100
+            return missing_pct < self.threshold
+        if self.how == 'any':
+            return ~missing.any(axis=1)
+        return ~missing.all(axis=1)
+
+    def check_data_loss(self, rows_to_drop: int, total_rows: int) -> Tuple[bool, Optional[str]]:
+        """Reject drops that would remove too much of the dataset"""
+        data_loss_pct = (rows_to_drop / total_rows) * 100
+
+        # Warn if data loss is significant
+        if data_loss_pct > 50:
+            return False, f"Dropping missing values would result in {data_loss_pct:.1f}% data loss ({rows_to_drop}/{total_rows} rows). This exceeds the 50% safety threshold."
+
+        if rows_to_drop == total_rows:
+            return False, "Dropping missing values would remove all rows from the dataset"
+
+        return True, None
+
     def preview(self, df: pd.DataFrame, n_rows: int = 100) -> pd.DataFrame:
         preview_df = df.head(n_rows).copy()
         return self.apply(preview_df)
@@ -197,31 +302,15 @@ class DropMissingTransformation(BaseTransformation):
             return False, "Cannot drop missing values from empty dataset"
 
         # Calculate how many rows would be dropped
-        if self.threshold is not None:
-            cols_to_check = self.columns if self.columns else df.columns.tolist()
-            missing_pct = (df[cols_to_check].isnull().sum(axis=1) / len(cols_to_check)) * 100
-            rows_to_drop = (missing_pct >= self.threshold).sum()
-        else:
-            if self.how == 'any':
-                rows_to_drop = df[self.columns if self.columns else df.columns].isnull().any(axis=1).sum()
-            else:  # 'all'
-                rows_to_drop = df[self.columns if self.columns else df.columns].isnull().all(axis=1).sum()
-
-        data_loss_pct = (rows_to_drop / len(df)) * 100
-
-        # Warn if data loss is significant
-        if data_loss_pct > 50:
-            return False, f"Dropping missing values would result in {data_loss_pct:.1f}% data loss ({rows_to_drop}/{len(df)} rows). This exceeds the 50% safety threshold."
-
-        if rows_to_drop == len(df):
-            return False, "Dropping missing values would remove all rows from the dataset"
-
-        return True, None
+        rows_to_drop = (~self.row_mask(df)).sum()
+        return self.check_data_loss(rows_to_drop, len(df))
 
 
 class FillMissingTransformation(BaseTransformation):
     """Fill missing values with specified value or strategy"""
 
+    column_wise = True
+
     def validate_parameters(self) -> None:
         self.columns = self.parameters.get('columns', [])
         self.value = self.parameters.get('value', None)
@@ -233,45 +322,45 @@ class FillMissingTransformation(BaseTransformation):
         if self.method and self.method not in ['mean', 'median', 'mode', 'ffill', 'bfill']:
             raise ValueError(f"Invalid method: {self.method}")
 
+        # A constant fill only looks at the cell; strategies depend on other rows
+        self.row_independent = self.value is not None
+
     def apply(self, df: pd.DataFrame) -> pd.DataFrame:
         # Optimization: Use copy-on-write
         df_copy = df.copy()
 
-        cols_to_fill = self.columns if self.columns else df.columns.tolist()
+        for col in df.columns:
+            if self.applies_to(col, df[col]):
+                df_copy[col] = self.transform_column(df_copy[col])
+
+        return df_copy
+
+    def input_columns(self, columns: List[str]) -> List[str]:
+        return list(self.columns) if self.columns else list(columns)
 
-        # Optimization: Batch similar operations together
+    def applies_to(self, column: str, series: pd.Series) -> bool:
+        if self.columns and column not in self.columns:
+            return False
+        if self.value is None and self.method in ['mean', 'median']:
+            # Statistics only make sense for numeric columns
+            return pd.api.types.is_numeric_dtype(series)
+        return True
+
+    def transform_column(self, series: pd.Series) -> pd.Series:
         if self.value is not None:
-            # Vectorized fill for all columns at once
-            for col in cols_to_fill:
-                if col in df.columns:
-                    df_copy[col] = df_copy[col].fillna(self.value)
-        elif self.method in ['mean', 'median']:
-            # Optimization: Calculate statistics once for numeric columns
-            numeric_cols = [col for col in cols_to_fill if col in df.columns and pd.api.types.is_numeric_dtype(df_copy[col])]
-            if numeric_cols:
-                if self.method == 'mean':
-                    fill_values = df_copy[numeric_cols].mean()
-                else:  # median
-                    fill_values = df_copy[numeric_cols].median()
-                df_copy[numeric_cols] = df_copy[numeric_cols].fillna(fill_values)
-        elif self.method == 'mode':
-            for col in cols_to_fill:
-                if col in df.columns:
-                    mode_val = df_copy[col].mode()
-                    if len(mode_val) > 0:
-                        df_copy[col] = df_copy[col].fillna(mode_val[0])
-        elif self.method == 'ffill':
+            return series.fillna(self.value)
+        if self.method == 'mean':
+            return series.fillna(series.mean())
+        if self.method == 'median':
+            return series.fillna(series.median())
+        if self.method == 'mode':
+            mode_val = series.mode()
+            return series.fillna(mode_val[0]) if len(mode_val) > 0 else series
+        if self.method == 'ffill':
             # Vectorized forward fill
-            for col in cols_to_fill:
-                if col in df.columns:
-                    df_copy[col] = df_copy[col].fillna(method='ffill')
-        elif self.method == 'bfill':
-            # Vectorized backward fill
-            for col in cols_to_fill:
-                if col in df.columns:
-                    df_copy[col] = df_copy[col].fillna(method='bfill')
-
-        return df_copy
+            return series.ffill()
+        # Vectorized backward fill
+        return series.bfill()
 
     def preview(self, df: pd.DataFrame, n_rows: int = 100) -> pd.DataFrame:
         return self.apply(df.head(n_rows).copy())
@@ -457,10 +546,27 @@ class TransformationEngine:
         parameters: Dict[str, Any]
     ) -> TransformationResult:
         """Apply transformation to full dataset"""
+        transformed_df, result = self.apply_transformation_frame(df, transformation_type, parameters)
+        if transformed_df is not None:
+            result.transformed_data = transformed_df.to_dict('records')
+        return result
+
+    def apply_transformation_frame(
+        self,
+        df: pd.DataFrame,
+        transformation_type: TransformationType,
+        parameters: Dict[str, Any]
+    ) -> Tuple[Optional[pd.DataFrame], TransformationResult]:
+        """
+        Apply transformation to full dataset, returning the transformed DataFrame.
+
+        The returned result carries metadata only; ``transformed_data`` is left
+        unset so no records are materialized. The DataFrame is None on failure.
+        """
         try:
             # Edge case: Empty dataset
             if df.empty:
-                return TransformationResult(
+                return None, TransformationResult(
                     success=False,
                     error="Cannot apply transformation to empty dataset"
                 )
@@ -472,7 +578,7 @@ class TransformationEngine:
             # Validate transformation configuration first
             validation_result = self.validate_transformation(df, transformation_type, parameters)
             if not validation_result.success:
-                return validation_result
+                return None, validation_result
 
             # Create transformation
             transformation = self.create_transformation(transformation_type, parameters)
@@ -480,7 +586,7 @@ class TransformationEngine:
             # Validate data
             is_valid, error = transformation.validate_data(df)
             if not is_valid:
-                return TransformationResult(
+                return None, TransformationResult(
                     success=False,
                     error=error
                 )
@@ -493,7 +599,7 @@ class TransformationEngine:
 
             # Edge case: Check if transformation resulted in empty dataset
             if transformed_df.empty and not df.empty:
-                return TransformationResult(
+                return None, TransformationResult(
                     success=False,
                     error="Transformation removed all rows from dataset. Operation aborted."
                 )
@@ -514,9 +620,8 @@ class TransformationEngine:
                 'affected_columns': affected_columns
             })
 
-            return TransformationResult(
+            return transformed_df, TransformationResult(
                 success=True,
-                transformed_data=transformed_df.to_dict('records'),
                 affected_rows=affected_rows,
                 affected_columns=affected_columns,
                 warnings=warnings
@@ -524,10 +629,58 @@ class TransformationEngine:
 
         except Exception as e:
             logger.error(f"Apply transformation failed: {str(e)}")
-            return TransformationResult(
+            return None, TransformationResult(
                 success=False,
                 error=str(e)
             )
+
+    def apply_pipeline(
+        self,
+        df: pd.DataFrame,
+        steps: List[Tuple[TransformationType, Dict[str, Any]]]
+    ) -> PipelineResult:
+        """
+        Apply transformations as one lazily planned pipeline.
+
+        Parameters and referenced columns are validated once up front, then
+        the planner fuses consecutive column-wise steps into a single pass and
+        runs row filters as early as they commute, handing DataFrames between
+        stages without materializing records. Stops at the first failing step;
+        ``failed_step`` is its index in ``steps``.
+        """
+        from .pipeline_planner import PipelinePlanner, PlannedStep
+
+        planned_steps = []
+        for index, (transformation_type, parameters) in enumerate(steps):
+            try:
+                transformation = self.create_transformation(transformation_type, parameters)
+            except ValueError as e:
+                return PipelineResult(
+                    success=False,
+                    error=f"Invalid parameters: {str(e)}",
+                    failed_step=index
+                )
+            planned_steps.append(PlannedStep(index, transformation_type, transformation))
+
+        columns = df.columns.tolist()
+        failed_step, error = PipelinePlanner.validate_columns(planned_steps, columns)
+        if error:
+            return PipelineResult(success=False, error=error, failed_step=failed_step)
+
+        try:
+            plan = PipelinePlanner().plan(planned_steps, columns)
+            logger.debug(f"Pipeline plan: {plan.explain()}")
+            result = plan.execute(df)
+        except Exception as e:
+            # Step failures are reported by the plan; this is a planning error
+            logger.error(f"Apply pipeline failed: {str(e)}")
+            return PipelineResult(success=False, error=str(e))
+
+        if result.success:
+            timestamp = datetime.now(timezone.utc)
+            self.history.extend({'timestamp': timestamp, **summary} for summary in result.steps)
+
+        return result
     
     def _calculate_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
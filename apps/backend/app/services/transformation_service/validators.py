@@ -1,7 +1,7 @@
 """
 Validators for transformation pipeline
 """
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Set
 import pandas as pd
 import numpy as np
 from pydantic import BaseModel, Field
@@ -25,190 +25,361 @@ class ValidationResult(BaseModel):
     suggestions: List[str] = Field(default_factory=list)
 
 
-class TransformationValidator:
-    """Validates transformations before applying"""
-    
-    @staticmethod
-    def validate_remove_duplicates(
-        df: pd.DataFrame,
-        parameters: Dict[str, Any]
-    ) -> ValidationResult:
-        """Validate remove duplicates transformation"""
+def _hash_value(value: Any, dtype: Any) -> np.uint64:
+    """Row hash of a single value as it would be stored in a column of dtype"""
+    try:
+        series = pd.Series([value]).astype(dtype)
+    except (TypeError, ValueError):
+        series = pd.Series([value], dtype=object)
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()[0]
+
+
+class ValidationPlanner:
+    """
+    Validates a chain of transformations from column facts gathered in one pass.
+
+    The null masks, value hashes and whitespace masks of every column the
+    chain reads are computed once, up front. Each step then updates those
+    facts the way applying it would: removing duplicates narrows the live
+    rows, filling missing values clears null flags and copies hashes in,
+    trimming swaps in the hashes of the stripped strings. Later steps are
+    checked against the predicted data without scanning the frame again.
+    Steps other than remove_duplicates, fill_missing and trim_whitespace
+    are assumed to leave the data unchanged.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.alive = np.ones(len(df), dtype=bool)
+        self.string_columns = set(df.select_dtypes(include=['object']).columns)
+        self.numeric_columns = {col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])}
+        self.nulls: Dict[str, np.ndarray] = {}
+        self.hashes: Dict[str, np.ndarray] = {}
+        self.whitespace: Dict[str, np.ndarray] = {}
+        self.stripped_hashes: Dict[str, np.ndarray] = {}
+        # Row each value was copied from by forward/backward fills
+        self.sources: Dict[str, np.ndarray] = {}
+        self.suggestions: List[str] = []
+        self.scans = 0
+
+    def validate(
+        self,
+        transformations: List[Dict[str, Any]],
+        suggest: bool = False
+    ) -> List[ValidationResult]:
+        """Validate each step against the data left by the steps before it"""
+        steps = [(t.get('type'), t.get('parameters') or {}) for t in transformations]
+        self._scan(*self._plan(steps, suggest))
+        if suggest:
+            self.suggestions = self._suggest()
+
+        results = []
+        for step_type, parameters in steps:
+            if step_type == 'remove_duplicates':
+                results.append(self._remove_duplicates(parameters))
+            elif step_type == 'fill_missing':
+                results.append(self._fill_missing(parameters))
+            elif step_type == 'trim_whitespace':
+                results.append(self._trim_whitespace(parameters))
+            else:
+                results.append(ValidationResult(is_valid=True))
+        return results
+
+    def _plan(self, steps: List[Tuple[str, Dict[str, Any]]], suggest: bool) -> Tuple[Set[str], Set[str], Set[str]]:
+        """Columns whose null masks, hashes and whitespace masks the chain needs"""
+        columns = list(self.df.columns)
+        null_cols: Set[str] = set()
+        hash_cols: Set[str] = set()
+        text_cols: Set[str] = set()
+        string_columns = set(self.string_columns)
+
+        if suggest:
+            null_cols.update(columns)
+            hash_cols.update(columns)
+            text_cols.update([col for col in columns if col in string_columns][:5])
+
+        for step_type, parameters in steps:
+            if step_type == 'remove_duplicates':
+                hash_cols.update(col for col in parameters.get('subset') or columns if col in self.df.columns)
+            elif step_type == 'fill_missing':
+                null_cols.update(col for col in parameters.get('columns') or columns if col in self.df.columns)
+            elif step_type == 'trim_whitespace':
+                targets = parameters.get('columns') or [col for col in columns if col in string_columns]
+                targets = [col for col in targets if col in self.df.columns]
+                text_cols.update(targets)
+                string_columns.update(targets)
+        return null_cols, hash_cols, text_cols
+
+    def _scan(self, null_cols: Set[str], hash_cols: Set[str], text_cols: Set[str]) -> None:
+        """The one pass over the data"""
+        self.scans += 1
+        null_cols = [col for col in self.df.columns if col in null_cols]
+        if null_cols:
+            mask = self.df[null_cols].isna().to_numpy()
+            self.nulls = {col: mask[:, i].copy() for i, col in enumerate(null_cols)}
+
+        for col in hash_cols:
+            self.hashes[col] = pd.util.hash_pandas_object(self.df[col], index=False).to_numpy()
+
+        for col in text_cols:
+            as_text = self.df[col].astype(str)
+            stripped = as_text.str.strip()
+            self.whitespace[col] = (stripped != as_text).to_numpy()
+            if col in hash_cols:
+                self.stripped_hashes[col] = pd.util.hash_pandas_object(stripped, index=False).to_numpy()
+
+    def _missing_columns(self, columns: Optional[List[str]], result: ValidationResult) -> bool:
+        missing_cols = [col for col in columns or [] if col not in self.df.columns]
+        if missing_cols:
+            result.is_valid = False
+            result.errors.append(f"Columns not found: {missing_cols}")
+        return bool(missing_cols)
+
+    def _duplicates(self, columns: List[str], keep: Any = 'first') -> Tuple[np.ndarray, np.ndarray]:
+        """Live row positions and which of them duplicate an earlier live row"""
+        rows = np.flatnonzero(self.alive)
+        if not columns or not len(rows):
+            return rows, np.zeros(len(rows), dtype=bool)
+        keys = pd.DataFrame({i: self.hashes[col][rows] for i, col in enumerate(columns)})
+        return rows, keys.duplicated(keep=keep).to_numpy()
+
+    def _remove_duplicates(self, parameters: Dict[str, Any]) -> ValidationResult:
         result = ValidationResult(is_valid=True)
-        
         subset = parameters.get('subset', None)
-        
-        if subset:
-            # Check if columns exist
-            missing_cols = [col for col in subset if col not in df.columns]
-            if missing_cols:
-                result.is_valid = False
-                result.errors.append(f"Columns not found: {missing_cols}")
-                return result
-        
-        # Check for duplicates
-        if subset:
-            duplicates = df.duplicated(subset=subset)
-        else:
-            duplicates = df.duplicated()
-        
-        n_duplicates = duplicates.sum()
-        
+        if self._missing_columns(subset, result):
+            return result
+
+        rows, duplicates = self._duplicates(subset or list(self.df.columns), parameters.get('keep', 'first'))
+        n_duplicates = int(duplicates.sum())
+
         if n_duplicates == 0:
             result.warnings.append("No duplicate rows found")
         else:
             result.info.append(f"Found {n_duplicates} duplicate rows")
-            result.affected_rows = df[duplicates].index.tolist()[:10]  # First 10
-        
+            result.affected_rows = self.df.index[rows[duplicates][:10]].tolist()  # First 10
+            self.alive[rows[duplicates]] = False
+
         return result
-    
-    @staticmethod
-    def validate_fill_missing(
-        df: pd.DataFrame,
-        parameters: Dict[str, Any]
-    ) -> ValidationResult:
-        """Validate fill missing transformation"""
+
+    def _fill_missing(self, parameters: Dict[str, Any]) -> ValidationResult:
         result = ValidationResult(is_valid=True)
-        
         columns = parameters.get('columns', [])
         value = parameters.get('value', None)
         method = parameters.get('method', None)
-        
-        # Check if columns exist
-        if columns:
-            missing_cols = [col for col in columns if col not in df.columns]
-            if missing_cols:
-                result.is_valid = False
-                result.errors.append(f"Columns not found: {missing_cols}")
-                return result
-        
+        if self._missing_columns(columns, result):
+            return result
+
+        cols_to_check = columns if columns else list(self.df.columns)
+
         # Check if method is applicable
         if method in ['mean', 'median']:
-            cols_to_check = columns if columns else df.columns.tolist()
             for col in cols_to_check:
-                if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+                if col not in self.numeric_columns:
                     result.warnings.append(
                         f"Column '{col}' is not numeric, {method} imputation will be skipped"
                     )
-        
-        # Check missing values
-        if columns:
-            missing_counts = {col: df[col].isnull().sum() 
-                            for col in columns if col in df.columns}
-        else:
-            missing_counts = df.isnull().sum().to_dict()
-        
+
+        missing_counts = {col: int(np.count_nonzero(self.nulls[col] & self.alive)) for col in cols_to_check}
         cols_with_missing = [col for col, count in missing_counts.items() if count > 0]
-        
+
         if not cols_with_missing:
             result.warnings.append("No missing values found in specified columns")
         else:
             total_missing = sum(missing_counts.values())
             result.info.append(f"Found {total_missing} missing values across {len(cols_with_missing)} columns")
-        
+
+        if value is None and method is None:
+            return result
+        for col in cols_with_missing:
+            if value is not None:
+                self._fill_constant(col, value)
+            elif method in ['ffill', 'bfill']:
+                self._propagate(col, reverse=method == 'bfill')
+            elif method in ['mean', 'median'] and col not in self.numeric_columns:
+                continue
+            elif method in ['mean', 'median', 'mode'] and np.any(self.alive & ~self.nulls[col]):
+                self._fill_constant(col, self._statistic(col, method))
+
         return result
-    
-    @staticmethod
-    def validate_trim_whitespace(
-        df: pd.DataFrame,
-        parameters: Dict[str, Any]
-    ) -> ValidationResult:
-        """Validate trim whitespace transformation"""
+
+    def _statistic(self, col: str, method: str) -> Any:
+        """Fill value of a strategy, from the column's live non-null values"""
+        if not self._needs_values(col):
+            # Only the null mask is tracked, so any fill value will do
+            return 0
+        positions = self.sources.get(col, np.arange(len(self.df)))[self.alive & ~self.nulls[col]]
+        values = self.df[col].iloc[positions]
+        if method == 'mean':
+            return values.mean()
+        if method == 'median':
+            return values.median()
+        return values.mode()[0]
+
+    def _needs_values(self, col: str) -> bool:
+        return col in self.hashes or col in self.whitespace
+
+    def _fill_constant(self, col: str, value: Any) -> None:
+        filled = self.nulls[col] & self.alive
+        self.nulls[col][filled] = False
+        if col in self.hashes:
+            self.hashes[col][filled] = _hash_value(value, self.df[col].dtype)
+        if col in self.whitespace:
+            text = str(value)
+            self.whitespace[col][filled] = text != text.strip()
+            if col in self.stripped_hashes:
+                self.stripped_hashes[col][filled] = _hash_value(text.strip(), object)
+
+    def _propagate(self, col: str, reverse: bool) -> None:
+        """Forward (or backward) fill by copying facts between live rows"""
+        rows = np.flatnonzero(self.alive)
+        if reverse:
+            rows = rows[::-1]
+        nulls = self.nulls[col][rows]
+        last = np.maximum.accumulate(np.where(nulls, -1, np.arange(len(rows))))
+        # Leading gaps have nothing to copy from and stay missing
+        filled = nulls & (last >= 0)
+        targets, sources = rows[filled], rows[last[filled]]
+
+        for facts in (self.hashes, self.whitespace, self.stripped_hashes):
+            if col in facts:
+                facts[col][targets] = facts[col][sources]
+        row_sources = self.sources.setdefault(col, np.arange(len(self.df)))
+        row_sources[targets] = row_sources[sources]
+        self.nulls[col][targets] = False
+
+    def _trim_whitespace(self, parameters: Dict[str, Any]) -> ValidationResult:
         result = ValidationResult(is_valid=True)
-        
         columns = parameters.get('columns', [])
-        
-        # Check if columns exist
+        if self._missing_columns(columns, result):
+            return result
+
         if columns:
-            missing_cols = [col for col in columns if col not in df.columns]
-            if missing_cols:
-                result.is_valid = False
-                result.errors.append(f"Columns not found: {missing_cols}")
-                return result
-            
             # Check if columns are string type
-            non_string_cols = []
-            for col in columns:
-                if col in df.columns and not pd.api.types.is_object_dtype(df[col]):
-                    non_string_cols.append(col)
-            
+            non_string_cols = [col for col in columns if col not in self.string_columns]
             if non_string_cols:
                 result.warnings.append(
                     f"Non-string columns will be converted to string: {non_string_cols}"
                 )
-        
-        # Check for whitespace
-        string_cols = columns if columns else df.select_dtypes(include=['object']).columns.tolist()
-        
+
+        string_cols = columns if columns else [col for col in self.df.columns if col in self.string_columns]
+
         whitespace_found = False
         for col in string_cols:
-            if col in df.columns:
-                # Check for leading/trailing whitespace
-                has_whitespace = df[col].astype(str).str.strip() != df[col].astype(str)
-                if has_whitespace.any():
-                    whitespace_found = True
-                    n_affected = has_whitespace.sum()
-                    result.info.append(f"Column '{col}' has {n_affected} values with whitespace")
-        
+            n_affected = int(np.count_nonzero(self.whitespace[col] & self.alive))
+            if n_affected:
+                whitespace_found = True
+                result.info.append(f"Column '{col}' has {n_affected} values with whitespace")
+
         if not whitespace_found:
             result.warnings.append("No whitespace found in string columns")
-        
-        return result
-    
-    @staticmethod
-    def validate_transformation_chain(
-        df: pd.DataFrame,
-        transformations: List[Dict[str, Any]]
-    ) -> ValidationResult:
-        """Validate a chain of transformations"""
-        result = ValidationResult(is_valid=True)
-        
-        # Simulate applying transformations to check compatibility
-        temp_df = df.copy()
-        
-        for i, transform in enumerate(transformations):
-            # Here we would validate each transformation
-            # This is a simplified version
-            transform_type = transform.get('type')
-            
-            # Check if output of previous transformation is compatible with next
-            if i > 0:
-                # Add compatibility checks here
-                pass
-        
+
+        # Trimming converts to string, so missing values become text too
+        for col in string_cols:
+            self.whitespace[col][:] = False
+            if col in self.nulls:
+                self.nulls[col][:] = False
+            if col in self.hashes:
+                self.hashes[col] = self.stripped_hashes[col].copy()
+            self.string_columns.add(col)
+            self.numeric_columns.discard(col)
+
         return result
-    
-    @staticmethod
-    def suggest_transformations(df: pd.DataFrame) -> List[str]:
-        """Suggest transformations based on data quality"""
+
+    def _suggest(self) -> List[str]:
+        """Suggestions from the facts of the untransformed data"""
         suggestions = []
-        
+        columns = list(self.df.columns)
+
         # Check for duplicates
-        if df.duplicated().any():
+        if self._duplicates(columns)[1].any():
             suggestions.append("Consider removing duplicate rows")
-        
+
         # Check for missing values
-        missing_cols = df.columns[df.isnull().any()].tolist()
+        missing_cols = [col for col in columns if self.nulls[col].any()]
         if missing_cols:
             suggestions.append(f"Handle missing values in columns: {missing_cols[:5]}")
-        
-        # Check for whitespace in string columns
-        string_cols = df.select_dtypes(include=['object']).columns
-        for col in string_cols[:5]:  # Check first 5 string columns
-            if df[col].astype(str).str.strip().ne(df[col].astype(str)).any():
+
+        # Check for whitespace in the first 5 string columns
+        for col in [col for col in columns if col in self.string_columns][:5]:
+            if self.whitespace[col].any():
                 suggestions.append(f"Trim whitespace in column '{col}'")
                 break
-        
+
         # Check for mixed types
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                # Try to convert to numeric
-                try:
-                    pd.to_numeric(df[col], errors='coerce')
-                    non_numeric = pd.to_numeric(df[col], errors='coerce').isnull().sum()
-                    if non_numeric < len(df) * 0.1:  # Less than 10% non-numeric
-                        suggestions.append(f"Consider converting '{col}' to numeric")
-                except:
-                    pass
-        
-        return suggestions[:10]  # Return top 10 suggestions
\ No newline at end of file
+        for col in columns:
+            if col not in self.string_columns:
+                continue
+            try:
+                non_numeric = pd.to_numeric(self.df[col], errors='coerce').isnull().sum()
+            except (TypeError, ValueError):
+                continue
+            if non_numeric < len(self.df) * 0.1:  # Less than 10% non-numeric
+                suggestions.append(f"Consider converting '{col}' to numeric")
+
+        return suggestions
+
+
+class TransformationValidator:
+    """Validates transformations before applying"""
+
+    @staticmethod
+    def _validate_step(df: pd.DataFrame, step_type: str, parameters: Dict[str, Any]) -> ValidationResult:
+        return ValidationPlanner(df).validate([{'type': step_type, 'parameters': parameters}])[0]
+
+    @staticmethod
+    def validate_remove_duplicates(
+        df: pd.DataFrame,
+        parameters: Dict[str, Any]
+    ) -> ValidationResult:
+        """Validate remove duplicates transformation"""
+        return TransformationValidator._validate_step(df, 'remove_duplicates', parameters)
+
+    @staticmethod
+    def validate_fill_missing(
+        df: pd.DataFrame,
+        parameters: Dict[str, Any]
+    ) -> ValidationResult:
+        """Validate fill missing transformation"""
+        return TransformationValidator._validate_step(df, 'fill_missing', parameters)
+
+    @staticmethod
+    def validate_trim_whitespace(
+        df: pd.DataFrame,
+        parameters: Dict[str, Any]
+    ) -> ValidationResult:
+        """Validate trim whitespace transformation"""
+        return TransformationValidator._validate_step(df, 'trim_whitespace', parameters)
+
+    @staticmethod
+    def validate_transformation_chain(
+        df: pd.DataFrame,
+        transformations: List[Dict[str, Any]],
+        suggest: bool = False
+    ) -> ValidationResult:
+        """
+        Validate a chain of transformations in one pass over the data.
+
+        Each step is checked against the data the steps before it would
+        leave behind. With suggest, suggestions for the untransformed data
+        are included from the same pass.
+        """
+        planner = ValidationPlanner(df)
+        result = ValidationResult(is_valid=True)
+
+        for step_result in planner.validate(transformations, suggest=suggest):
+            result.is_valid = result.is_valid and step_result.is_valid
+            result.errors.extend(step_result.errors)
+            result.warnings.extend(step_result.warnings)
+            result.info.extend(step_result.info)
+            result.affected_rows.extend(step_result.affected_rows)
+
+        result.affected_rows = result.affected_rows[:10]
+        result.suggestions = planner.suggestions[:10]
+        return result
+
+    @staticmethod
+    def suggest_transformations(df: pd.DataFrame) -> List[str]:
+        """Suggest transformations based on data quality"""
+        planner = ValidationPlanner(df)
+        planner.validate([], suggest=True)
+        return planner.suggestions[:10]  # Return top 10 suggestions
@@ -0,0 +1,253 @@
+"""
+Dataset version retention.
+
+Plans deletions from one projection query per dataset, deletes the version
+documents in bulk, then deletes their S3 objects (legacy files, version
+manifests and chunks no remaining version references) with batched
+delete_objects calls run in parallel. A scheduled sweep applies
+the policy to every dataset with a pause between datasets; dry runs report
+what would be deleted without deleting anything.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import os
+
+from pydantic import BaseModel, Field
+
+from app.models.version import DatasetVersion
+from app.services.versioning_service import VersioningService, versioning_service
+
+logger = logging.getLogger(__name__)
+
+
+class VersionRetentionView(BaseModel):
+    """Fields of a version needed to apply the retention policy."""
+
+    version_id: str
+    version_number: int
+    file_path: str
+    file_size: int = 0
+    is_pinned: bool = False
+    is_base_version: bool = False
+    in_training: bool = False
+    created_at: datetime
+    chunk_hashes: List[str] = Field(default_factory=list)
+
+    class Settings:
+        projection = {
+            "version_id": 1,
+            "version_number": 1,
+            "file_path": 1,
+            "file_size": 1,
+            "is_pinned": 1,
+            "is_base_version": 1,
+            "created_at": 1,
+            "in_training": {"$gt": [{"$size": {"$ifNull": ["$used_in_training", []]}}, 0]},
+            "chunk_hashes": {"$ifNull": ["$chunks.sha256", []]},
+        }
+
+
+@dataclass
+class RetentionPolicy:
+    """Which versions to keep."""
+    retention_days: int = field(default_factory=lambda: int(os.getenv("VERSION_RETENTION_DAYS", "30")))
+    keep_count: int = field(default_factory=lambda: int(os.getenv("VERSION_KEEP_COUNT", "10")))
+
+
+@dataclass
+class RetentionPlan:
+    """Versions and S3 objects a cleanup of one dataset deletes."""
+    dataset_id: str
+    version_ids: List[str] = field(default_factory=list)
+    object_keys: List[str] = field(default_factory=list)
+    bytes_reclaimed: int = 0
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Mongo returns naive UTC datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class VersionRetentionEngine:
+    """Applies the version retention policy to one dataset or all of them"""
+
+    def __init__(
+        self,
+        service: VersioningService,
+        sweep_interval: Optional[float] = None,
+        throttle: Optional[float] = None,
+        dry_run: Optional[bool] = None
+    ):
+        self.service = service
+        # Seconds between scheduled sweeps; 0 disables them
+        self.sweep_interval = sweep_interval if sweep_interval is not None else float(
+            os.getenv("VERSION_RETENTION_INTERVAL", str(24 * 3600))
+        )
+        # Pause between datasets during a sweep
+        self.throttle = throttle if throttle is not None else float(
+            os.getenv("VERSION_RETENTION_THROTTLE", "0.5")
+        )
+        self.dry_run = dry_run if dry_run is not None else (
+            os.getenv("VERSION_RETENTION_DRY_RUN", "false").lower() == "true"
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    async def plan(self, dataset_id: str, policy: Optional[RetentionPolicy] = None) -> RetentionPlan:
+        """Work out what a cleanup of the dataset would delete"""
+        policy = policy or RetentionPolicy()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=policy.retention_days)
+
+        versions = await DatasetVersion.find(
+            {"dataset_id": dataset_id}
+        ).sort("-version_number").project(VersionRetentionView).to_list()
+
+        plan = RetentionPlan(dataset_id=dataset_id)
+        deleted_chunks = set()
+        kept_chunks = set()
+        for i, version in enumerate(versions):
+            # Keep pinned, base, recently used, or recent versions
+            if (
+                version.is_pinned or
+                version.is_base_version or
+                i < policy.keep_count or
+                _as_utc(version.created_at) > cutoff or
+                version.in_training
+            ):
+                kept_chunks.update(version.chunk_hashes)
+                continue
+
+            plan.version_ids.append(version.version_id)
+            plan.object_keys.append(version.file_path)
+            plan.bytes_reclaimed += version.file_size
+            deleted_chunks.update(version.chunk_hashes)
+
+        # Chunks are shared between versions; drop only unreferenced ones
+        chunk_store = self.service.chunk_store
+        plan.object_keys.extend(
+            chunk_store.chunk_key(dataset_id, chunk_hash)
+            for chunk_hash in sorted(deleted_chunks - kept_chunks)
+        )
+        return plan
+
+    async def cleanup_dataset(
+        self,
+        dataset_id: str,
+        policy: Optional[RetentionPolicy] = None,
+        dry_run: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Delete a dataset's expired versions.
+
+        Version documents are deleted first, so a failed S3 delete leaves
+        an unreferenced object rather than a version without content.
+
+        Returns:
+            Report of the versions and objects deleted (or that would be)
+        """
+        dry_run = self.dry_run if dry_run is None else dry_run
+        plan = await self.plan(dataset_id, policy)
+
+        objects_deleted = 0
+        if plan.version_ids and not dry_run:
+            await DatasetVersion.get_motor_collection().delete_many(
+                {"version_id": {"$in": plan.version_ids}}
+            )
+            self.service.lineage_cache.invalidate(dataset_id)
+            objects_deleted = await self._delete_objects(plan.object_keys)
+            logger.info(
+                f"Deleted {len(plan.version_ids)} old versions and {objects_deleted} objects "
+                f"for dataset {dataset_id}"
+            )
+
+        return {
+            "dataset_id": dataset_id,
+            "dry_run": dry_run,
+            "versions_deleted": len(plan.version_ids),
+            "version_ids": plan.version_ids,
+            "objects_deleted": len(plan.object_keys) if dry_run else objects_deleted,
+            "bytes_reclaimed": plan.bytes_reclaimed,
+        }
+
+    async def sweep(
+        self,
+        policy: Optional[RetentionPolicy] = None,
+        dry_run: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Apply the policy to every dataset, pausing between datasets"""
+        dataset_ids = await DatasetVersion.get_motor_collection().distinct("dataset_id")
+
+        reports = []
+        failed = []
+        for i, dataset_id in enumerate(dataset_ids):
+            if i and self.throttle:
+                await asyncio.sleep(self.throttle)
+            try:
+                report = await self.cleanup_dataset(dataset_id, policy, dry_run)
+            except Exception as e:
+                logger.error(f"Retention cleanup failed for dataset {dataset_id}: {e}")
+                failed.append(dataset_id)
+                continue
+            if report["versions_deleted"]:
+                reports.append(report)
+
+        return {
+            "dry_run": self.dry_run if dry_run is None else dry_run,
+            "datasets_checked": len(dataset_ids),
+            "datasets_failed": failed,
+            "versions_deleted": sum(r["versions_deleted"] for r in reports),
+            "objects_deleted": sum(r["objects_deleted"] for r in reports),
+            "bytes_reclaimed": sum(r["bytes_reclaimed"] for r in reports),
+            "datasets": reports,
+        }
+
+    async def _delete_objects(self, keys: List[str]) -> int:
+        """Delete keys with batched, parallel delete_objects requests"""
+        if not keys:
+            return 0
+        return await self.service.storage.delete_many(keys)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                report = await self.sweep()
+                logger.info(
+                    f"Version retention sweep{' (dry run)' if report['dry_run'] else ''}: "
+                    f"{report['versions_deleted']} versions in "
+                    f"{len(report['datasets'])} of {report['datasets_checked']} datasets"
+                )
+            except Exception as e:
+                logger.error(f"Scheduled version retention sweep failed: {e}")
+
+    def start(self) -> None:
+        """Start scheduled sweeps on the running event loop"""
+        if self.sweep_interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop scheduled sweeps"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global retention engine
+retention_engine = VersionRetentionEngine(versioning_service)
+
+
+async def init_version_retention():
+    """Start scheduled version retention sweeps"""
+    retention_engine.start()
+
+
+async def cleanup_version_retention():
+    """Stop scheduled version retention sweeps"""
+    await retention_engine.stop()
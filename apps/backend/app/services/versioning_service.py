@@ -5,10 +5,16 @@ Handles creation, retrieval, and management of dataset versions and transformati
 enabling reproducibility and historical analysis.
 """
 
-from typing import Optional, List, Dict, Any, Tuple
-from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator, Iterable
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
 import uuid
-import boto3
 from botocore.exceptions import ClientError
 import pandas as pd
 import io
@@ -18,26 +24,102 @@ logger = logging.getLogger(__name__)
 
 from app.models.version import (
     DatasetVersion,
+    RowDiff,
     TransformationLineage,
     TransformationStep,
     VersionComparison
 )
 from app.models.dataset import DatasetMetadata
+from app.services.chunk_store import ChunkStore
+from app.services.object_storage import ObjectStorage, get_object_storage
+from app.services.redis_cache import cache_service
+from app.services.version_diff import diff_files, file_type_for
 from app.config import settings
 
+# Seconds to cache version diffs; versions never change, so this only bounds cache size
+VERSION_DIFF_CACHE_TTL = int(os.getenv("VERSION_DIFF_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Datasets whose lineage graphs are kept in memory
+LINEAGE_CACHE_DATASETS = int(os.getenv("LINEAGE_CACHE_DATASETS", "256"))
+
+
+@dataclass(frozen=True)
+class VersionLink:
+    """A version's edge to its parent in the lineage graph."""
+    version_id: str
+    dataset_id: str
+    parent_version_id: Optional[str]
+    transformation_lineage_id: Optional[str]
+
+
+class LineageGraphCache:
+    """
+    Parent links of dataset versions, cached per dataset.
+
+    Graphs are filled from lineage queries and dropped whenever a version
+    of the dataset is created or deleted. The least recently used datasets
+    are evicted beyond max_datasets.
+    """
+
+    def __init__(self, max_datasets: int = LINEAGE_CACHE_DATASETS):
+        self.max_datasets = max_datasets
+        self._graphs: "OrderedDict[str, Dict[str, VersionLink]]" = OrderedDict()
+        self._datasets: Dict[str, str] = {}
+
+    def add(self, links: Iterable[VersionLink]) -> None:
+        for link in links:
+            graph = self._graphs.setdefault(link.dataset_id, {})
+            graph[link.version_id] = link
+            self._datasets[link.version_id] = link.dataset_id
+            self._graphs.move_to_end(link.dataset_id)
+        while len(self._graphs) > self.max_datasets:
+            self._forget(next(iter(self._graphs)))
+
+    def ancestry(self, version_id: str) -> Optional[List[VersionLink]]:
+        """Links from the version back to its root, or None if any is missing"""
+        dataset_id = self._datasets.get(version_id)
+        if dataset_id is None:
+            return None
+        graph = self._graphs[dataset_id]
+        self._graphs.move_to_end(dataset_id)
+
+        links = []
+        current = version_id
+        while current:
+            link = graph.get(current)
+            if link is None:
+                return None
+            links.append(link)
+            current = link.parent_version_id
+        return links
+
+    def invalidate(self, dataset_id: str) -> None:
+        if dataset_id in self._graphs:
+            self._forget(dataset_id)
+
+    def _forget(self, dataset_id: str) -> None:
+        for version_id in self._graphs.pop(dataset_id):
+            self._datasets.pop(version_id, None)
+
 
 class VersioningService:
     """Service for managing dataset versions and lineage tracking."""
 
     def __init__(self):
-        """Initialize versioning service with S3 client."""
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        )
+        """Initialize versioning service with the shared S3 client."""
+        self.s3_client = get_object_storage().client
         self.bucket_name = settings.S3_BUCKET
+        self.lineage_cache = LineageGraphCache()
+
+    @property
+    def storage(self) -> ObjectStorage:
+        """Object storage over the current S3 client."""
+        return ObjectStorage(self.s3_client, self.bucket_name)
+
+    @property
+    def chunk_store(self) -> ChunkStore:
+        """Chunk store over the current S3 client."""
+        return ChunkStore(self.s3_client, self.bucket_name)
 
     async def create_base_version(
         self,
@@ -84,6 +166,13 @@ class VersioningService:
             dtypes
         )
 
+        # Chunk the base content so later versions only store what changed
+        try:
+            chunks = await self.chunk_store.put(dataset_metadata.dataset_id, file_content)
+        except ValueError as e:
+            logger.warning(f"Base version stored without chunks, later versions won't deduplicate: {e}")
+            chunks = None
+
         # Create version document
         version_id = str(uuid.uuid4())
         version = DatasetVersion(
@@ -95,6 +184,7 @@ class VersioningService:
             file_size=len(file_content),
             file_path=dataset_metadata.file_path,
             s3_url=dataset_metadata.s3_url,
+            chunks=chunks,
             description=description or "Initial upload",
             num_rows=dataset_metadata.num_rows,
             num_columns=dataset_metadata.num_columns,
@@ -105,6 +195,7 @@ class VersioningService:
         )
 
         await version.insert()
+        self.lineage_cache.invalidate(version.dataset_id)
         logger.info(f"Created base version {version_id} for dataset {dataset_metadata.dataset_id}")
         return version
 
@@ -165,19 +256,23 @@ class VersioningService:
             )
             return existing_version, lineage
 
-        # Upload transformed file to S3 with versioned path
+        # Store only the chunks the parent doesn't already have, plus a
+        # manifest at the versioned path
         next_version_number = await self._get_next_version_number(parent_version.dataset_id)
         version_id = str(uuid.uuid4())
-        versioned_file_path = f"datasets/{user_id}/{parent_version.dataset_id}/v{next_version_number}/{dataset_metadata.filename}"
+        versioned_file_path = f"datasets/{user_id}/{parent_version.dataset_id}/v{next_version_number}/{dataset_metadata.filename}.manifest.json"
+
+        known_hashes = [chunk.sha256 for chunk in parent_version.chunks or []]
+        chunks = await self.chunk_store.put(parent_version.dataset_id, transformed_content, known_hashes)
+        manifest = {
+            "dataset_id": parent_version.dataset_id,
+            "content_hash": content_hash,
+            "chunks": [chunk.model_dump() for chunk in chunks]
+        }
 
         try:
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=versioned_file_path,
-                Body=transformed_content
-            )
-            s3_url = f"s3://{self.bucket_name}/{versioned_file_path}"
-            logger.info(f"Uploaded version to {s3_url}")
+            s3_url = await self.storage.put_bytes(versioned_file_path, json.dumps(manifest).encode())
+            logger.info(f"Uploaded version manifest to {s3_url}")
         except ClientError as e:
             logger.error(f"Failed to upload version to S3: {e}")
             raise ValueError(f"Failed to upload version: {str(e)}")
@@ -201,6 +296,7 @@ class VersioningService:
             file_size=len(transformed_content),
             file_path=versioned_file_path,
             s3_url=s3_url,
+            chunks=chunks,
             description=description or f"Transformation from v{parent_version.version_number}",
             num_rows=dataset_metadata.num_rows,
             num_columns=dataset_metadata.num_columns,
@@ -227,6 +323,8 @@ class VersioningService:
         # Link lineage to version
         new_version.transformation_lineage_id = lineage.lineage_id
         await new_version.save()
+        # Only now: a chain read before the link is saved would cache it without its last step
+        self.lineage_cache.invalidate(new_version.dataset_id)
 
         return new_version, lineage
 
@@ -315,18 +413,65 @@ class VersioningService:
         if not version:
             raise ValueError(f"Version {version_id} not found")
 
+        if version.chunks is not None:
+            content = await self.chunk_store.read(version.dataset_id, version.chunks)
+            logger.info(f"Reassembled content for version {version_id} ({len(content)} bytes)")
+            return content
+
         try:
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=version.file_path
-            )
-            content = response['Body'].read()
+            content = await self.storage.get_bytes(version.file_path)
             logger.info(f"Retrieved content for version {version_id} ({len(content)} bytes)")
             return content
         except ClientError as e:
             logger.error(f"Failed to retrieve version content from S3: {e}")
             raise ValueError(f"Failed to retrieve version content: {str(e)}")
 
+    async def iter_version_content(self, version_id: str) -> AsyncIterator[bytes]:
+        """
+        Stream file content for a specific version chunk by chunk.
+
+        Args:
+            version_id: Version identifier
+
+        Yields:
+            Consecutive pieces of the file content
+
+        Raises:
+            ValueError: If version not found or S3 retrieval fails
+        """
+        version = await self.get_version(version_id, mark_accessed=True)
+        if not version:
+            raise ValueError(f"Version {version_id} not found")
+
+        async for piece in self._iter_content(version):
+            yield piece
+
+    async def _iter_content(self, version: DatasetVersion) -> AsyncIterator[bytes]:
+        """Stream a loaded version's content without recording an access"""
+        if version.chunks is not None:
+            async for body in self.chunk_store.iter_content(version.dataset_id, version.chunks):
+                yield body
+            return
+
+        try:
+            async for piece in self.storage.iter_bytes(version.file_path):
+                yield piece
+        except ClientError as e:
+            logger.error(f"Failed to retrieve version content from S3: {e}")
+            raise ValueError(f"Failed to retrieve version content: {str(e)}")
+
+    async def _spool_content(self, version: DatasetVersion) -> str:
+        """Copy a version's content to a local temporary file piece by piece, returning its path"""
+        fd, path = tempfile.mkstemp(prefix=f"version-{version.version_id}-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for piece in self._iter_content(version):
+                    await asyncio.to_thread(f.write, piece)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path
+
     async def list_versions(
         self,
         dataset_id: str,
@@ -365,30 +510,109 @@ class VersioningService:
         Returns:
             List of TransformationLineage documents in chronological order
         """
-        chain = []
-        current_version_id = version_id
+        chains = await self.get_lineage_chains([version_id])
+        chain = chains.get(version_id, [])
+        logger.info(f"Retrieved lineage chain of {len(chain)} transformations for version {version_id}")
+        return chain
+
+    async def get_lineage_chains(self, version_ids: List[str]) -> Dict[str, List[TransformationLineage]]:
+        """
+        Get lineage chains for many versions at once.
 
-        while current_version_id:
-            version = await self.get_version(current_version_id, mark_accessed=False)
-            if not version:
-                break
+        Ancestry comes from the lineage graph cache or one $graphLookup
+        aggregation, and the lineage documents from one query.
 
-            if version.transformation_lineage_id:
-                lineage = await TransformationLineage.find_one(
-                    TransformationLineage.lineage_id == version.transformation_lineage_id
+        Args:
+            version_ids: Target version IDs
+
+        Returns:
+            Mapping of each found version ID to its chronological lineage chain
+        """
+        ancestries = await self._get_ancestries(version_ids)
+        lineages = await self._get_lineages(
+            link.transformation_lineage_id
+            for links in ancestries.values()
+            for link in links
+        )
+
+        return {
+            version_id: [
+                lineages[link.transformation_lineage_id]
+                for link in reversed(links)
+                if link.transformation_lineage_id in lineages
+            ]
+            for version_id, links in ancestries.items()
+        }
+
+    async def _get_ancestries(self, version_ids: Iterable[str]) -> Dict[str, List[VersionLink]]:
+        """Links from each version back to its base version"""
+        ancestries = {}
+        missing = []
+        for version_id in dict.fromkeys(version_ids):
+            links = self.lineage_cache.ancestry(version_id)
+            if links is None:
+                missing.append(version_id)
+            else:
+                ancestries[version_id] = links
+
+        if not missing:
+            return ancestries
+
+        link_fields = {
+            "_id": 0,
+            "version_id": 1,
+            "dataset_id": 1,
+            "parent_version_id": 1,
+            "transformation_lineage_id": 1,
+        }
+        pipeline = [
+            {"$match": {"version_id": {"$in": missing}}},
+            {"$graphLookup": {
+                "from": DatasetVersion.Settings.name,
+                "startWith": "$parent_version_id",
+                "connectFromField": "parent_version_id",
+                "connectToField": "version_id",
+                "as": "ancestors",
+                "depthField": "depth",
+            }},
+            {"$project": {**link_fields, "ancestors": {**link_fields, "depth": 1}}},
+        ]
+        results = await DatasetVersion.aggregate(pipeline).to_list()
+
+        for result in results:
+            # Lineage never crosses datasets
+            ancestors = [
+                a for a in sorted(result["ancestors"], key=lambda a: a["depth"])
+                if a["dataset_id"] == result["dataset_id"]
+            ]
+            links = [
+                VersionLink(
+                    version_id=doc["version_id"],
+                    dataset_id=doc["dataset_id"],
+                    parent_version_id=doc.get("parent_version_id"),
+                    transformation_lineage_id=doc.get("transformation_lineage_id"),
                 )
-                if lineage:
-                    chain.insert(0, lineage)  # Insert at beginning for chronological order
+                for doc in [result] + ancestors
+            ]
+            self.lineage_cache.add(links)
+            ancestries[result["version_id"]] = links
 
-            current_version_id = version.parent_version_id
+        return ancestries
 
-        logger.info(f"Retrieved lineage chain of {len(chain)} transformations for version {version_id}")
-        return chain
+    async def _get_lineages(self, lineage_ids: Iterable[Optional[str]]) -> Dict[str, TransformationLineage]:
+        """Lineage documents by ID, in one query"""
+        ids = list({lineage_id for lineage_id in lineage_ids if lineage_id})
+        if not ids:
+            return {}
+        lineages = await TransformationLineage.find({"lineage_id": {"$in": ids}}).to_list()
+        return {lineage.lineage_id: lineage for lineage in lineages}
 
     async def compare_versions(
         self,
         version1_id: str,
-        version2_id: str
+        version2_id: str,
+        key_columns: Optional[List[str]] = None,
+        include_row_diff: bool = True
     ) -> VersionComparison:
         """
         Compare two dataset versions.
@@ -396,6 +620,9 @@ class VersioningService:
         Args:
             version1_id: First version ID
             version2_id: Second version ID
+            key_columns: Columns identifying a row for the row diff;
+                rows are matched by position when omitted
+            include_row_diff: Whether to diff the versions' content
 
         Returns:
             VersionComparison with detailed differences
@@ -431,8 +658,16 @@ class VersioningService:
         # Find lineage path
         lineage_path = await self._find_lineage_path(version1_id, version2_id)
 
-        # Content similarity based on hash
-        content_similarity = 100.0 if version1.content_hash == version2.content_hash else 0.0
+        row_diff = None
+        if include_row_diff:
+            row_diff = await self._diff_rows(version1, version2, key_columns)
+
+        if row_diff is not None:
+            compared_rows = max(version1.num_rows, version2.num_rows, 1)
+            content_similarity = round(row_diff.rows_unchanged / compared_rows * 100, 2)
+        else:
+            # Content similarity based on hash
+            content_similarity = 100.0 if version1.content_hash == version2.content_hash else 0.0
 
         comparison = VersionComparison(
             version1_id=version1_id,
@@ -444,37 +679,94 @@ class VersioningService:
             schema_identical=schema_identical,
             content_similarity=content_similarity,
             lineage_path=[lineage.lineage_id for lineage in lineage_path],
-            transformation_count=len(lineage_path)
+            transformation_count=len(lineage_path),
+            row_diff=row_diff
         )
 
         logger.info(f"Compared versions {version1_id} and {version2_id}: {len(lineage_path)} transformations")
         return comparison
 
+    async def _diff_rows(
+        self,
+        version1: DatasetVersion,
+        version2: DatasetVersion,
+        key_columns: Optional[List[str]] = None
+    ) -> Optional[RowDiff]:
+        """
+        Row- and cell-level diff of two versions, cached per version pair.
+
+        Versions are immutable, so a cached diff never goes stale. Content
+        is streamed into local temporary files that the diff reads in chunks
+        of rows, and comparing does not count as accessing either version.
+        Returns None when content can't be retrieved; invalid key columns raise.
+        """
+        cache_key = f"version_diff:{version1.version_id}:{version2.version_id}:{','.join(key_columns or [])}"
+        cached = await cache_service.get(cache_key)
+        if cached is not None:
+            return RowDiff.model_validate(cached)
+
+        paths = []
+        try:
+            try:
+                for version in (version1, version2):
+                    paths.append(await self._spool_content(version))
+            except ValueError as e:
+                logger.warning(f"Skipping row diff of {version1.version_id} and {version2.version_id}: {e}")
+                return None
+
+            row_diff = await asyncio.to_thread(
+                diff_files,
+                paths[0],
+                paths[1],
+                file_type_for(version1.file_path),
+                file_type_for(version2.file_path),
+                key_columns
+            )
+        finally:
+            for path in paths:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(path)
+        await cache_service.set(cache_key, row_diff.model_dump(), ttl=VERSION_DIFF_CACHE_TTL)
+        return row_diff
+
     async def _find_lineage_path(
         self,
         version1_id: str,
         version2_id: str
     ) -> List[TransformationLineage]:
-        """Find transformation lineage path between two versions."""
-        # Get lineage chains for both versions
-        chain1 = await self.get_lineage_chain(version1_id)
-        chain2 = await self.get_lineage_chain(version2_id)
+        """
+        Find transformation lineage path between two versions.
+
+        Walks from version1 up to the closest common ancestor and down to
+        version2; steps walked upwards are listed newest first.
+        """
+        ancestries = await self._get_ancestries([version1_id, version2_id])
+        links1 = ancestries.get(version1_id, [])
+        links2 = ancestries.get(version2_id, [])
 
-        # Find common ancestor and path
-        if not chain1 and not chain2:
+        ancestors2 = {link.version_id for link in links2}
+        common = next((link.version_id for link in links1 if link.version_id in ancestors2), None)
+        if common is None:
             return []
 
-        # If one is ancestor of the other
-        if len(chain1) < len(chain2):
-            # version1 might be ancestor of version2
-            path = chain2[len(chain1):]
-            return path
-        elif len(chain2) < len(chain1):
-            # version2 might be ancestor of version1
-            path = chain1[len(chain2):]
-            return list(reversed(path))
+        up = []
+        for link in links1:
+            if link.version_id == common:
+                break
+            up.append(link)
+        down = []
+        for link in links2:
+            if link.version_id == common:
+                break
+            down.append(link)
+        path_links = up + list(reversed(down))
 
-        return []
+        lineages = await self._get_lineages(link.transformation_lineage_id for link in path_links)
+        return [
+            lineages[link.transformation_lineage_id]
+            for link in path_links
+            if link.transformation_lineage_id in lineages
+        ]
 
     async def pin_version(self, version_id: str) -> DatasetVersion:
         """
@@ -537,42 +829,14 @@ class VersioningService:
         Returns:
             Number of versions deleted
         """
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=retention_days)
-
-        # Get all versions for dataset
-        all_versions = await DatasetVersion.find(
-            DatasetVersion.dataset_id == dataset_id
-        ).sort(-DatasetVersion.version_number).to_list()
-
-        # Determine versions to delete
-        deleted_count = 0
-        for i, version in enumerate(all_versions):
-            # Keep pinned, base, recently used, or recent versions
-            if (
-                version.is_pinned or
-                version.is_base_version or
-                i < keep_count or
-                version.created_at > cutoff_date or
-                len(version.used_in_training) > 0
-            ):
-                continue
-
-            # Delete from S3
-            try:
-                self.s3_client.delete_object(
-                    Bucket=self.bucket_name,
-                    Key=version.file_path
-                )
-            except ClientError as e:
-                logger.warning(f"Failed to delete S3 object for version {version.version_id}: {e}")
+        from app.services.version_retention import RetentionPolicy, VersionRetentionEngine
 
-            # Delete from database
-            await version.delete()
-            deleted_count += 1
-            logger.info(f"Deleted old version {version.version_id}")
-
-        logger.info(f"Cleaned up {deleted_count} old versions for dataset {dataset_id}")
-        return deleted_count
+        report = await VersionRetentionEngine(self).cleanup_dataset(
+            dataset_id,
+            RetentionPolicy(retention_days=retention_days, keep_count=keep_count),
+            dry_run=False
+        )
+        return report["versions_deleted"]
 
 
 # Global service instance
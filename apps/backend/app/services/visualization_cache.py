@@ -1,10 +1,14 @@
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
+import logging
 import numpy as np
 import pandas as pd
+from pymongo import UpdateOne
 from app.models.visualization_cache import (
     VisualizationCache,
     HistogramData,
+    FineHistogramData,
     BoxplotData,
     CorrelationMatrixData,
 )
@@ -18,15 +22,28 @@ from app.utils.plotting import (
 from beanie import Link
 from app.services.redis_cache import cache_service
 
+logger = logging.getLogger(__name__)
+
+# Resolution of the stored histogram; any bin count dividing it re-bins exactly
+FINE_HISTOGRAM_BINS = 1000
+
+
+def _visualization_cache_key(
+    dataset_id: str, visualization_type: str, column_name: Optional[str] = None
+) -> str:
+    """Build the Redis key for a cached visualization"""
+    cache_key = f"viz:{dataset_id}:{visualization_type}"
+    if column_name:
+        cache_key += f":{column_name}"
+    return cache_key
+
 
 async def get_cached_visualization(
     dataset_id: str, visualization_type: str, column_name: Optional[str] = None
 ) -> Optional[Dict[str, Any]]:
     """Get cached visualization data from Redis first, then MongoDB"""
     # Generate Redis cache key
-    cache_key = f"viz:{dataset_id}:{visualization_type}"
-    if column_name:
-        cache_key += f":{column_name}"
+    cache_key = _visualization_cache_key(dataset_id, visualization_type, column_name)
     
     # Try Redis cache first
     cached_data = await cache_service.get(cache_key)
@@ -64,9 +81,7 @@ async def cache_visualization(
 ) -> VisualizationCache:
     """Cache visualization data in both Redis and MongoDB"""
     # Generate Redis cache key
-    cache_key = f"viz:{dataset_id}:{visualization_type}"
-    if column_name:
-        cache_key += f":{column_name}"
+    cache_key = _visualization_cache_key(dataset_id, visualization_type, column_name)
     
     # Cache in Redis for fast access
     await cache_service.set(cache_key, data, ttl=3600)  # 1 hour
@@ -101,36 +116,168 @@ async def cache_visualization(
     return cache
 
 
-async def generate_and_cache_histogram(
-    dataset_id: str, column_name: str, num_bins: int = 50
-) -> Dict[str, Any]:
-    """Generate and cache histogram data for a numeric column"""
-    # Get cached data if it exists
-    cached_data = await get_cached_visualization(dataset_id, "histogram", column_name)
-    if cached_data:
-        return cached_data
+def build_fine_histogram(
+    values: np.ndarray, num_fine_bins: int = FINE_HISTOGRAM_BINS
+) -> FineHistogramData:
+    """Build an equal-width fine histogram over the full range of the values"""
+    counts, bin_edges = np.histogram(values, bins=num_fine_bins)
+    return FineHistogramData(
+        min=float(bin_edges[0]), max=float(bin_edges[-1]), counts=counts.tolist()
+    )
+
+
+def rebin_histogram(fine: FineHistogramData, num_bins: int) -> HistogramData:
+    """Re-bin a fine histogram to num_bins equal-width bins over the same range
+
+    Each fine bin is assigned to the coarse bin containing its center, so the
+    result is exact when num_bins divides the fine bin count and otherwise
+    within one fine bin width of the raw-data histogram.
+    """
+    if num_bins < 1:
+        raise ValueError("num_bins must be a positive integer")
+
+    fine_counts = np.asarray(fine.counts, dtype=np.int64)
+    num_fine_bins = len(fine_counts)
+    # Integer arithmetic for the fine-bin centers avoids float edge drift
+    coarse_index = ((2 * np.arange(num_fine_bins) + 1) * num_bins) // (2 * num_fine_bins)
+    counts = np.bincount(coarse_index, weights=fine_counts, minlength=num_bins)
+
+    bin_edges = np.linspace(fine.min, fine.max, num_bins + 1)
+    bins = [(bin_edges[i] + bin_edges[i + 1]) / 2 for i in range(num_bins)]
+
+    return HistogramData(
+        bins=bins, counts=counts.astype(np.int64).tolist(), bin_edges=bin_edges.tolist()
+    )
+
+
+def _boxplot_summary(series: pd.Series) -> BoxplotData:
+    """Compute boxplot statistics for a numeric series"""
+    values = series.dropna().to_numpy(dtype=float)
+    if values.size == 0:
+        raise ValueError(f"Column '{series.name}' has no values to summarize")
+    minimum, q1, median, q3, maximum = np.quantile(values, [0, 0.25, 0.5, 0.75, 1])
+    iqr = q3 - q1
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
+
+    outliers = values[(values < lower_bound) | (values > upper_bound)]
+
+    return BoxplotData(
+        min=minimum,
+        q1=q1,
+        median=median,
+        q3=q3,
+        max=maximum,
+        outliers=outliers.tolist(),
+    )
+
+
+def _correlation_summary(df: pd.DataFrame) -> CorrelationMatrixData:
+    """Compute the correlation matrix for the numeric columns of a DataFrame"""
+    corr_matrix = df.select_dtypes(include=[np.number]).corr()
+    return CorrelationMatrixData(
+        matrix=corr_matrix.values.tolist(), columns=list(corr_matrix.columns)
+    )
+
+
+def compute_visualization_summaries(
+    df: pd.DataFrame,
+) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+    """Compute all precomputable visualizations for a dataset in one pass
+
+    Returns a mapping of (visualization_type, column_name) to the cached data:
+    a fine histogram and boxplot per numeric column, plus the correlation matrix.
+    """
+    summaries: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+
+    for column_name in df.select_dtypes(include=[np.number]).columns:
+        values = df[column_name].dropna().to_numpy(dtype=float)
+        if values.size == 0:
+            continue
+        summaries[("histogram_fine", column_name)] = build_fine_histogram(values).model_dump()
+        summaries[("boxplot", column_name)] = _boxplot_summary(df[column_name]).model_dump()
+
+    summaries[("correlation", None)] = _correlation_summary(df).model_dump()
+    return summaries
+
+
+async def precompute_visualizations(dataset_id: str, df: pd.DataFrame) -> int:
+    """Precompute and cache visualizations for a freshly processed dataset
+
+    The summaries are computed in a worker thread, Redis entries are written
+    in a single round-trip and MongoDB entries in one bulk upsert; returns the
+    number of visualizations cached.
+    """
+    summaries = await asyncio.to_thread(compute_visualization_summaries, df)
+
+    await cache_service.mset(
+        {
+            _visualization_cache_key(dataset_id, visualization_type, column_name): data
+            for (visualization_type, column_name), data in summaries.items()
+        },
+        ttl=3600,  # 1 hour
+    )
 
-    # Get dataset from S3
     dataset = await UserData.get(dataset_id)
     if not dataset:
         raise ValueError(f"Dataset {dataset_id} not found")
 
-    df = pd.read_csv(get_file_from_s3(dataset.s3_url))
+    now = datetime.utcnow()
+    await VisualizationCache.get_motor_collection().bulk_write(
+        [
+            UpdateOne(
+                {
+                    "dataset_id": dataset.to_ref(),
+                    "visualization_type": visualization_type,
+                    "column_name": column_name,
+                },
+                {"$set": {"data": data, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+                upsert=True,
+            )
+            for (visualization_type, column_name), data in summaries.items()
+        ],
+        ordered=False,
+    )
 
-    # Calculate histogram
-    counts, bin_edges = np.histogram(df[column_name].dropna(), bins=num_bins)
-    bins = [(bin_edges[i] + bin_edges[i + 1]) / 2 for i in range(len(bin_edges) - 1)]
+    logger.info(f"Precomputed {len(summaries)} visualizations for dataset {dataset_id}")
+    return len(summaries)
 
-    histogram_data = HistogramData(
-        bins=bins, counts=counts.tolist(), bin_edges=bin_edges.tolist()
-    )
 
-    # Cache the data
-    await cache_visualization(
-        dataset_id, "histogram", histogram_data.model_dump(), column_name
+async def _load_dataset_frame(dataset_id: str) -> pd.DataFrame:
+    """Load a dataset's raw file from S3"""
+    dataset = await UserData.get(dataset_id)
+    if not dataset:
+        raise ValueError(f"Dataset {dataset_id} not found")
+
+    return pd.read_csv(await asyncio.to_thread(get_file_from_s3, dataset.s3_url))
+
+
+async def generate_and_cache_histogram(
+    dataset_id: str, column_name: str, num_bins: int = 50
+) -> Dict[str, Any]:
+    """Generate histogram data for a numeric column
+
+    The fine histogram is cached independently of num_bins, so any bin count
+    is served by re-binning without touching the raw file.
+    """
+    # Get cached fine histogram if it exists
+    cached_data = await get_cached_visualization(
+        dataset_id, "histogram_fine", column_name
     )
+    if cached_data:
+        fine_histogram = FineHistogramData(**cached_data)
+    else:
+        df = await _load_dataset_frame(dataset_id)
+        fine_histogram = build_fine_histogram(
+            df[column_name].dropna().to_numpy(dtype=float)
+        )
+
+        # Cache the data
+        await cache_visualization(
+            dataset_id, "histogram_fine", fine_histogram.model_dump(), column_name
+        )
 
-    return histogram_data.model_dump()
+    return rebin_histogram(fine_histogram, num_bins).model_dump()
 
 
 async def generate_and_cache_boxplot(
@@ -142,32 +289,10 @@ async def generate_and_cache_boxplot(
     if cached_data:
         return cached_data
 
-    # Get dataset from S3
-    dataset = await UserData.get(dataset_id)
-    if not dataset:
-        raise ValueError(f"Dataset {dataset_id} not found")
-
-    df = pd.read_csv(get_file_from_s3(dataset.s3_url))
+    df = await _load_dataset_frame(dataset_id)
 
     # Calculate boxplot statistics
-    q1 = df[column_name].quantile(0.25)
-    q3 = df[column_name].quantile(0.75)
-    iqr = q3 - q1
-    lower_bound = q1 - 1.5 * iqr
-    upper_bound = q3 + 1.5 * iqr
-
-    outliers = df[(df[column_name] < lower_bound) | (df[column_name] > upper_bound)][
-        column_name
-    ].tolist()
-
-    boxplot_data = BoxplotData(
-        min=df[column_name].min(),
-        q1=q1,
-        median=df[column_name].median(),
-        q3=q3,
-        max=df[column_name].max(),
-        outliers=outliers,
-    )
+    boxplot_data = _boxplot_summary(df[column_name])
 
     # Cache the data
     await cache_visualization(
@@ -184,24 +309,10 @@ async def generate_and_cache_correlation_matrix(dataset_id: str) -> Dict[str, An
     if cached_data:
         return cached_data
 
-    # Get dataset from S3
-    dataset = await UserData.get(dataset_id)
-    if not dataset:
-        raise ValueError(f"Dataset {dataset_id} not found")
-
-    df = pd.read_csv(get_file_from_s3(dataset.s3_url))
-
-    # Select numeric columns
-    numeric_df = df.select_dtypes(include=[np.number])
-
-    # Calculate correlation matrix
-    corr_matrix = numeric_df.corr()
-
-    # Convert numpy array to list and get column names
-    matrix_values = corr_matrix.values.tolist()
-    columns = list(corr_matrix.columns)  # Convert Index to list
+    df = await _load_dataset_frame(dataset_id)
 
-    correlation_data = CorrelationMatrixData(matrix=matrix_values, columns=columns)
+    # Calculate correlation matrix over numeric columns
+    correlation_data = _correlation_summary(df)
 
     # Cache the data
     await cache_visualization(dataset_id, "correlation", correlation_data.model_dump())
@@ -1,10 +1,11 @@
-import boto3
 import os
 from botocore.exceptions import ClientError, NoCredentialsError
-from typing import Optional, Tuple
+from typing import BinaryIO, Optional, Tuple, Union
 import logging
 import io
 
+from app.services.object_storage import get_object_storage, parse_s3_url
+
 # Suppress AWS logging
 logging.getLogger("boto3").setLevel(logging.WARNING)
 logging.getLogger("botocore").setLevel(logging.WARNING)
@@ -14,18 +15,11 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Initialize S3 client as None initially
-s3_client = None
-S3_BUCKET = None
-
 
 def get_s3_client():
     """
-    Get or create an S3 client with the current environment variables.
-    This ensures we're using the most up-to-date environment variables.
+    Get the shared, pooled S3 client, or None if AWS is not configured.
     """
-    global s3_client
-
     # Check for required environment variables
     required_env_vars = [
         "AWS_ACCESS_KEY_ID",
@@ -41,28 +35,21 @@ def get_s3_client():
         return None
 
     try:
-        # Create a new client with current environment variables
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION", "us-east-1"),
-        )
-        logger.info("S3 client initialized successfully")
-        return s3_client
+        return get_object_storage().client
     except Exception as e:
         logger.error(f"Failed to initialize S3 client: {e}")
         return None
 
 
 def upload_file_to_s3(
-    file_content: bytes, s3_filename: str, content_type: Optional[str] = None
+    file_content: Union[bytes, BinaryIO], s3_filename: str, content_type: Optional[str] = None
 ) -> Tuple[bool, Optional[str]]:
     """
     Upload a file to S3.
 
     Args:
-        file_content: The content of the file as bytes
+        file_content: The content of the file as bytes, or a binary file
+            object that is streamed from its current position
         s3_filename: The filename to use in S3
         content_type: The content type of the file (optional)
 
@@ -71,7 +58,7 @@ def upload_file_to_s3(
         - success: Boolean indicating if the upload was successful
         - url: The public URL of the uploaded file, or None if upload failed
     """
-    # Get the S3 client with current environment variables
+    # Get the shared S3 client
     client = get_s3_client()
     if client is None:
         return False, None
@@ -85,15 +72,18 @@ def upload_file_to_s3(
     try:
         # Log upload attempt
         logger.info(f"Attempting to upload file to S3: {s3_filename} to bucket: {bucket_name}")
-        logger.info(f"File size: {len(file_content)} bytes")
+        if isinstance(file_content, bytes):
+            logger.info(f"File size: {len(file_content)} bytes")
+            file_content = io.BytesIO(file_content)
         
-        # Upload the file without public access
+        # Upload the file without public access, in parallel parts if large
         extra_args = {}
         if content_type:
             extra_args["ContentType"] = content_type
 
         client.upload_fileobj(
-            io.BytesIO(file_content), bucket_name, s3_filename, ExtraArgs=extra_args
+            file_content, bucket_name, s3_filename,
+            ExtraArgs=extra_args, Config=get_object_storage().transfer_config
         )
 
         # Generate the URL (this will be a signed URL if needed for access)
@@ -123,29 +113,18 @@ def get_file_from_s3(s3_url: str) -> io.BytesIO:
     Returns:
         A BytesIO object containing the file content
     """
-    # Get the S3 client
+    # Get the shared S3 client
     client = get_s3_client()
     if client is None:
         raise Exception("Failed to initialize S3 client")
 
-    # Parse the S3 URL to get bucket and key
-    # URL format: https://bucket-name.s3.amazonaws.com/key
     try:
-        # Remove the https:// prefix if present
-        if s3_url.startswith("https://"):
-            s3_url = s3_url[8:]
-
-        # Split by the first slash to separate bucket and key
-        parts = s3_url.split("/", 1)
-        if len(parts) != 2:
-            raise ValueError(f"Invalid S3 URL format: {s3_url}")
-
-        bucket_name = parts[0].split(".")[0]  # Remove .s3.amazonaws.com
-        key = parts[1]
+        # URL format: https://bucket-name.s3.amazonaws.com/key or s3://bucket-name/key
+        bucket_name, key = parse_s3_url(s3_url)
 
-        # Download the file to a BytesIO object
+        # Download the file to a BytesIO object, in parallel ranged parts if large
         file_obj = io.BytesIO()
-        client.download_fileobj(bucket_name, key, file_obj)
+        client.download_fileobj(bucket_name, key, file_obj, Config=get_object_storage().transfer_config)
         file_obj.seek(0)
 
         logger.info(f"File downloaded successfully from {s3_url}")
@@ -0,0 +1,105 @@
+"""
+File ingestion benchmarks.
+
+Compares parse time and peak RSS growth of the Arrow ingestion engine with
+the pandas engine over CSV, JSON Lines, Parquet and Excel fixtures written
+to disk from the shared benchmark frames.
+"""
+import gc
+import threading
+import time
+
+import psutil
+import pytest
+
+from app.services.data_processing.ingestion import ArrowIngestionEngine, PandasIngestionEngine
+
+ENGINES = {
+    "pandas": PandasIngestionEngine(),
+    "arrow": ArrowIngestionEngine(),
+}
+
+
+@pytest.fixture(scope="module")
+def fixture_files(tmp_path_factory):
+    import numpy as np
+    import pandas as pd
+
+    np.random.seed(42)
+    n_rows = 200000
+    df = pd.DataFrame({
+        'id': range(n_rows),
+        'numeric_1': np.random.randn(n_rows),
+        'numeric_2': np.random.uniform(0, 100, n_rows),
+        'categorical_1': np.random.choice(['A', 'B', 'C', 'D'], n_rows),
+        'text': [f'Sample text {i}' for i in range(n_rows)],
+        'with_missing': [np.nan if i % 10 == 0 else i for i in range(n_rows)],
+        'date': pd.date_range('2020-01-01', periods=n_rows, freq='min').astype(str),
+    })
+
+    directory = tmp_path_factory.mktemp("ingestion")
+    files = {
+        'csv': directory / 'data.csv',
+        'parquet': directory / 'data.parquet',
+        'json': directory / 'data.jsonl',
+        'excel': directory / 'data.xlsx',
+    }
+    df.to_csv(files['csv'], index=False)
+    df.to_parquet(files['parquet'])
+    # JSON Lines, which the Arrow reader parses; JSON documents go to pandas
+    df.head(50000).to_json(files['json'], orient='records', lines=True)
+    # openpyxl writes slowly; keep the workbook small
+    df.head(5000).to_excel(files['excel'], index=False, engine='openpyxl')
+    return files
+
+
+def measure(read):
+    """Run a read, returning (seconds, peak RSS growth in bytes)"""
+    gc.collect()
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    peak = baseline
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, process.memory_info().rss)
+            time.sleep(0.002)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    start = time.perf_counter()
+    df = read()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    peak = max(peak, process.memory_info().rss)
+    del df
+    return elapsed, peak - baseline
+
+
+class TestIngestionPerformance:
+    """Parse time and peak memory per engine and format"""
+
+    @pytest.mark.parametrize("engine", ["pandas", "arrow"])
+    @pytest.mark.parametrize("file_type", ["csv", "parquet", "json", "excel"])
+    def test_read(self, benchmark, fixture_files, engine, file_type):
+        path = fixture_files[file_type]
+        df = benchmark(ENGINES[engine].read, str(path), file_type)
+        assert len(df) > 0
+
+    @pytest.mark.parametrize("file_type", ["csv", "parquet", "json"])
+    def test_arrow_reads_without_fallback(self, fixture_files, file_type):
+        assert ENGINES["arrow"].read_table(str(fixture_files[file_type]), file_type) is not None
+
+    def test_csv_parse_comparison(self, fixture_files):
+        path = str(fixture_files['csv'])
+        results = {}
+        for name, engine in ENGINES.items():
+            engine.read(path, 'csv')  # warm up
+            results[name] = measure(lambda: engine.read(path, 'csv'))
+
+        # Reported only; wall-clock comparisons are too noisy to assert on
+        for name, (seconds, rss) in results.items():
+            print(f"\n{name}: {seconds * 1000:.0f}ms, peak RSS +{rss / 2**20:.1f}MiB")
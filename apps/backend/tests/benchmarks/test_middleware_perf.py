@@ -0,0 +1,150 @@
+"""
+Request instrumentation overhead benchmarks.
+
+Compares the per-request cost of the previous stack of BaseHTTPMiddleware
+layers (API versioning, Prometheus metrics, monitoring) with the single
+pure ASGI InstrumentationMiddleware, calling the ASGI apps directly so
+that no HTTP client overhead is measured.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.api_version import APIVersionMiddleware
+from app.middleware.instrumentation import InstrumentationMiddleware
+from app.middleware.monitoring import MonitoringMiddleware
+
+REQUESTS_PER_ROUND = 200
+
+# The legacy layer labels series by raw path; keep them out of the shared registry
+legacy_registry = CollectorRegistry()
+legacy_latency = Histogram(
+    name="http_request_duration_seconds",
+    documentation="HTTP request latency in seconds",
+    labelnames=["method", "endpoint", "status_code"],
+    buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0),
+    registry=legacy_registry,
+)
+legacy_count = Counter(
+    name="http_requests_total",
+    documentation="Total HTTP requests",
+    labelnames=["method", "endpoint", "status_code"],
+    registry=legacy_registry,
+)
+
+
+class LegacyMetricsMiddleware(BaseHTTPMiddleware):
+    """The former BaseHTTPMiddleware-based Prometheus layer, with its own registry"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            labels = dict(method=request.method, endpoint=request.url.path, status_code=status_code)
+            legacy_latency.labels(**labels).observe(time.time() - start_time)
+            legacy_count.labels(**labels).inc()
+        return response
+
+
+def build_app(*middleware) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/datasets/{dataset_id}")
+    async def get_dataset(dataset_id: str):
+        return {"dataset_id": dataset_id}
+
+    for cls in middleware:
+        app.add_middleware(cls)
+    return app
+
+
+def make_runner(app):
+    loop = asyncio.new_event_loop()
+
+    async def one_request(i: int):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/api/v1/datasets/ds_{i}",
+            "raw_path": f"/api/v1/datasets/ds_{i}".encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"testserver"), (b"accept", b"application/json")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        sent_request = False
+
+        async def receive():
+            nonlocal sent_request
+            if not sent_request:
+                sent_request = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            pass
+
+        await app(scope, receive, send)
+
+    async def run_round():
+        for i in range(REQUESTS_PER_ROUND):
+            await one_request(i)
+
+    def run():
+        loop.run_until_complete(run_round())
+
+    return run, loop
+
+
+@pytest.fixture
+def runners():
+    built = {
+        "bare": make_runner(build_app()),
+        "legacy": make_runner(build_app(MonitoringMiddleware, APIVersionMiddleware, LegacyMetricsMiddleware)),
+        "instrumented": make_runner(build_app(InstrumentationMiddleware)),
+    }
+    yield {name: run for name, (run, _) in built.items()}
+    for _, loop in built.values():
+        loop.close()
+
+
+class TestInstrumentationOverhead:
+    """Per-request overhead of request instrumentation"""
+
+    def test_bare_app(self, benchmark, runners):
+        benchmark(runners["bare"])
+        print(f"\nbare: {benchmark.stats['mean'] / REQUESTS_PER_ROUND * 1e6:.1f}us/request")
+
+    def test_legacy_middleware_stack(self, benchmark, runners):
+        benchmark(runners["legacy"])
+        print(f"\nlegacy stack: {benchmark.stats['mean'] / REQUESTS_PER_ROUND * 1e6:.1f}us/request")
+
+    def test_instrumentation_middleware(self, benchmark, runners):
+        benchmark(runners["instrumented"])
+        print(f"\ninstrumented: {benchmark.stats['mean'] / REQUESTS_PER_ROUND * 1e6:.1f}us/request")
+
+    def test_instrumentation_is_cheaper_than_legacy_stack(self, runners):
+        def per_request(run, rounds=5):
+            run()  # warm up
+            start = time.perf_counter()
+            for _ in range(rounds):
+                run()
+            return (time.perf_counter() - start) / (rounds * REQUESTS_PER_ROUND)
+
+        bare = per_request(runners["bare"])
+        legacy = per_request(runners["legacy"]) - bare
+        instrumented = per_request(runners["instrumented"]) - bare
+        print(f"\noverhead per request: legacy {legacy * 1e6:.1f}us, instrumented {instrumented * 1e6:.1f}us")
+
+        assert instrumented < legacy
@@ -0,0 +1,77 @@
+"""
+ONNX Runtime vs native estimator benchmarks.
+
+Compares single-row latency and 1000-row throughput for models served
+through onnxruntime against the native sklearn estimator.
+"""
+import pytest
+import numpy as np
+
+pytest.importorskip("skl2onnx")
+pytest.importorskip("onnxruntime")
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from app.services.onnx_backend import OnnxModel, convert_to_onnx
+
+
+@pytest.fixture(params=["random_forest", "logistic_regression"])
+def served_models(request, benchmark_data_10k):
+    """Native model and its ONNX counterpart trained on the same data"""
+    X = benchmark_data_10k[['numeric_1', 'numeric_2', 'numeric_3']].to_numpy(dtype=np.float64)
+    y = benchmark_data_10k['target'].to_numpy()
+
+    if request.param == "random_forest":
+        native = RandomForestClassifier(n_estimators=50, max_depth=10, random_state=42, n_jobs=1)
+    else:
+        native = LogisticRegression()
+    native.fit(X, y)
+
+    onnx_model = OnnxModel.from_bytes(convert_to_onnx(native), intra_op_threads=1)
+    return request.param, native, onnx_model, X
+
+
+class TestOnnxServingPerformance:
+    """Latency and throughput of ONNX serving vs native models"""
+
+    def test_native_single_row(self, benchmark, served_models, performance_targets):
+        name, native, _, X = served_models
+        row = X[:1]
+
+        result = benchmark(native.predict_proba, row)
+
+        assert result.shape[0] == 1
+        assert benchmark.stats['mean'] < performance_targets['single_prediction']
+        print(f"\n{name} native single row: {benchmark.stats['mean']*1e6:.0f}us")
+
+    def test_onnx_single_row(self, benchmark, served_models, performance_targets):
+        name, native, onnx_model, X = served_models
+        row = X[:1]
+
+        result = benchmark(onnx_model.predict_proba, row)
+
+        np.testing.assert_allclose(result, native.predict_proba(row), atol=1e-5)
+        assert benchmark.stats['mean'] < performance_targets['single_prediction']
+        print(f"\n{name} ONNX single row: {benchmark.stats['mean']*1e6:.0f}us")
+
+    def test_native_throughput_1000_rows(self, benchmark, served_models, performance_targets):
+        name, native, _, X = served_models
+        batch = X[:1000]
+
+        benchmark(native.predict, batch)
+
+        rows_per_sec = 1000 / benchmark.stats['mean']
+        assert rows_per_sec > performance_targets['batch_prediction_throughput']
+        print(f"\n{name} native: {rows_per_sec:.0f} rows/sec")
+
+    def test_onnx_throughput_1000_rows(self, benchmark, served_models, performance_targets):
+        name, native, onnx_model, X = served_models
+        batch = X[:1000]
+
+        result = benchmark(onnx_model.predict, batch)
+
+        assert (result == native.predict(batch)).mean() > 0.99
+        rows_per_sec = 1000 / benchmark.stats['mean']
+        assert rows_per_sec > performance_targets['batch_prediction_throughput']
+        print(f"\n{name} ONNX: {rows_per_sec:.0f} rows/sec")
@@ -248,3 +248,40 @@ class TestPredictionWithDifferentModels:
 
         rows_per_sec = 100 / benchmark.stats['mean']
         print(f"\nXGBoost: {rows_per_sec:.0f} rows/sec")
+
+
+class TestSingleRowFeaturePerformance:
+    """Benchmark the compiled single-row feature pipeline against pandas"""
+
+    @pytest.fixture
+    def fitted_engineer(self, benchmark_data_1k):
+        import asyncio
+        from app.services.model_training.feature_engineer import FeatureEngineer
+
+        X = benchmark_data_1k.drop(columns=['target'])
+        engineer = FeatureEngineer()
+        asyncio.run(engineer.fit_transform(X, benchmark_data_1k['target'], "binary_classification"))
+        record = X.iloc[0].to_dict()
+        return engineer, record
+
+    def test_pandas_single_row_transform(self, benchmark, fitted_engineer):
+        """Baseline: DataFrame construction + FeatureEngineer.transform"""
+        import asyncio
+        engineer, record = fitted_engineer
+        loop = asyncio.new_event_loop()
+
+        def transform():
+            return loop.run_until_complete(engineer.transform(pd.DataFrame([record])))
+
+        result = benchmark(transform)
+        loop.close()
+        assert result.shape[0] == 1
+
+    def test_compiled_single_row_transform(self, benchmark, fitted_engineer):
+        """Compiled pipeline: dict straight into a NumPy row"""
+        engineer, record = fitted_engineer
+        compiled = engineer.compile()
+        assert compiled is not None
+
+        result = benchmark(compiled.transform_records, [record])
+        assert result.shape == (1, len(compiled.feature_names))
@@ -213,5 +213,39 @@ class TestTransformationScalability:
         print(f"\nFill missing with {size} rows: {benchmark.stats['mean']:.3f}s")
 
 
+class TestPipelinePerformance:
+    """Benchmark multi-step recipe application"""
+
+    RECIPE = [
+        (TransformationType.REMOVE_DUPLICATES, {'keep': 'first'}),
+        (TransformationType.TRIM_WHITESPACE, {'columns': ['text', 'categorical_1']}),
+        (TransformationType.FILL_MISSING, {'columns': ['with_missing'], 'value': 0}),
+        (TransformationType.TRIM_WHITESPACE, {'columns': ['categorical_2']}),
+        (TransformationType.DROP_MISSING, {'columns': ['numeric_1']}),
+    ]
+
+    def test_pipeline_planned_100k(self, benchmark, benchmark_data_100k, performance_targets):
+        """Benchmark planned, fused recipe application (100K rows)"""
+        engine = TransformationEngine()
+
+        result = benchmark(engine.apply_pipeline, benchmark_data_100k, self.RECIPE)
+
+        assert result.success
+        assert benchmark.stats['mean'] < performance_targets['transformation_apply_100k']
+
+    def test_pipeline_eager_100k(self, benchmark, benchmark_data_100k):
+        """Baseline: the same recipe applied one step at a time"""
+        engine = TransformationEngine()
+
+        def run_eager():
+            df = benchmark_data_100k
+            for transformation_type, parameters in self.RECIPE:
+                df, result = engine.apply_transformation_frame(df, transformation_type, parameters)
+            return result
+
+        result = benchmark(run_eager)
+        assert result.success
+
+
 # Import numpy for the drop_missing test
 import numpy as np
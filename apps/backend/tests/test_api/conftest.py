@@ -64,7 +64,7 @@ def mock_user_data():
 def mock_s3_upload():
     """Mock S3 upload function"""
     with patch('app.api.routes.secure_upload.upload_file_to_s3') as mock:
-        mock.return_value = "s3://test-bucket/test-file.csv"
+        mock.return_value = (True, "s3://test-bucket/test-file.csv")
         yield mock
 
 
@@ -145,7 +145,13 @@ def mock_upload_handler():
         temp_file.write(test_csv_content)
         temp_file.close()
         
-        mock.complete_upload = AsyncMock(return_value=Path(temp_file.name))
+        from app.services.security.upload_handler import CompletedUpload
+        mock.chunk_size = 5242880
+        mock.complete_upload = AsyncMock(return_value=CompletedUpload(
+            filename="test.csv",
+            sha256="0" * 64,
+            temp_path=Path(temp_file.name)
+        ))
         mock._get_session = MagicMock(return_value={
             "filename": "test.csv",
             "file_size": 1024,
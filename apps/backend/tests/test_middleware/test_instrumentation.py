@@ -0,0 +1,82 @@
+"""
+Tests for the combined instrumentation middleware.
+
+Tests validate:
+- Version negotiation, headers and 406 responses
+- Route template labels for metrics and monitoring
+- Exception tracking
+"""
+
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.middleware.api_version import CURRENT_VERSION, get_api_version
+from app.middleware.instrumentation import InstrumentationMiddleware
+from app.middleware.metrics import get_metrics
+
+
+@pytest.fixture
+def monitor():
+    with patch("app.middleware.instrumentation.monitor") as mock_monitor:
+        yield mock_monitor
+
+
+@pytest.fixture
+def client(monitor):
+    app = FastAPI()
+    app.add_middleware(InstrumentationMiddleware)
+
+    @app.get("/api/v1/models/{model_id}")
+    async def get_model(model_id: str, request: Request):
+        return {"model_id": model_id, "version": get_api_version(request)}
+
+    @app.get("/api/v1/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return TestClient(app)
+
+
+@pytest.mark.unit
+class TestInstrumentationMiddleware:
+    def test_version_state_and_headers(self, client):
+        response = client.get("/api/v1/models/m_1")
+
+        assert response.status_code == 200
+        assert response.json()["version"] == "v1"
+        assert response.headers["X-API-Version"] == "v1"
+        assert response.headers["X-API-Current-Version"] == CURRENT_VERSION
+
+    def test_unsupported_version_is_rejected(self, client, monitor):
+        response = client.get(
+            "/api/v1/models/m_1", headers={"Accept": "application/vnd.narrativeml.v99+json"}
+        )
+        # Path version wins over the header
+        assert response.status_code == 200
+
+        response = client.get("/api/v9/models/m_1")
+
+        assert response.status_code == 406
+        assert response.json()["supported_versions"] == ["v1"]
+        monitor.record_api_call.assert_called_with("<unmatched>", "GET", 406, pytest.approx(0, abs=1))
+
+    def test_records_route_template(self, client, monitor):
+        client.get("/api/v1/models/m_42")
+
+        endpoint, method, status_code, _ = monitor.record_api_call.call_args[0]
+        assert (endpoint, method, status_code) == ("/api/v1/models/{model_id}", "GET", 200)
+        metrics = get_metrics().decode("utf-8")
+        assert 'endpoint="/api/v1/models/{model_id}"' in metrics
+        assert "m_42" not in metrics
+
+    def test_exceptions_are_tracked(self, client, monitor):
+        with pytest.raises(RuntimeError):
+            client.get("/api/v1/boom")
+
+        monitor.increment.assert_called_once_with(
+            "api.exceptions", 1,
+            {"endpoint": "/api/v1/boom", "method": "GET", "exception": "RuntimeError"}
+        )
+        assert monitor.record_api_call.call_args[0][:3] == ("/api/v1/boom", "GET", 500)
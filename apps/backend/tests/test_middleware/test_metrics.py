@@ -266,15 +266,49 @@ class TestMetricsLabels:
                 break
 
     def test_active_requests_has_correct_labels(self, client):
-        """Test that active_requests has method, endpoint labels."""
+        """Test that active_requests is labelled by method only."""
         client.get("/test")
         metrics = get_metrics().decode("utf-8")
 
         # Find a line with active_requests metric
         for line in metrics.split("\n"):
-            if "http_requests_active" in line and "/test" in line:
+            if line.startswith("http_requests_active{"):
                 assert "method=" in line
-                assert "endpoint=" in line
-                # Should NOT have status_code label
+                # Route is unknown until routing, and no status yet
+                assert "endpoint=" not in line
                 assert "status_code=" not in line
                 break
+        else:
+            pytest.fail("http_requests_active series not found")
+
+
+class TestRouteTemplateLabels:
+    """Endpoint labels use route templates, keeping cardinality bounded."""
+
+    @pytest.fixture
+    def templated_client(self):
+        test_app = FastAPI()
+        test_app.add_middleware(MetricsMiddleware)
+
+        @test_app.get("/datasets/{dataset_id}")
+        async def get_dataset(dataset_id: str):
+            return {"id": dataset_id}
+
+        return TestClient(test_app)
+
+    def test_path_parameters_share_one_series(self, templated_client):
+        for i in range(5):
+            templated_client.get(f"/datasets/ds_{i}")
+
+        metrics = get_metrics().decode("utf-8")
+
+        assert 'endpoint="/datasets/{dataset_id}"' in metrics
+        assert "ds_3" not in metrics
+
+    def test_unmatched_paths_share_one_series(self, templated_client):
+        templated_client.get("/no/such/path/123")
+
+        metrics = get_metrics().decode("utf-8")
+
+        assert 'http_requests_total{endpoint="<unmatched>",method="GET",status_code="404"}' in metrics
+        assert "/no/such/path" not in metrics
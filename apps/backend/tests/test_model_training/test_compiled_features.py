@@ -0,0 +1,212 @@
+"""
+Parity tests for the compiled feature pipeline
+
+Every supported configuration must produce exactly the same matrix as
+FeatureEngineer.transform on a DataFrame built from the same records.
+"""
+
+import pickle
+import warnings
+
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from app.services.model_training.feature_engineer import (
+    FeatureEngineer,
+    FeatureEngineeringConfig
+)
+from app.services.model_training.compiled_features import (
+    CompiledFeaturePipeline,
+    compile_feature_pipeline,
+    matrix_input,
+    prepare_model_input
+)
+
+
+@pytest.fixture
+def training_data():
+    """Mixed numeric/categorical data with missing values"""
+    rng = np.random.RandomState(7)
+    n_samples = 300
+    return pd.DataFrame({
+        'age': rng.normal(40, 12, n_samples),
+        'income': np.concatenate([rng.lognormal(10, 1, 280), [np.nan] * 20]),
+        'score': rng.uniform(-5, 5, n_samples),
+        'city': rng.choice(['paris', 'berlin', 'rome'], n_samples),
+        'plan': np.concatenate([rng.choice(['free', 'pro'], 290), [np.nan] * 10]).astype(object),
+        'tier': rng.choice([1, 2, 3], n_samples),
+    })
+
+
+@pytest.fixture
+def target(training_data):
+    rng = np.random.RandomState(11)
+    return pd.Series(rng.choice([0, 1], len(training_data)))
+
+
+def records_for(df: pd.DataFrame):
+    """Records as the API receives them (JSON nulls for missing numerics)"""
+    records = df.to_dict('records')
+    for record in records:
+        for key in ('age', 'income', 'score'):
+            if pd.isna(record[key]):
+                record[key] = None
+    return records
+
+
+async def fitted(config, training_data, target):
+    engineer = FeatureEngineer(config)
+    await engineer.fit_transform(training_data, target, "binary_classification")
+    return engineer
+
+
+async def assert_parity(engineer, records):
+    compiled = compile_feature_pipeline(engineer)
+    assert compiled is not None
+
+    expected = await engineer.transform(pd.DataFrame(records))
+    actual = compiled.transform_records(records)
+
+    assert compiled.feature_names == list(expected.columns)
+    # Bit-identical, including any NaNs
+    np.testing.assert_array_equal(actual, expected.to_numpy(dtype=np.float64))
+
+
+CONFIGS = [
+    pytest.param(FeatureEngineeringConfig(), id="default"),
+    pytest.param(FeatureEngineeringConfig(select_features=False), id="no-selection"),
+    pytest.param(FeatureEngineeringConfig(scaling_method="minmax", max_features=6), id="minmax-top6"),
+    pytest.param(FeatureEngineeringConfig(scaling_method="robust", missing_strategy="median"), id="robust-median"),
+    pytest.param(FeatureEngineeringConfig(create_interactions=True, select_features=False), id="interactions"),
+    pytest.param(FeatureEngineeringConfig(create_interactions=True, max_features=8), id="interactions-selected"),
+    pytest.param(FeatureEngineeringConfig(scale_features=False, missing_strategy="most_frequent"), id="unscaled"),
+]
+
+
+class TestCompiledFeatureParity:
+    """Compiled output must equal the pandas path exactly"""
+
+    @pytest.mark.parametrize("config", CONFIGS)
+    async def test_single_row(self, config, training_data, target):
+        engineer = await fitted(config, training_data, target)
+        for i in (0, 5, 17):
+            await assert_parity(engineer, records_for(training_data.iloc[[i]]))
+
+    @pytest.mark.parametrize("config", CONFIGS)
+    async def test_many_rows(self, config, training_data, target):
+        engineer = await fitted(config, training_data, target)
+        await assert_parity(engineer, records_for(training_data.iloc[:50]))
+
+    @pytest.mark.parametrize("config", [c for c in CONFIGS if c.id != "unscaled"])
+    async def test_missing_numerics_are_imputed(self, config, training_data, target):
+        engineer = await fitted(config, training_data, target)
+        record = records_for(training_data.iloc[[3]])[0]
+        record['age'] = None
+        record['income'] = None
+        await assert_parity(engineer, [record])
+
+    async def test_unknown_category_encodes_as_zeros(self, training_data, target):
+        engineer = await fitted(FeatureEngineeringConfig(select_features=False), training_data, target)
+        record = records_for(training_data.iloc[[0]])[0]
+        record['city'] = 'madrid'
+        record['tier'] = 9
+        await assert_parity(engineer, [record])
+
+    async def test_numeric_category_matches_float_input(self, training_data, target):
+        engineer = await fitted(FeatureEngineeringConfig(select_features=False), training_data, target)
+        record = records_for(training_data.iloc[[0]])[0]
+        record['tier'] = float(record['tier'])
+        await assert_parity(engineer, [record])
+
+    async def test_predictions_identical(self, training_data, target):
+        engineer = await fitted(FeatureEngineeringConfig(), training_data, target)
+        X = (await engineer.fit_transform(training_data, target, "binary_classification")).X_transformed
+        records = records_for(training_data.iloc[:25])
+
+        for model in (RandomForestClassifier(n_estimators=10, random_state=0), LogisticRegression()):
+            model.fit(X, target)
+            expected = model.predict_proba(await engineer.transform(pd.DataFrame(records)))
+            actual = model.predict_proba(await prepare_model_input(model, records, engineer))
+            np.testing.assert_array_equal(actual, expected)
+
+
+    async def test_feature_name_warning_is_scoped(self, training_data, target):
+        engineer = await fitted(FeatureEngineeringConfig(), training_data, target)
+        X = (await engineer.fit_transform(training_data, target, "binary_classification")).X_transformed
+        model = LogisticRegression().fit(X, target)
+        matrix = await prepare_model_input(model, records_for(training_data.iloc[:5]), engineer)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            with matrix_input():
+                model.predict(matrix)
+            assert not caught
+            model.predict(matrix)
+
+        assert any("valid feature names" in str(w.message) for w in caught)
+
+
+class TestCompiledFeatureFallback:
+    """Unsupported inputs and configurations go back to the pandas path"""
+
+    async def test_label_encoding_is_not_compiled(self, training_data, target):
+        config = FeatureEngineeringConfig(encoding_method="label", select_features=False)
+        engineer = await fitted(config, training_data, target)
+        assert compile_feature_pipeline(engineer) is None
+
+    async def test_null_category_raises(self, training_data, target):
+        engineer = await fitted(FeatureEngineeringConfig(), training_data, target)
+        record = records_for(training_data.iloc[[0]])[0]
+        record['plan'] = None
+        with pytest.raises(ValueError):
+            engineer.compile().transform_records([record])
+
+    async def test_null_numeric_with_most_frequent_raises(self, training_data, target):
+        config = FeatureEngineeringConfig(missing_strategy="most_frequent")
+        engineer = await fitted(config, training_data, target)
+        record = records_for(training_data.iloc[[0]])[0]
+        record['age'] = None
+        with pytest.raises(ValueError):
+            engineer.compile().transform_records([record])
+
+    async def test_missing_field_raises(self, training_data, target):
+        engineer = await fitted(FeatureEngineeringConfig(), training_data, target)
+        record = records_for(training_data.iloc[[0]])[0]
+        del record['age']
+        with pytest.raises(KeyError):
+            engineer.compile().transform_records([record])
+
+    async def test_prepare_model_input_falls_back(self, training_data, target):
+        engineer = await fitted(FeatureEngineeringConfig(), training_data, target)
+        record = records_for(training_data.iloc[[0]])[0]
+        record['plan'] = None
+
+        result = await prepare_model_input(LogisticRegression(), [record], engineer)
+
+        assert isinstance(result, pd.DataFrame)
+
+    async def test_without_feature_engineer_selects_columns(self):
+        result = await prepare_model_input(None, [{"a": 1, "b": 2, "c": 3}], None, ["b", "a"])
+        assert list(result.columns) == ["b", "a"]
+
+
+class TestCompiledCaching:
+    async def test_compile_is_cached_and_not_pickled(self, training_data, target):
+        engineer = await fitted(FeatureEngineeringConfig(), training_data, target)
+        compiled = engineer.compile()
+
+        assert isinstance(compiled, CompiledFeaturePipeline)
+        assert engineer.compile() is compiled
+
+        restored = pickle.loads(pickle.dumps(engineer))
+        assert "_compiled_pipeline" not in restored.__dict__
+        assert restored.compile() is not None
+
+    async def test_refit_recompiles(self, training_data, target):
+        engineer = await fitted(FeatureEngineeringConfig(), training_data, target)
+        compiled = engineer.compile()
+        await engineer.fit_transform(training_data, target, "binary_classification")
+        assert engineer.compile() is not compiled
@@ -0,0 +1,123 @@
+"""
+Tests for schema-driven DataFrame compaction
+"""
+
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.data_processing.compaction import compact_column, compact_dataframe
+from app.services.data_processing.data_processor import DataProcessor
+from app.services.data_processing.schema_inference import DataType, SchemaInferenceService
+from app.services.visualization_cache import compute_visualization_summaries
+
+
+@pytest.fixture
+def frame():
+    n = 2000
+    rng = np.random.RandomState(0)
+    return pd.DataFrame({
+        'id': np.arange(n, dtype=np.int64),
+        'small': rng.randint(0, 100, n).astype(np.int64),
+        'with_missing': [np.nan if i % 10 == 0 else float(i) for i in range(n)],
+        'price': rng.uniform(0, 100, n),
+        'halves': rng.randint(0, 10, n) / 2,
+        'department': rng.choice(['Sales', 'Engineering', 'HR'], n).astype(object),
+        'comment': [f'free text comment number {i} ' * 4 for i in range(n)],
+        'flag': rng.choice([True, False], n),
+    })
+
+
+@pytest.fixture
+async def compacted(frame):
+    schema = await SchemaInferenceService().infer_schema(frame)
+    return compact_dataframe(frame, schema)
+
+
+class TestCompactColumn:
+    def test_integers_downcast(self):
+        assert compact_column(pd.Series([1, 2, 300]), DataType.INTEGER).dtype == np.int16
+
+    def test_integers_with_missing_become_nullable(self):
+        series = compact_column(pd.Series([1.0, np.nan, 3.0]), DataType.INTEGER)
+
+        assert series.dtype == "Int8"
+        assert series.isna().tolist() == [False, True, False]
+
+    def test_lossy_floats_stay_float64(self):
+        assert compact_column(pd.Series([0.1, 0.2]), DataType.FLOAT).dtype == np.float64
+        assert compact_column(pd.Series([0.5, 0.25]), DataType.FLOAT).dtype == np.float32
+
+    def test_mixed_objects_are_left_alone(self):
+        series = pd.Series([1, 'a', None], dtype=object)
+        assert compact_column(series, DataType.STRING).dtype == object
+
+
+class TestCompactDataFrame:
+    async def test_dtypes(self, compacted):
+        df, report = compacted
+
+        assert df['id'].dtype == np.int16
+        assert df['small'].dtype == np.int8
+        assert df['with_missing'].dtype == "Int16"
+        assert df['price'].dtype == np.float64
+        assert df['halves'].dtype == np.float32
+        assert df['department'].dtype == "category"
+        assert df['comment'].dtype == pd.StringDtype("pyarrow")
+        assert df['flag'].dtype == bool
+        assert report['column_dtypes']['department'] == {'from': 'object', 'to': 'category'}
+
+    async def test_memory_savings(self, compacted):
+        df, report = compacted
+
+        assert report['memory_after_bytes'] == int(df.memory_usage(deep=True).sum())
+        assert report['memory_saved_percentage'] > 40
+        # Categorical codes replace one Python string per row
+        assert df['department'].memory_usage(deep=True) < 0.05 * report['memory_before_bytes']
+
+    async def test_values_round_trip(self, frame, compacted):
+        df, _ = compacted
+
+        restored = df.astype(frame.dtypes.to_dict())
+        pd.testing.assert_frame_equal(restored, frame)
+
+    async def test_downstream_services(self, frame, compacted):
+        df, _ = compacted
+        processor = DataProcessor(compact=False)
+
+        original = await processor.process_dataframe(frame.copy())
+        result = await processor.process_dataframe(df)
+
+        for before, after in zip(
+            original.statistics.column_statistics, result.statistics.column_statistics
+        ):
+            assert after.null_count == before.null_count
+            assert after.unique_count == before.unique_count
+            assert after.mean == pytest.approx(before.mean)
+            assert after.median == pytest.approx(before.median)
+            assert after.avg_length == pytest.approx(before.avg_length)
+        assert result.quality_report.overall_quality_score == pytest.approx(
+            original.quality_report.overall_quality_score
+        )
+        assert set(compute_visualization_summaries(df)) == set(compute_visualization_summaries(frame))
+        assert result.get_preview(rows=5)['preview_rows'] == 5
+
+
+class TestDataProcessorCompaction:
+    async def test_process_bytes_reports_memory(self, frame):
+        buffer = BytesIO()
+        frame.to_csv(buffer, index=False)
+
+        result = await DataProcessor().process_bytes(buffer.getvalue(), 'data.csv')
+
+        assert result.memory_report['memory_after_bytes'] < result.memory_report['memory_before_bytes']
+        assert result.dataframe['department'].dtype == "category"
+        assert 'memory_report' in result.to_dict()
+
+    async def test_compaction_can_be_disabled(self, frame):
+        result = await DataProcessor(compact=False).process_dataframe(frame.copy())
+
+        assert result.memory_report == {}
+        assert result.dataframe['department'].dtype == object
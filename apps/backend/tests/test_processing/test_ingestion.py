@@ -0,0 +1,168 @@
+"""
+Parity tests for the Arrow and pandas ingestion engines
+"""
+
+import json
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.data_processing.ingestion import (
+    ArrowIngestionEngine,
+    PandasIngestionEngine,
+    get_ingestion_engine,
+)
+
+
+@pytest.fixture
+def arrow():
+    return ArrowIngestionEngine()
+
+
+@pytest.fixture
+def pandas_engine():
+    return PandasIngestionEngine()
+
+
+def read_both(arrow, pandas_engine, data: bytes, file_type: str = "csv", **kwargs):
+    return (
+        arrow.read(BytesIO(data), file_type, **kwargs),
+        pandas_engine.read(BytesIO(data), file_type, **kwargs),
+    )
+
+
+def assert_same_frame(left: pd.DataFrame, right: pd.DataFrame):
+    assert left.dtypes.to_dict() == right.dtypes.to_dict()
+    # String columns may hold None where pandas holds NaN; both are NA
+    pd.testing.assert_frame_equal(left.fillna(-1), right.fillna(-1))
+
+
+class TestCSVParity:
+    def test_dtypes_match(self, arrow, pandas_engine):
+        n = 500
+        df = pd.DataFrame({
+            'id': range(n),
+            'name': [f'Person {i}' for i in range(n)],
+            'score': np.random.RandomState(0).rand(n),
+            'active': [i % 2 == 0 for i in range(n)],
+            'joined': pd.date_range('2020-01-01', periods=n, freq='h').astype(str),
+        })
+
+        left, right = read_both(arrow, pandas_engine, df.to_csv(index=False).encode())
+
+        assert_same_frame(left, right)
+        # Dates stay strings, as pandas reads them
+        assert left['joined'].dtype == object
+
+    def test_missing_values(self, arrow, pandas_engine):
+        data = b"a,b,c,d\n1,x,,NA\n,y,,2\n3,NA,,\n"
+
+        left, right = read_both(arrow, pandas_engine, data)
+
+        assert_same_frame(left, right)
+        assert left['a'].dtype == np.float64
+        assert left['c'].isna().all() and left['c'].dtype == np.float64
+        assert left['b'].isna().tolist() == [False, False, True]
+
+    def test_pandas_missing_value_strings(self, arrow, pandas_engine):
+        data = b"a,b,c\n1,None,x\n<NA>,#N/A,y\nnan,null,N/A\n"
+
+        left, right = read_both(arrow, pandas_engine, data)
+
+        assert_same_frame(left, right)
+        assert left['b'].isna().all()
+        assert left['c'].isna().tolist() == [False, False, True]
+
+    def test_type_widens_after_prescan(self, arrow, pandas_engine, monkeypatch):
+        monkeypatch.setattr("app.services.data_processing.ingestion.PRESCAN_BYTES", 64)
+        data = b"a,b\n" + b"1,2020-01-01\n" * 200 + b"2.5,not a date\n"
+
+        left, right = read_both(arrow, pandas_engine, data)
+
+        assert_same_frame(left, right)
+        assert left['a'].dtype == np.float64
+        assert left['b'].dtype == object
+
+    def test_late_dates_stay_strings(self, arrow, pandas_engine, monkeypatch):
+        monkeypatch.setattr("app.services.data_processing.ingestion.PRESCAN_BYTES", 64)
+        data = b"a,b\n" + b"1,\n" * 200 + b"2,2021-05-01\n"
+
+        left, right = read_both(arrow, pandas_engine, data)
+
+        assert left['b'].dtype == object
+        assert left['b'].iloc[-1] == right['b'].iloc[-1] == '2021-05-01'
+
+    def test_latin1_encoding(self, arrow, pandas_engine):
+        data = "city,value\nZürich,1\nSão Paulo,2\n".encode("latin-1")
+
+        left, right = read_both(arrow, pandas_engine, data, encoding="latin-1")
+
+        assert_same_frame(left, right)
+        assert left['city'].tolist() == ['Zürich', 'São Paulo']
+
+    def test_delimiter(self, arrow, pandas_engine):
+        left, right = read_both(arrow, pandas_engine, b"a;b\n1;x\n2;y\n", delimiter=';')
+
+        assert_same_frame(left, right)
+        assert list(left.columns) == ['a', 'b']
+
+    def test_renamed_headers_use_pandas(self, arrow, pandas_engine):
+        data = pd.DataFrame({'a': [1, 2]}).to_csv().encode()
+
+        left, right = read_both(arrow, pandas_engine, data)
+
+        assert list(left.columns) == list(right.columns) == ['Unnamed: 0', 'a']
+
+    def test_empty_file_raises(self, arrow):
+        with pytest.raises(Exception):
+            arrow.read(BytesIO(b""), 'csv')
+
+
+class TestOtherFormats:
+    def test_json_records_document(self, arrow, pandas_engine):
+        data = json.dumps([{'a': 1, 'b': 'x'}, {'a': 2, 'b': None}]).encode()
+
+        left, right = read_both(arrow, pandas_engine, data, file_type='json')
+
+        assert_same_frame(left, right)
+
+    def test_json_lines(self, arrow, pandas_engine):
+        data = b'{"a": 1, "b": "x"}\n{"a": 2, "b": "y"}\n'
+
+        left, right = read_both(arrow, pandas_engine, data, file_type='json')
+
+        assert left.to_dict('list') == {'a': [1, 2], 'b': ['x', 'y']}
+        assert_same_frame(left, right)
+
+    def test_parquet(self, arrow, pandas_engine):
+        buffer = BytesIO()
+        pd.DataFrame({'a': [1, 2], 'b': ['x', None]}).to_parquet(buffer)
+
+        left, right = read_both(arrow, pandas_engine, buffer.getvalue(), file_type='parquet')
+
+        pd.testing.assert_frame_equal(left, right)
+
+    def test_excel_reads_through_pandas(self, arrow):
+        buffer = BytesIO()
+        pd.DataFrame({'a': [1, 2]}).to_excel(buffer, index=False, engine='openpyxl')
+
+        assert arrow.read(BytesIO(buffer.getvalue()), 'excel')['a'].tolist() == [1, 2]
+
+    def test_unknown_type(self, arrow):
+        with pytest.raises(ValueError):
+            arrow.read(BytesIO(b"x"), 'unknown')
+
+
+class TestEngineSelection:
+    def test_default_from_environment(self, monkeypatch):
+        monkeypatch.setenv("INGESTION_ENGINE", "pandas")
+        assert get_ingestion_engine().name == "pandas"
+
+        monkeypatch.delenv("INGESTION_ENGINE")
+        assert get_ingestion_engine().name == "arrow"
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            get_ingestion_engine("polars")
@@ -3,9 +3,15 @@ Tests for Monitoring Service
 """
 
 import pytest
+import threading
 import time
 from unittest.mock import patch
-from app.services.monitoring import ApplicationMonitor
+from app.services.monitoring import (
+    ApplicationMonitor,
+    LatencyHistogram,
+    RotatingCounter,
+    WindowedHistogram,
+)
 
 
 class TestApplicationMonitor:
@@ -37,7 +43,9 @@ class TestApplicationMonitor:
         # Check that timers and counters were updated
         assert self.monitor.counters["api.requests_total"] == 1
         assert len(self.monitor.timers["api.response_time"]) == 1
-        assert self.monitor.response_times[endpoint] == [duration]
+        latency = self.monitor.get_latency_percentiles(endpoint)
+        assert latency["count"] == 1
+        assert latency["p50_ms"] == pytest.approx(duration * 1000, rel=0.04)
     
     def test_record_upload_metrics(self):
         """Test recording upload metrics"""
@@ -171,4 +179,104 @@ class TestApplicationMonitor:
             time.sleep(0.01)  # Small delay
         
         assert len(self.monitor.timers[metric_name]) == 1
-        assert self.monitor.timers[metric_name][0] > 0
\ No newline at end of file
+        assert self.monitor.timers[metric_name][0] > 0
+
+
+class TestWindowedAggregation:
+    """Rotating time buckets and streaming latency histograms"""
+
+    def test_rotating_counter_expires_old_seconds(self):
+        counter = RotatingCounter(window_seconds=10)
+        counter.add(100, 3)
+        counter.add(105)
+
+        assert counter.total(105, 10) == 4
+        assert counter.total(110, 5) == 0
+        # Slot 100 % 10 is reused for second 110
+        counter.add(110)
+        assert counter.total(110, 10) == 2
+
+    def test_histogram_percentiles_within_relative_error(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+
+        assert histogram.count == 1000
+        assert histogram.mean == pytest.approx(0.5005)
+        assert histogram.percentile(0.50) == pytest.approx(0.500, rel=0.04)
+        assert histogram.percentile(0.99) == pytest.approx(0.990, rel=0.04)
+
+    def test_windowed_histogram_only_merges_window(self):
+        windowed = WindowedHistogram(window_seconds=60)
+        windowed.record(0, 5.0)
+        windowed.record(100, 0.010)
+
+        assert windowed.snapshot(100, 60).count == 1
+        assert windowed.snapshot(100, 60).percentile(1.0) == pytest.approx(0.010, rel=0.04)
+
+    def test_health_metrics_include_percentiles(self):
+        monitor = ApplicationMonitor()
+        for ms in (10, 20, 30, 1000):
+            monitor.record_api_call("/api/x", "GET", 200, ms / 1000)
+        monitor.record_api_call("/api/x", "GET", 500, 0.01)
+
+        metrics = monitor.get_health_metrics()
+
+        assert metrics["requests_1min"] == 5
+        assert metrics["error_rate_1min"] == pytest.approx(20.0)
+        assert metrics["p50_response_time_ms"] == pytest.approx(20, rel=0.04)
+        assert metrics["p99_response_time_ms"] == pytest.approx(1000, rel=0.04)
+        assert metrics["uptime_seconds"] >= 0
+
+    def test_recording_from_threads(self):
+        monitor = ApplicationMonitor()
+
+        def work():
+            for _ in range(1000):
+                monitor.record_api_call("/api/x", "GET", 200, 0.001)
+                monitor.increment("jobs")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert monitor.counters["api.requests_total"] == 4000
+        assert monitor.counters["jobs"] == 4000
+        assert monitor.get_latency_percentiles("/api/x", seconds=300)["count"] == 4000
+
+    def test_exited_thread_shards_are_retired(self):
+        monitor = ApplicationMonitor()
+
+        def work():
+            monitor.record_api_call("/api/x", "GET", 500, 0.002)
+            monitor.timing("job", 0.5)
+
+        for _ in range(20):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        monitor.increment("main")
+
+        # The retired aggregate plus this thread's shard
+        assert len(monitor._shards) == 2
+        assert monitor.counters["api.requests_total"] == 20
+        assert len(monitor.timers["job"]) == 20
+        assert monitor.get_latency_percentiles("/api/x", seconds=60)["count"] == 20
+        assert monitor.get_health_metrics()["error_rate_1min"] == pytest.approx(100.0)
+
+    def test_gauges_from_threads(self):
+        monitor = ApplicationMonitor()
+
+        def work(i):
+            for _ in range(200):
+                monitor.gauge(f"gauge.{i}", i)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert dict(monitor.gauges) == {f"gauge.{i}": i for i in range(4)}
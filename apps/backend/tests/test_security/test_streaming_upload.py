@@ -0,0 +1,196 @@
+"""
+Tests for streaming chunked uploads to S3 multipart parts
+"""
+
+import asyncio
+import hashlib
+import random
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.security.upload_handler import ChunkedUploadHandler, StreamingCSVScanner
+from app.services.security.pii_detector import PIIDetector
+
+CHUNK_SIZE = 64
+
+
+def make_csv(rows: int = 40) -> bytes:
+    lines = ["id,email,note"]
+    for i in range(rows):
+        lines.append(f'{i},user{i}@example.com,"line {i}, with comma"')
+    return ("\n".join(lines) + "\n").encode()
+
+
+def chunks_of(data: bytes):
+    return [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+
+@pytest.fixture
+def s3():
+    client = MagicMock()
+    client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+    client.upload_part.side_effect = lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}
+    return client
+
+
+@pytest.fixture
+def handler(tmp_path, s3):
+    return ChunkedUploadHandler(
+        temp_dir=str(tmp_path), chunk_size=CHUNK_SIZE, s3_client=s3, bucket_name="bucket"
+    )
+
+
+@pytest.fixture
+def local_handler(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.security.upload_handler.get_s3_client", lambda: None)
+    return ChunkedUploadHandler(temp_dir=str(tmp_path), chunk_size=CHUNK_SIZE)
+
+
+async def upload(handler, data: bytes, filename: str = "data.csv", order=None):
+    session = await handler.init_upload(filename, len(data), hashlib.sha256(data).hexdigest())
+    chunks = chunks_of(data)
+    for n in order or range(len(chunks)):
+        await handler.upload_chunk(session["session_id"], n, chunks[n])
+    return session["session_id"]
+
+
+class TestMultipartStreaming:
+    async def test_chunks_become_parts(self, handler, s3):
+        data = make_csv()
+        session_id = await upload(handler, data)
+
+        result = await handler.complete_upload(session_id)
+
+        assert s3.upload_part.call_count == len(chunks_of(data))
+        parts = s3.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Parts"]
+        assert [p["PartNumber"] for p in parts] == list(range(1, len(parts) + 1))
+        assert result.sha256 == hashlib.sha256(data).hexdigest()
+        assert result.s3_url == f"https://bucket.s3.amazonaws.com/{result.s3_key}"
+        # Nothing was assembled locally
+        assert result.temp_path is None
+
+    async def test_out_of_order_chunks_are_hashed_in_order(self, handler, tmp_path):
+        data = make_csv()
+        order = list(reversed(range(len(chunks_of(data)))))
+
+        result = await handler.complete_upload(await upload(handler, data, order=order))
+
+        assert result.sha256 == hashlib.sha256(data).hexdigest()
+        assert result.scan.row_count == 40
+        assert not list(tmp_path.glob("*.part"))
+
+    async def test_concurrent_out_of_order_chunks(self, handler, tmp_path):
+        data = make_csv(200)
+        chunks = chunks_of(data)
+        for seed in range(5):
+            session = await handler.init_upload("data.csv", len(data), hashlib.sha256(data).hexdigest())
+            order = list(range(len(chunks)))
+            random.Random(seed).shuffle(order)
+            # Resend some chunks concurrently with their first delivery
+            order += order[:5]
+
+            responses = await asyncio.gather(*[
+                handler.upload_chunk(session["session_id"], n, chunks[n]) for n in order
+            ])
+
+            assert sum(response.get("complete", False) for response in responses) == 1
+            result = await handler.complete_upload(session["session_id"])
+            assert result.sha256 == hashlib.sha256(data).hexdigest()
+            assert result.scan.row_count == 200
+        assert not list(tmp_path.glob("*.part"))
+
+    async def test_scan_collects_pii_and_sample(self, handler):
+        result = await handler.complete_upload(await upload(handler, make_csv()))
+
+        assert result.scan.error is None
+        assert result.scan.columns == ["id", "email", "note"]
+        assert result.scan.sample["note"].iloc[3] == "line 3, with comma"
+        assert [d.column_name for d in result.scan.pii_detections] == ["email"]
+
+    async def test_failed_part_aborts_upload(self, handler, s3):
+        data = make_csv()
+        session = await handler.init_upload("data.csv", len(data))
+        s3.upload_part.side_effect = RuntimeError("connection reset")
+
+        with pytest.raises(HTTPException) as exc:
+            await handler.upload_chunk(session["session_id"], 0, chunks_of(data)[0])
+
+        assert exc.value.status_code == 502
+        s3.abort_multipart_upload.assert_called_once_with(
+            Bucket="bucket", Key=handler.sessions[session["session_id"]]["s3_key"], UploadId="upload-1"
+        )
+        assert handler.sessions[session["session_id"]]["status"] == "failed"
+
+    async def test_hash_mismatch_aborts_upload(self, handler, s3):
+        data = make_csv()
+        session = await handler.init_upload("data.csv", len(data), "0" * 64)
+        chunks = chunks_of(data)
+
+        with pytest.raises(HTTPException) as exc:
+            for n, chunk in enumerate(chunks):
+                await handler.upload_chunk(session["session_id"], n, chunk)
+
+        assert exc.value.status_code == 400
+        s3.abort_multipart_upload.assert_called_once()
+        s3.complete_multipart_upload.assert_not_called()
+
+    async def test_failed_completion_aborts_upload(self, handler, s3):
+        session_id = await upload(handler, make_csv())
+        s3.complete_multipart_upload.side_effect = RuntimeError("boom")
+
+        with pytest.raises(HTTPException):
+            await handler.complete_upload(session_id)
+
+        s3.abort_multipart_upload.assert_called_once()
+
+    async def test_expired_sessions_abort_uploads(self, handler, s3):
+        data = make_csv()
+        session = await handler.init_upload("data.csv", len(data))
+        handler.sessions[session["session_id"]]["expires_at"] = "2000-01-01T00:00:00"
+
+        assert await handler.cleanup_expired_sessions() == 1
+        s3.abort_multipart_upload.assert_called_once()
+
+    async def test_excel_is_assembled_locally(self, handler):
+        data = b"x" * (CHUNK_SIZE * 2)
+
+        result = await handler.complete_upload(await upload(handler, data, "book.xlsx"))
+
+        assert result.scan is None
+        assert result.temp_path.read_bytes() == data
+        assert result.s3_key is not None
+
+
+class TestLocalFallback:
+    async def test_assembles_temp_file(self, local_handler):
+        data = make_csv()
+
+        result = await local_handler.complete_upload(
+            await upload(local_handler, data, order=[1, 0] + list(range(2, len(chunks_of(data)))))
+        )
+
+        assert result.s3_url is None
+        assert result.temp_path.read_bytes() == data
+        assert result.sha256 == hashlib.sha256(data).hexdigest()
+
+
+class TestStreamingCSVScanner:
+    def test_row_split_across_feeds(self):
+        scanner = StreamingCSVScanner(PIIDetector(), sample_rows=2)
+        data = make_csv(10)
+        for i in range(0, len(data), 7):
+            scanner.feed(data[i:i + 7])
+        scanner.finish()
+
+        assert scanner.row_count == 10
+        assert len(scanner.sample) == 2
+
+    def test_missing_trailing_newline(self):
+        scanner = StreamingCSVScanner(PIIDetector())
+        scanner.feed(b"a,b\n1,2\n3,4")
+        scanner.finish()
+
+        assert scanner.row_count == 2
+        assert scanner.sample["a"].tolist() == [1, 3]
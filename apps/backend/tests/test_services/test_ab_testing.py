@@ -0,0 +1,160 @@
+"""
+Tests for buffered A/B test metric tracking
+"""
+import asyncio
+
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+from pymongo.errors import BulkWriteError
+
+from app.models.ab_test import ABTest, ExperimentStatus, Variant
+from app.services.ab_testing import (
+    ABTestingService,
+    ABTestMetricsBuffer,
+    ExperimentConfigCache,
+)
+
+
+def make_experiment(status=ExperimentStatus.RUNNING):
+    variants = [
+        Variant(variant_id="var_a", model_id="m1", name="Control", traffic_percentage=50),
+        Variant(variant_id="var_b", model_id="m2", name="Treatment A", traffic_percentage=50),
+    ]
+    return ABTest.model_construct(
+        experiment_id="exp_1", variants=variants, status=status, primary_metric="error_rate"
+    )
+
+
+@pytest.fixture
+def collection():
+    mock_collection = Mock(bulk_write=AsyncMock())
+    with patch.object(ABTest, "get_motor_collection", return_value=mock_collection):
+        yield mock_collection
+
+
+class TestABTestMetricsBuffer:
+    async def test_flush_issues_positional_incs(self, collection):
+        buffer = ABTestMetricsBuffer()
+        buffer.record("exp_1", "var_a", 10.0)
+        buffer.record("exp_1", "var_a", 20.0, success=False, custom_metrics={"revenue": 2.5})
+        buffer.record("exp_1", "var_b", 5.0)
+
+        assert await buffer.flush() == 2
+
+        operations = collection.bulk_write.call_args[0][0]
+        assert collection.bulk_write.call_args[1] == {"ordered": False}
+        update = operations[0]._doc
+        assert operations[0]._filter == {"experiment_id": "exp_1", "variants.variant_id": "var_a"}
+        assert update["$inc"] == {
+            "variants.$.total_predictions": 2,
+            "variants.$.total_latency_ms": 30.0,
+            "variants.$.error_count": 1,
+            "variants.$.custom_metrics.revenue": 2.5,
+        }
+        assert buffer.pending("exp_1") == {}
+
+    async def test_concurrent_tracking_loses_no_counts(self, collection):
+        buffer = ABTestMetricsBuffer()
+
+        async def track(i):
+            buffer.record("exp_1", "var_a", 1.0)
+            await asyncio.sleep(0)
+
+        await asyncio.gather(*(track(i) for i in range(500)))
+        await buffer.flush()
+
+        update = collection.bulk_write.call_args[0][0][0]._doc
+        assert update["$inc"]["variants.$.total_predictions"] == 500
+
+    async def test_failed_updates_are_merged_back(self, collection):
+        collection.bulk_write.side_effect = BulkWriteError({"writeErrors": [{"index": 0, "code": 2}]})
+        buffer = ABTestMetricsBuffer()
+        buffer.record("exp_1", "var_a", 10.0, success=False)
+        buffer.record("exp_1", "var_b", 3.0)
+
+        assert await buffer.flush() == 1
+        buffer.record("exp_1", "var_a", 5.0)
+
+        pending = buffer.pending("exp_1")
+        delta = pending["var_a"]
+        assert (delta.predictions, delta.latency_ms, delta.errors) == (2, 15.0, 1)
+        assert "var_b" not in pending
+
+    async def test_unknown_outcome_drops_batch(self, collection):
+        collection.bulk_write.side_effect = Exception("connection reset")
+        buffer = ABTestMetricsBuffer()
+        buffer.record("exp_1", "var_a", 10.0)
+
+        assert await buffer.flush() == 0
+        assert buffer.pending("exp_1") == {}
+
+    def test_with_pending_does_not_mutate_document(self):
+        buffer = ABTestMetricsBuffer()
+        experiment = make_experiment()
+        buffer.record("exp_1", "var_b", 8.0, success=False)
+
+        counted = buffer.with_pending(experiment)
+
+        assert counted.variants[1].total_predictions == 1
+        assert counted.variants[1].error_count == 1
+        assert experiment.variants[1].total_predictions == 0
+
+
+class TestExperimentConfigCache:
+    async def test_repeat_lookups_hit_cache(self):
+        cache = ExperimentConfigCache(ttl_seconds=60)
+        experiment = make_experiment()
+        with patch.object(ABTest, "find_one", AsyncMock(return_value=experiment)) as find_one:
+            assert await cache.get("exp_1") is experiment
+            assert await cache.get("exp_1") is experiment
+            cache.invalidate("exp_1")
+            await cache.get("exp_1")
+
+        assert find_one.call_count == 2
+
+    async def test_missing_experiments_are_cached(self):
+        cache = ExperimentConfigCache(ttl_seconds=60)
+        with patch.object(ABTest, "find_one", AsyncMock(return_value=None)) as find_one:
+            assert await cache.get("nope") is None
+            assert await cache.get("nope") is None
+
+        find_one.assert_called_once()
+
+
+class TestTrackPrediction:
+    @pytest.fixture(autouse=True)
+    def services(self):
+        with patch("app.services.ab_testing.experiment_cache") as cache, \
+                patch("app.services.ab_testing.ab_test_metrics") as metrics:
+            cache.get = AsyncMock(return_value=make_experiment())
+            yield cache, metrics
+
+    async def test_records_without_saving(self, services):
+        _, metrics = services
+
+        await ABTestingService.track_prediction("exp_1", "var_a", 12.0, custom_metrics={"ok": 1})
+
+        metrics.record.assert_called_once_with("exp_1", "var_a", 12.0, True, {"ok": 1})
+
+    async def test_unknown_variant_is_ignored(self, services):
+        _, metrics = services
+
+        await ABTestingService.track_prediction("exp_1", "var_z", 12.0)
+
+        metrics.record.assert_not_called()
+
+    async def test_unsafe_metric_names_are_dropped(self, services):
+        _, metrics = services
+
+        await ABTestingService.track_prediction(
+            "exp_1", "var_a", 1.0, custom_metrics={"a.b": 1, "$set": 1, "good": 2}
+        )
+
+        assert metrics.record.call_args[0][4] == {"good": 2}
+
+    async def test_running_experiment_lookup(self, services):
+        cache, _ = services
+        assert await ABTestingService.get_running_experiment("exp_1") is not None
+
+        cache.get.return_value = make_experiment(ExperimentStatus.PAUSED)
+        assert await ABTestingService.get_running_experiment("exp_1") is None
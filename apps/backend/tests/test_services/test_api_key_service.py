@@ -0,0 +1,170 @@
+"""
+Tests for cached API key verification and buffered usage accounting
+"""
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+from pymongo.errors import BulkWriteError
+from datetime import datetime, timedelta
+
+from app.models.api_key import APIKey
+from app.api.routes.production import hash_api_key, verify_api_key
+from app.services.api_key_service import (
+    APIKeyVerificationCache,
+    APIKeyUsageBuffer,
+    api_key_cache,
+    api_key_usage,
+)
+
+
+def make_api_key(key_id="key_test123", key_hash=None, is_active=True):
+    api_key = Mock()
+    api_key.key_id = key_id
+    api_key.key_hash = key_hash or hash_api_key("sk_live_test123")
+    api_key.is_valid = Mock(return_value=is_active)
+    return api_key
+
+
+@pytest.fixture
+def api_key_doc():
+    return make_api_key()
+
+
+@pytest.fixture(autouse=True)
+def reset_globals():
+    api_key_cache.clear()
+    api_key_usage._counts.clear()
+    api_key_usage._last_used.clear()
+    yield
+    api_key_cache.clear()
+    api_key_usage._counts.clear()
+    api_key_usage._last_used.clear()
+
+
+class TestAPIKeyVerificationCache:
+    def test_put_and_get(self, api_key_doc):
+        cache = APIKeyVerificationCache(ttl_seconds=60)
+        cache.put(api_key_doc.key_hash, api_key_doc)
+        assert cache.get(api_key_doc.key_hash) is api_key_doc
+
+    def test_expired_entry_is_dropped(self, api_key_doc):
+        cache = APIKeyVerificationCache(ttl_seconds=60)
+        with patch("app.services.api_key_service.time.monotonic", return_value=100.0):
+            cache.put(api_key_doc.key_hash, api_key_doc)
+        with patch("app.services.api_key_service.time.monotonic", return_value=161.0):
+            assert cache.get(api_key_doc.key_hash) is None
+
+    def test_invalidate_by_key_id(self, api_key_doc):
+        cache = APIKeyVerificationCache(ttl_seconds=60)
+        cache.put(api_key_doc.key_hash, api_key_doc)
+        cache.invalidate(api_key_doc.key_id)
+        assert cache.get(api_key_doc.key_hash) is None
+
+    def test_evicts_oldest_when_full(self, api_key_doc):
+        cache = APIKeyVerificationCache(ttl_seconds=60, max_entries=1)
+        other = make_api_key(key_id="key_other", key_hash="other")
+        cache.put(api_key_doc.key_hash, api_key_doc)
+        cache.put(other.key_hash, other)
+        assert cache.get(api_key_doc.key_hash) is None
+        assert cache.get(other.key_hash) is other
+
+
+class TestAPIKeyUsageBuffer:
+    def test_record_accumulates(self):
+        buffer = APIKeyUsageBuffer(flush_interval=60)
+        early = datetime(2024, 1, 1, 12, 0)
+        late = early + timedelta(minutes=5)
+        buffer.record("key_a", late)
+        buffer.record("key_a", early)
+        assert buffer.pending("key_a") == (2, late)
+
+    async def test_flush_uses_single_bulk_write(self):
+        buffer = APIKeyUsageBuffer(flush_interval=60)
+        now = datetime(2024, 1, 1, 12, 0)
+        buffer.record("key_a", now)
+        buffer.record("key_a", now)
+        buffer.record("key_b", now)
+
+        collection = Mock()
+        collection.bulk_write = AsyncMock()
+        with patch.object(APIKey, "get_motor_collection", return_value=collection):
+            assert await buffer.flush() == 2
+
+        collection.bulk_write.assert_called_once()
+        operations = collection.bulk_write.call_args[0][0]
+        docs = {op._filter["key_id"]: op._doc for op in operations}
+        assert docs["key_a"] == {"$inc": {"total_requests": 2}, "$max": {"last_used_at": now}}
+        assert docs["key_b"]["$inc"] == {"total_requests": 1}
+        assert buffer.pending("key_a") == (0, None)
+
+    async def test_failed_updates_keep_counts(self):
+        buffer = APIKeyUsageBuffer(flush_interval=60)
+        buffer.record("key_a")
+        buffer.record("key_b")
+
+        collection = Mock()
+        collection.bulk_write = AsyncMock(
+            side_effect=BulkWriteError({"writeErrors": [{"index": 1, "code": 2}]})
+        )
+        with patch.object(APIKey, "get_motor_collection", return_value=collection):
+            assert await buffer.flush() == 1
+
+        assert buffer.pending("key_a")[0] == 0
+        assert buffer.pending("key_b")[0] == 1
+
+    async def test_unknown_outcome_drops_counts(self):
+        buffer = APIKeyUsageBuffer(flush_interval=60)
+        buffer.record("key_a")
+
+        collection = Mock()
+        collection.bulk_write = AsyncMock(side_effect=Exception("db down"))
+        with patch.object(APIKey, "get_motor_collection", return_value=collection):
+            assert await buffer.flush() == 0
+
+        assert buffer.pending("key_a")[0] == 0
+
+    def test_with_pending_adds_unflushed_usage(self):
+        buffer = APIKeyUsageBuffer(flush_interval=60)
+        stored = APIKey.model_construct(key_id="key_a", total_requests=3, last_used_at=None)
+        now = datetime(2030, 1, 1)
+        buffer.record("key_a", now)
+        buffer.record("key_a", now)
+
+        counted = buffer.with_pending(stored)
+
+        assert (counted.total_requests, counted.last_used_at) == (5, now)
+        assert (stored.total_requests, stored.last_used_at) == (3, None)
+
+    async def test_stop_flushes_remaining(self):
+        buffer = APIKeyUsageBuffer(flush_interval=60)
+        buffer.start()
+        buffer.record("key_a")
+
+        collection = Mock()
+        collection.bulk_write = AsyncMock()
+        with patch.object(APIKey, "get_motor_collection", return_value=collection):
+            await buffer.stop()
+
+        collection.bulk_write.assert_called_once()
+
+
+class TestVerifyAPIKeyHotPath:
+    async def test_repeat_requests_hit_db_once_and_never_write(self, api_key_doc):
+        api_key_doc.save = AsyncMock()
+        with patch.object(APIKey, "find_one", new=AsyncMock(return_value=api_key_doc)) as find_one:
+            for _ in range(5):
+                result = await verify_api_key("sk_live_test123")
+                assert result is api_key_doc
+
+        find_one.assert_called_once()
+        api_key_doc.save.assert_not_called()
+        assert api_key_usage.pending("key_test123")[0] == 5
+
+    async def test_revoked_cached_key_is_rejected(self, api_key_doc):
+        from fastapi import HTTPException
+
+        api_key_cache.put(api_key_doc.key_hash, api_key_doc)
+        api_key_doc.is_valid.return_value = False
+
+        with pytest.raises(HTTPException) as exc_info:
+            await verify_api_key("sk_live_test123")
+        assert exc_info.value.status_code == 401
@@ -0,0 +1,137 @@
+"""
+Tests for the node-local artifact disk cache.
+"""
+
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.artifact_cache import ArtifactCache
+from app.services.object_storage import ObjectStorage
+from app.services.s3_service import S3Service, download_file_from_s3
+
+
+@pytest.fixture
+def client():
+    """In-memory S3 client whose ETags change when an object is rewritten"""
+    objects = {"datasets/a.csv": b"a,b\n1,2\n", "models/m.joblib": b"model"}
+    client = MagicMock()
+    client.objects = objects
+    client.head_object.side_effect = lambda Bucket, Key: {"ETag": f'"{hash(objects[Key])}"'}
+    client.download_fileobj.side_effect = (
+        lambda Bucket, Key, Fileobj, Config=None: Fileobj.write(objects[Key])
+    )
+    return client
+
+
+@pytest.fixture
+def cache(client, tmp_path):
+    return ArtifactCache(ObjectStorage(client, "bucket"), cache_dir=str(tmp_path), max_bytes=1024)
+
+
+class TestReadThrough:
+    def test_second_read_is_local(self, cache, client):
+        first = cache.get_path_sync("datasets/a.csv")
+        second = cache.get_path_sync("datasets/a.csv")
+
+        assert first == second
+        assert first.endswith(".csv")
+        with open(first, "rb") as f:
+            assert f.read() == b"a,b\n1,2\n"
+        assert client.download_fileobj.call_count == 1
+        assert cache.get_stats() == {"hits": 1, "misses": 1}
+
+    def test_etag_is_trusted_for_ttl(self, cache, client):
+        cache.get_path_sync("datasets/a.csv")
+        cache.get_path_sync("datasets/a.csv")
+
+        # One check before the download and one after it
+        assert client.head_object.call_count == 2
+
+    def test_changed_object_gets_new_entry(self, cache, client):
+        cache.etag_ttl = 0
+        old = cache.get_path_sync("datasets/a.csv")
+        client.objects["datasets/a.csv"] = b"a,b\n3,4\n"
+
+        new = cache.get_path_sync("datasets/a.csv")
+
+        assert new != old
+        with open(new, "rb") as f:
+            assert f.read() == b"a,b\n3,4\n"
+
+    def test_object_changing_during_download(self, cache, client):
+        etags = iter(range(10))
+        client.head_object.side_effect = lambda Bucket, Key: {"ETag": str(next(etags))}
+
+        with pytest.raises(ValueError, match="changed while downloading"):
+            cache.get_path_sync("datasets/a.csv")
+
+        assert not [name for _, _, names in os.walk(cache.cache_dir) for name in names]
+
+    def test_concurrent_readers(self, cache, client):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            paths = set(pool.map(lambda _: cache.get_path_sync("datasets/a.csv"), range(16)))
+
+        assert len(paths) == 1
+        with open(paths.pop(), "rb") as f:
+            assert f.read() == b"a,b\n1,2\n"
+
+    async def test_get_bytes(self, cache):
+        assert await cache.get_bytes("models/m.joblib") == b"model"
+
+
+class TestEviction:
+    def test_least_recently_used_files_are_evicted(self, cache, client):
+        client.objects.update({f"k{i}": bytes(400) for i in range(3)})
+        paths = [cache.get_path_sync("k0"), cache.get_path_sync("k1")]
+        # Make k0 the most recently used
+        os.utime(paths[1], (time.time() - 60, time.time() - 60))
+        cache.get_path_sync("k0")
+
+        cache.get_path_sync("k2")
+
+        assert os.path.exists(paths[0])
+        assert not os.path.exists(paths[1])
+
+    def test_stale_partial_downloads_are_removed(self, cache):
+        os.makedirs(os.path.join(cache.cache_dir, "ab"))
+        partial = os.path.join(cache.cache_dir, "ab", ".partial-x")
+        open(partial, "wb").close()
+        os.utime(partial, (0, 0))
+
+        cache._evict()
+
+        assert not os.path.exists(partial)
+
+
+class TestS3Service:
+    async def test_whole_file_reads_use_cache(self, cache, client):
+        service = S3Service(cache.storage, cache=cache)
+
+        assert await service.download_file_bytes("datasets/a.csv") == b"a,b\n1,2\n"
+        assert await service.download_file_bytes("datasets/a.csv") == b"a,b\n1,2\n"
+        assert await service.download_file_path("datasets/a.csv") == cache.get_path_sync("datasets/a.csv")
+        assert client.download_fileobj.call_count == 1
+
+    async def test_ranged_reads_bypass_cache(self, cache, client):
+        client.get_object.return_value = {"Body": io.BytesIO(b"a,b")}
+        service = S3Service(cache.storage, cache=cache)
+
+        assert await service.download_file_bytes("datasets/a.csv", byte_range=(0, 2)) == b"a,b"
+        client.download_fileobj.assert_not_called()
+
+    def test_download_file_from_s3_links_cached_copy(self, cache, client):
+        with patch("app.services.s3_service.get_artifact_cache", return_value=cache):
+            path = download_file_from_s3("https://bucket.s3.amazonaws.com/datasets/a.csv")
+            again = download_file_from_s3("https://bucket.s3.amazonaws.com/datasets/a.csv")
+
+        with open(path, "rb") as f:
+            assert f.read() == b"a,b\n1,2\n"
+        os.unlink(path)
+        os.unlink(again)
+        assert os.path.exists(cache.get_path_sync("datasets/a.csv"))
+        assert client.download_fileobj.call_count == 1
@@ -0,0 +1,129 @@
+"""
+Tests for content-defined chunk storage of dataset versions.
+"""
+
+import hashlib
+import io
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.models.version import DatasetVersion
+from app.services.chunk_store import ChunkStore, chunk_boundaries, split_chunks
+from app.services.versioning_service import VersioningService
+
+SIZES = {"min_size": 1024, "avg_size": 4096, "max_size": 16384}
+
+
+@pytest.fixture
+def content():
+    rows = [f"{i},{i * 7 % 13},name {i},{np.sin(i):.6f}\n" for i in range(20000)]
+    return ("id,group,name,value\n" + "".join(rows)).encode()
+
+
+@pytest.fixture
+def s3():
+    """In-memory S3 client"""
+    objects = {}
+    client = MagicMock()
+    client.objects = objects
+    client.put_object.side_effect = lambda Bucket, Key, Body: objects.__setitem__(Key, bytes(Body))
+    client.get_object.side_effect = lambda Bucket, Key: {"Body": io.BytesIO(objects[Key])}
+    client.delete_object.side_effect = lambda Bucket, Key: objects.pop(Key, None)
+    client.delete_objects.side_effect = lambda Bucket, Delete: [
+        objects.pop(o["Key"], None) for o in Delete["Objects"]
+    ] and {}
+    return client
+
+
+class TestChunking:
+    def test_boundaries_respect_sizes(self, content):
+        cuts = chunk_boundaries(content, **SIZES)
+        sizes = np.diff([0] + cuts)
+
+        assert cuts[-1] == len(content)
+        assert sizes[:-1].min() >= SIZES["min_size"]
+        assert sizes.max() <= SIZES["max_size"]
+
+    def test_edit_only_changes_nearby_chunks(self, content):
+        middle = len(content) // 2
+        edited = content[:middle] + b"99999,1,inserted row,0.5\n" + content[middle:]
+
+        before = {c.sha256 for c in split_chunks(content, **SIZES)}
+        after = split_chunks(edited, **SIZES)
+        changed = [c for c in after if c.sha256 not in before]
+
+        assert len(changed) <= 2
+        assert sum(c.size for c in changed) < 0.1 * len(edited)
+
+    def test_chunks_reassemble(self, content):
+        chunks = split_chunks(content, **SIZES)
+        offset = 0
+        for chunk in chunks:
+            piece = content[offset:offset + chunk.size]
+            assert hashlib.sha256(piece).hexdigest() == chunk.sha256
+            offset += chunk.size
+        assert offset == len(content)
+
+    def test_empty_content(self):
+        assert split_chunks(b"", **SIZES) == []
+
+
+class TestChunkStore:
+    async def test_put_skips_known_chunks(self, content, s3):
+        store = ChunkStore(s3, "bucket")
+        with patch("app.services.chunk_store.split_chunks", lambda data: split_chunks(data, **SIZES)):
+            first = await store.put("ds1", content)
+            uploads = s3.put_object.call_count
+
+            edited = content.replace(b"name 15000,", b"name 15000 (fixed),")
+            second = await store.put("ds1", edited, [c.sha256 for c in first])
+
+        assert uploads == len({c.sha256 for c in first})
+        new_uploads = s3.put_object.call_args_list[uploads:]
+        assert 1 <= len(new_uploads) <= 2
+        assert await store.read("ds1", second) == edited
+
+    async def test_read_detects_corruption(self, content, s3):
+        store = ChunkStore(s3, "bucket")
+        chunks = await store.put("ds1", content[:5000])
+        s3.objects[store.chunk_key("ds1", chunks[0].sha256)] = b"tampered"
+
+        with pytest.raises(ValueError, match="corrupt"):
+            await store.read("ds1", chunks)
+
+    async def test_delete(self, content, s3):
+        store = ChunkStore(s3, "bucket")
+        chunks = await store.put("ds1", content[:5000])
+
+        assert await store.delete("ds1", [c.sha256 for c in chunks]) == len(chunks)
+        assert not s3.objects
+
+
+class TestVersionContent:
+    async def test_chunked_version_is_reassembled(self, content, s3):
+        service = VersioningService()
+        service.s3_client = s3
+        chunks = await service.chunk_store.put("ds1", content)
+        version = DatasetVersion.model_construct(
+            version_id="v2", dataset_id="ds1", file_path="manifest", chunks=chunks
+        )
+
+        with patch.object(service, 'get_version', AsyncMock(return_value=version)):
+            assert await service.get_version_content("v2") == content
+            streamed = [piece async for piece in service.iter_version_content("v2")]
+
+        assert b"".join(streamed) == content
+        assert len(streamed) == len(chunks)
+
+    async def test_legacy_version_reads_single_file(self, s3):
+        service = VersioningService()
+        service.s3_client = s3
+        s3.objects["path/v1"] = b"a,b\n1,2\n"
+        version = DatasetVersion.model_construct(
+            version_id="v1", dataset_id="ds1", file_path="path/v1", chunks=None
+        )
+
+        with patch.object(service, 'get_version', AsyncMock(return_value=version)):
+            assert await service.get_version_content("v1") == b"a,b\n1,2\n"
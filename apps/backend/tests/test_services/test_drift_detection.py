@@ -0,0 +1,145 @@
+"""
+Tests for streaming drift detection
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import Mock
+
+from app.services.drift_detection import (
+    DriftMonitor,
+    LiveProfile,
+    build_feature_profile,
+    jensen_shannon_divergence,
+    population_stability_index,
+)
+
+
+@pytest.fixture
+def training_df():
+    rng = np.random.RandomState(0)
+    return pd.DataFrame({
+        "age": rng.normal(40, 10, 2000),
+        "city": rng.choice(["paris", "rome", "oslo"], 2000, p=[0.6, 0.3, 0.1]),
+    })
+
+
+@pytest.fixture
+def model(training_df):
+    return Mock(model_id="m1", version="1.0.0", feature_profile=build_feature_profile(training_df))
+
+
+def records(age_mean, cities, n=1000, seed=1):
+    rng = np.random.RandomState(seed)
+    return [
+        {"age": float(age), "city": str(city)}
+        for age, city in zip(rng.normal(age_mean, 10, n), rng.choice(cities, n))
+    ]
+
+
+class TestFeatureProfile:
+    def test_numeric_profile_uses_quantile_bins(self, training_df):
+        profile = build_feature_profile(training_df)["age"]
+
+        assert profile["type"] == "numeric"
+        assert len(profile["edges"]) == 9
+        assert sum(profile["counts"]) == 2000
+        # Quantile bins hold roughly equal counts
+        assert max(profile["counts"]) - min(profile["counts"]) <= 2
+
+    def test_categorical_profile_has_other_bin(self, training_df):
+        profile = build_feature_profile(training_df, max_categories=2)["city"]
+
+        assert profile["categories"] == ["paris", "rome"]
+        assert len(profile["counts"]) == 3
+        assert sum(profile["counts"]) == 2000
+
+    def test_missing_values_are_counted(self):
+        profile = build_feature_profile(pd.DataFrame({"x": [1.0, None, 3.0, None]}))
+        assert profile["x"]["missing"] == 2
+
+
+class TestDivergences:
+    def test_identical_distributions_score_zero(self):
+        p = np.array([0.2, 0.3, 0.5])
+        assert population_stability_index(p, p) == pytest.approx(0)
+        assert jensen_shannon_divergence(p, p) == pytest.approx(0)
+
+    def test_disjoint_distributions(self):
+        p = np.array([1.0, 0.0])
+        q = np.array([0.0, 1.0])
+        assert jensen_shannon_divergence(p, q) == pytest.approx(1.0)
+        assert population_stability_index(p, q) > 1
+
+
+class TestDriftMonitor:
+    def test_no_drift_on_training_distribution(self, model):
+        monitor = DriftMonitor(min_samples=100)
+        monitor.observe(model, records(40, ["paris"] * 6 + ["rome"] * 3 + ["oslo"]))
+
+        result = monitor.evaluate("m1")
+
+        assert result["drift_detected"] is False
+        assert result["live_samples"] == 1000
+        assert set(result["feature_scores"]) == {"age", "city"}
+        assert "ks_statistic" in result["feature_scores"]["age"]
+        assert "ks_statistic" not in result["feature_scores"]["city"]
+
+    def test_shifted_features_are_flagged(self, model):
+        monitor = DriftMonitor(min_samples=100)
+        monitor.observe(model, records(60, ["oslo", "berlin"]))
+
+        result = monitor.evaluate("m1")
+
+        assert result["drift_detected"] is True
+        assert result["features_with_drift"] == ["age", "city"]
+        assert result["drift_score"] > 0.2
+
+    def test_memory_is_bounded_by_bins(self, model):
+        monitor = DriftMonitor()
+        monitor.observe(model, records(40, ["paris", "lima", "kyiv", "nuuk"], n=5000))
+
+        window = monitor.windows["m1"]
+        assert window.histograms["age"].counts.shape == (10,)
+        assert window.histograms["city"].counts.shape == (4,)
+
+    def test_scheduled_check_rotates_window(self, model):
+        monitor = DriftMonitor(min_samples=100)
+        monitor.observe(model, records(40, ["paris"]))
+
+        assert monitor.check_all() == 1
+        assert monitor.windows["m1"].observations == 0
+        assert monitor.get_result("m1")["live_samples"] == 1000
+
+    def test_too_few_samples(self, model):
+        monitor = DriftMonitor(min_samples=100)
+        monitor.observe(model, records(40, ["paris"], n=10))
+
+        assert monitor.evaluate("m1") is None
+        assert monitor.check_all() == 0
+
+    def test_new_version_resets_window(self, model):
+        monitor = DriftMonitor(min_samples=1)
+        monitor.observe(model, records(40, ["paris"], n=5))
+        model.version = "1.1.0"
+        monitor.observe(model, records(40, ["paris"], n=3))
+
+        assert monitor.windows["m1"].observations == 3
+
+    def test_models_without_profile_are_ignored(self):
+        monitor = DriftMonitor()
+        monitor.observe(Mock(model_id="m2", feature_profile=None), [{"a": 1}])
+        assert "m2" not in monitor.windows
+
+    def test_live_profiles_merge(self, model):
+        a = LiveProfile("1.0.0", model.feature_profile)
+        b = LiveProfile("1.0.0", model.feature_profile)
+        for record in records(40, ["paris"], n=30):
+            a.observe(record)
+        for record in records(40, ["rome"], n=20, seed=2):
+            b.observe(record)
+
+        a.merge(b)
+
+        assert a.observations == 50
+        assert a.histograms["age"].total == 50
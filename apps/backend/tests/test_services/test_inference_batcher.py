@@ -0,0 +1,121 @@
+"""
+Tests for micro-batched inference
+"""
+import asyncio
+
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+
+from app.services.inference_batcher import InferenceBatcherRegistry, ModelBatcher
+
+
+class SumModel:
+    """Predicts the row sum; probabilities are [1-p, p] with p = x/10"""
+
+    def __init__(self):
+        self.predict_calls = 0
+
+    def predict(self, X):
+        self.predict_calls += 1
+        return X.sum(axis=1).to_numpy()
+
+    def predict_proba(self, X):
+        p = (X["a"] / 10).to_numpy()
+        return np.column_stack([1 - p, p])
+
+
+@pytest.fixture
+def model():
+    return SumModel()
+
+
+@pytest.fixture(autouse=True)
+def no_metrics():
+    with patch("app.services.inference_batcher.ml_metrics") as metrics:
+        yield metrics
+
+
+class TestModelBatcher:
+    async def test_concurrent_requests_share_one_predict(self, model, no_metrics):
+        batcher = ModelBatcher("m1", model, feature_names=["a", "b"], max_batch_rows=100, max_wait_ms=20)
+        payloads = [[{"a": i, "b": i * 2}] for i in range(10)]
+
+        results = await asyncio.gather(*(batcher.predict(payload) for payload in payloads))
+
+        assert model.predict_calls == 1
+        assert [preds.tolist() for preds, _ in results] == [[i * 3] for i in range(10)]
+        no_metrics.record_inference_batch.assert_called_once()
+        assert no_metrics.record_inference_batch.call_args[0][1] == 10
+
+    async def test_multi_row_requests_are_scattered_in_order(self, model):
+        batcher = ModelBatcher("m1", model, feature_names=["a", "b"], max_wait_ms=20)
+        first = [{"a": 1, "b": 0}, {"a": 2, "b": 0}]
+        second = [{"a": a, "b": 1} for a in (5, 6, 7)]
+
+        (p1, _), (p2, _) = await asyncio.gather(batcher.predict(first), batcher.predict(second))
+
+        assert p1.tolist() == [1, 2]
+        assert p2.tolist() == [6, 7, 8]
+
+    async def test_flushes_when_batch_is_full(self, model):
+        batcher = ModelBatcher("m1", model, feature_names=["a", "b"], max_batch_rows=2, max_wait_ms=10000)
+        payloads = [[{"a": i, "b": 0}] for i in range(2)]
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.predict(payload) for payload in payloads)), timeout=1
+        )
+
+        assert len(results) == 2
+
+    async def test_probabilities_only_for_requesting_callers(self, model):
+        batcher = ModelBatcher("m1", model, feature_names=["a", "b"], max_wait_ms=20)
+
+        (_, proba), (_, none) = await asyncio.gather(
+            batcher.predict([{"a": 5, "b": 0}], include_probabilities=True),
+            batcher.predict([{"a": 1, "b": 0}])
+        )
+
+        assert proba.tolist() == [[0.5, 0.5]]
+        assert none is None
+
+    async def test_bad_request_does_not_fail_the_batch(self, model):
+        batcher = ModelBatcher("m1", model, feature_names=["a", "b"], max_wait_ms=20)
+
+        good, bad = await asyncio.gather(
+            batcher.predict([{"a": 1, "b": 2}]),
+            batcher.predict([{"c": 1}]),
+            return_exceptions=True
+        )
+
+        assert good[0].tolist() == [3]
+        assert isinstance(bad, KeyError)
+
+    async def test_uses_feature_engineer(self, model):
+        feature_engineer = Mock(spec=["transform"])
+
+        async def transform(df):
+            return df * 10
+
+        feature_engineer.transform.side_effect = transform
+        batcher = ModelBatcher("m1", model, feature_engineer=feature_engineer, max_wait_ms=1)
+
+        preds, _ = await batcher.predict([{"a": 1, "b": 1}])
+
+        assert preds.tolist() == [20]
+
+
+class TestInferenceBatcherRegistry:
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("INFERENCE_BATCHING_ENABLED", raising=False)
+        assert InferenceBatcherRegistry().enabled is False
+
+    def test_register_reuses_batcher(self, model):
+        registry = InferenceBatcherRegistry(enabled=True, max_batch_rows=8, max_wait_ms=2)
+        batcher = registry.register("m1:1.0.0", "m1", model)
+
+        assert registry.register("m1:1.0.0", "m1", SumModel()) is batcher
+        assert registry.get("m1:1.0.0") is batcher
+        assert batcher.max_batch_rows == 8
+        registry.remove("m1:1.0.0")
+        assert registry.get("m1:1.0.0") is None
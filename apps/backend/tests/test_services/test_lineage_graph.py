@@ -0,0 +1,159 @@
+"""
+Tests for lineage traversal with $graphLookup and the lineage graph cache.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+
+import pytest
+
+from app.models.version import DatasetVersion, TransformationLineage
+from app.services.versioning_service import LineageGraphCache, VersionLink, VersioningService
+
+# v1 -> v2 -> v3 -> v4, and v2 -> v5
+PARENTS = {"v1": None, "v2": "v1", "v3": "v2", "v4": "v3", "v5": "v2"}
+
+
+def version_doc(version_id):
+    parent = PARENTS[version_id]
+    return {
+        "version_id": version_id,
+        "dataset_id": "ds1",
+        "parent_version_id": parent,
+        "transformation_lineage_id": f"lin-{version_id}" if parent else None,
+    }
+
+
+def graph_lookup(pipeline):
+    """Evaluate the ancestry pipeline against PARENTS"""
+    results = []
+    for version_id in pipeline[0]["$match"]["version_id"]["$in"]:
+        if version_id not in PARENTS:
+            continue
+        ancestors = []
+        parent, depth = PARENTS[version_id], 0
+        while parent:
+            ancestors.append({**version_doc(parent), "depth": depth})
+            parent, depth = PARENTS[parent], depth + 1
+        results.append({**version_doc(version_id), "ancestors": list(reversed(ancestors))})
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=results)
+    return cursor
+
+
+def find_lineages(query):
+    lineages = [
+        TransformationLineage.model_construct(
+            lineage_id=lineage_id, parent_version_id=PARENTS[lineage_id[4:]], child_version_id=lineage_id[4:]
+        )
+        for lineage_id in query["lineage_id"]["$in"]
+    ]
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=lineages)
+    return cursor
+
+
+@pytest.fixture
+def service():
+    return VersioningService()
+
+
+@pytest.fixture
+def db():
+    with patch.object(DatasetVersion, "aggregate", side_effect=graph_lookup) as aggregate, \
+            patch.object(TransformationLineage, "find", side_effect=find_lineages) as find:
+        yield aggregate, find
+
+
+class TestLineageChains:
+    async def test_chain_in_two_queries(self, service, db):
+        aggregate, find = db
+
+        chain = await service.get_lineage_chain("v4")
+
+        assert [lineage.lineage_id for lineage in chain] == ["lin-v2", "lin-v3", "lin-v4"]
+        assert "$graphLookup" in aggregate.call_args.args[0][1]
+        assert aggregate.call_count == find.call_count == 1
+
+    async def test_batch(self, service, db):
+        aggregate, find = db
+
+        chains = await service.get_lineage_chains(["v1", "v3", "v5", "missing"])
+
+        assert {v: [l.lineage_id for l in c] for v, c in chains.items()} == {
+            "v1": [], "v3": ["lin-v2", "lin-v3"], "v5": ["lin-v2", "lin-v5"],
+        }
+        assert aggregate.call_count == find.call_count == 1
+
+    async def test_cached_ancestry(self, service, db):
+        aggregate, _ = db
+
+        await service.get_lineage_chain("v4")
+        chain = await service.get_lineage_chain("v3")
+
+        assert [lineage.lineage_id for lineage in chain] == ["lin-v2", "lin-v3"]
+        assert aggregate.call_count == 1
+
+        service.lineage_cache.invalidate("ds1")
+        await service.get_lineage_chain("v3")
+        assert aggregate.call_count == 2
+
+
+    async def test_cache_invalidated_after_version_is_linked(self, service):
+        parent = MagicMock(version_id="v1", dataset_id="ds1", version_number=1, chunks=None)
+        new_version = MagicMock(dataset_id="ds1", insert=AsyncMock(), save=AsyncMock())
+        events = MagicMock()
+        events.attach_mock(new_version.insert, "insert")
+        events.attach_mock(new_version.save, "save")
+        metadata = MagicMock(data_schema=[], filename="a.csv")
+
+        with patch("app.services.versioning_service.DatasetVersion") as version_model, \
+                patch.object(service, "_get_next_version_number", AsyncMock(return_value=2)), \
+                patch.object(service, "_create_lineage", AsyncMock(
+                    return_value=TransformationLineage.model_construct(lineage_id="lin-new"))), \
+                patch.object(service.lineage_cache, "invalidate") as invalidate, \
+                patch.object(VersioningService, "storage", PropertyMock(
+                    return_value=MagicMock(put_bytes=AsyncMock(return_value="s3://b/k")))), \
+                patch.object(VersioningService, "chunk_store", PropertyMock(
+                    return_value=MagicMock(put=AsyncMock(return_value=[])))):
+            version_model.find_one = AsyncMock(side_effect=[parent, None])
+            version_model.compute_content_hash.return_value = "hash"
+            version_model.return_value = new_version
+            events.attach_mock(invalidate, "invalidate")
+
+            version, _ = await service.create_transformation_version("v1", b"a\n1\n", [], metadata, "u1")
+
+        assert version.transformation_lineage_id == "lin-new"
+        # A chain read before the save would cache the version without its lineage id
+        assert [call[0] for call in events.mock_calls] == ["insert", "save", "invalidate"]
+        invalidate.assert_called_once_with("ds1")
+
+
+class TestLineagePath:
+    @pytest.mark.parametrize("v1, v2, expected", [
+        ("v2", "v4", ["lin-v3", "lin-v4"]),
+        ("v4", "v2", ["lin-v4", "lin-v3"]),
+        ("v4", "v5", ["lin-v4", "lin-v3", "lin-v5"]),
+        ("v3", "v3", []),
+    ])
+    async def test_path(self, service, db, v1, v2, expected):
+        path = await service._find_lineage_path(v1, v2)
+
+        assert [lineage.lineage_id for lineage in path] == expected
+
+
+class TestLineageGraphCache:
+    def test_incomplete_chain_is_a_miss(self):
+        cache = LineageGraphCache()
+        cache.add([VersionLink("v3", "ds1", "v2", "lin-v3")])
+
+        assert cache.ancestry("v3") is None
+
+    def test_evicts_least_recent_dataset(self):
+        cache = LineageGraphCache(max_datasets=2)
+        for dataset_id in ("a", "b"):
+            cache.add([VersionLink(f"{dataset_id}1", dataset_id, None, None)])
+        cache.ancestry("a1")
+        cache.add([VersionLink("c1", "c", None, None)])
+
+        assert cache.ancestry("a1") is not None
+        assert cache.ancestry("b1") is None
@@ -0,0 +1,120 @@
+"""
+Tests for the shared async object storage layer.
+"""
+
+import io
+import os
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.services.object_storage import ObjectStorage, parse_s3_url
+from app.services.s3_service import S3Service, download_file_from_s3
+
+
+@pytest.fixture
+def client():
+    """In-memory S3 client recording the threads calls run on"""
+    objects = {"data.csv": b"a,b\n1,2\n3,4\n"}
+    client = MagicMock()
+    client.objects = objects
+    client.threads = set()
+
+    def get_object(Bucket, Key, Range=None):
+        client.threads.add(threading.get_ident())
+        if Key not in objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        body = objects[Key]
+        if Range:
+            start, end = map(int, Range[len("bytes="):].split("-"))
+            body = body[start:end + 1]
+        return {"Body": io.BytesIO(body)}
+
+    def head_object(Bucket, Key):
+        if Key not in objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"ContentLength": len(objects[Key])}
+
+    client.get_object.side_effect = get_object
+    client.head_object.side_effect = head_object
+    client.put_object.side_effect = lambda Bucket, Key, Body, **kwargs: objects.__setitem__(Key, Body)
+    return client
+
+
+@pytest.fixture
+def storage(client):
+    return ObjectStorage(client, "bucket")
+
+
+class TestParseS3Url:
+    @pytest.mark.parametrize("url, expected", [
+        ("s3://bucket/datasets/a.csv", ("bucket", "datasets/a.csv")),
+        ("https://bucket.s3.amazonaws.com/datasets/a%20b.csv", ("bucket", "datasets/a b.csv")),
+        ("https://bucket.s3.eu-west-1.amazonaws.com/a.csv", ("bucket", "a.csv")),
+    ])
+    def test_valid(self, url, expected):
+        assert parse_s3_url(url) == expected
+
+    @pytest.mark.parametrize("url", ["https://example.com/a.csv", "s3://bucket", "datasets/a.csv"])
+    def test_invalid(self, url):
+        with pytest.raises(ValueError, match="Invalid S3 URL"):
+            parse_s3_url(url)
+
+
+class TestObjectStorage:
+    async def test_reads_run_off_the_event_loop(self, storage, client):
+        assert await storage.get_bytes("data.csv") == b"a,b\n1,2\n3,4\n"
+        assert threading.get_ident() not in client.threads
+
+    async def test_ranged_read(self, storage, client):
+        assert await storage.get_bytes("data.csv", byte_range=(4, 6)) == b"1,2"
+        assert client.get_object.call_args.kwargs["Range"] == "bytes=4-6"
+
+    async def test_streaming_read(self, storage):
+        pieces = [piece async for piece in storage.iter_bytes("data.csv", chunk_size=5)]
+
+        assert pieces == [b"a,b\n1", b",2\n3,", b"4\n"]
+
+    async def test_put_and_head(self, storage):
+        url = await storage.put_bytes("new.csv", b"x", content_type="text/csv")
+
+        assert url == "s3://bucket/new.csv"
+        assert (await storage.head("new.csv"))["ContentLength"] == 1
+        assert await storage.head("missing.csv") is None
+
+    async def test_transfers_use_multipart_config(self, storage, client):
+        await storage.upload_fileobj(io.BytesIO(b"x"), "up.csv", content_type="text/csv")
+        await storage.download_file("up.csv", "local.csv")
+
+        upload = client.upload_fileobj.call_args
+        assert upload.kwargs["Config"] is storage.transfer_config
+        assert upload.kwargs["ExtraArgs"] == {"ContentType": "text/csv"}
+        assert client.download_file.call_args.kwargs["Config"] is storage.transfer_config
+
+    def test_client_is_created_once(self):
+        storage = ObjectStorage(bucket_name="bucket")
+        with patch("app.services.object_storage.create_s3_client", return_value=MagicMock()) as create:
+            assert storage.client is storage.client
+
+        create.assert_called_once()
+
+
+class TestS3Service:
+    async def test_uses_shared_storage(self, storage):
+        service = S3Service(storage)
+
+        assert service.s3_client is storage.client
+        assert await service.download_file_bytes("data.csv", byte_range=(0, 2)) == b"a,b"
+        assert b"".join([p async for p in service.iter_file("data.csv", chunk_size=4)]) == b"a,b\n1,2\n3,4\n"
+
+    def test_download_file_from_s3_uses_shared_client(self, storage, client):
+        with patch("app.services.s3_service.get_object_storage", return_value=storage), \
+                patch("app.services.s3_service.get_artifact_cache", return_value=None):
+            path = download_file_from_s3("https://other-bucket.s3.amazonaws.com/datasets/a.csv")
+        os.unlink(path)
+
+        args = client.download_file.call_args
+        assert args.args == ("other-bucket", "datasets/a.csv", path)
+        assert args.kwargs["Config"] is storage.transfer_config
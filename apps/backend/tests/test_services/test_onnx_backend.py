@@ -0,0 +1,135 @@
+"""
+Tests for the ONNX Runtime serving backend
+"""
+import io
+
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LogisticRegression
+
+from app.services import onnx_backend
+from app.services.onnx_backend import (
+    OnnxClassifier,
+    OnnxModel,
+    OnnxSessionCache,
+    convert_to_onnx,
+)
+
+requires_onnx = pytest.mark.skipif(
+    not (onnx_backend.ONNX_CONVERT_AVAILABLE and onnx_backend.ONNX_RUNTIME_AVAILABLE),
+    reason="skl2onnx/onnxruntime not installed"
+)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.RandomState(0)
+    X = rng.randn(200, 4)
+    y_class = (X[:, 0] + X[:, 1] > 0).astype(int)
+    y_reg = X @ np.array([1.0, -2.0, 0.5, 3.0])
+    return X, y_class, y_reg
+
+
+class TestConversion:
+    def test_returns_none_without_skl2onnx(self, data):
+        X, y, _ = data
+        model = LogisticRegression().fit(X, y)
+        with patch.object(onnx_backend, "ONNX_CONVERT_AVAILABLE", False):
+            assert convert_to_onnx(model) is None
+
+    @requires_onnx
+    def test_unsupported_estimator_falls_back(self):
+        class Custom:
+            n_features_in_ = 3
+
+            def predict(self, X):
+                return X
+
+        assert convert_to_onnx(Custom()) is None
+
+    def test_serving_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("ONNX_SERVING_ENABLED", raising=False)
+        assert onnx_backend.onnx_serving_enabled() is False
+
+
+@requires_onnx
+class TestOnnxModel:
+    def test_classifier_matches_native(self, data):
+        X, y, _ = data
+        native = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+        model = OnnxModel.from_bytes(convert_to_onnx(native))
+
+        assert isinstance(model, OnnxClassifier)
+        np.testing.assert_array_equal(model.predict(X), native.predict(X))
+        np.testing.assert_allclose(model.predict_proba(X), native.predict_proba(X), atol=1e-5)
+
+    def test_regressor_matches_native(self, data):
+        X, _, y = data
+        native = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+        model = OnnxModel.from_bytes(convert_to_onnx(native))
+
+        assert not hasattr(model, "predict_proba")
+        predictions = model.predict(X)
+        assert predictions.shape == (len(X),)
+        np.testing.assert_allclose(predictions, native.predict(X), rtol=1e-4, atol=1e-4)
+
+    def test_accepts_dataframes(self, data):
+        import pandas as pd
+
+        X, y, _ = data
+        native = LogisticRegression().fit(X, y)
+        model = OnnxModel.from_bytes(convert_to_onnx(native))
+
+        np.testing.assert_array_equal(model.predict(pd.DataFrame(X)), native.predict(X))
+
+    def test_thread_count(self, data):
+        X, y, _ = data
+        model = OnnxModel.from_bytes(convert_to_onnx(LogisticRegression().fit(X, y)), intra_op_threads=2)
+        assert model.session.get_session_options().intra_op_num_threads == 2
+
+
+class TestOnnxSessionCache:
+    def test_evicts_least_recently_used(self):
+        cache = OnnxSessionCache(max_sessions=2)
+        a, b, c = Mock(), Mock(), Mock()
+        cache.put("a", a)
+        cache.put("b", b)
+        cache.get("a")
+        cache.put("c", c)
+
+        assert cache.get("a") is a
+        assert cache.get("b") is None
+        assert cache.get("c") is c
+
+
+class TestModelStorageOnnx:
+    @pytest.fixture
+    def storage(self):
+        with patch("app.services.model_storage.S3Service") as s3_cls:
+            s3 = s3_cls.return_value
+            s3.bucket_name = "bucket"
+            s3.download_file_obj = AsyncMock()
+            from app.services.model_storage import ModelStorageService
+            yield ModelStorageService()
+
+    async def test_onnx_load_failure_returns_none(self, storage):
+        storage.s3_service.download_file_obj.side_effect = Exception("missing")
+        assert await storage._load_onnx_model("s3://bucket/models/u/m/model.onnx") is None
+
+    @requires_onnx
+    async def test_onnx_session_is_cached(self, storage, data):
+        X, y, _ = data
+        onnx_bytes = convert_to_onnx(LogisticRegression().fit(X, y))
+        storage.s3_service.download_file_obj.return_value = onnx_bytes
+        path = "s3://bucket/models/u/m/model.onnx"
+        onnx_backend.onnx_sessions.remove(path)
+
+        first = await storage._load_onnx_model(path)
+        second = await storage._load_onnx_model(path)
+
+        assert isinstance(first, OnnxClassifier)
+        assert second is first
+        storage.s3_service.download_file_obj.assert_called_once_with("models/u/m/model.onnx")
+        onnx_backend.onnx_sessions.remove(path)
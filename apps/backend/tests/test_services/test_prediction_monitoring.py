@@ -13,6 +13,15 @@ from app.services.prediction_monitoring import (
 )
 
 
+@pytest.fixture
+def stored_events():
+    """Aggregation result for the prediction_events collection (empty by default)"""
+    result = {"totals": [], "latency": [], "predictions": [], "api_keys": []}
+    with patch('app.services.prediction_monitoring.PredictionEvent') as mock_event_class:
+        mock_event_class.aggregate.return_value.to_list = AsyncMock(return_value=[result])
+        yield result
+
+
 class TestPredictionLog:
     """Test cases for PredictionLog class"""
     
@@ -21,7 +30,7 @@ class TestPredictionLog:
         """Test logging a prediction"""
         log = PredictionLog()
         
-        await log.log_prediction(
+        log.record(
             model_id="model_123",
             prediction_id="pred_123",
             input_data={"feature1": 1, "feature2": "value"},
@@ -51,7 +60,7 @@ class TestPredictionLog:
         
         # Log multiple predictions
         for i in range(5):
-            await log.log_prediction(
+            log.record(
                 model_id="model_123",
                 prediction_id=f"pred_{i}",
                 input_data={"value": i},
@@ -68,7 +77,7 @@ class TestPredictionLog:
         
         # Log more than 10000 predictions
         for i in range(10005):
-            await log.log_prediction(
+            log.record(
                 model_id="model_123",
                 prediction_id=f"pred_{i}",
                 input_data={"value": i},
@@ -88,7 +97,7 @@ class TestPredictionLog:
         
         # Log 20 predictions
         for i in range(20):
-            await log.log_prediction(
+            log.record(
                 model_id="model_123",
                 prediction_id=f"pred_{i}",
                 input_data={"value": i},
@@ -106,17 +115,16 @@ class TestPredictionLog:
         assert len(all_preds) == 20
 
 
+@pytest.mark.usefixtures("stored_events")
 class TestPredictionMonitoringService:
     """Test cases for PredictionMonitoringService"""
     
     @pytest.mark.asyncio
     @patch('app.services.prediction_monitoring.MLModel')
-    async def test_log_prediction_updates_model(self, mock_model_class):
-        """Test that logging prediction updates model last_used_at"""
-        # Mock model
-        mock_model = AsyncMock()
-        mock_model.save = AsyncMock()
-        mock_model_class.find_one = AsyncMock(return_value=mock_model)
+    async def test_log_prediction_is_buffered(self, mock_model_class):
+        """Test that logging a prediction buffers it without touching the model"""
+        prediction_log.clear()
+        mock_model_class.find_one = AsyncMock()
         
         # Log prediction
         pred_id = await PredictionMonitoringService.log_prediction(
@@ -131,16 +139,17 @@ class TestPredictionMonitoringService:
         # Check prediction ID format
         assert pred_id.startswith("pred_")
         
-        # Check model was updated
-        mock_model_class.find_one.assert_called_once()
-        assert mock_model.last_used_at is not None
-        mock_model.save.assert_called_once()
+        # last_used_at is updated by the batched flush instead
+        mock_model_class.find_one.assert_not_called()
+        assert prediction_log.pending() == 1
+        assert prediction_log._pending[0]["prediction_id"] == pred_id
+        prediction_log.clear()
     
     @pytest.mark.asyncio
     async def test_get_model_metrics_no_data(self):
         """Test getting metrics with no prediction data"""
         # Clear any existing logs
-        prediction_log.logs.clear()
+        prediction_log.clear()
         
         metrics = await PredictionMonitoringService.get_model_metrics("model_999", 24)
         
@@ -154,12 +163,12 @@ class TestPredictionMonitoringService:
     async def test_get_model_metrics_with_data(self):
         """Test getting metrics with prediction data"""
         # Clear logs and add test data
-        prediction_log.logs.clear()
+        prediction_log.clear()
         
         # Add predictions from last hour
         now = datetime.utcnow()
         for i in range(10):
-            await prediction_log.log_prediction(
+            prediction_log.record(
                 model_id="model_123",
                 prediction_id=f"pred_{i}",
                 input_data={"test": i},
@@ -180,7 +189,7 @@ class TestPredictionMonitoringService:
     @pytest.mark.asyncio
     async def test_get_model_metrics_time_window(self):
         """Test metrics respect time window"""
-        prediction_log.logs.clear()
+        prediction_log.clear()
         
         # Add old prediction (25 hours ago)
         old_time = datetime.utcnow() - timedelta(hours=25)
@@ -193,7 +202,7 @@ class TestPredictionMonitoringService:
         }]
         
         # Add recent prediction
-        await prediction_log.log_prediction(
+        prediction_log.record(
             model_id="model_123",
             prediction_id="new_pred",
             input_data={},
@@ -209,12 +218,12 @@ class TestPredictionMonitoringService:
     @pytest.mark.asyncio
     async def test_get_prediction_distribution(self):
         """Test getting prediction distribution"""
-        prediction_log.logs.clear()
+        prediction_log.clear()
         
         # Add predictions with different values
         predictions = ["class_a"] * 5 + ["class_b"] * 3 + ["class_c"] * 2
         for i, pred in enumerate(predictions):
-            await prediction_log.log_prediction(
+            prediction_log.record(
                 model_id="model_123",
                 prediction_id=f"pred_{i}",
                 input_data={},
@@ -247,12 +256,12 @@ class TestPredictionMonitoringService:
     @pytest.mark.asyncio
     async def test_get_usage_by_api_key(self):
         """Test getting usage grouped by API key"""
-        prediction_log.logs.clear()
+        prediction_log.clear()
         
         # Add predictions with different API keys
         api_keys = ["key_1", "key_1", "key_1", "key_2", "key_2", None]
         for i, key in enumerate(api_keys):
-            await prediction_log.log_prediction(
+            prediction_log.record(
                 model_id="model_123",
                 prediction_id=f"pred_{i}",
                 input_data={},
@@ -269,13 +278,13 @@ class TestPredictionMonitoringService:
     @pytest.mark.asyncio
     async def test_concurrent_logging(self):
         """Test concurrent prediction logging"""
-        prediction_log.logs.clear()
+        prediction_log.clear()
         
         # Simulate concurrent logging
         import asyncio
         
         async def log_pred(i):
-            await prediction_log.log_prediction(
+            prediction_log.record(
                 model_id="model_123",
                 prediction_id=f"pred_{i}",
                 input_data={"i": i},
@@ -286,4 +295,198 @@ class TestPredictionMonitoringService:
         await asyncio.gather(*[log_pred(i) for i in range(50)])
         
         # All should be logged
-        assert len(prediction_log.logs["model_123"]) == 50
\ No newline at end of file
+        assert len(prediction_log.logs["model_123"]) == 50
+
+class TestPredictionTelemetry:
+    """Rollups and batched event writes"""
+    
+    def test_errors_count_in_rollups_not_recent_logs(self):
+        log = PredictionLog()
+        log.record("m1", "pred_1", {"a": 1}, "yes", probability=0.9, latency_ms=3)
+        log.record("m1", "pred_2", None, None, latency_ms=700, error=True)
+        
+        (_, rollup), = log.get_rollups("m1", 1)
+        
+        assert rollup.count == 1
+        assert rollup.errors == 1
+        assert len(log.logs["m1"]) == 1
+        assert "input_data" not in log.logs["m1"][0]
+        assert log.pending() == 2
+    
+    @pytest.mark.asyncio
+    async def test_metrics_add_pending_events(self, stored_events):
+        prediction_log.clear()
+        for latency in (2, 4, 6, 300):
+            prediction_log.record("m1", "p", {}, 1, probability=0.5, latency_ms=latency)
+        prediction_log.record("m1", "p", {}, None, error=True)
+        
+        metrics = await PredictionMonitoringService.get_model_metrics("m1", 1)
+        
+        assert metrics["total_predictions"] == 4
+        assert metrics["avg_latency_ms"] == 78.0
+        assert metrics["p95_latency_ms"] == 500.0
+        assert metrics["error_rate"] == 0.2
+        prediction_log.clear()
+    
+    def test_old_rollups_expire(self):
+        log = PredictionLog(retention_hours=1)
+        stale = (datetime.utcnow() - timedelta(hours=2)).replace(second=0, microsecond=0)
+        log.rollups["m1"][stale] = Mock()
+        
+        log.record("m1", "p", {}, 1)
+        
+        assert stale not in log.rollups["m1"]
+        assert len(log.rollups["m1"]) == 1
+    
+    def test_distribution_values_are_bounded(self):
+        from app.services.prediction_monitoring import MAX_DISTRIBUTION_VALUES, OTHER_PREDICTIONS
+        log = PredictionLog()
+        for i in range(MAX_DISTRIBUTION_VALUES + 10):
+            log.record("m1", "p", {}, float(i))
+        
+        (_, rollup), = log.get_rollups("m1", 1)
+        
+        assert len(rollup.predictions) == MAX_DISTRIBUTION_VALUES + 1
+        assert rollup.predictions[OTHER_PREDICTIONS] == 10
+    
+    @pytest.mark.asyncio
+    @patch('app.services.prediction_monitoring.MLModel')
+    @patch('app.services.prediction_monitoring.PredictionEvent')
+    async def test_flush_writes_one_batch(self, mock_event_class, mock_model_class):
+        collection = Mock(insert_many=AsyncMock())
+        mock_event_class.get_motor_collection.return_value = collection
+        models = Mock(bulk_write=AsyncMock())
+        mock_model_class.get_motor_collection.return_value = models
+        log = PredictionLog()
+        for i in range(3):
+            log.record("m1", f"pred_{i}", {"x": i}, i)
+        
+        assert await log.flush() == 3
+        
+        events = collection.insert_many.call_args[0][0]
+        assert [e["input_data"] for e in events] == [{"x": 0}, {"x": 1}, {"x": 2}]
+        assert all(e["model_id"] == "m1" for e in events)
+        assert len(models.bulk_write.call_args[0][0]) == 1
+        assert log.pending() == 0
+    
+    @pytest.mark.asyncio
+    @patch('app.services.prediction_monitoring.PredictionEvent')
+    async def test_failed_flush_is_retried(self, mock_event_class):
+        collection = Mock(insert_many=AsyncMock(side_effect=Exception("down")))
+        mock_event_class.get_motor_collection.return_value = collection
+        log = PredictionLog()
+        log.record("m1", "pred_1", {}, 1)
+        
+        assert await log.flush() == 0
+        assert log.pending() == 1
+    
+    @pytest.mark.asyncio
+    @patch('app.services.prediction_monitoring.MLModel')
+    @patch('app.services.prediction_monitoring.PredictionEvent')
+    async def test_partial_flush_requeues_failed_events(self, mock_event_class, mock_model_class):
+        from pymongo.errors import BulkWriteError
+        
+        def insert_many(events, ordered):
+            for i, event in enumerate(events):
+                event["_id"] = i
+            raise BulkWriteError({"writeErrors": [{"index": 1, "code": 121}]})
+        
+        mock_event_class.get_motor_collection.return_value = Mock(insert_many=AsyncMock(side_effect=insert_many))
+        mock_model_class.get_motor_collection.return_value = Mock(bulk_write=AsyncMock())
+        log = PredictionLog()
+        for i in range(3):
+            log.record("m1", f"pred_{i}", {"x": i}, i)
+        
+        assert await log.flush() == 2
+        
+        assert log.pending() == 1
+        assert log._pending[0]["prediction_id"] == "pred_1"
+        assert "_id" not in log._pending[0]
+    
+    def test_request_latency_and_outcome_count_once(self):
+        log = PredictionLog()
+        log.record_request(
+            "m1", "pred_1", [{"a": 1}, {"a": 2}, {"a": 3}], ["y", "n", "y"],
+            probabilities=[0.9, 0.8, 0.7], latency_ms=40, api_key_id="k1"
+        )
+        log.record_request("m1", "pred_2", [], [], latency_ms=5, api_key_id="k1", error=True)
+        
+        (_, rollup), = log.get_rollups("m1", 1)
+        
+        assert rollup.count == 3
+        assert rollup.requests == 1
+        assert rollup.errors == 1
+        assert rollup.latency_sum == 40
+        assert sum(rollup.latency_histogram) == 1
+        assert rollup.api_keys == {"k1": 2}
+        assert rollup.predictions == {"y": 2, "n": 1}
+        assert log.pending() == 4
+    
+    @pytest.mark.asyncio
+    @patch('app.services.prediction_monitoring.drift_monitor')
+    @patch('app.services.prediction_monitoring.MLModel')
+    async def test_detect_drift_reads_monitor_result(self, mock_model_class, mock_monitor):
+        mock_model_class.find_one = AsyncMock(return_value=Mock())
+        mock_monitor.get_result.return_value = {
+            "drift_detected": True,
+            "drift_score": 0.4,
+            "features_with_drift": ["age"],
+            "recommendation": "retrain"
+        }
+        
+        result = await PredictionMonitoringService.detect_drift("model_123")
+        
+        assert result["features_with_drift"] == ["age"]
+        mock_monitor.get_result.assert_called_once_with("model_123")
+    
+    @pytest.mark.asyncio
+    async def test_metrics_combine_stored_and_pending_events(self, stored_events):
+        """Other workers' flushed events count alongside this worker's buffer"""
+        stored_events.update({
+            "totals": [{
+                "count": 6, "requests": 3, "errors": 1, "latency_sum": 30.0,
+                "confidence_sum": 3.0, "confidence_count": 6,
+                "first": datetime.utcnow() - timedelta(hours=3)
+            }],
+            "latency": [{"_id": 3, "count": 3}],
+            "predictions": [{"_id": "yes", "count": 4}, {"_id": 1, "count": 1}],
+            "api_keys": [{"_id": "k1", "count": 3}, {"_id": None, "count": 1}]
+        })
+        prediction_log.clear()
+        prediction_log.record_request(
+            "m1", "pred_1", [{}, {}], ["yes", "no"], probabilities=[0.5, 0.5],
+            latency_ms=50, api_key_id="k1"
+        )
+        prediction_log.record("m2", "pred_2", {}, "other model")
+        
+        metrics = await PredictionMonitoringService.get_model_metrics("m1", 24)
+        distribution = await PredictionMonitoringService.get_prediction_distribution("m1", 24)
+        usage = await PredictionMonitoringService.get_usage_by_api_key("m1", 24)
+        prediction_log.clear()
+        
+        assert metrics["total_predictions"] == 8
+        assert metrics["avg_latency_ms"] == 20.0
+        assert metrics["p95_latency_ms"] == 50.0
+        assert metrics["error_rate"] == 0.2
+        assert metrics["avg_confidence"] == 0.5
+        # Eight rows over three hours and part of a minute
+        assert metrics["predictions_per_hour"] in (2.66, 2.67)
+        assert distribution == {
+            "distribution": {"yes": 5, "1": 1, "other": 1, "no": 1},
+            "total": 8,
+            "unique_values": 4
+        }
+        assert usage == {"k1": 4, "unknown": 1}
+    
+    @pytest.mark.asyncio
+    @patch('app.services.prediction_monitoring.PredictionEvent')
+    async def test_metrics_fall_back_to_rollups(self, mock_event_class):
+        mock_event_class.aggregate.side_effect = Exception("down")
+        prediction_log.clear()
+        prediction_log.record("m1", "pred_1", {}, "yes", latency_ms=10)
+        
+        metrics = await PredictionMonitoringService.get_model_metrics("m1", 1)
+        prediction_log.clear()
+        
+        assert metrics["total_predictions"] == 1
+        assert metrics["avg_latency_ms"] == 10.0
@@ -0,0 +1,97 @@
+"""
+Tests for the token-bucket rate limiter
+"""
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+
+from app.services.rate_limiter import RateLimitResult, TokenBucketRateLimiter
+
+
+@pytest.fixture
+def limiter():
+    return TokenBucketRateLimiter(local_threshold=0.5, sync_fraction=0.05)
+
+
+def mock_redis(script):
+    client = Mock()
+    client.register_script.return_value = script
+    cache = Mock()
+    cache.redis_client = client
+    return cache
+
+
+class TestRateLimitResult:
+    def test_allowed_headers(self):
+        result = RateLimitResult(True, 100, 40.5, 100 / 3600)
+        headers = result.headers()
+        assert headers["X-RateLimit-Limit"] == "100"
+        assert headers["X-RateLimit-Remaining"] == "40"
+        assert int(headers["X-RateLimit-Reset"]) == 2142
+        assert "Retry-After" not in headers
+
+    def test_denied_headers_include_retry_after(self):
+        result = RateLimitResult(False, 3600, 0, 1.0)
+        assert result.headers()["Retry-After"] == "1"
+
+
+class TestInProcessFallback:
+    async def test_enforces_limit_without_redis(self, limiter):
+        with patch("app.services.rate_limiter.cache_service") as cache:
+            cache.redis_client = None
+            results = [await limiter.acquire("k", 3) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert results[2].remaining == 0
+
+    async def test_redis_error_falls_back_and_backs_off(self, limiter):
+        script = AsyncMock(side_effect=Exception("connection refused"))
+        with patch("app.services.rate_limiter.cache_service", mock_redis(script)):
+            first = await limiter.acquire("k", 10)
+            second = await limiter.acquire("k", 10)
+
+        assert first.allowed and second.allowed
+        # Second call is inside the backoff window and does not retry Redis
+        assert script.call_count == 1
+
+    async def test_zero_limit_denies(self, limiter):
+        result = await limiter.acquire("k", 0)
+        assert not result.allowed
+
+
+class TestRedisTokenBucket:
+    async def test_denied_by_redis(self, limiter):
+        script = AsyncMock(return_value=[0, "0"])
+        with patch("app.services.rate_limiter.cache_service", mock_redis(script)):
+            result = await limiter.acquire("k", 1000)
+
+        assert not result.allowed
+        kwargs = script.call_args.kwargs
+        assert kwargs["keys"] == ["k"]
+        capacity, rate, _, debit, requested, ttl = kwargs["args"]
+        assert (capacity, debit, requested, ttl) == (1000.0, 0, 1, 3600)
+        assert rate == pytest.approx(1000 / 3600)
+
+    async def test_local_precheck_skips_round_trips_below_quota(self, limiter):
+        remote_tokens = [1000.0]
+
+        async def script(keys, args):
+            remote_tokens[0] -= args[3] + args[4]
+            return [1, str(remote_tokens[0])]
+
+        script_mock = AsyncMock(side_effect=script)
+        with patch("app.services.rate_limiter.cache_service", mock_redis(script_mock)):
+            results = [await limiter.acquire("k", 1000) for _ in range(200)]
+
+        assert all(r.allowed for r in results)
+        # One sync per 50 locally admitted requests (5% of the limit)
+        assert script_mock.call_count == 4
+        # Everything but the last 46 local admissions has been debited remotely
+        assert remote_tokens[0] == 1000 - 200 + 46
+
+    async def test_near_quota_checks_redis_every_request(self, limiter):
+        script = AsyncMock(return_value=[1, "10"])
+        with patch("app.services.rate_limiter.cache_service", mock_redis(script)):
+            for _ in range(5):
+                await limiter.acquire("k", 100)
+
+        assert script.call_count == 5
@@ -10,6 +10,16 @@ import json
 from app.services.redis_cache import RedisCacheService, cache_result, cache_service
 
 
+def make_mock_pipeline(results=None):
+    """Build a mock redis pipeline usable as an async context manager"""
+    pipe = Mock()
+    pipe.execute = AsyncMock(return_value=results or [])
+    pipe.reset = AsyncMock()
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+    return pipe
+
+
 class TestRedisCacheService:
     """Test cases for RedisCacheService"""
     
@@ -150,19 +160,22 @@ class TestRedisCacheService:
     async def test_hash_operations(self):
         """Test hash set/get operations"""
         mock_redis = AsyncMock()
-        mock_redis.hset = AsyncMock(return_value=True)
+        mock_pipe = make_mock_pipeline([2, True])
+        mock_redis.pipeline = Mock(return_value=mock_pipe)
         mock_redis.hgetall = AsyncMock(return_value={
             b"field1": b'"value1"',
             b"field2": b'42'
         })
-        mock_redis.expire = AsyncMock(return_value=True)
         
         self.cache_service.redis_client = mock_redis
         
-        # Test hash set
+        # Test hash set - HSET and EXPIRE share one round-trip
         test_data = {"field1": "value1", "field2": 42}
         result = await self.cache_service.set_hash("test_hash", test_data, ttl=300)
         assert result is True
+        mock_pipe.hset.assert_called_once()
+        mock_pipe.expire.assert_called_once_with("test_hash", 300)
+        mock_pipe.execute.assert_awaited_once()
         
         # Test hash get
         retrieved_data = await self.cache_service.get_hash("test_hash")
@@ -172,32 +185,155 @@ class TestRedisCacheService:
     async def test_list_operations(self):
         """Test list set/get operations"""
         mock_redis = AsyncMock()
-        mock_redis.delete = AsyncMock(return_value=1)
-        mock_redis.lpush = AsyncMock(return_value=3)
+        mock_pipe = make_mock_pipeline([1, 3, True])
+        mock_redis.pipeline = Mock(return_value=mock_pipe)
         mock_redis.lrange = AsyncMock(return_value=[b'"item3"', b'"item2"', b'"item1"'])
-        mock_redis.expire = AsyncMock(return_value=True)
         
         self.cache_service.redis_client = mock_redis
         
-        # Test list set
+        # Test list set - DEL, LPUSH and EXPIRE run in one transaction
         test_list = ["item1", "item2", "item3"]
         result = await self.cache_service.set_list("test_list", test_list, ttl=300)
         assert result is True
+        mock_redis.pipeline.assert_called_once_with(transaction=True)
+        mock_pipe.delete.assert_called_once_with("test_list")
+        mock_pipe.lpush.assert_called_once()
+        mock_pipe.expire.assert_called_once_with("test_list", 300)
+        mock_pipe.execute.assert_awaited_once()
         
         # Test list get
         retrieved_list = await self.cache_service.get_list("test_list")
         assert retrieved_list == test_list
         
+    @pytest.mark.asyncio
+    async def test_mget_operation(self):
+        """Test multi-key get in a single round-trip"""
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(return_value=[b'{"a": 1}', None, b'7'])
+        
+        self.cache_service.redis_client = mock_redis
+        
+        result = await self.cache_service.mget(["k1", "k2", "k3"])
+        assert result == {"k1": {"a": 1}, "k3": 7}
+        mock_redis.mget.assert_called_once_with(["k1", "k2", "k3"])
+        
+    @pytest.mark.asyncio
+    async def test_mset_with_per_key_ttl(self):
+        """Test multi-key set with per-key TTLs"""
+        mock_redis = AsyncMock()
+        mock_pipe = make_mock_pipeline([True, True])
+        mock_redis.pipeline = Mock(return_value=mock_pipe)
+        
+        self.cache_service.redis_client = mock_redis
+        
+        result = await self.cache_service.mset({"k1": "v1", "k2": "v2"}, ttl={"k1": 60})
+        assert result is True
+        assert mock_pipe.setex.call_count == 2
+        ttls = {call.args[0]: call.args[1] for call in mock_pipe.setex.call_args_list}
+        assert ttls == {"k1": 60, "k2": self.cache_service.default_ttl}
+        mock_pipe.execute.assert_awaited_once()
+        
+    @pytest.mark.asyncio
+    async def test_pipeline_context_manager(self):
+        """Test queued commands are decoded in order on execute"""
+        mock_redis = AsyncMock()
+        mock_pipe = make_mock_pipeline([True, b'{"x": 1}', None, 1])
+        mock_redis.pipeline = Mock(return_value=mock_pipe)
+        
+        self.cache_service.redis_client = mock_redis
+        
+        async with self.cache_service.pipeline() as pipe:
+            pipe.set("a", {"x": 1}, ttl=10)
+            pipe.get("a")
+            pipe.get("missing")
+            pipe.delete("b")
+            results = await pipe.execute()
+        
+        assert results == [True, {"x": 1}, None, 1]
+        # Already executed inside the block, so not sent twice
+        mock_pipe.execute.assert_awaited_once()
+        
+    @pytest.mark.asyncio
+    async def test_pipeline_flushes_commands_queued_after_execute(self):
+        """Test each execute sends only new commands and the rest go on exit"""
+        mock_redis = AsyncMock()
+        mock_pipe = make_mock_pipeline()
+        mock_pipe.execute.side_effect = [[b'1'], [True]]
+        mock_redis.pipeline = Mock(return_value=mock_pipe)
+        
+        self.cache_service.redis_client = mock_redis
+        
+        async with self.cache_service.pipeline() as pipe:
+            pipe.get("a")
+            assert await pipe.execute() == [1]
+            pipe.set("b", 2)
+            assert len(pipe) == 1
+        
+        assert mock_pipe.execute.await_count == 2
+        assert len(pipe) == 0
+        
+    @pytest.mark.asyncio
+    async def test_pipeline_failure_drops_queue(self):
+        """Test a failed execute resets the queue instead of misaligning results"""
+        mock_redis = AsyncMock()
+        mock_pipe = make_mock_pipeline()
+        mock_pipe.execute.side_effect = [ConnectionError("down"), [True]]
+        mock_redis.pipeline = Mock(return_value=mock_pipe)
+        
+        self.cache_service.redis_client = mock_redis
+        
+        async with self.cache_service.pipeline() as pipe:
+            pipe.get("a")
+            with pytest.raises(ConnectionError):
+                await pipe.execute()
+            pipe.set("b", 1)
+            assert await pipe.execute() == [True]
+        
+        assert mock_pipe.reset.await_count == 2
+        
+    @pytest.mark.asyncio
+    async def test_pipeline_without_redis_connection(self):
+        """Test pipeline returns defaults when Redis is unavailable"""
+        async with self.cache_service.pipeline() as pipe:
+            pipe.set("a", 1)
+            pipe.get("a")
+            results = await pipe.execute()
+        
+        assert results == [False, None]
+        assert await self.cache_service.mget(["a"]) == {}
+        assert await self.cache_service.mset({"a": 1}) is False
+        
+    @pytest.mark.asyncio
+    async def test_batch_domain_helpers(self):
+        """Test batch data stats and prediction helpers"""
+        mock_redis = AsyncMock()
+        mock_pipe = make_mock_pipeline([True, True])
+        mock_redis.pipeline = Mock(return_value=mock_pipe)
+        mock_redis.mget = AsyncMock(return_value=[b'{"rows": 10}', None])
+        
+        self.cache_service.redis_client = mock_redis
+        
+        stats = await self.cache_service.get_data_stats_batch(["d1", "d2"])
+        assert stats == {"d1": {"rows": 10}}
+        mock_redis.mget.assert_called_once_with(["data_stats:d1", "data_stats:d2"])
+        
+        result = await self.cache_service.cache_model_predictions_batch(
+            "model_1", {"h1": [0.1], "h2": [0.9]}
+        )
+        assert result is True
+        keys = sorted(call.args[0] for call in mock_pipe.setex.call_args_list)
+        assert keys == ["predictions:model_1:h1", "predictions:model_1:h2"]
+        assert all(call.args[1] == 3600 for call in mock_pipe.setex.call_args_list)
+        
     @pytest.mark.asyncio
     async def test_user_progress_caching(self):
         """Test user progress specific caching methods"""
         mock_redis = AsyncMock()
-        mock_redis.hset = AsyncMock(return_value=True)
+        mock_redis.pipeline = Mock(return_value=make_mock_pipeline([2, True]))
         mock_redis.hgetall = AsyncMock(return_value={
             b"user_id": b'"test_user"',
             b"progress": b'50'
         })
-        mock_redis.expire = AsyncMock(return_value=True)
         
         self.cache_service.redis_client = mock_redis
         
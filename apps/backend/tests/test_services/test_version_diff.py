@@ -0,0 +1,192 @@
+"""
+Tests for row- and cell-level version diffs.
+"""
+
+import io
+import os
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.version import DatasetVersion, RowDiff
+from app.services.version_diff import diff_contents, file_type_for
+from app.services.versioning_service import VersioningService
+
+
+def to_csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode()
+
+
+@pytest.fixture
+def frames():
+    n = 1000
+    rng = np.random.RandomState(0)
+    old = pd.DataFrame({
+        'id': np.arange(n),
+        'price': rng.uniform(0, 100, n).round(2),
+        'category': rng.choice(['a', 'b', 'c'], n),
+    })
+    new = old.copy()
+    new.loc[new['id'].isin([10, 500]), 'price'] += 1
+    new.loc[new['id'] == 700, 'category'] = 'z'
+    new = new[new['id'] != 3]
+    new = pd.concat([new, pd.DataFrame({'id': [1000, 1001], 'price': [1.0, 2.0], 'category': ['a', 'b']})])
+    return old, new
+
+
+class TestKeyedDiff:
+    def test_counts(self, frames):
+        old, new = frames
+
+        diff = diff_contents(to_csv(old), to_csv(new), key_columns=['id'])
+
+        assert diff.basis == 'key'
+        assert (diff.rows_added, diff.rows_removed, diff.rows_changed) == (2, 1, 3)
+        assert diff.rows_unchanged == 996
+        assert diff.cells_changed == {'price': 2, 'category': 1}
+
+    def test_samples(self, frames):
+        old, new = frames
+
+        diff = diff_contents(to_csv(old), to_csv(new), key_columns=['id'])
+
+        changed = {row['key']['id']: row['changes'] for row in diff.changed_rows}
+        assert changed['700'] == {'category': [old.loc[700, 'category'], 'z']}
+        assert [row['id'] for row in diff.added_rows] == ['1000', '1001']
+        assert [row['id'] for row in diff.removed_rows] == ['3']
+
+    def test_chunked_matches_single_pass(self, frames):
+        old, new = frames
+
+        whole = diff_contents(to_csv(old), to_csv(new), key_columns=['id'])
+        chunked = diff_contents(to_csv(old), to_csv(new), key_columns=['id'], chunk_rows=37)
+
+        assert chunked == whole
+
+    def test_reordered_rows_are_unchanged(self, frames):
+        old, _ = frames
+        shuffled = old.sample(frac=1, random_state=1)
+
+        diff = diff_contents(to_csv(old), to_csv(shuffled), key_columns=['id'])
+
+        assert diff.rows_unchanged == len(old)
+        assert diff.rows_changed == diff.rows_added == diff.rows_removed == 0
+
+    def test_schema_changes_compare_shared_columns(self, frames):
+        old, _ = frames
+        new = old.drop(columns=['category']).assign(extra=1)
+
+        diff = diff_contents(to_csv(old), to_csv(new), key_columns=['id'])
+
+        assert diff.rows_unchanged == len(old)
+
+    def test_duplicate_keys(self):
+        with pytest.raises(ValueError, match="uniquely"):
+            diff_contents(b"id,v\n1,a\n1,b\n", b"id,v\n1,a\n", key_columns=['id'])
+
+    def test_missing_key_column(self):
+        with pytest.raises(ValueError, match="Key columns"):
+            diff_contents(b"id,v\n1,a\n", b"v\na\n", key_columns=['id'])
+
+
+class TestPositionalDiff:
+    def test_rows_matched_by_position(self):
+        diff = diff_contents(b"a,b\n1,x\n2,y\n3,z\n", b"a,b\n1,x\n2,Y\n", chunk_rows=2)
+
+        assert diff.basis == 'position'
+        assert (diff.rows_changed, diff.rows_removed, diff.rows_unchanged) == (1, 1, 1)
+        assert diff.changed_rows == [{'key': {'row': 1}, 'changes': {'b': ['y', 'Y']}}]
+        assert diff.removed_rows == [{'a': '3', 'b': 'z'}]
+
+    def test_values_compared_as_text(self):
+        # Per-chunk type inference would read 2 as int here and float there
+        diff = diff_contents(b"a\n1\n2\n2.5\n", b"a\n1\n2\n2.5\n", chunk_rows=1)
+
+        assert diff.rows_unchanged == 3
+
+
+class TestFileTypes:
+    def test_file_type_for(self):
+        assert file_type_for("datasets/u/d/v2/data.csv.manifest.json") == 'csv'
+        assert file_type_for("datasets/u/d/data.parquet") == 'parquet'
+        assert file_type_for("datasets/u/d/data.xlsx") == 'excel'
+
+    def test_parquet(self, frames):
+        old, new = frames
+        old_buffer, new_buffer = io.BytesIO(), io.BytesIO()
+        old.to_parquet(old_buffer)
+        new.to_parquet(new_buffer)
+
+        diff = diff_contents(
+            old_buffer.getvalue(), new_buffer.getvalue(), 'parquet', 'parquet', ['id'], chunk_rows=100
+        )
+
+        assert (diff.rows_added, diff.rows_removed, diff.rows_changed) == (2, 1, 3)
+
+
+class TestCompareVersions:
+    async def test_diff_is_cached_per_pair(self, frames):
+        old, new = frames
+        service = VersioningService()
+        versions = {
+            'v1': DatasetVersion.model_construct(
+                version_id='v1', dataset_id='ds1', file_path='a/data.csv', num_rows=len(old)
+            ),
+            'v2': DatasetVersion.model_construct(
+                version_id='v2', dataset_id='ds1', file_path='b/data.csv.manifest.json', num_rows=len(new)
+            ),
+        }
+        contents = {'v1': to_csv(old), 'v2': to_csv(new)}
+        cache = {}
+        spooled = []
+
+        async def iter_content(version):
+            content = contents[version.version_id]
+            for start in range(0, len(content), 1000):
+                yield content[start:start + 1000]
+
+        original_spool = service._spool_content
+
+        async def spool(version):
+            path = await original_spool(version)
+            spooled.append(path)
+            return path
+
+        async def cache_set(key, value, ttl=None):
+            cache[key] = value
+            return True
+
+        with patch.object(service, '_iter_content', side_effect=iter_content) as content, \
+                patch.object(service, '_spool_content', side_effect=spool), \
+                patch.object(service, 'get_version', AsyncMock()) as get_version, \
+                patch('app.services.versioning_service.cache_service') as cache_service:
+            cache_service.get = AsyncMock(side_effect=cache.get)
+            cache_service.set = AsyncMock(side_effect=cache_set)
+
+            first = await service._diff_rows(versions['v1'], versions['v2'], ['id'])
+            second = await service._diff_rows(versions['v1'], versions['v2'], ['id'])
+
+        assert isinstance(second, RowDiff)
+        assert first == second
+        assert first == diff_contents(contents['v1'], contents['v2'], key_columns=['id'])
+        assert content.call_count == 2
+        assert list(cache) == ['version_diff:v1:v2:id']
+        # Content was streamed to temporary files, removed afterwards, without marking access
+        assert len(spooled) == 2 and not any(os.path.exists(path) for path in spooled)
+        get_version.assert_not_called()
+
+    async def test_missing_content_skips_diff(self):
+        service = VersioningService()
+        version = DatasetVersion.model_construct(version_id='v1', dataset_id='ds1', file_path='a.csv')
+
+        async def iter_content(version):
+            raise ValueError("gone")
+            yield
+
+        with patch.object(service, '_iter_content', side_effect=iter_content), \
+                patch('app.services.versioning_service.cache_service') as cache_service:
+            cache_service.get = AsyncMock(return_value=None)
+
+            assert await service._diff_rows(version, version) is None
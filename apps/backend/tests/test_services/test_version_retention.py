@@ -0,0 +1,158 @@
+"""
+Tests for batched version retention cleanup and sweeps.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.models.version import DatasetVersion
+from app.services.version_retention import (
+    RetentionPolicy,
+    VersionRetentionEngine,
+    VersionRetentionView,
+)
+from app.services.versioning_service import VersioningService
+
+OLD = datetime.now(timezone.utc) - timedelta(days=60)
+POLICY = RetentionPolicy(retention_days=30, keep_count=1)
+
+
+def view(version_id, number, chunks=(), created_at=OLD, **flags):
+    return VersionRetentionView(
+        version_id=version_id,
+        version_number=number,
+        file_path=f"datasets/u/ds1/{version_id}",
+        file_size=100,
+        created_at=created_at,
+        chunk_hashes=list(chunks),
+        **flags
+    )
+
+
+@pytest.fixture
+def versions():
+    # Newest first, as the projection query sorts them
+    return [
+        view("v6", 6, chunks=["a", "b"]),
+        view("v5", 5, chunks=["b", "c"], created_at=datetime.now(timezone.utc)),
+        view("v4", 4, chunks=["c", "d"], is_pinned=True),
+        view("v3", 3, chunks=["d", "e"], in_training=True),
+        view("v2", 2, chunks=["e", "f", "g"]),
+        view("v1", 1, is_base_version=True),
+    ]
+
+
+@pytest.fixture
+def db(versions):
+    query = MagicMock()
+    query.sort.return_value = query
+    query.project.return_value = query
+    query.to_list = AsyncMock(return_value=versions)
+    collection = MagicMock()
+    collection.delete_many = AsyncMock()
+    collection.distinct = AsyncMock(return_value=["ds1", "ds2"])
+    with patch.object(DatasetVersion, "find", return_value=query) as find, \
+            patch.object(DatasetVersion, "get_motor_collection", return_value=collection):
+        yield find, query, collection
+
+
+@pytest.fixture
+def engine():
+    service = VersioningService()
+    service.s3_client = MagicMock()
+    service.s3_client.delete_objects.return_value = {}
+    return VersionRetentionEngine(service, throttle=0, dry_run=False)
+
+
+class TestPlan:
+    async def test_single_projection_query(self, engine, db):
+        find, query, _ = db
+
+        plan = await engine.plan("ds1", POLICY)
+
+        find.assert_called_once_with({"dataset_id": "ds1"})
+        query.project.assert_called_once_with(VersionRetentionView)
+        assert plan.version_ids == ["v2"]
+        assert plan.bytes_reclaimed == 100
+
+    async def test_only_unreferenced_chunks_are_deleted(self, engine, db):
+        plan = await engine.plan("ds1", POLICY)
+
+        chunk_store = engine.service.chunk_store
+        assert plan.object_keys == [
+            "datasets/u/ds1/v2",
+            chunk_store.chunk_key("ds1", "f"),
+            chunk_store.chunk_key("ds1", "g"),
+        ]
+
+
+class TestCleanup:
+    async def test_bulk_deletes(self, engine, db):
+        _, _, collection = db
+
+        report = await engine.cleanup_dataset("ds1", POLICY)
+
+        collection.delete_many.assert_awaited_once_with({"version_id": {"$in": ["v2"]}})
+        request = engine.service.s3_client.delete_objects.call_args.kwargs
+        assert len(request["Delete"]["Objects"]) == 3
+        assert report["versions_deleted"] == 1
+        assert report["objects_deleted"] == 3
+
+    async def test_dry_run_deletes_nothing(self, engine, db):
+        _, _, collection = db
+
+        report = await engine.cleanup_dataset("ds1", POLICY, dry_run=True)
+
+        collection.delete_many.assert_not_called()
+        engine.service.s3_client.delete_objects.assert_not_called()
+        assert report["dry_run"] is True
+        assert report["version_ids"] == ["v2"]
+        assert report["objects_deleted"] == 3
+
+    async def test_s3_deletes_are_batched(self, engine):
+        keys = [f"k{i}" for i in range(2500)]
+        engine.service.s3_client.delete_objects.side_effect = lambda Bucket, Delete: (
+            {"Errors": [{"Key": "k0", "Message": "denied"}]} if Delete["Objects"][0]["Key"] == "k0" else {}
+        )
+
+        deleted = await engine._delete_objects(keys)
+
+        sizes = sorted(
+            len(call.kwargs["Delete"]["Objects"])
+            for call in engine.service.s3_client.delete_objects.call_args_list
+        )
+        assert sizes == [500, 1000, 1000]
+        assert deleted == 2499
+
+    async def test_service_cleanup_uses_engine(self, db):
+        service = VersioningService()
+        service.s3_client = MagicMock()
+        service.s3_client.delete_objects.return_value = {}
+
+        assert await service.cleanup_old_versions("ds1", retention_days=30, keep_count=1) == 1
+
+
+class TestSweep:
+    async def test_sweeps_every_dataset(self, engine, db):
+        report = await engine.sweep(POLICY, dry_run=True)
+
+        assert report["datasets_checked"] == 2
+        assert report["versions_deleted"] == 2
+        assert [r["dataset_id"] for r in report["datasets"]] == ["ds1", "ds2"]
+
+    async def test_failed_dataset_does_not_stop_sweep(self, engine, db):
+        with patch.object(engine, "cleanup_dataset", AsyncMock(side_effect=[RuntimeError("boom"), {
+            "dataset_id": "ds2", "versions_deleted": 1, "objects_deleted": 2, "bytes_reclaimed": 5,
+        }])):
+            report = await engine.sweep(POLICY)
+
+        assert report["datasets_failed"] == ["ds1"]
+        assert report["versions_deleted"] == 1
+
+    async def test_disabled_schedule(self, engine):
+        engine.sweep_interval = 0
+        engine.start()
+
+        assert engine._task is None
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta, timezone
 import io
 
 from app.services.versioning_service import VersioningService
+from app.services.version_retention import VersionRetentionView
 from app.models.version import (
     DatasetVersion,
     TransformationLineage,
@@ -642,52 +643,47 @@ class TestVersionManagement:
 
         versions = [
             # Keep: recent
-            MagicMock(
+            VersionRetentionView(
                 version_id="v10",
-                is_pinned=False,
-                is_base_version=False,
+                version_number=10,
                 created_at=datetime.now(timezone.utc),
-                used_in_training=[],
-                file_path="path10",
-                delete=AsyncMock()
+                file_path="path10"
             ),
             # Keep: pinned
-            MagicMock(
+            VersionRetentionView(
                 version_id="v9",
+                version_number=9,
                 is_pinned=True,
-                is_base_version=False,
                 created_at=old_date,
-                used_in_training=[],
-                file_path="path9",
-                delete=AsyncMock()
+                file_path="path9"
             ),
             # Keep: base version
-            MagicMock(
+            VersionRetentionView(
                 version_id="v1",
-                is_pinned=False,
+                version_number=1,
                 is_base_version=True,
                 created_at=old_date,
-                used_in_training=[],
-                file_path="path1",
-                delete=AsyncMock()
+                file_path="path1"
             ),
             # Delete: old and unpinned
-            MagicMock(
+            VersionRetentionView(
                 version_id="v5",
-                is_pinned=False,
-                is_base_version=False,
+                version_number=5,
                 created_at=old_date,
-                used_in_training=[],
-                file_path="path5",
-                delete=AsyncMock()
+                file_path="path5"
             ),
         ]
 
         mock_query = MagicMock()
         mock_query.sort.return_value = mock_query
+        mock_query.project.return_value = mock_query
         mock_query.to_list = AsyncMock(return_value=versions)
+        mock_collection = MagicMock()
+        mock_collection.delete_many = AsyncMock()
+        mock_s3_client.delete_objects.return_value = {}
 
-        with patch.object(DatasetVersion, 'find', return_value=mock_query):
+        with patch.object(DatasetVersion, 'find', return_value=mock_query), \
+                patch.object(DatasetVersion, 'get_motor_collection', return_value=mock_collection):
             deleted_count = await versioning_service.cleanup_old_versions(
                 dataset_id="ds1",
                 retention_days=30,
@@ -695,5 +691,5 @@ class TestVersionManagement:
             )
 
             assert deleted_count == 1
-            versions[3].delete.assert_called_once()
-            mock_s3_client.delete_object.assert_called_once()
+            mock_collection.delete_many.assert_called_once_with({"version_id": {"$in": ["v5"]}})
+            mock_s3_client.delete_objects.assert_called_once()
@@ -5,9 +5,12 @@ from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock, AsyncMock, Mock
 from beanie import Link
 
+import pandas as pd
+
 from app.models.visualization_cache import (
     VisualizationCache,
     HistogramData,
+    FineHistogramData,
     BoxplotData,
     CorrelationMatrixData)
 from app.models.user_data import UserData
@@ -16,7 +19,12 @@ from app.services.visualization_cache import (
     cache_visualization,
     generate_and_cache_histogram,
     generate_and_cache_boxplot,
-    generate_and_cache_correlation_matrix)
+    generate_and_cache_correlation_matrix,
+    build_fine_histogram,
+    rebin_histogram,
+    compute_visualization_summaries,
+    _boxplot_summary,
+    precompute_visualizations)
 
 
 @pytest.fixture
@@ -228,3 +236,112 @@ class TestVisualizationCache:
                 # Assert
                 assert result is not None
                 mock_insert.assert_called_once()
+
+
+class TestMultiResolutionHistogram:
+    """Test suite for fine histograms and re-binning."""
+
+    def test_rebin_matches_raw_histogram_when_bins_divide(self):
+        """Re-binning is exact when the bin count divides the fine resolution."""
+        values = np.random.default_rng(0).normal(size=5000)
+        fine = build_fine_histogram(values)
+
+        for num_bins in (10, 20, 50, 100):
+            rebinned = rebin_histogram(fine, num_bins)
+            counts, bin_edges = np.histogram(values, bins=num_bins)
+            assert rebinned.counts == counts.tolist()
+            np.testing.assert_allclose(rebinned.bin_edges, bin_edges)
+
+    def test_rebin_preserves_total_for_any_bin_count(self):
+        """Non-dividing bin counts keep every observation."""
+        values = np.random.default_rng(1).exponential(size=2000)
+        fine = build_fine_histogram(values)
+
+        rebinned = rebin_histogram(fine, 7)
+        assert len(rebinned.bins) == 7
+        assert sum(rebinned.counts) == len(values)
+
+    def test_rebin_rejects_invalid_bin_count(self):
+        """A non-positive bin count is a client error."""
+        fine = FineHistogramData(min=0.0, max=1.0, counts=[1] * 10)
+        with pytest.raises(ValueError):
+            rebin_histogram(fine, 0)
+
+    @pytest.mark.asyncio
+    async def test_histogram_served_from_cached_fine_bins(self):
+        """Any bin count is served from the cached fine histogram."""
+        fine = build_fine_histogram(np.arange(100, dtype=float))
+
+        with patch(
+            "app.services.visualization_cache.get_cached_visualization",
+            new_callable=AsyncMock,
+            return_value=fine.model_dump()) as mock_get, patch(
+            "app.services.visualization_cache.UserData.get",
+            new_callable=AsyncMock) as mock_user_data:
+            result_10 = await generate_and_cache_histogram("ds", "col", 10)
+            result_4 = await generate_and_cache_histogram("ds", "col", 4)
+
+        assert result_10["counts"] == [10] * 10
+        assert result_4["counts"] == [25] * 4
+        mock_get.assert_called_with("ds", "histogram_fine", "col")
+        mock_user_data.assert_not_called()
+
+
+class TestVisualizationPrecompute:
+    """Test suite for precomputing visualizations at ingest."""
+
+    def test_compute_visualization_summaries(self):
+        """Numeric columns get histograms and boxplots plus one correlation matrix."""
+        df = pd.DataFrame({
+            "a": [1.0, 2.0, 3.0, 4.0, 100.0],
+            "b": [2, 4, 6, 8, 10],
+            "label": ["x", "y", "z", "x", "y"],
+            "empty": [None] * 5,
+        })
+
+        summaries = compute_visualization_summaries(df)
+
+        assert set(summaries) == {
+            ("histogram_fine", "a"), ("boxplot", "a"),
+            ("histogram_fine", "b"), ("boxplot", "b"),
+            ("correlation", None),
+        }
+        assert sum(summaries[("histogram_fine", "a")]["counts"]) == 5
+        assert summaries[("boxplot", "a")]["median"] == 3.0
+        assert summaries[("boxplot", "a")]["outliers"] == [100.0]
+        assert "label" not in summaries[("correlation", None)]["columns"]
+
+    def test_boxplot_summary_rejects_empty_column(self):
+        """A column with no values is reported instead of failing in np.quantile."""
+        with pytest.raises(ValueError, match="no values"):
+            _boxplot_summary(pd.Series([np.nan, np.nan], name="a"))
+
+    @pytest.mark.asyncio
+    async def test_precompute_visualizations_batches_writes(self):
+        """Redis entries are written with a single mset and MongoDB entries with one bulk upsert."""
+        df = pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": [3.0, 2.0, 1.0]})
+        mock_dataset = Mock()
+        collection = Mock()
+        collection.bulk_write = AsyncMock()
+
+        with patch(
+            "app.services.visualization_cache.cache_service") as mock_cache, patch(
+            "app.services.visualization_cache.UserData.get",
+            new_callable=AsyncMock,
+            return_value=mock_dataset), patch(
+            "app.services.visualization_cache.VisualizationCache.get_motor_collection",
+            return_value=collection):
+            mock_cache.mset = AsyncMock(return_value=True)
+
+            count = await precompute_visualizations("ds", df)
+
+        assert count == 5
+        mock_cache.mset.assert_awaited_once()
+        keys = set(mock_cache.mset.call_args.args[0])
+        assert "viz:ds:histogram_fine:a" in keys
+        assert "viz:ds:correlation" in keys
+        collection.bulk_write.assert_awaited_once()
+        operations = collection.bulk_write.call_args.args[0]
+        assert len(operations) == 5
+        assert all(op._upsert for op in operations)
+        assert operations[0]._filter["dataset_id"] is mock_dataset.to_ref.return_value
@@ -0,0 +1,167 @@
+"""
+Tests for transformation data utilities
+"""
+import threading
+
+import pytest
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from unittest.mock import AsyncMock, patch
+
+from app.services.transformation_service.data_utils import (
+    DatasetSample,
+    get_dataset_sample,
+    load_dataset_sample,
+    read_parquet_head,
+    stratified_sample,
+)
+
+
+@pytest.fixture
+def large_df():
+    """Dataset with a rare category and a minority of rows with gaps"""
+    rng = np.random.default_rng(0)
+    n = 20000
+    df = pd.DataFrame({
+        'id': np.arange(n),
+        'segment': rng.choice(['common', 'rare'], n, p=[0.99, 0.01]),
+        'value': rng.normal(size=n),
+    })
+    df.loc[rng.choice(n, 1000, replace=False), 'value'] = np.nan
+    return df
+
+
+class TestStratifiedSample:
+    """Test stratified sampling"""
+
+    def test_returns_small_frames_unchanged(self):
+        df = pd.DataFrame({'a': [1, 2, 3]})
+        assert stratified_sample(df, 10) is df
+
+    def test_preserves_strata_proportions(self, large_df):
+        sample = stratified_sample(large_df, 2000)
+
+        assert abs(len(sample) - 2000) <= 4
+        assert sample['id'].is_monotonic_increasing
+        full_missing = large_df['value'].isnull().mean()
+        assert abs(sample['value'].isnull().mean() - full_missing) < 0.01
+        full_rare = (large_df['segment'] == 'rare').mean()
+        assert abs((sample['segment'] == 'rare').mean() - full_rare) < 0.01
+
+
+class TestSampleLoading:
+    """Test reading samples from files"""
+
+    def test_read_parquet_head_scans_needed_rows(self, tmp_path, large_df):
+        path = str(tmp_path / 'data.parquet')
+        pq.write_table(pa.Table.from_pandas(large_df), path, row_group_size=1000)
+
+        head = read_parquet_head(path, 1500)
+
+        pd.testing.assert_frame_equal(head, large_df.head(1500))
+
+    def test_parquet_sample_reads_subset_of_row_groups(self, tmp_path, large_df):
+        path = str(tmp_path / 'data.parquet')
+        pq.write_table(pa.Table.from_pandas(large_df), path, row_group_size=1000)
+
+        sample = load_dataset_sample(path, target_rows=500)
+
+        assert sample.total_rows == len(large_df)
+        assert sample.is_estimate
+        assert abs(sample.sample_rows - 500) <= 4
+        # Sampled row groups span the file
+        assert sample.dataframe['id'].max() > len(large_df) // 2
+
+    def test_parquet_sample_is_bounded_within_row_groups(self, tmp_path, large_df):
+        path = str(tmp_path / 'data.parquet')
+        pq.write_table(pa.Table.from_pandas(large_df), path, row_group_size=len(large_df))
+
+        with patch('app.services.transformation_service.data_utils.stratified_sample',
+                   side_effect=lambda df, n: df) as sample_rows:
+            sample = load_dataset_sample(path, target_rows=500)
+
+        assert len(sample_rows.call_args.args[0]) == 2000
+        assert sample.total_rows == len(large_df)
+
+    def test_parquet_without_extension_falls_back(self, tmp_path, large_df):
+        path = str(tmp_path / 'data')
+        pq.write_table(pa.Table.from_pandas(large_df), path, row_group_size=1000)
+
+        sample = load_dataset_sample(path, target_rows=500)
+
+        assert sample.total_rows == len(large_df)
+
+    def test_empty_file_is_not_read_as_parquet(self, tmp_path):
+        path = tmp_path / 'empty'
+        path.touch()
+
+        with pytest.raises(pd.errors.EmptyDataError):
+            load_dataset_sample(str(path))
+
+    def test_csv_sample_streams_file(self, tmp_path, large_df):
+        path = str(tmp_path / 'data.csv')
+        large_df.to_csv(path, index=False)
+
+        with patch('app.services.transformation_service.data_utils.CSV_SAMPLE_CHUNK_ROWS', 3000):
+            sample = load_dataset_sample(path, target_rows=1000)
+
+        assert sample.total_rows == len(large_df)
+        assert abs(sample.sample_rows - 1000) <= 4
+        assert set(sample.dataframe.columns) == set(large_df.columns)
+
+    def test_small_dataset_is_not_an_estimate(self, tmp_path):
+        path = str(tmp_path / 'small.csv')
+        pd.DataFrame({'a': [1, 2, 3]}).to_csv(path, index=False)
+
+        sample = load_dataset_sample(path, target_rows=100)
+
+        assert sample.total_rows == 3
+        assert not sample.is_estimate
+
+
+class TestCachedDatasetSample:
+    """Test the cached sample used by preview and validation"""
+
+    @pytest.mark.asyncio
+    async def test_sample_served_from_cache(self):
+        cached_df = pd.DataFrame({'a': [1, 2]})
+
+        with patch('app.services.transformation_service.data_utils.cache_service') as mock_cache, \
+             patch('app.services.transformation_service.data_utils.download_file_from_s3') as mock_download:
+            mock_cache.get = AsyncMock(return_value={'dataframe': cached_df, 'total_rows': 1000})
+
+            sample = await get_dataset_sample('https://bucket.s3.amazonaws.com/data.csv')
+
+        assert isinstance(sample, DatasetSample)
+        assert sample.total_rows == 1000
+        assert sample.is_estimate
+        mock_download.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_sample_built_and_cached_on_miss(self, tmp_path):
+        path = tmp_path / 'data.csv'
+        pd.DataFrame({'a': range(50)}).to_csv(path, index=False)
+        threads = []
+
+        def download(s3_url):
+            threads.append(threading.get_ident())
+            return str(path)
+
+        with patch('app.services.transformation_service.data_utils.cache_service') as mock_cache, \
+             patch('app.services.transformation_service.data_utils.download_file_from_s3',
+                   side_effect=download), \
+             patch('app.services.transformation_service.data_utils.load_dataset_sample',
+                   side_effect=lambda *args: threads.append(threading.get_ident()) or load_dataset_sample(*args)):
+            mock_cache.get = AsyncMock(return_value=None)
+            mock_cache.set = AsyncMock(return_value=True)
+
+            sample = await get_dataset_sample('https://bucket.s3.amazonaws.com/data.csv', target_rows=10)
+
+        assert sample.total_rows == 50
+        assert sample.sample_rows == 10
+        mock_cache.set.assert_awaited_once()
+        assert not path.exists()
+        # Download and parsing both ran off the event loop
+        assert threading.get_ident() not in threads and len(threads) == 2
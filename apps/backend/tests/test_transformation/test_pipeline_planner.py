@@ -0,0 +1,220 @@
+"""
+Tests for the lazy transformation pipeline planner
+"""
+from unittest.mock import patch
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.services.transformation_service.transformation_engine import (
+    FillMissingTransformation,
+    TransformationEngine,
+    TransformationType,
+)
+from app.services.transformation_service.pipeline_planner import (
+    PipelinePlan,
+    PipelinePlanner,
+    PlannedStep,
+)
+
+
+def build_plan(steps, columns):
+    """Build a plan for (type, parameters) steps"""
+    engine = TransformationEngine()
+    planned = [
+        PlannedStep(index, transformation_type, engine.create_transformation(transformation_type, parameters))
+        for index, (transformation_type, parameters) in enumerate(steps)
+    ]
+    return PipelinePlanner().plan(planned, columns)
+
+
+def apply_eagerly(df, steps):
+    """Reference result: apply each step eagerly in recipe order"""
+    engine = TransformationEngine()
+    for transformation_type, parameters in steps:
+        df, result = engine.apply_transformation_frame(df, transformation_type, parameters)
+        assert result.success, result.error
+    return df
+
+
+@pytest.fixture
+def messy_df():
+    """Dataset with duplicates, padded strings and gaps"""
+    rng = np.random.default_rng(42)
+    n = 500
+    df = pd.DataFrame({
+        'id': rng.integers(0, 200, n).astype(float),
+        'name': rng.choice([' alice', 'bob ', ' carol ', 'dave'], n),
+        'city': rng.choice(['NYC ', ' LA', 'SF'], n),
+        'score': rng.normal(50, 10, n),
+    })
+    df.loc[rng.choice(n, 40, replace=False), 'score'] = np.nan
+    df.loc[rng.choice(n, 10, replace=False), 'id'] = np.nan
+    return pd.concat([df, df.head(50)], ignore_index=True)
+
+
+class TestPipelinePlanner:
+    """Test plan construction"""
+
+    def test_fuses_consecutive_column_steps(self):
+        """Trim then fill on the same column run in one column stage"""
+        plan = build_plan([
+            (TransformationType.TRIM_WHITESPACE, {'columns': ['name']}),
+            (TransformationType.FILL_MISSING, {'columns': ['name'], 'value': 'unknown'}),
+        ], ['name', 'score'])
+
+        assert plan.explain() == [
+            {'stage': 'column', 'steps': [0, 1], 'types': ['trim_whitespace', 'fill_missing']}
+        ]
+
+    def test_pushes_commuting_filter_early(self):
+        """A filter on untouched columns runs before row-independent column steps"""
+        plan = build_plan([
+            (TransformationType.TRIM_WHITESPACE, {'columns': ['name']}),
+            (TransformationType.FILL_MISSING, {'columns': ['score'], 'value': 0}),
+            (TransformationType.DROP_MISSING, {'columns': ['id']}),
+        ], ['id', 'name', 'score'])
+
+        assert [stage['stage'] for stage in plan.explain()] == ['row_filter', 'column']
+        assert plan.explain()[0]['steps'] == [2]
+
+    def test_keeps_filter_after_row_dependent_steps(self):
+        """Statistic fills depend on which rows remain, so filters stay put"""
+        plan = build_plan([
+            (TransformationType.FILL_MISSING, {'columns': ['score'], 'method': 'mean'}),
+            (TransformationType.DROP_MISSING, {'columns': ['id']}),
+        ], ['id', 'score'])
+
+        assert [stage['stage'] for stage in plan.explain()] == ['column', 'row_filter']
+
+    def test_keeps_filter_after_steps_on_its_columns(self):
+        """Trimming can create duplicates, so deduplication stays after it"""
+        plan = build_plan([
+            (TransformationType.TRIM_WHITESPACE, {'columns': []}),
+            (TransformationType.REMOVE_DUPLICATES, {'keep': 'first'}),
+        ], ['name'])
+
+        assert [stage['stage'] for stage in plan.explain()] == ['column', 'row_filter']
+
+
+class TestPipelineExecution:
+    """Test planned execution matches eager execution"""
+
+    @pytest.mark.parametrize("steps", [
+        [
+            (TransformationType.TRIM_WHITESPACE, {'columns': []}),
+            (TransformationType.REMOVE_DUPLICATES, {'keep': 'first'}),
+            (TransformationType.FILL_MISSING, {'columns': ['score'], 'method': 'median'}),
+        ],
+        [
+            (TransformationType.TRIM_WHITESPACE, {'columns': ['name']}),
+            (TransformationType.FILL_MISSING, {'columns': ['score'], 'value': 0.0}),
+            (TransformationType.DROP_MISSING, {'columns': ['id']}),
+            (TransformationType.REMOVE_DUPLICATES, {'subset': ['id', 'name'], 'keep': 'last'}),
+        ],
+        [
+            (TransformationType.FILL_MISSING, {'method': 'ffill'}),
+            (TransformationType.TRIM_WHITESPACE, {'columns': ['city']}),
+            (TransformationType.FILL_MISSING, {'columns': ['id'], 'method': 'mode'}),
+        ],
+    ])
+    def test_matches_eager_execution(self, messy_df, steps):
+        """Fused, reordered execution produces the same frame as eager steps"""
+        expected = apply_eagerly(messy_df, steps)
+
+        result = TransformationEngine().apply_pipeline(messy_df, steps)
+
+        assert result.success, result.error
+        pd.testing.assert_frame_equal(result.dataframe, expected)
+        assert result.affected_rows == len(messy_df) - len(expected)
+
+    def test_does_not_mutate_input(self, messy_df):
+        """The input frame is never modified in place"""
+        original = messy_df.copy()
+        TransformationEngine().apply_pipeline(messy_df, [
+            (TransformationType.TRIM_WHITESPACE, {'columns': []}),
+            (TransformationType.FILL_MISSING, {'value': 0}),
+        ])
+
+        pd.testing.assert_frame_equal(messy_df, original)
+
+    def test_records_history_per_step(self, messy_df):
+        """Each recipe step is recorded in order"""
+        engine = TransformationEngine()
+        engine.apply_pipeline(messy_df, [
+            (TransformationType.REMOVE_DUPLICATES, {'keep': 'first'}),
+            (TransformationType.TRIM_WHITESPACE, {'columns': ['name']}),
+        ])
+
+        history = engine.get_history()
+        assert [entry['type'] for entry in history] == [
+            TransformationType.REMOVE_DUPLICATES, TransformationType.TRIM_WHITESPACE
+        ]
+        assert history[0]['affected_rows'] > 0
+        assert history[1]['affected_columns'] == ['name']
+
+    def test_invalid_parameters_fail_before_execution(self, messy_df):
+        """Parameters are validated once, up front"""
+        result = TransformationEngine().apply_pipeline(messy_df, [
+            (TransformationType.TRIM_WHITESPACE, {'columns': ['name']}),
+            (TransformationType.REMOVE_DUPLICATES, {'keep': 'invalid'}),
+        ])
+
+        assert not result.success
+        assert result.failed_step == 1
+        assert 'Invalid parameters' in result.error
+
+    def test_missing_columns_fail_before_execution(self, messy_df):
+        """Referenced columns are checked against the input schema"""
+        result = TransformationEngine().apply_pipeline(messy_df, [
+            (TransformationType.REMOVE_DUPLICATES, {'subset': ['nope']}),
+        ])
+
+        assert not result.success
+        assert result.failed_step == 0
+        assert 'nope' in result.error
+
+    @pytest.mark.parametrize('step', [
+        (TransformationType.TRIM_WHITESPACE, {'columns': ['nope']}),
+        (TransformationType.FILL_MISSING, {'columns': ['nope'], 'value': 0}),
+        (TransformationType.DROP_MISSING, {'columns': ['nope']}),
+    ])
+    def test_missing_columns_report_their_step(self, messy_df, step):
+        """Every step type is checked, and the failing step is reported"""
+        with patch.object(PipelinePlan, 'execute') as execute:
+            result = TransformationEngine().apply_pipeline(messy_df, [
+                (TransformationType.REMOVE_DUPLICATES, {}),
+                step,
+            ])
+
+        assert not result.success
+        assert result.failed_step == 1
+        assert 'nope' in result.error
+        execute.assert_not_called()
+
+    def test_failure_while_running_reports_its_step(self, messy_df):
+        """Errors inside a fused stage name the step that raised"""
+        with patch.object(
+            FillMissingTransformation, 'transform_column', side_effect=TypeError("bad fill")
+        ):
+            result = TransformationEngine().apply_pipeline(messy_df, [
+                (TransformationType.TRIM_WHITESPACE, {'columns': ['name']}),
+                (TransformationType.FILL_MISSING, {'columns': ['score'], 'method': 'ffill'}),
+            ])
+
+        assert not result.success
+        assert result.failed_step == 1
+        assert 'bad fill' in result.error
+
+    def test_excessive_data_loss_fails_at_filter(self):
+        """Drop-missing safety threshold still applies inside a plan"""
+        df = pd.DataFrame({'a': [1, np.nan, np.nan, np.nan], 'b': [' x', 'y', 'z', 'w']})
+
+        result = TransformationEngine().apply_pipeline(df, [
+            (TransformationType.TRIM_WHITESPACE, {'columns': ['b']}),
+            (TransformationType.DROP_MISSING, {'columns': ['a']}),
+        ])
+
+        assert not result.success
+        assert result.failed_step == 1
+        assert 'safety threshold' in result.error
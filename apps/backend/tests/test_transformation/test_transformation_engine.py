@@ -468,4 +468,65 @@ class TestEdgeCases:
         )
 
         # Should drop all rows since col2 is all NaN
-        assert not result.success  # Validation should catch this
\ No newline at end of file
+        assert not result.success  # Validation should catch this
+
+class TestPipelineHandoff:
+    """Test DataFrame handoff between pipeline steps"""
+
+    def test_apply_transformation_frame_returns_dataframe(self):
+        """Frame API returns the DataFrame without materializing records"""
+        df = pd.DataFrame({'id': [1, 1, 2], 'name': [' a', ' a', 'b ']})
+
+        engine = TransformationEngine()
+        transformed_df, result = engine.apply_transformation_frame(
+            df=df,
+            transformation_type=TransformationType.REMOVE_DUPLICATES,
+            parameters={'keep': 'first'}
+        )
+
+        assert result.success
+        assert result.transformed_data is None
+        assert isinstance(transformed_df, pd.DataFrame)
+        assert len(transformed_df) == 2
+        assert result.affected_rows == 1
+
+    def test_apply_pipeline_matches_record_roundtrip(self):
+        """Pipeline output matches chaining apply_transformation through records"""
+        df = pd.DataFrame({
+            'id': [1, 1, 2, 3],
+            'name': [' a', ' a', 'b ', None],
+            'score': [1.0, 1.0, np.nan, 3.0]
+        })
+        steps = [
+            (TransformationType.REMOVE_DUPLICATES, {'keep': 'first'}),
+            (TransformationType.TRIM_WHITESPACE, {'columns': ['name']}),
+            (TransformationType.FILL_MISSING, {'columns': ['score'], 'value': 0.0}),
+        ]
+
+        result = TransformationEngine().apply_pipeline(df, steps)
+
+        expected = df
+        engine = TransformationEngine()
+        for transformation_type, parameters in steps:
+            step_result = engine.apply_transformation(expected, transformation_type, parameters)
+            expected = pd.DataFrame(step_result.transformed_data)
+
+        assert result.success
+        assert result.affected_rows == 1
+        assert result.to_records() == expected.to_dict('records')
+        assert result.to_records(offset=1, limit=1) == expected.iloc[1:2].to_dict('records')
+
+    def test_apply_pipeline_reports_failed_step(self):
+        """Pipeline stops at the first failing step"""
+        df = pd.DataFrame({'col1': [1, 2, 3], 'col2': [np.nan, np.nan, np.nan]})
+        steps = [
+            (TransformationType.REMOVE_DUPLICATES, {'keep': 'first'}),
+            (TransformationType.DROP_MISSING, {'columns': ['col2'], 'how': 'any'}),
+        ]
+
+        result = TransformationEngine().apply_pipeline(df, steps)
+
+        assert not result.success
+        assert result.failed_step == 1
+        assert result.dataframe is None
+        assert result.to_records() == []
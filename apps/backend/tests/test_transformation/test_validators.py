@@ -0,0 +1,147 @@
+"""
+Tests for single-pass transformation chain validation
+"""
+from unittest.mock import patch
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.services.transformation_service.transformation_engine import TransformationEngine
+from app.services.transformation_service.validators import (
+    TransformationValidator,
+    ValidationPlanner,
+)
+
+
+@pytest.fixture
+def messy_df():
+    """Dataset with duplicates, padded strings and gaps"""
+    rng = np.random.default_rng(7)
+    n = 300
+    df = pd.DataFrame({
+        'name': rng.choice(['alice', ' bob', 'carol ', 'dave'], n).astype(object),
+        'city': rng.choice(['nyc', 'la ', None], n).astype(object),
+        'age': rng.choice([20.0, 30.0, np.nan], n),
+        'score': rng.integers(0, 3, n).astype(float),
+    })
+    df.loc[rng.choice(n, 40, replace=False), 'score'] = np.nan
+    return df
+
+
+def apply_eagerly(df, steps):
+    """Reference data: apply each step in order"""
+    engine = TransformationEngine()
+    for step in steps:
+        df, result = engine.apply_transformation_frame(df, step['type'], step['parameters'])
+        assert result.success, result.error
+    return df
+
+
+def expected_results(df, steps):
+    """Reference results: validate each step against the eagerly transformed data"""
+    results = []
+    for step in steps:
+        results.append(TransformationValidator.validate_transformation_chain(df, [step]))
+        df = apply_eagerly(df, [step])
+    return results
+
+
+CHAINS = [
+    [
+        {'type': 'trim_whitespace', 'parameters': {}},
+        {'type': 'remove_duplicates', 'parameters': {}},
+        {'type': 'fill_missing', 'parameters': {'columns': ['age'], 'method': 'mean'}},
+        {'type': 'remove_duplicates', 'parameters': {'subset': ['name', 'age']}},
+    ],
+    [
+        {'type': 'fill_missing', 'parameters': {'columns': ['score'], 'method': 'ffill'}},
+        {'type': 'remove_duplicates', 'parameters': {'subset': ['name', 'score']}},
+        {'type': 'fill_missing', 'parameters': {'columns': ['city'], 'value': ' la '}},
+        {'type': 'trim_whitespace', 'parameters': {'columns': ['city', 'age']}},
+        {'type': 'remove_duplicates', 'parameters': {'subset': ['city', 'age'], 'keep': 'last'}},
+        {'type': 'fill_missing', 'parameters': {'method': 'median'}},
+    ],
+    [
+        {'type': 'remove_duplicates', 'parameters': {'subset': ['name']}},
+        {'type': 'fill_missing', 'parameters': {'columns': ['city', 'score'], 'method': 'bfill'}},
+        {'type': 'fill_missing', 'parameters': {'method': 'mode'}},
+        {'type': 'trim_whitespace', 'parameters': {}},
+        {'type': 'remove_duplicates', 'parameters': {}},
+    ],
+]
+
+
+class TestChainPrediction:
+    @pytest.mark.parametrize('steps', CHAINS)
+    def test_matches_validating_transformed_data(self, messy_df, steps):
+        results = ValidationPlanner(messy_df).validate(steps)
+
+        for result, expected in zip(results, expected_results(messy_df, steps)):
+            assert result.errors == expected.errors
+            assert result.warnings == expected.warnings
+            assert result.info == expected.info
+
+    def test_duplicate_rows_keep_original_labels(self, messy_df):
+        result = TransformationValidator.validate_remove_duplicates(messy_df, {'subset': ['name']})
+
+        assert result.info == ["Found 296 duplicate rows"]
+        assert result.affected_rows == messy_df.index[messy_df.duplicated(subset=['name'])].tolist()[:10]
+
+    def test_chain_merges_step_results(self, messy_df):
+        steps = CHAINS[0] + [{'type': 'fill_missing', 'parameters': {'columns': ['missing']}}]
+
+        result = TransformationValidator.validate_transformation_chain(messy_df, steps)
+
+        assert result.is_valid is False
+        assert result.errors == ["Columns not found: ['missing']"]
+        assert "No whitespace found in string columns" not in result.warnings
+
+
+class TestSinglePass:
+    def test_ten_steps_scan_once(self, messy_df):
+        steps = (CHAINS[0] + CHAINS[1])[:10]
+        planner = ValidationPlanner(messy_df)
+
+        with patch.object(
+            pd.DataFrame, 'duplicated', autospec=True, side_effect=pd.DataFrame.duplicated
+        ) as duplicated:
+            planner.validate(steps)
+
+        assert planner.scans == 1
+        # Duplicates are found among row hashes, never in the data itself
+        assert duplicated.call_count == 4
+        for call in duplicated.call_args_list:
+            assert set(call.args[0].dtypes) == {np.dtype('uint64')}
+
+    def test_string_scan_is_shared(self, messy_df):
+        steps = [
+            {'type': 'trim_whitespace', 'parameters': {'columns': ['name']}},
+            {'type': 'trim_whitespace', 'parameters': {'columns': ['name']}},
+        ]
+
+        with patch.object(pd.Series, 'astype', autospec=True, side_effect=pd.Series.astype) as astype:
+            results = ValidationPlanner(messy_df).validate(steps)
+
+        assert sum(1 for call in astype.call_args_list if call.args[1] is str) == 1
+        assert results[1].warnings == ["No whitespace found in string columns"]
+
+
+class TestSuggestions:
+    def test_suggestions(self, messy_df):
+        messy_df['amount'] = messy_df['score'].fillna(0).astype(int).astype(str).astype(object)
+
+        suggestions = TransformationValidator.suggest_transformations(messy_df)
+
+        assert suggestions == [
+            "Consider removing duplicate rows",
+            "Handle missing values in columns: ['city', 'age', 'score']",
+            "Trim whitespace in column 'name'",
+            "Consider converting 'amount' to numeric",
+        ]
+
+    def test_chain_includes_suggestions_for_original_data(self, messy_df):
+        result = TransformationValidator.validate_transformation_chain(
+            messy_df, CHAINS[0], suggest=True
+        )
+
+        assert result.suggestions == TransformationValidator.suggest_transformations(messy_df)
@@ -1,9 +1,10 @@
 import pytest
 import boto3
 import os
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import ANY, Mock, patch, MagicMock
 from botocore.exceptions import ClientError, NoCredentialsError
 import io
+from app.services.object_storage import ObjectStorage
 from app.utils.s3 import get_s3_client, upload_file_to_s3, get_file_from_s3
 
 
@@ -32,17 +33,21 @@ def mock_s3_client():
 
 
 def test_get_s3_client_success(mock_env_vars):
-    """Test successful S3 client creation."""
-    with patch("boto3.client") as mock_boto3_client:
+    """Test the shared S3 client is created once, with a connection pool."""
+    with patch("app.utils.s3.get_object_storage", return_value=ObjectStorage()), \
+            patch("boto3.client") as mock_boto3_client:
         mock_boto3_client.return_value = Mock()
         client = get_s3_client()
 
         assert client is not None
+        assert get_s3_client() is client
         mock_boto3_client.assert_called_once_with(
             "s3",
             aws_access_key_id="test_access_key",
             aws_secret_access_key="test_secret_key",
             region_name="us-east-1",
+            endpoint_url=None,
+            config=ANY,
         )
 
 
@@ -64,7 +69,8 @@ def test_get_s3_client_boto3_error():
             "AWS_REGION": "us-east-1",
         },
     ):
-        with patch("boto3.client", side_effect=Exception("Boto3 error")):
+        with patch("app.utils.s3.get_object_storage", return_value=ObjectStorage()), \
+                patch("boto3.client", side_effect=Exception("Boto3 error")):
             client = get_s3_client()
             assert client is None
 
@@ -140,7 +146,7 @@ def test_get_file_from_s3_success(mock_env_vars, mock_s3_client):
         expected_content = b"test file content"
 
         # Mock the download_fileobj to write content to the BytesIO object
-        def mock_download_fileobj(bucket, key, file_obj):
+        def mock_download_fileobj(bucket, key, file_obj, Config=None):
             file_obj.write(expected_content)
             file_obj.seek(0)
 
@@ -151,7 +157,7 @@ def test_get_file_from_s3_success(mock_env_vars, mock_s3_client):
         assert isinstance(result, io.BytesIO)
         assert result.getvalue() == expected_content
         mock_s3_client.download_fileobj.assert_called_once_with(
-            "test_bucket", "test_file.txt", result
+            "test_bucket", "test_file.txt", result, Config=ANY
         )
 
 
@@ -3,11 +3,46 @@ import os
 import tempfile
 import logging
 import re
+import threading
 from urllib.parse import urlparse, unquote
 from typing import Optional
 
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
 logger = logging.getLogger(__name__)
 
+# Large files download in parallel ranged parts
+S3_MULTIPART_CHUNK_SIZE = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "10"))
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_CHUNK_SIZE,
+    multipart_chunksize=S3_MULTIPART_CHUNK_SIZE,
+    max_concurrency=S3_MAX_CONCURRENCY,
+)
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """Get the shared S3 client, creating it with a connection pool on first use"""
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client(
+                    "s3",
+                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                    region_name=os.getenv("AWS_REGION", "us-east-1"),
+                    endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+                    config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS),
+                )
+    return _s3_client
+
 
 def download_file_from_s3(s3_url: str) -> str:
     """
@@ -36,21 +71,13 @@ def download_file_from_s3(s3_url: str) -> str:
 
         logger.info(f"Downloading file from S3: {bucket_name}/{object_key}")
 
-        # Initialize S3 client
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION", "us-east-1"),
-        )
-
         # Create a temporary file and close it immediately
         temp_file = tempfile.NamedTemporaryFile(delete=False)
         temp_file_path = temp_file.name
         temp_file.close()  # Close the file handle immediately
 
         # Download the file
-        s3_client.download_file(bucket_name, object_key, temp_file_path)
+        get_s3_client().download_file(bucket_name, object_key, temp_file_path, Config=TRANSFER_CONFIG)
 
         logger.info(f"File downloaded successfully to {temp_file_path}")
         return temp_file_path